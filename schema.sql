@@ -1,3 +1,6 @@
+-- Schema at the latest migration (src/migrations). After creating a database with
+-- this file, mark it as migrated with `alembic stamp head` from the src directory.
+
 CREATE TABLE public.usuarios (
 	id bigserial NOT NULL PRIMARY KEY,
 	primeiro_nome varchar(100) NOT NULL,
@@ -23,18 +26,33 @@ CREATE TABLE public.empresas (
 );
 
 
+CREATE TABLE public.produtos_canonicos (
+	id bigserial PRIMARY key,
+	codigo varchar NULL,
+	chave text NOT NULL,
+	descricao text NULL,
+	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+
+CREATE UNIQUE INDEX ux_produtos_canonicos_codigo ON public.produtos_canonicos (codigo) WHERE codigo IS NOT NULL;
+CREATE UNIQUE INDEX ux_produtos_canonicos_chave ON public.produtos_canonicos (chave) WHERE codigo IS NULL;
+
+
 CREATE TABLE public.produtos (
 	id bigserial PRIMARY key,
 	codigo varchar NOT NULL,
 	descricao text NOT NULL,
-	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+	id_produto_canonico bigint NULL REFERENCES produtos_canonicos(id) ON DELETE SET NULL,
+	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	CONSTRAINT produtos_codigo_descricao_unique UNIQUE (codigo, descricao)
 );
 
 
 CREATE TABLE public.notas_fiscais (
 	id bigserial NOT NULL PRIMARY key,
-	id_empresa bigserial REFERENCES empresas(id) ON DELETE SET NULL ON UPDATE CASCADE,
-	id_usuario bigserial REFERENCES usuarios(id) ON DELETE SET NULL ON UPDATE CASCADE,
+	id_empresa bigint NULL REFERENCES empresas(id) ON DELETE SET NULL ON UPDATE CASCADE,
+	id_usuario bigint NULL REFERENCES usuarios(id) ON DELETE SET NULL ON UPDATE CASCADE,
 	chave_acesso varchar(50) NOT NULL,
 	numero varchar NOT NULL, 
 	serie varchar NOT NULL,
@@ -45,16 +63,94 @@ CREATE TABLE public.notas_fiscais (
 	tributacao_estadual decimal NOT NULL DEFAULT 0.0,
 	tributacao_municipal decimal NOT NULL DEFAULT 0.0,
 	fonte varchar DEFAULT NULL,
-	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	CONSTRAINT notas_fiscais_chave_acesso_unique UNIQUE (chave_acesso)
 );
 
 
 CREATE TABLE public.itens_nota (
 	id bigserial NOT NULL PRIMARY KEY,
-	id_produto bigserial REFERENCES produtos(id) ON DELETE SET NULL ON UPDATE CASCADE,
-	id_nota_fiscal bigserial REFERENCES notas_fiscais(id) ON DELETE SET NULL ON UPDATE CASCADE,
+	id_produto bigint NULL REFERENCES produtos(id) ON DELETE SET NULL ON UPDATE CASCADE,
+	id_nota_fiscal bigint NULL REFERENCES notas_fiscais(id) ON DELETE SET NULL ON UPDATE CASCADE,
 	quantidade decimal NULL DEFAULT 0,
 	preco_unitario decimal NOT NULL DEFAULT 0.0,
 	unidade_medida varchar DEFAULT NULL,
-	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	CONSTRAINT itens_nota_nota_produto_unique UNIQUE (id_nota_fiscal, id_produto)
+);
+
+
+CREATE INDEX ix_notas_fiscais_id_empresa ON public.notas_fiscais (id_empresa);
+CREATE INDEX ix_notas_fiscais_id_usuario ON public.notas_fiscais (id_usuario);
+CREATE INDEX ix_produtos_id_produto_canonico ON public.produtos (id_produto_canonico);
+CREATE INDEX ix_itens_nota_id_produto ON public.itens_nota (id_produto);
+
+
+CREATE TABLE public.tarefas (
+	id bigserial NOT NULL PRIMARY KEY,
+	id_chat bigint NULL,
+	origem text NULL,
+	situacao varchar NOT NULL DEFAULT 'pending',
+	tentativas integer NOT NULL DEFAULT 0,
+	max_tentativas integer NOT NULL DEFAULT 3,
+	ultimo_erro text NULL,
+	id_nota_fiscal bigint NULL REFERENCES notas_fiscais(id) ON DELETE SET NULL,
+	executar_em timestamp NOT NULL,
+	bloqueada_em timestamp NULL,
+	data_criacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+	data_atualizacao timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+
+CREATE INDEX ix_tarefas_id_chat ON public.tarefas (id_chat);
+CREATE INDEX ix_tarefas_pendentes ON public.tarefas (executar_em) WHERE situacao = 'pending';
+
+
+CREATE MATERIALIZED VIEW public.precos_diarios AS
+SELECT
+	i.id_produto,
+	p.id_produto_canonico,
+	n.id_empresa,
+	n.data_emissao::date AS dia,
+	min(i.preco_unitario)::float AS preco_minimo,
+	max(i.preco_unitario)::float AS preco_maximo,
+	(sum(i.preco_unitario * i.quantidade) / nullif(sum(i.quantidade), 0))::float AS preco_medio,
+	sum(i.quantidade)::float AS quantidade,
+	count(*) AS ocorrencias
+FROM public.itens_nota i
+JOIN public.notas_fiscais n ON n.id = i.id_nota_fiscal
+JOIN public.produtos p ON p.id = i.id_produto
+WHERE i.id_produto IS NOT NULL AND n.id_empresa IS NOT NULL AND n.data_emissao IS NOT NULL
+GROUP BY i.id_produto, p.id_produto_canonico, n.id_empresa, n.data_emissao::date;
+
+
+CREATE UNIQUE INDEX ux_precos_diarios ON public.precos_diarios (id_produto, id_empresa, dia);
+CREATE INDEX ix_precos_diarios_empresa ON public.precos_diarios (id_empresa, id_produto, dia);
+CREATE INDEX ix_precos_diarios_canonico ON public.precos_diarios (id_produto_canonico, dia);
+
+
+CREATE MATERIALIZED VIEW public.gastos_mensais AS
+SELECT
+	n.id_usuario,
+	date_trunc('month', n.data_emissao)::date AS mes,
+	sum(i.preco_unitario * i.quantidade)::float AS total,
+	count(DISTINCT n.id) AS notas,
+	count(*) AS itens
+FROM public.notas_fiscais n
+JOIN public.itens_nota i ON i.id_nota_fiscal = n.id
+WHERE n.id_usuario IS NOT NULL AND n.data_emissao IS NOT NULL
+GROUP BY n.id_usuario, date_trunc('month', n.data_emissao)::date;
+
+
+CREATE UNIQUE INDEX ux_gastos_mensais ON public.gastos_mensais (id_usuario, mes);
+
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+CREATE OR REPLACE FUNCTION public.normalizar_busca(texto text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$;
+
+CREATE INDEX ix_produtos_busca_texto ON public.produtos USING gin (to_tsvector('portuguese'::regconfig, public.normalizar_busca(descricao)));
+CREATE INDEX ix_produtos_busca_trigramas ON public.produtos USING gin (public.normalizar_busca(descricao) gin_trgm_ops);
@@ -0,0 +1,14 @@
+from .clustering import CanonicalProduct, Cluster, ProductRecord, UnionFind, cluster
+from .normalize import description_key, description_tokens, normalize_gtin, size_tokens
+
+__all__ = [
+    "CanonicalProduct",
+    "Cluster",
+    "ProductRecord",
+    "UnionFind",
+    "cluster",
+    "description_key",
+    "description_tokens",
+    "normalize_gtin",
+    "size_tokens",
+]
@@ -0,0 +1,209 @@
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from .normalize import description_key, description_tokens, normalize_gtin, size_tokens
+
+__all__ = ["CanonicalProduct", "Cluster", "ProductRecord", "UnionFind", "cluster"]
+
+
+@dataclass(frozen=True)
+class ProductRecord:
+    id: int
+    code: str
+    description: str
+
+
+@dataclass
+class Cluster:
+    """Products found to be the same, whatever their code or description."""
+
+    ids: list[int]
+    gtin: str | None = None
+    description: str = ""
+
+    @property
+    def key(self) -> str:
+        return description_key(self.description)
+
+
+@dataclass(frozen=True)
+class CanonicalProduct:
+    """Values identifying a canonical product when new products are ingested."""
+
+    gtin: str | None
+    key: str
+    description: str
+
+    @classmethod
+    def of(cls, code: str, description: str) -> "CanonicalProduct":
+        return cls(normalize_gtin(code), description_key(description), description)
+
+
+class UnionFind:
+    """Disjoint sets of products, which are never merged when they have different GTINs."""
+
+    def __init__(self, gtins: list[str | None]):
+        self.parent = list(range(len(gtins)))
+        self.size = [1] * len(gtins)
+        self.gtin = list(gtins)
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            # Path halving keeps the trees flat without recursion
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+
+        return i
+
+    def union(self, i: int, j: int) -> bool:
+        """Merge the sets of `i` and `j`, unless they have different GTINs.
+
+        Returns:
+            bool: whether `i` and `j` are in the same set
+        """
+        i, j = self.find(i), self.find(j)
+
+        if i == j:
+            return True
+        if self.gtin[i] and self.gtin[j] and self.gtin[i] != self.gtin[j]:
+            return False
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+        self.gtin[i] = self.gtin[i] or self.gtin[j]
+
+        return True
+
+    def sets(self) -> list[list[int]]:
+        sets = defaultdict(list)
+
+        for i in range(len(self.parent)):
+            sets[self.find(i)].append(i)
+
+        return list(sets.values())
+
+
+@dataclass
+class _Normalized:
+    gtin: str | None
+    tokens: frozenset[str]
+    sizes: frozenset[str] = field(init=False)
+
+    def __post_init__(self):
+        self.sizes = size_tokens(self.tokens)
+
+
+def cluster(
+    products: Iterable[ProductRecord],
+    threshold: float = 0.8,
+    max_block: int = 1000,
+) -> list[Cluster]:
+    """Group the products that are the same, by GTIN and by similar descriptions.
+
+    Products with the same GTIN, or with descriptions having the same words, are
+    merged. Descriptions are also merged when the Jaccard similarity of their words
+    reaches `threshold` and they have the same sizes. Only the pairs sharing one of
+    their rarest words are compared (prefix filtering), which finds every pair above
+    the threshold without comparing every product with every other one. Products
+    with different GTINs are never merged.
+
+    Args:
+        products (Iterable[ProductRecord]): products to group
+        threshold (float, optional): minimum similarity of the descriptions. Defaults to 0.8.
+        max_block (int, optional): words shared by more products are not used to find
+            pairs, as they are common enough to tell nothing. Defaults to 1000.
+
+    Returns:
+        list[Cluster]: every product in a single cluster, the clusters ordered by their
+            first id
+    """
+    products = sorted(products, key=lambda product: product.id)
+    normalized = [
+        _Normalized(
+            normalize_gtin(product.code),
+            frozenset(description_tokens(product.description)),
+        )
+        for product in products
+    ]
+    sets = UnionFind([product.gtin for product in normalized])
+
+    for block in (_block_by_gtin(normalized), _block_by_words(normalized)):
+        for members in block.values():
+            for other in members[1:]:
+                sets.union(members[0], other)
+
+    for i, j in _similar_pairs(normalized, threshold, max_block):
+        sets.union(i, j)
+
+    clusters = []
+
+    for members in sorted(sets.sets()):
+        first = products[members[0]]
+        gtins = [normalized[i].gtin for i in members if normalized[i].gtin]
+        clusters.append(
+            Cluster(
+                ids=[products[i].id for i in members],
+                gtin=Counter(gtins).most_common(1)[0][0] if gtins else None,
+                description=first.description,
+            )
+        )
+
+    return clusters
+
+
+def _block_by_gtin(normalized: list[_Normalized]) -> dict[str, list[int]]:
+    blocks = defaultdict(list)
+
+    for i, product in enumerate(normalized):
+        if product.gtin:
+            blocks[product.gtin].append(i)
+
+    return blocks
+
+
+def _block_by_words(normalized: list[_Normalized]) -> dict[frozenset, list[int]]:
+    blocks = defaultdict(list)
+
+    for i, product in enumerate(normalized):
+        if product.tokens:
+            blocks[product.tokens].append(i)
+
+    return blocks
+
+
+def _similar_pairs(
+    normalized: list[_Normalized], threshold: float, max_block: int
+) -> Iterable[tuple[int, int]]:
+    frequency = Counter(token for product in normalized for token in product.tokens)
+    index: dict[str, list[int]] = defaultdict(list)
+
+    for i, product in enumerate(normalized):
+        if not product.tokens:
+            continue
+
+        # Two sets with a similarity of at least `threshold` share at least one of
+        # the first words of each, when the words are ordered the same way
+        words = sorted(product.tokens, key=lambda token: (frequency[token], token))
+        prefix = words[: len(words) - math.ceil(threshold * len(words)) + 1]
+        candidates = set()
+
+        for word in prefix:
+            if len(index[word]) < max_block:
+                candidates.update(index[word])
+            index[word].append(i)
+
+        for j in candidates:
+            other = normalized[j]
+
+            if product.sizes == other.sizes and (
+                _jaccard(product.tokens, other.tokens) >= threshold
+            ):
+                yield j, i
+
+
+def _jaccard(a: frozenset, b: frozenset) -> float:
+    return len(a & b) / len(a | b)
@@ -0,0 +1,119 @@
+import re
+import unicodedata
+
+__all__ = [
+    "description_key",
+    "description_tokens",
+    "normalize_gtin",
+    "size_tokens",
+]
+
+# Abbreviations the stores use for the same words, in lowercase without accents
+ABBREVIATIONS = {
+    "bisc": "biscoito",
+    "choc": "chocolate",
+    "cx": "caixa",
+    "desn": "desnatado",
+    "detg": "detergente",
+    "frgo": "frango",
+    "int": "integral",
+    "integ": "integral",
+    "mus": "mussarela",
+    "mussar": "mussarela",
+    "pct": "pacote",
+    "qjo": "queijo",
+    "refri": "refrigerante",
+    "refrig": "refrigerante",
+    "semidesn": "semidesnatado",
+    "trad": "tradicional",
+}
+
+STOP_WORDS = frozenset({"c", "com", "da", "de", "do", "e", "em", "p", "para", "s"})
+
+# Sizes are written "1L", "1 L", "1000ML" or "1,5KG", they are all converted to a
+# single token of the quantity in the largest unit
+SIZE_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)\s*(ml|l|lt|kg|gr|g)\b")
+SIZE_UNITS = {"ml": ("l", 1000), "l": ("l", 1), "lt": ("l", 1)}
+SIZE_UNITS.update({"g": ("kg", 1000), "gr": ("kg", 1000), "kg": ("kg", 1)})
+SIZE_TOKEN_PATTERN = re.compile(r"^\d+(?:\.\d+)?(?:l|kg)$")
+
+WORD_PATTERN = re.compile(r"[a-z0-9.]+")
+
+
+def description_tokens(description: str) -> list[str]:
+    """Words of a description, lowercase, without accents, abbreviations nor stop words.
+
+    Args:
+        description (str): description of a product, as printed on the invoice
+
+    Returns:
+        list[str]: the words, in the order of the description
+    """
+    text = _strip_accents(description or "").lower()
+    text = SIZE_PATTERN.sub(_size, text)
+    tokens = []
+
+    for word in WORD_PATTERN.findall(text):
+        word = word.strip(".")
+
+        if SIZE_TOKEN_PATTERN.match(word):
+            tokens.append(word)
+            continue
+
+        for part in word.split("."):
+            part = ABBREVIATIONS.get(part, part)
+
+            if part and part not in STOP_WORDS:
+                tokens.append(part)
+
+    return tokens
+
+
+def description_key(description: str) -> str:
+    """Key shared by the descriptions with the same words, in any order.
+
+    "LEITE UHT INTEGRAL 1L" and "LEITE INT. UHT 1000ML" have the same key.
+    """
+    return " ".join(sorted(set(description_tokens(description))))
+
+
+def size_tokens(tokens: list[str] | set[str]) -> frozenset[str]:
+    """Sizes among the tokens, products of different sizes are never the same."""
+    return frozenset(token for token in tokens if SIZE_TOKEN_PATTERN.match(token))
+
+
+def normalize_gtin(code: str) -> str | None:
+    """The GTIN (EAN, UPC) of a code, as 14 digits, or None when the code is not a
+    valid GTIN, as the internal codes of the stores.
+
+    Args:
+        code (str): code of a product, possibly padded with zeros
+
+    Returns:
+        str | None: the GTIN with 14 digits
+    """
+    digits = (code or "").strip().lstrip("0")
+
+    if not digits.isdigit() or len(digits) < 8 or len(digits) > 14:
+        return None
+
+    gtin = digits.zfill(14)
+    # The check digit makes the weighted sum of the digits a multiple of ten
+    total = sum(int(digit) * (3 if i % 2 == 0 else 1) for i, digit in enumerate(gtin))
+
+    return gtin if total % 10 == 0 else None
+
+
+def _strip_accents(text: str) -> str:
+    return "".join(
+        character
+        for character in unicodedata.normalize("NFKD", text)
+        if not unicodedata.combining(character)
+    )
+
+
+def _size(match: re.Match) -> str:
+    quantity = float(match.group(1).replace(",", "."))
+    unit, divisor = SIZE_UNITS[match.group(2)]
+
+    return f" {quantity / divisor:g}{unit} "
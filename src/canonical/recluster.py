@@ -0,0 +1,61 @@
+import argparse
+import logging
+import sys
+import time
+
+__all__ = ["main"]
+
+logger = logging.getLogger(__name__)
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m canonical.recluster",
+        description="Cluster every product again and update their canonical products.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.8,
+        help="Minimum similarity of the words of two descriptions to merge them.",
+    )
+    parser.add_argument(
+        "--max-block",
+        type=int,
+        default=1000,
+        help="Words shared by more products are not used to compare descriptions.",
+    )
+    args = parser.parse_args(argv)
+
+    if not 0 < args.threshold <= 1:
+        parser.error("the threshold must be greater than 0 and at most 1")
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    from repositories import AnalyticsRepository, CanonicalProductRepository
+    from settings.database import SessionLocal
+
+    started_at = time.perf_counter()
+
+    with SessionLocal() as session:
+        report = CanonicalProductRepository(session).recluster(
+            args.threshold, args.max_block
+        )
+        AnalyticsRepository(session).refresh()
+
+    logger.info(
+        "Clustered %d products into %d canonical products in %.1fs: "
+        "%d created, %d deleted, %d products remapped",
+        report.products,
+        report.clusters,
+        time.perf_counter() - started_at,
+        report.created,
+        report.deleted,
+        report.remapped,
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,42 +1,100 @@
 from datetime import datetime, UTC
 
-from sqlalchemy import Column, DateTime, Integer, String, Text, Float, ForeignKey
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    Text,
+    Float,
+    ForeignKey,
+    Index,
+    UniqueConstraint,
+    text,
+)
 from sqlalchemy.orm import relationship, declarative_base
 
-
 __all__ = [
     "Schema",
     "UserSchema",
     "ProductSchema",
+    "CanonicalProductSchema",
     "CompanySchema",
     "InvoiceSchema",
     "ItemSchema",
+    "JobSchema",
 ]
 
 Schema = declarative_base()
 
 
+def _now() -> datetime:
+    # Called on each insert, the creation time tells apart the rows to export. The
+    # columns have no time zone, asyncpg refuses aware datetimes for them
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
 class UserSchema(Schema):
     __tablename__ = "usuarios"
     id = Column(Integer, primary_key=True, autoincrement=True)
     first_name = Column(Text, name="primeiro_nome")
     last_name = Column(Text, name="ultimo_nome")
     username = Column(Text, name="nome_usuario", unique=True)
-    created_on = Column(DateTime, name="data_criacao", default=datetime.now(UTC))
+    created_on = Column(DateTime, name="data_criacao", default=_now)
 
 
 class ProductSchema(Schema):
     __tablename__ = "produtos"
+    __table_args__ = (
+        UniqueConstraint(
+            "codigo", "descricao", name="produtos_codigo_descricao_unique"
+        ),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    code = Column(String, name="codigo")
+    description = Column(Text, name="descricao")
+    canonical_id = Column(
+        Integer,
+        ForeignKey("produtos_canonicos.id", ondelete="SET NULL"),
+        name="id_produto_canonico",
+        index=True,
+    )
+    created_on = Column(DateTime, name="data_criacao", default=_now)
+    canonical = relationship("CanonicalProductSchema", backref="produtos", lazy=True)
+
+
+class CanonicalProductSchema(Schema):
+    __tablename__ = "produtos_canonicos"
+    __table_args__ = (
+        # A product is identified by its GTIN, or by the words of its description
+        # when it has none
+        Index(
+            "ux_produtos_canonicos_codigo",
+            "codigo",
+            unique=True,
+            postgresql_where=text("codigo IS NOT NULL"),
+            sqlite_where=text("codigo IS NOT NULL"),
+        ),
+        Index(
+            "ux_produtos_canonicos_chave",
+            "chave",
+            unique=True,
+            postgresql_where=text("codigo IS NULL"),
+            sqlite_where=text("codigo IS NULL"),
+        ),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     code = Column(String, name="codigo")
+    key = Column(Text, name="chave", nullable=False)
     description = Column(Text, name="descricao")
-    created_on = Column(DateTime, name="data_criacao", default=datetime.now(UTC))
+    created_on = Column(DateTime, name="data_criacao", default=_now)
 
 
 class CompanySchema(Schema):
     __tablename__ = "empresas"
     id = Column(Integer, primary_key=True, autoincrement=True)
-    cnpj = Column(String, name="cnpj")
+    cnpj = Column(String, name="cnpj", unique=True)
     name = Column(Text, name="razao_social")
     street = Column(Text, name="logradouro")
     number = Column(String, name="numero")
@@ -45,14 +103,19 @@ class CompanySchema(Schema):
     state = Column(String, name="uf")
     complement = Column(Text, name="complemento")
     zip_code = Column(String, name="cep")
-    created_on = Column(DateTime, name="data_criacao", default=datetime.now(UTC))
+    created_on = Column(DateTime, name="data_criacao", default=_now)
 
 
 class InvoiceSchema(Schema):
     __tablename__ = "notas_fiscais"
+    __table_args__ = (
+        UniqueConstraint("chave_acesso", name="notas_fiscais_chave_acesso_unique"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
-    company_id = Column(Integer, ForeignKey("empresas.id"), name="id_empresa")
-    user_id = Column(Integer, ForeignKey("usuarios.id"), name="id_usuario")
+    company_id = Column(
+        Integer, ForeignKey("empresas.id"), name="id_empresa", index=True
+    )
+    user_id = Column(Integer, ForeignKey("usuarios.id"), name="id_usuario", index=True)
     access_key = Column(Text, name="chave_acesso")
     number = Column(Text, name="numero")
     series = Column(Text, name="serie")
@@ -63,7 +126,7 @@ class InvoiceSchema(Schema):
     state_tax = Column(Float, name="tributacao_estadual")
     city_tax = Column(Float, name="tributacao_municipal")
     source = Column(Text, name="fonte")
-    created_on = Column(DateTime, name="data_criacao", default=datetime.now(UTC))
+    created_on = Column(DateTime, name="data_criacao", default=_now)
     company = relationship("CompanySchema", backref="notas_fiscais", lazy=True)
     items = relationship("ItemSchema", backref="notas_fiscais", lazy=True)
     user = relationship("UserSchema", backref="notas_fiscais", lazy=True)
@@ -71,14 +134,49 @@ class InvoiceSchema(Schema):
 
 class ItemSchema(Schema):
     __tablename__ = "itens_nota"
+    __table_args__ = (
+        UniqueConstraint(
+            "id_nota_fiscal", "id_produto", name="itens_nota_nota_produto_unique"
+        ),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
-    product_id = Column(Integer, ForeignKey("produtos.id"), name="id_produto")
+    product_id = Column(
+        Integer, ForeignKey("produtos.id"), name="id_produto", index=True
+    )
     invoice_id = Column(Integer, ForeignKey("notas_fiscais.id"), name="id_nota_fiscal")
     quantity = Column(Float, name="quantidade")
     unit_price = Column(Float, name="preco_unitario")
     unity_of_measurement = Column(Text, name="unidade_medida")
-    created_on = Column(DateTime, name="data_criacao", default=datetime.now(UTC))
+    created_on = Column(DateTime, name="data_criacao", default=_now)
     product = relationship("ProductSchema", backref="notas_fiscais", lazy=True)
     invoice = relationship(
         "InvoiceSchema", backref="notas_fiscais", viewonly=True, lazy=True
     )
+
+
+class JobSchema(Schema):
+    __tablename__ = "tarefas"
+    __table_args__ = (
+        # Only the jobs waiting to run are looked up by the workers
+        Index(
+            "ix_tarefas_pendentes",
+            "executar_em",
+            postgresql_where=text("situacao = 'pending'"),
+        ),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    chat_id = Column(BigInteger, name="id_chat", index=True)
+    source = Column(Text, name="origem")
+    status = Column(String, name="situacao", nullable=False, default="pending")
+    attempts = Column(Integer, name="tentativas", nullable=False, default=0)
+    max_attempts = Column(Integer, name="max_tentativas", nullable=False, default=3)
+    last_error = Column(Text, name="ultimo_erro")
+    invoice_id = Column(
+        Integer,
+        ForeignKey("notas_fiscais.id", ondelete="SET NULL"),
+        name="id_nota_fiscal",
+    )
+    run_at = Column(DateTime, name="executar_em", nullable=False)
+    locked_at = Column(DateTime, name="bloqueada_em")
+    created_on = Column(DateTime, name="data_criacao", nullable=False)
+    updated_on = Column(DateTime, name="data_atualizacao", nullable=False)
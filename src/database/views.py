@@ -0,0 +1,33 @@
+from sqlalchemy import BigInteger, Column, Date, Float, Integer, MetaData, Table
+
+__all__ = ["Views", "daily_prices", "monthly_spending", "MATERIALIZED_VIEWS"]
+
+# Materialized views, created by the migrations. They are kept apart from the
+# tables of `Schema`, so that autogenerated migrations do not create them as tables.
+Views = MetaData()
+
+daily_prices = Table(
+    "precos_diarios",
+    Views,
+    Column("id_produto", Integer, key="product_id", primary_key=True),
+    Column("id_produto_canonico", Integer, key="canonical_id"),
+    Column("id_empresa", Integer, key="company_id", primary_key=True),
+    Column("dia", Date, key="day", primary_key=True),
+    Column("preco_minimo", Float, key="min_price"),
+    Column("preco_maximo", Float, key="max_price"),
+    Column("preco_medio", Float, key="average_price"),
+    Column("quantidade", Float, key="quantity"),
+    Column("ocorrencias", BigInteger, key="count"),
+)
+
+monthly_spending = Table(
+    "gastos_mensais",
+    Views,
+    Column("id_usuario", Integer, key="user_id", primary_key=True),
+    Column("mes", Date, key="month", primary_key=True),
+    Column("total", Float, key="total"),
+    Column("notas", BigInteger, key="invoice_count"),
+    Column("itens", BigInteger, key="item_count"),
+)
+
+MATERIALIZED_VIEWS = (daily_prices.name, monthly_spending.name)
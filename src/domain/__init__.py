@@ -1,5 +1,23 @@
-from .entities import Entity, User, Company, Product, Item, EletronicInvoice
-from .value_objects import Address, PaymentType, Taxes, Totals
+from .entities import (
+    Entity,
+    User,
+    Company,
+    Product,
+    Item,
+    EletronicInvoice,
+    Job,
+    normalize_product_code,
+)
+from .value_objects import (
+    Address,
+    DailyPrice,
+    JobStatus,
+    MonthlySpending,
+    PaymentType,
+    StorePrice,
+    Taxes,
+    Totals,
+)
 
 __all__ = [
     "Entity",
@@ -8,8 +26,14 @@ __all__ = [
     "Product",
     "Item",
     "EletronicInvoice",
+    "Job",
     "Address",
+    "DailyPrice",
+    "JobStatus",
+    "MonthlySpending",
     "PaymentType",
+    "StorePrice",
     "Taxes",
     "Totals",
+    "normalize_product_code",
 ]
@@ -1,3 +1,21 @@
-from .entities import Entity, User, Company, Product, Item, EletronicInvoice
+from .entities import (
+    Entity,
+    User,
+    Company,
+    Product,
+    Item,
+    EletronicInvoice,
+    Job,
+    normalize_product_code,
+)
 
-__all__ = ["Entity", "User", "Company", "Product", "Item", "EletronicInvoice"]
+__all__ = [
+    "Entity",
+    "User",
+    "Company",
+    "Product",
+    "Item",
+    "EletronicInvoice",
+    "Job",
+    "normalize_product_code",
+]
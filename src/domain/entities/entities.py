@@ -1,6 +1,23 @@
 from dataclasses import dataclass
 from datetime import datetime
-from ..value_objects import Address, Taxes, Totals
+from ..value_objects import Address, JobStatus, Taxes, Totals
+
+# Product codes are stored with the 15 digits of the scraped pages
+PRODUCT_CODE_LENGTH = 15
+
+
+def normalize_product_code(code: str | int) -> str:
+    """Product code as stored, zero padded to `PRODUCT_CODE_LENGTH` digits.
+
+    Leading zeros of numeric codes are dropped first, so "7891000100103" and
+    "0007891000100103" are the same code.
+    """
+    code = str(code).strip()
+
+    if code.isdigit():
+        code = code.lstrip("0")
+
+    return f"{code:0>{PRODUCT_CODE_LENGTH}}"
 
 
 @dataclass
@@ -54,10 +71,10 @@ class Product(Entity):
 
     @code.setter
     def code(self, value):
-        self.__code = f"{value:0>13}"
+        self.__code = normalize_product_code(value)
 
     def __str__(self):
-        return f"{self.code:0>13} {self.description}"
+        return f"{self.code} {self.description}"
 
     @property
     def __dict__(self):
@@ -136,3 +153,16 @@ class EletronicInvoice(Entity):
             "taxes": vars(self.taxes) if self.taxes else {},
             "created_on": self.created_on.strftime("%Y-%m-%d %H:%M:%S"),
         }
+
+
+@dataclass
+class Job(Entity):
+    chat_id: int = 0
+    source: str = ""
+    status: JobStatus = JobStatus.PENDING
+    attempts: int = 0
+    max_attempts: int = 3
+    last_error: str = None
+    invoice_id: int = None
+    run_at: datetime = None
+    created_on: datetime = None
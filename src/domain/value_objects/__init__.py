@@ -1,3 +1,21 @@
-from .value_objects import Address, PaymentType, Taxes, Totals
+from .value_objects import (
+    Address,
+    DailyPrice,
+    JobStatus,
+    MonthlySpending,
+    PaymentType,
+    StorePrice,
+    Taxes,
+    Totals,
+)
 
-__all__ = ["Address", "PaymentType", "Taxes", "Totals"]
+__all__ = [
+    "Address",
+    "DailyPrice",
+    "JobStatus",
+    "MonthlySpending",
+    "PaymentType",
+    "StorePrice",
+    "Taxes",
+    "Totals",
+]
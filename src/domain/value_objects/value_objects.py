@@ -1,7 +1,24 @@
 from dataclasses import dataclass
+from datetime import date
 from enum import Enum
 
-__all__ = ["Address", "PaymentType", "Taxes", "Totals"]
+__all__ = [
+    "Address",
+    "DailyPrice",
+    "JobStatus",
+    "MonthlySpending",
+    "PaymentType",
+    "StorePrice",
+    "Taxes",
+    "Totals",
+]
+
+
+class JobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    DEAD = "dead"
 
 
 class PaymentType(Enum):
@@ -55,3 +72,32 @@ class Taxes:
     @property
     def total(self) -> float:
         return self.federal + self.state + self.municipal
+
+
+@dataclass
+class DailyPrice:
+    day: date
+    min_price: float
+    max_price: float
+    average_price: float
+    quantity: float = 0.0
+    count: int = 0
+    product_id: int = None
+    product_description: str = None
+
+
+@dataclass
+class StorePrice:
+    company_id: int
+    company_name: str
+    day: date
+    average_price: float
+    min_price: float
+
+
+@dataclass
+class MonthlySpending:
+    month: date
+    total: float
+    invoices: int
+    items: int
@@ -0,0 +1,140 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Callable
+
+from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import AsyncSession
+from telebot.async_telebot import AsyncTeleBot
+from telebot.types import Message
+
+from domain import Job
+from drivers.bots.common import (
+    HELP_MESSAGE,
+    User,
+    parse_nfce_command,
+    start_message,
+    status_message,
+)
+from repositories.aio import AsyncJobRepository
+
+__all__ = ["create_bot"]
+
+logger = logging.getLogger(__name__)
+
+
+def create_bot(
+    token: str,
+    session_factory: Callable[[], AsyncSession],
+    max_attempts: int = 3,
+) -> AsyncTeleBot:
+    """Create the bot on asyncio, which answers many chats at once in a single process.
+
+    The handlers only enqueue the invoices, which are saved by the workers, so the
+    same bot serves both the polling and the webhook of the REST API.
+
+    Args:
+        token (str): Telegram bot token.
+        session_factory (Callable[[], AsyncSession]): Factory of asynchronous database sessions.
+        max_attempts (int, optional): Attempts to save each invoice. Defaults to 3.
+
+    Returns:
+        AsyncTeleBot: bot with the handlers of the commands
+    """
+    bot = AsyncTeleBot(token)
+
+    @bot.message_handler(commands=["comecar"])
+    @User.get_user
+    async def start_handler(message: Message, user: User = None):
+        logger.info("%s started using the bot", user)
+        await bot.reply_to(message, start_message(user), parse_mode="Markdown")
+
+    @bot.message_handler(commands=["ajuda"])
+    async def help_handler(message: Message):
+        await bot.reply_to(message, HELP_MESSAGE)
+
+    @bot.message_handler(commands=["nfce"])
+    @User.get_user
+    async def nfce_command(message: Message, user: User = None):
+        logger.info("User %s sent the command %s", user, message.text)
+
+        try:
+            sources = parse_nfce_command(message.text)
+        except ValueError as e:
+            await bot.send_message(message.chat.id, str(e), parse_mode="Markdown")
+            return
+
+        await enqueue_invoices(message.chat.id, sources)
+
+    @bot.message_handler(commands=["status"])
+    async def status_handler(message: Message):
+        async with session_factory() as session:
+            jobs = await AsyncJobRepository(session).find_latest(message.chat.id)
+
+        await bot.reply_to(message, status_message(jobs))
+
+    async def enqueue_invoices(chat_id: int, sources: list[str]) -> None:
+        jobs = [
+            Job(chat_id=chat_id, source=source, max_attempts=max_attempts)
+            for source in sources
+        ]
+
+        try:
+            async with session_factory() as session:
+                await AsyncJobRepository(session).save_all(jobs)
+        except Exception:
+            await bot.send_message(chat_id, "Deu erro ao receber as NFC-e.")
+            logger.error("Failed to enqueue %s", sources, exc_info=True)
+            return
+
+        await bot.send_message(
+            chat_id, f"Recebi {len(jobs)} NFC-e, aviso assim que os dados forem salvos."
+        )
+
+    return bot
+
+
+async def main(argv: list[str] = None) -> int:
+    from drivers.bots.worker import WorkerPool
+    from settings.database import AsyncSessionLocal
+
+    parser = argparse.ArgumentParser(prog="python -m drivers.bots.async_telegram")
+    parser.add_argument(
+        "--set-webhook",
+        action="store_true",
+        help="Register TELEGRAM_WEBHOOK_URL for the REST API and exit, instead of polling.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    load_dotenv()
+
+    bot = create_bot(
+        os.environ.get("TELEGRAM_BOT_TOKEN"),
+        AsyncSessionLocal,
+        max_attempts=int(os.environ.get("JOB_MAX_ATTEMPTS", 3)),
+    )
+
+    if args.set_webhook:
+        try:
+            await bot.set_webhook(
+                os.environ["TELEGRAM_WEBHOOK_URL"],
+                secret_token=os.environ.get("TELEGRAM_WEBHOOK_SECRET") or None,
+            )
+        finally:
+            await bot.close_session()
+
+        return 0
+
+    with WorkerPool(processes=int(os.environ.get("BOT_WORKERS", 2))):
+        # Updates are not delivered to polling while a webhook is set
+        await bot.remove_webhook()
+        await bot.infinity_polling()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
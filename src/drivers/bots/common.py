@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+from domain import Job, JobStatus
+
+__all__ = [
+    "User",
+    "JOB_STATUS",
+    "HELP_MESSAGE",
+    "start_message",
+    "status_message",
+    "parse_nfce_command",
+]
+
+JOB_STATUS = {
+    JobStatus.PENDING: "na fila",
+    JobStatus.RUNNING: "em andamento",
+    JobStatus.DONE: "salva",
+    JobStatus.DEAD: "falhou",
+}
+
+HELP_MESSAGE = (
+    "Para usar o bot, me envie a URL de uma NFC-e que eu salvo para você.\n\n"
+    + "Comandos disponíveis:\n"
+    + "  - /comecar - Exibe a mensagem inicial do bot.\n\n"
+    + "  - /ajuda - Exibe esta mensagem de ajuda.\n\n"
+    + "  - /nfce url <url> [<url> ...] - Salva as NFC-e com as URLs informadas.\n\n"
+    + "  - /nfce chave <chave> - Salva a NFC-e com a chave de acesso informada.\n\n"
+    + "  - /status - Exibe a situação das últimas NFC-e enviadas.\n\n"
+)
+
+
+@dataclass
+class User:
+    def __init__(self, id: int, first_name: str, last_name: str, username: str):
+        self.id = id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.username = username
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+    def __str__(self) -> str:
+        return self.full_name if self.full_name else f"@{self.username}"
+
+    @staticmethod
+    def get_user(func):
+        # Returns the result of `func` as is, so it also decorates coroutines
+        def wrapper(message):
+            user = User(
+                message.from_user.id,
+                message.from_user.first_name,
+                message.from_user.last_name,
+                message.from_user.username,
+            )
+            return func(message, user)
+
+        return wrapper
+
+
+def start_message(user: User) -> str:
+    return (
+        f"Oi, *{user}*.\n"
+        + "Eu sou o bot (não oficial) da NFC-e!\n"
+        + "Me envie a URL de uma NFC-e que eu salvo para você."
+    )
+
+
+def status_message(jobs: list[Job]) -> str:
+    if not jobs:
+        return "Você ainda não enviou nenhuma NFC-e."
+
+    lines = [f"- {job.source}: {JOB_STATUS[job.status]}" for job in jobs]
+    return "Últimas NFC-e enviadas:\n" + "\n".join(lines)
+
+
+def parse_nfce_command(text: str) -> list[str]:
+    """Read the URLs or the access key of a `/nfce` command.
+
+    Args:
+        text (str): text of the message
+
+    Raises:
+        ValueError: with the message to reply, if the command is invalid
+
+    Returns:
+        list[str]: URLs or access key of the invoices to save
+    """
+    commands = text.split()
+
+    if len(commands) < 3:
+        raise ValueError("Por favor, use o comando `/nfce url` seguido da <URL>.")
+
+    option, values = commands[1].lower(), commands[2:]
+
+    if option == "url":
+        return values
+    elif option == "chave":
+        return ["".join(values)]
+
+    raise ValueError("Opção inválida. Por favor, escolha entre *URL* ou *CHAVE*.")
@@ -1,89 +1,42 @@
 # TODO: Refactor to use the REST API instead of the database directly
-from dataclasses import dataclass
 import os
 from telebot import TeleBot, logger
 import logging
 from dotenv import load_dotenv
 
-from database.schema import PostgresDatabase
-from repositories import (
-    CompanyRepository,
-    InvoiceRepository,
-    ItemRepository,
-    ProductRepository,
+from domain import Job
+from drivers.bots.common import (
+    HELP_MESSAGE,
+    User,
+    parse_nfce_command,
+    start_message,
+    status_message,
 )
-from scrapers.database import save_invoice
-from scrapers.scrapers import NfceScraper
+from drivers.bots.worker import WorkerPool
+from repositories import JobRepository
+from settings.database import SessionLocal
 
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 
-database = PostgresDatabase(
-    database=os.getenv("POSTGRES_DB"),
-    username=os.getenv("POSTGRES_USER"),
-    password=os.getenv("POSTGRES_PASSWORD"),
-    host=os.getenv("POSTGRES_HOST"),
-)
-
 logger.setLevel(logging.INFO)
 
 bot = TeleBot(TELEGRAM_BOT_TOKEN)
 
-
-@dataclass
-class User:
-    def __init__(self, id: int, first_name: str, last_name: str, username: str):
-        self.id = id
-        self.first_name = first_name
-        self.last_name = last_name
-        self.username = username
-
-    @property
-    def full_name(self):
-        return f"{self.first_name} {self.last_name}".strip()
-
-    def __str__(self) -> str:
-        return self.full_name if self.full_name else f"@{self.username}"
-
-    @staticmethod
-    def get_user(func):
-        def wrapper(message):
-            user = User(
-                message.from_user.id,
-                message.from_user.first_name,
-                message.from_user.last_name,
-                message.from_user.username,
-            )
-            return func(message, user)
-
-        return wrapper
+MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", 3))
 
 
 @bot.message_handler(commands=["comecar"])
 @User.get_user
 def start_handler(message, user=None):
-    response_message = (
-        f"Oi, *{user}*.\n"
-        + "Eu sou o bot (não oficial) da NFC-e!\n"
-        + "Me envie a URL de uma NFC-e que eu salvo para você."
-    )
-
     logger.info("%s started using the bot", user)
-    bot.reply_to(message, response_message, parse_mode="Markdown")
+    bot.reply_to(message, start_message(user), parse_mode="Markdown")
 
 
 @bot.message_handler(commands=["ajuda"])
 def help_handler(message):
-    help_message = (
-        "Para usar o bot, me envie a URL de uma NFC-e que eu salvo para você.\n\n"
-        + "Comandos disponíveis:\n"
-        + "  - /comecar - Exibe a mensagem inicial do bot.\n\n"
-        + "  - /ajuda - Exibe esta mensagem de ajuda.\n\n"
-        + "  - /nfce url <url> - Salva a NFC-e com a URL informada.\n\n"
-        + "  - /nfce chave <chave> - Salva a NFC-e com a chave de acesso informada.\n\n"
-    )
-    bot.reply_to(message, help_message)
+    bot.reply_to(message, HELP_MESSAGE)
 
 
 @bot.message_handler(commands=["nfce"])
@@ -91,92 +44,45 @@ def help_handler(message):
 def nfce_command(message, user=None):
     logger.info("User %s sent the command %s", user, message.text)
 
-    commands = message.text.split(" ")
-
-    if len(commands) == 3:
-        option = commands[1]
-        value = commands[2]
+    try:
+        sources = parse_nfce_command(message.text)
+    except ValueError as e:
+        bot.send_message(message.chat.id, str(e), parse_mode="Markdown")
+        return
 
-        if option.lower() == "url":
-            get_and_save_invoice(message.chat.id, value)
-            return
-        elif option.lower() == "chave":
-            fetch_nfce_by_key(message.chat.id, value)
-            return
-        else:
-            response_message = (
-                "Opção inválida. Por favor, escolha entre *URL* ou *CHAVE*."
-            )
-            bot.send_message(message.chat.id, response_message, parse_mode="Markdown")
-            return
+    enqueue_invoices(message.chat.id, sources)
 
-    response_message = "Por favor, use o comando `/nfce url` seguido da <URL>."
-    bot.send_message(message.chat.id, response_message, parse_mode="Markdown")
-    return
 
+@bot.message_handler(commands=["status"])
+def status_handler(message):
+    with SessionLocal() as session:
+        jobs = JobRepository(session).find_latest(message.chat.id)
 
-def get_invoice_by_url(url):
-    try:
-        invoice = NfceScraper().get(url)
-        logger.info("Scraped invoice %s", invoice)
-        return invoice
-    except Exception as e:
-        logger.error("Failed to scrape", e)
-        return {}
+    bot.reply_to(message, status_message(jobs))
 
 
-def save_invoice_db(invoice):
-    try:
-        save_invoice(
-            invoice,
-            invoice_repository=InvoiceRepository(database),
-            company_repository=CompanyRepository(database),
-            product_repository=ProductRepository(database),
-            item_repository=ItemRepository(database),
-        )
-    except Exception as e:
-        logger.error(
-            "Failed to save invoice %s: %s",
-            invoice["informacoes"]["chave_acesso"],
-            str(e),
-            exc_info=True,
-        )
-        return 0
-
-
-def get_and_save_invoice(chat_id, url):
-
-    try:
-        invoice = get_invoice_by_url(url)
-        access_key = invoice["informacoes"]["chave_acesso"]
-
-        bot.send_message(
-            chat_id,
-            f"Ok, consegui buscar os dados da NFC-e **{access_key}**.",
-            parse_mode="Markdown",
-        )
-    except Exception as e:
-        bot.send_message(chat_id, "Deu erro ao obter os dados da NFC-e.")
-        logger.error("Failed to scrape", e)
-        return
+def enqueue_invoices(chat_id, sources):
+    """Enqueue the invoices to be saved by the workers, which reply when they are done."""
+    jobs = [
+        Job(chat_id=chat_id, source=source, max_attempts=MAX_ATTEMPTS)
+        for source in sources
+    ]
 
     try:
-        save_invoice_db(invoice)
-
-        bot.send_message(chat_id, "Salvei os dados da nota.")
+        with SessionLocal() as session:
+            JobRepository(session).save_all(jobs)
     except Exception:
-        bot.send_message(chat_id, "Deu erro ao salvar os dados da NFC-e.")
-        logger.error("Invoice not found", exc_info=True)
+        bot.send_message(chat_id, "Deu erro ao receber as NFC-e.")
+        logger.error("Failed to enqueue %s", sources, exc_info=True)
+        return
 
-    nfce_data = (
-        f"*Chave de Acesso:* {access_key}\n"
-        + f"*Valor Pago:* R${invoice['totais']['valor_a_pagar']:.2f}\n"
-        + f"*Qtd. Itens:* {invoice['totais']['quantidade_itens']}"
+    bot.send_message(
+        chat_id, f"Recebi {len(jobs)} NFC-e, aviso assim que os dados forem salvos."
     )
 
-    text = f"*INFORMAÇÕES DA NOTA:*\n\n{nfce_data}"
-    bot.send_message(chat_id, text, parse_mode="Markdown")
-
 
 if __name__ == "__main__":
-    bot.infinity_polling()
+    # The invoices are scraped and saved by the workers, so that a slow page does
+    # not block the other chats
+    with WorkerPool(processes=int(os.environ.get("BOT_WORKERS", 2))):
+        bot.infinity_polling()
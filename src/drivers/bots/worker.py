@@ -0,0 +1,387 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+from typing import Any, Callable
+
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from telebot import TeleBot
+
+from domain import EletronicInvoice, Job, JobStatus
+from repositories import (
+    AnalyticsRepository,
+    InvoiceRepository,
+    ItemRepository,
+    JobRepository,
+)
+from repositories.cache import (
+    CacheBackend,
+    CachedCompanyRepository,
+    CachedProductRepository,
+    LruCache,
+)
+from scrapers.batch import get_url
+from scrapers.cache import CachedScraper, PageCache
+from scrapers.database import save_invoice
+from scrapers.interfaces import Scraper
+from scrapers.scrapers import HttpNfceScraper
+from settings.database import SessionLocal
+
+__all__ = ["Worker", "WorkerPool", "format_invoice"]
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Run the jobs enqueued by the bot: scrape the invoice, save it and reply to the chat.
+
+    Failed jobs are retried with an exponential backoff, and the chat is told about
+    the invoices that could not be saved once their job is dead.
+    """
+
+    def __init__(
+        self,
+        bot: TeleBot,
+        scraper: Scraper,
+        session_factory: Callable[[], Session],
+        key_url: str = "",
+        backoff: float = 30.0,
+        cache: CacheBackend = None,
+    ):
+        """
+        Initializes a Worker object.
+
+        Args:
+            bot (TeleBot): Bot used to reply to the chats.
+            scraper (Scraper): Scraper of the invoices.
+            session_factory (Callable[[], Session]): Factory of database sessions.
+            key_url (str, optional): URL template with a `{key}` placeholder, used to scrape access keys.
+                Defaults to "", meaning that access keys fail.
+            backoff (float, optional): Seconds to wait before the first retry, doubled on each retry.
+                Defaults to 30.0.
+            cache (CacheBackend, optional): Cache of companies and products. Defaults to a LruCache.
+        """
+        self.bot = bot
+        self.scraper = scraper
+        self.session_factory = session_factory
+        self.key_url = key_url
+        self.backoff = backoff
+        self.cache = cache or LruCache()
+
+    def run(self, stop: threading.Event, poll_interval: float = 1.0) -> None:
+        """Claim and run jobs until `stop` is set, waiting `poll_interval` seconds
+        whenever the queue is empty."""
+        while not stop.is_set():
+            try:
+                with self.session_factory() as session:
+                    jobs = JobRepository(session).claim()
+            except Exception:
+                logger.exception("Failed to claim a job")
+                jobs = []
+
+            if not jobs:
+                stop.wait(poll_interval)
+                continue
+
+            for job in jobs:
+                try:
+                    self.process(job)
+                except Exception:
+                    # The job is enqueued again once it is considered abandoned
+                    logger.exception("Failed to run the job %d", job.id)
+
+    def process(self, job: Job) -> None:
+        logger.info("Running job %d for %s", job.id, job.source)
+
+        try:
+            data = self.scraper.get(get_url(job.source, self.key_url))
+            invoice = self.save(data)
+        except Exception as e:
+            logger.warning("Job %d failed: %r", job.id, e)
+
+            with self.session_factory() as session:
+                job = JobRepository(session).fail(job, repr(e), self.backoff)
+
+            if job.status is JobStatus.DEAD:
+                self.reply(
+                    job.chat_id, f"Deu erro ao obter os dados da NFC-e {job.source}."
+                )
+            return
+
+        with self.session_factory() as session:
+            JobRepository(session).complete(job.id, invoice.id)
+
+        self.reply(
+            job.chat_id,
+            f"*INFORMAÇÕES DA NOTA:*\n\n{format_invoice(invoice)}",
+            parse_mode="Markdown",
+        )
+
+    def save(self, data: dict[str, Any]) -> EletronicInvoice:
+        """Save the invoice and read it back with its company and items."""
+        with self.session_factory() as session:
+            invoice_repository = InvoiceRepository(session)
+
+            entity = save_invoice(
+                data,
+                invoice_repository=invoice_repository,
+                company_repository=CachedCompanyRepository(session, self.cache),
+                product_repository=CachedProductRepository(session, self.cache),
+                item_repository=ItemRepository(session),
+            )
+
+            return invoice_repository.find_full(id=entity.id)
+
+    def reply(self, chat_id: int, text: str, **kwargs) -> None:
+        # The invoice is saved, a failed reply must not run the job again
+        try:
+            self.bot.send_message(chat_id, text, **kwargs)
+        except Exception:
+            logger.exception("Failed to reply to the chat %s", chat_id)
+
+
+class WorkerPool:
+    """Processes running workers, a thread starting again the processes that died and
+    enqueuing again the jobs they left running, and a thread refreshing the analytics
+    once jobs completed."""
+
+    def __init__(
+        self,
+        processes: int = 2,
+        poll_interval: float = 1.0,
+        backoff: float = 30.0,
+        stale_timeout: float = 600.0,
+        refresh_interval: float = 300.0,
+        check_interval: float = 5.0,
+    ):
+        """
+        Initializes a WorkerPool object.
+
+        Args:
+            processes (int, optional): Number of worker processes. Defaults to 2.
+            poll_interval (float, optional): Seconds between polls of an empty queue. Defaults to 1.0.
+            backoff (float, optional): Seconds to wait before the first retry of a job. Defaults to 30.0.
+            stale_timeout (float, optional): Seconds after which a running job is considered abandoned.
+                Defaults to 600.0.
+            refresh_interval (float, optional): Seconds between refreshes of the analytics, which
+                are skipped when no job completed since the last one. Defaults to 300.0, 0 disables them.
+            check_interval (float, optional): Seconds between checks of the worker processes, those that
+                died are started again. Defaults to 5.0.
+        """
+        self.processes = max(processes, 1)
+        self.poll_interval = poll_interval
+        self.backoff = backoff
+        self.stale_timeout = stale_timeout
+        self.refresh_interval = refresh_interval
+        self.check_interval = check_interval
+        # Spawned processes create their own database connections
+        self._context = multiprocessing.get_context("spawn")
+        self._stop = self._context.Event()
+        self._workers: list[multiprocessing.Process] = []
+        self._watcher: threading.Thread = None
+        self._supervisor: threading.Thread = None
+        self._refresher: threading.Thread = None
+
+    def __enter__(self) -> "WorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self._workers = [self._spawn(i) for i in range(self.processes)]
+
+        self._supervisor = threading.Thread(target=self._supervise, daemon=True)
+        self._supervisor.start()
+        self._watcher = threading.Thread(target=self._release_stale, daemon=True)
+        self._watcher.start()
+
+        if self.refresh_interval > 0:
+            self._refresher = threading.Thread(
+                target=self._refresh_analytics, daemon=True
+            )
+            self._refresher.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        self._stop.set()
+
+        # No process is started again once the supervisor is done
+        if self._supervisor is not None:
+            self._supervisor.join()
+
+        for worker in self._workers:
+            worker.join(timeout)
+
+            if worker.is_alive():
+                worker.terminate()
+
+    def join(self) -> None:
+        """Wait until the pool is stopped, the processes that die are replaced."""
+        while not self._stop.wait(1.0):
+            pass
+
+    def respawn(self) -> int:
+        """Start again the worker processes that died.
+
+        Returns:
+            int: processes started
+        """
+        started = 0
+
+        for i, worker in enumerate(self._workers):
+            if worker.is_alive() or self._stop.is_set():
+                continue
+
+            logger.warning(
+                "Worker %s exited with code %s, starting it again",
+                worker.name,
+                worker.exitcode,
+            )
+            self._workers[i] = self._spawn(i)
+            started += 1
+
+        return started
+
+    def _spawn(self, index: int) -> multiprocessing.Process:
+        worker = self._context.Process(
+            target=_run_worker,
+            args=(self._stop, self.poll_interval, self.backoff),
+            name=f"nfce-worker-{index}",
+            daemon=True,
+        )
+        worker.start()
+
+        return worker
+
+    def _supervise(self) -> None:
+        while not self._stop.wait(self.check_interval):
+            try:
+                self.respawn()
+            except Exception:
+                logger.exception("Failed to start the worker processes again")
+
+    def _release_stale(self) -> None:
+        while not self._stop.wait(self.stale_timeout / 4):
+            try:
+                with SessionLocal() as session:
+                    released = JobRepository(session).release_stale(self.stale_timeout)
+
+                if released:
+                    logger.warning("Enqueued %d abandoned jobs again", released)
+            except Exception:
+                logger.exception("Failed to release the abandoned jobs")
+
+    def _refresh_analytics(self) -> None:
+        refreshed_at = None
+
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                with SessionLocal() as session:
+                    completed_at = JobRepository(session).last_completed_at()
+
+                    if completed_at is None or completed_at == refreshed_at:
+                        continue
+
+                    if AnalyticsRepository(session).refresh():
+                        refreshed_at = completed_at
+            except Exception:
+                logger.exception("Failed to refresh the analytics")
+
+
+def format_invoice(invoice: EletronicInvoice) -> str:
+    total = sum(item.total_price for item in invoice.items)
+    items = "\n".join(
+        f"- {item.product.description}: {item.quantity:g} x R${item.unit_price:.2f}"
+        for item in invoice.items
+    )
+
+    return (
+        f"*Chave de Acesso:* {invoice.access_key}\n"
+        + (f"*Empresa:* {invoice.company.name}\n" if invoice.company else "")
+        + f"*Valor dos Itens:* R${total:.2f}\n"
+        + f"*Qtd. Itens:* {len(invoice.items)}\n\n"
+        + items
+    )
+
+
+def _create_worker(backoff: float) -> Worker:
+    load_dotenv()
+
+    page_cache = PageCache(
+        os.environ.get("NFCE_CACHE_DIR", ".cache/nfce"),
+        max_bytes=int(os.environ.get("NFCE_CACHE_MAX_BYTES", 512 * 1024**2)),
+    )
+    cache = LruCache(
+        max_size=int(os.environ.get("CACHE_MAX_SIZE", 10_000)),
+        ttl=float(os.environ.get("CACHE_TTL", 3600)),
+    )
+
+    return Worker(
+        TeleBot(os.environ.get("TELEGRAM_BOT_TOKEN")),
+        CachedScraper(HttpNfceScraper(), page_cache),
+        SessionLocal,
+        key_url=os.environ.get("NFCE_KEY_URL", ""),
+        backoff=backoff,
+        cache=cache,
+    )
+
+
+def _run_worker(stop, poll_interval: float, backoff: float) -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        _create_worker(backoff).run(stop, poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m drivers.bots.worker",
+        description="Run the jobs enqueued by the Telegram bot.",
+    )
+    parser.add_argument("--processes", type=int, default=2)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--backoff", type=float, default=30.0)
+    parser.add_argument(
+        "--refresh-interval",
+        type=float,
+        default=300.0,
+        help="Seconds between refreshes of the analytics, 0 disables them.",
+    )
+    parser.add_argument(
+        "--retry-dead",
+        action="store_true",
+        help="Enqueue the dead jobs again before starting.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    load_dotenv()
+
+    if args.retry_dead:
+        with SessionLocal() as session:
+            logger.info("Enqueued %d dead jobs", JobRepository(session).retry_dead())
+
+    pool = WorkerPool(
+        args.processes,
+        args.poll_interval,
+        args.backoff,
+        refresh_interval=args.refresh_interval,
+    )
+
+    with pool:
+        try:
+            pool.join()
+        except KeyboardInterrupt:
+            pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
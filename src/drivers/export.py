@@ -0,0 +1,343 @@
+import argparse
+import io
+import json
+import logging
+import sys
+from dataclasses import dataclass, field
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Iterable, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import Row
+
+from repositories.export import EXPORTS, Export
+
+__all__ = [
+    "ARROW_STREAM_MEDIA_TYPE",
+    "ExportReport",
+    "ParquetExporter",
+    "arrow_schema",
+    "ipc_stream",
+    "read_watermarks",
+    "to_record_batch",
+    "write_ipc_stream",
+    "write_watermarks",
+]
+
+logger = logging.getLogger(__name__)
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+ARROW_TYPES = {
+    bool: pa.bool_(),
+    int: pa.int64(),
+    float: pa.float64(),
+    str: pa.string(),
+    datetime: pa.timestamp("us"),
+    date: pa.date32(),
+}
+
+# Name pyarrow and Spark give to the partition of the rows without a value
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+WATERMARKS_FILE = "_watermarks.json"
+
+
+@dataclass
+class ExportReport:
+    name: str
+    rows: int = 0
+    files: list[Path] = field(default_factory=list)
+    last_created_on: datetime = None
+
+    def add(self, rows: Sequence[Row], export: Export) -> None:
+        index = _index(export, export.created_on.name)
+        created_on = max(
+            (row[index] for row in rows if row[index] is not None), default=None
+        )
+
+        self.rows += len(rows)
+        if created_on and (
+            self.last_created_on is None or created_on > self.last_created_on
+        ):
+            self.last_created_on = created_on
+
+
+def arrow_schema(export: Export) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field(column.name, ARROW_TYPES[column.type.python_type])
+            for column in export.columns
+        ]
+    )
+
+
+def to_record_batch(rows: Sequence[Row], schema: pa.Schema) -> pa.RecordBatch:
+    """Convert the rows into columns, each built at once by Arrow."""
+    columns = zip(*rows) if rows else ([] for _ in schema)
+
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(values, type=field.type)
+            for values, field in zip(columns, schema, strict=True)
+        ],
+        schema=schema,
+    )
+
+
+class ParquetExporter:
+    """Writes exports as Parquet files partitioned by month, hive style.
+
+    Each run adds a file per month, `<directory>/<export>/mes=2024-01/part-<run>.parquet`,
+    so that incremental exports never rewrite the files of the previous runs. Files
+    are renamed into place once the whole export is written, a failed export leaves
+    no file behind.
+    """
+
+    def __init__(
+        self, directory: str | Path, run: str = None, compression: str = "zstd"
+    ):
+        """
+        Args:
+            directory (str | Path): directory of the exports
+            run (str, optional): suffix of the files written. Defaults to the current
+                time in UTC.
+            compression (str, optional): Parquet compression codec. Defaults to "zstd".
+        """
+        self.directory = Path(directory)
+        self.run = run or datetime.now(UTC).strftime("%Y%m%dT%H%M%S")
+        self.compression = compression
+
+    def write(self, export: Export, batches: Iterable[Sequence[Row]]) -> ExportReport:
+        """Write the batches of rows of an export.
+
+        Only a chunk of rows and a Parquet writer per month are kept in memory.
+
+        Returns:
+            ExportReport: rows and files written
+        """
+        schema = arrow_schema(export)
+        index = _index(export, export.partition_by.name)
+        report = ExportReport(export.name)
+        writers: dict[str, pq.ParquetWriter] = {}
+        paths: dict[str, Path] = {}
+
+        try:
+            for rows in batches:
+                for month, partition in _partitions(rows, index).items():
+                    if month not in writers:
+                        paths[month] = self._path(export, month)
+                        paths[month].parent.mkdir(parents=True, exist_ok=True)
+                        writers[month] = pq.ParquetWriter(
+                            _temporary(paths[month]),
+                            schema,
+                            compression=self.compression,
+                        )
+
+                    writers[month].write_batch(to_record_batch(partition, schema))
+
+                report.add(rows, export)
+        except BaseException:
+            for month, writer in writers.items():
+                writer.close()
+                _temporary(paths[month]).unlink(missing_ok=True)
+            raise
+
+        for month, writer in writers.items():
+            writer.close()
+            _temporary(paths[month]).replace(paths[month])
+
+        report.files = sorted(paths.values())
+
+        return report
+
+    def _path(self, export: Export, month: str) -> Path:
+        return (
+            self.directory / export.name / f"mes={month}" / f"part-{self.run}.parquet"
+        )
+
+
+def write_ipc_stream(
+    sink: BinaryIO, export: Export, batches: Iterable[Sequence[Row]]
+) -> ExportReport:
+    """Write the batches of rows of an export as an Arrow IPC stream."""
+    schema = arrow_schema(export)
+    report = ExportReport(export.name)
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in batches:
+            writer.write_batch(to_record_batch(rows, schema))
+            report.add(rows, export)
+
+    return report
+
+
+async def ipc_stream(
+    export: Export, batches: AsyncIterable[Sequence[Row]]
+) -> AsyncIterator[bytes]:
+    """Serialize the batches of rows of an export as an Arrow IPC stream, yielding
+    the bytes of each batch as soon as it is read."""
+    schema = arrow_schema(export)
+    sink = io.BytesIO()
+
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield _drain(sink)
+
+        async for rows in batches:
+            writer.write_batch(to_record_batch(rows, schema))
+            yield _drain(sink)
+
+    yield _drain(sink)
+
+
+def read_watermarks(directory: str | Path) -> dict[str, datetime]:
+    """Creation time up to which each export has every row, to continue from."""
+    path = Path(directory) / WATERMARKS_FILE
+
+    if not path.exists():
+        return {}
+
+    return {
+        name: datetime.fromisoformat(value)
+        for name, value in json.loads(path.read_text()).items()
+    }
+
+
+def write_watermarks(directory: str | Path, watermarks: dict[str, datetime]) -> None:
+    path = Path(directory) / WATERMARKS_FILE
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = _temporary(path)
+    temporary.write_text(
+        json.dumps(
+            {name: value.isoformat() for name, value in sorted(watermarks.items())},
+            indent=2,
+        )
+    )
+    temporary.replace(path)
+
+
+def _index(export: Export, name: str) -> int:
+    return [column.name for column in export.columns].index(name)
+
+
+def _partitions(rows: Sequence[Row], index: int) -> dict[str, list[Row]]:
+    partitions: dict[str, list[Row]] = {}
+
+    for row in rows:
+        value = row[index]
+        month = value.strftime("%Y-%m") if value else NULL_PARTITION
+        partitions.setdefault(month, []).append(row)
+
+    return partitions
+
+
+def _temporary(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
+
+
+def _drain(sink: io.BytesIO) -> bytes:
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+
+    return data
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m drivers.export",
+        description="Export the invoices, items, products and companies to Parquet or Arrow.",
+    )
+    parser.add_argument(
+        "output",
+        help="Directory of the exports, or `-` to write an Arrow stream to the standard output.",
+    )
+    parser.add_argument(
+        "--tables",
+        nargs="+",
+        choices=list(EXPORTS),
+        default=list(EXPORTS),
+        help="Exports to write, `compras` being the items joined to their invoices, "
+        "products and companies.",
+    )
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Export only the rows created after this time.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Export only the rows created after the previous incremental export.",
+    )
+    parser.add_argument(
+        "--lag",
+        type=float,
+        default=60,
+        help="Seconds the incremental exports stay behind the oldest open transaction, "
+        "for the clock difference between the application and the database.",
+    )
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    if args.output == "-" and (args.format != "arrow" or len(args.tables) != 1):
+        parser.error("the standard output takes the Arrow stream of a single table")
+
+    from repositories import ExportRepository
+    from settings.database import SessionLocal
+
+    watermarks = read_watermarks(args.output) if args.incremental else {}
+    exporter = ParquetExporter(args.output)
+
+    for name in args.tables:
+        export = EXPORTS[name]
+        since = args.since or watermarks.get(name)
+
+        with SessionLocal() as session:
+            repository = ExportRepository(session)
+            # Rows still being committed may be created before the last row read,
+            # incremental exports stop at the horizon and continue from it
+            until = (
+                repository.horizon(timedelta(seconds=args.lag))
+                if args.incremental
+                else None
+            )
+            batches = repository.batches(export, since, args.chunk_size, until)
+
+            if args.output == "-":
+                report = write_ipc_stream(sys.stdout.buffer, export, batches)
+            elif args.format == "arrow":
+                path = Path(args.output) / f"{name}-{exporter.run}.arrows"
+                path.parent.mkdir(parents=True, exist_ok=True)
+
+                try:
+                    with open(_temporary(path), "wb") as file:
+                        report = write_ipc_stream(file, export, batches)
+                except BaseException:
+                    _temporary(path).unlink(missing_ok=True)
+                    raise
+
+                _temporary(path).replace(path)
+                report.files = [path]
+            else:
+                report = exporter.write(export, batches)
+
+        logger.info(
+            "Exported %d rows of %s into %d files", report.rows, name, len(report.files)
+        )
+
+        if args.incremental:
+            watermarks[name] = max(until, since) if since else until
+            write_watermarks(args.output, watermarks)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,34 @@
-from typing import Annotated
-from fastapi import Depends, status, HTTPException
-from settings.database import get_db_connection
-from sqlalchemy.orm import Session
-from repositories import (
-    CompanyRepository,
-    ItemRepository,
-    ProductRepository,
-    InvoiceRepository,
-    UserRepository,
+import logging
+from datetime import date
+from functools import lru_cache
+from typing import Annotated, Awaitable, Callable
+from fastapi import Depends, Query, status, HTTPException
+from pydantic import BaseModel
+from telebot.async_telebot import AsyncTeleBot
+from drivers.bots.async_telegram import create_bot
+from settings.database import AsyncSessionLocal, get_async_db_connection
+from settings.environment import get_environment_variables
+from sqlalchemy.ext.asyncio import AsyncSession
+from repositories.aio import (
+    AsyncAnalyticsRepository,
+    AsyncCompanyRepository,
+    AsyncExportRepository,
+    AsyncItemRepository,
+    AsyncProductRepository,
+    AsyncInvoiceRepository,
+    AsyncReceiptRepository,
+    AsyncUserRepository,
 )
-from services import (
-    CompanyService,
-    ItemService,
-    ProductService,
-    InvoiceService,
-    UserService,
+from services.aio import (
+    AsyncAnalyticsService,
+    AsyncCompanyService,
+    AsyncItemService,
+    AsyncProductService,
+    AsyncInvoiceService,
+    AsyncReceiptService,
+    AsyncUserService,
 )
-from ports.services import Service
+from ports.services import AsyncService
 
 from dotenv import load_dotenv
 
@@ -29,78 +41,151 @@ __all__ = [
     "get_invoices_repository",
     "get_items_repository",
     "get_users_repository",
+    "get_receipts_repository",
+    "get_analytics_repository",
+    "get_exports_repository",
     "get_products_services",
     "get_companies_services",
     "get_invoices_services",
     "get_items_services",
     "get_users_services",
+    "get_receipts_services",
+    "get_analytics_services",
+    "get_telegram_bot",
+    "get_analytics_refresh",
+    "refresh_analytics",
+    "DateRange",
+    "get_period",
 ]
 
+logger = logging.getLogger(__name__)
+
 
 # Repositories
 
 
 def get_products_repository(
-    postgres_client: Session = Depends(get_db_connection),
-) -> Session:
-    return ProductRepository(postgres_client)
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncProductRepository:
+    return AsyncProductRepository(postgres_client)
 
 
 def get_companies_repository(
-    postgres_client: Session = Depends(get_db_connection),
-) -> Session:
-    return CompanyRepository(postgres_client)
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncCompanyRepository:
+    return AsyncCompanyRepository(postgres_client)
 
 
 def get_invoices_repository(
-    postgres_client: Session = Depends(get_db_connection),
-) -> Session:
-    return InvoiceRepository(postgres_client)
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncInvoiceRepository:
+    return AsyncInvoiceRepository(postgres_client)
 
 
 def get_items_repository(
-    postgres_client: Session = Depends(get_db_connection),
-) -> Session:
-    return ItemRepository(postgres_client)
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncItemRepository:
+    return AsyncItemRepository(postgres_client)
 
 
 def get_users_repository(
-    postgres_client: Session = Depends(get_db_connection),
-) -> Session:
-    return UserRepository(postgres_client)
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncUserRepository:
+    return AsyncUserRepository(postgres_client)
+
+
+def get_receipts_repository(
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncReceiptRepository:
+    return AsyncReceiptRepository(postgres_client)
+
+
+def get_analytics_repository(
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncAnalyticsRepository:
+    return AsyncAnalyticsRepository(postgres_client)
+
+
+def get_exports_repository(
+    postgres_client: AsyncSession = Depends(get_async_db_connection),
+) -> AsyncExportRepository:
+    return AsyncExportRepository(postgres_client)
 
 
 # Services
 
 
 def get_products_services(
-    repository: Annotated[ProductRepository, Depends(get_products_repository)],
-) -> Service:
-    return ProductService(repository)
+    repository: Annotated[AsyncProductRepository, Depends(get_products_repository)],
+) -> AsyncService:
+    return AsyncProductService(repository)
 
 
 def get_companies_services(
-    repository: Annotated[CompanyRepository, Depends(get_companies_repository)],
-) -> Service:
-    return CompanyService(repository)
+    repository: Annotated[AsyncCompanyRepository, Depends(get_companies_repository)],
+) -> AsyncService:
+    return AsyncCompanyService(repository)
 
 
 def get_invoices_services(
-    repository: Annotated[InvoiceRepository, Depends(get_invoices_repository)],
-) -> Service:
-    return InvoiceService(repository)
+    repository: Annotated[AsyncInvoiceRepository, Depends(get_invoices_repository)],
+) -> AsyncService:
+    return AsyncInvoiceService(repository)
 
 
 def get_items_services(
-    repository: Annotated[ItemRepository, Depends(get_items_repository)],
-) -> Service:
-    return ItemService(repository)
+    repository: Annotated[AsyncItemRepository, Depends(get_items_repository)],
+) -> AsyncService:
+    return AsyncItemService(repository)
 
 
 def get_users_services(
-    repository: Annotated[UserRepository, Depends(get_users_repository)],
-) -> Service:
-    return UserService(repository)
+    repository: Annotated[AsyncUserRepository, Depends(get_users_repository)],
+) -> AsyncService:
+    return AsyncUserService(repository)
+
+
+def get_receipts_services(
+    repository: Annotated[AsyncReceiptRepository, Depends(get_receipts_repository)],
+) -> AsyncReceiptService:
+    return AsyncReceiptService(repository)
+
+
+def get_analytics_services(
+    repository: Annotated[AsyncAnalyticsRepository, Depends(get_analytics_repository)],
+) -> AsyncAnalyticsService:
+    return AsyncAnalyticsService(repository)
+
+
+# Analytics
+
+
+async def refresh_analytics() -> None:
+    """Refresh the analytics in its own session, as a background task that outlives
+    the session of the request."""
+    try:
+        async with AsyncSessionLocal() as session:
+            await AsyncAnalyticsRepository(session).refresh()
+    except Exception:
+        logger.exception("Failed to refresh the analytics")
+
+
+def get_analytics_refresh() -> Callable[[], Awaitable[None]]:
+    return refresh_analytics
+
+
+# Bots
+
+
+@lru_cache
+def get_telegram_bot() -> AsyncTeleBot:
+    env = get_environment_variables()
+
+    return create_bot(
+        env.TELEGRAM_BOT_TOKEN,
+        AsyncSessionLocal,
+        max_attempts=env.JOB_MAX_ATTEMPTS,
+    )
 
 
 def validate_id_input(id: int):
@@ -111,3 +196,21 @@ def validate_id_input(id: int):
         )
 
     return int(id)
+
+
+class DateRange(BaseModel):
+    start: date | None = None
+    end: date | None = None
+
+
+def get_period(
+    start: Annotated[date | None, Query(description="First day, inclusive.")] = None,
+    end: Annotated[date | None, Query(description="Last day, inclusive.")] = None,
+) -> DateRange:
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A data inicial deve ser anterior à data final.",
+        )
+
+    return DateRange(start=start, end=end)
@@ -1,7 +1,12 @@
 from fastapi import FastAPI, Request, status
 from fastapi.responses import JSONResponse
 
-from services.exceptions import EntityAlreadyExists, EntityNotExists, EntityNotFound
+from services.exceptions import (
+    EntityAlreadyExists,
+    EntityInvalid,
+    EntityNotExists,
+    EntityNotFound,
+)
 
 
 def exception_container(app: FastAPI) -> None:
@@ -32,3 +37,15 @@ def exception_container(app: FastAPI) -> None:
             status_code=status.HTTP_400_BAD_REQUEST,
             content={"message": f"A entidade '{error.entity}' não foi encontrada."},
         )
+
+    @app.exception_handler(EntityInvalid)
+    async def entity_invalid_exception_handler(
+        request: Request, error: EntityInvalid
+    ) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "message": f"'{error.entity}' inválido: referência inexistente "
+                "ou campo obrigatório ausente."
+            },
+        )
@@ -1,20 +1,69 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from fastapi import FastAPI
 
+from drivers.bots.worker import WorkerPool
+from drivers.rest.dependencies import get_telegram_bot
 from drivers.rest.exceptions_handler import exception_container
+from settings.database import AsyncEngine
+from settings.environment import get_environment_variables
 from .routers import (
+    analytics_router,
     companies_router,
+    exports_router,
     invoices_router,
     items_router,
+    metrics_router,
     products_router,
+    telegram_router,
     users_router,
 )
 
-app = FastAPI()
+env = get_environment_variables()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with AsyncExitStack() as stack:
+        # Closes the pooled connections when the worker of uvicorn stops
+        stack.push_async_callback(AsyncEngine.dispose)
+
+        if env.TELEGRAM_WEBHOOK_URL:
+            # The bot runs inside the API, Telegram sends it the updates
+            bot = get_telegram_bot()
+            stack.push_async_callback(bot.close_session)
+
+        if env.TELEGRAM_WEBHOOK_URL and env.TELEGRAM_WEBHOOK_STARTUP:
+            # Every worker of uvicorn runs the lifespan, so registering the webhook
+            # and starting the workers is opt-in, for a single process
+            await bot.set_webhook(
+                env.TELEGRAM_WEBHOOK_URL,
+                secret_token=env.TELEGRAM_WEBHOOK_SECRET or None,
+            )
+
+            if env.BOT_WORKERS > 0:
+                stack.enter_context(
+                    WorkerPool(
+                        processes=env.BOT_WORKERS,
+                        refresh_interval=env.ANALYTICS_REFRESH_INTERVAL,
+                    )
+                )
+
+        yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(products_router)
 app.include_router(companies_router)
 app.include_router(invoices_router)
 app.include_router(items_router)
 app.include_router(users_router)
+app.include_router(metrics_router)
+app.include_router(analytics_router)
+app.include_router(exports_router)
+
+if env.TELEGRAM_WEBHOOK_URL:
+    app.include_router(telegram_router)
 
 exception_container(app)
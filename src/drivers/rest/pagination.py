@@ -0,0 +1,70 @@
+from typing import Annotated, AsyncIterable, Iterable
+
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+__all__ = [
+    "DEFAULT_PAGE_SIZE",
+    "MAX_PAGE_SIZE",
+    "NEXT_PAGE_HEADER",
+    "Pagination",
+    "get_pagination",
+    "page_response",
+    "ndjson_response",
+]
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_PAGE_HEADER = "X-Next-After-Id"
+
+
+class Pagination(BaseModel):
+    after_id: int = 0
+    limit: int = DEFAULT_PAGE_SIZE
+    stream: bool = False
+
+
+def get_pagination(
+    after_id: Annotated[
+        int, Query(ge=0, description="Return only the rows with a greater ID.")
+    ] = 0,
+    limit: Annotated[
+        int, Query(ge=1, le=MAX_PAGE_SIZE, description="Maximum number of rows.")
+    ] = DEFAULT_PAGE_SIZE,
+    stream: Annotated[
+        bool,
+        Query(description="Stream every row after `after_id` as JSON lines."),
+    ] = False,
+) -> Pagination:
+    return Pagination(after_id=after_id, limit=limit, stream=stream)
+
+
+def page_response(
+    response: Response, models: list[BaseModel], pagination: Pagination
+) -> list[BaseModel]:
+    """Return a page, telling the client where the next one starts when it is full."""
+    if len(models) == pagination.limit:
+        response.headers[NEXT_PAGE_HEADER] = str(models[-1].id)
+
+    return models
+
+
+def ndjson_response(
+    models: Iterable[BaseModel] | AsyncIterable[BaseModel],
+) -> StreamingResponse:
+    """Stream the models as newline delimited JSON, serializing one at a time."""
+
+    if hasattr(models, "__aiter__"):
+
+        async def lines():
+            async for model in models:
+                yield model.model_dump_json() + "\n"
+
+    else:
+
+        def lines():
+            for model in models:
+                yield model.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -1,13 +1,21 @@
+from .analytics import router as analytics_router
 from .companies import router as companies_router
+from .exports import router as exports_router
 from .items import router as items_router
 from .invoices import router as invoices_router
+from .metrics import router as metrics_router
 from .products import router as products_router
+from .telegram import router as telegram_router
 from .users import router as users_router
 
 __all__ = [
+    "analytics_router",
     "companies_router",
+    "exports_router",
     "items_router",
     "invoices_router",
+    "metrics_router",
     "products_router",
+    "telegram_router",
     "users_router",
 ]
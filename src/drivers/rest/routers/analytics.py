@@ -0,0 +1,67 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query, status
+
+from drivers.rest.dependencies import (
+    DateRange,
+    get_analytics_services,
+    get_period,
+    validate_id_input,
+)
+from drivers.rest.schemas.analytics import (
+    DailyPriceModel,
+    MonthlySpendingModel,
+    StorePriceModel,
+)
+from services.aio import AsyncAnalyticsService
+
+__all__ = ["router"]
+
+router = APIRouter(prefix="/analytics")
+
+
+@router.get("/products/{id}/prices", status_code=status.HTTP_200_OK)
+async def get_product_prices(
+    id: Annotated[int, Depends(validate_id_input)],
+    service: Annotated[AsyncAnalyticsService, Depends(get_analytics_services)],
+    period: Annotated[DateRange, Depends(get_period)],
+    company_id: int | None = None,
+) -> list[DailyPriceModel]:
+    """Price of a product per day, in every company or in `company_id` only"""
+
+    return await service.product_prices(id, company_id, period.start, period.end)
+
+
+@router.get("/products/{id}/cheapest", status_code=status.HTTP_200_OK)
+async def get_cheapest_companies(
+    id: Annotated[int, Depends(validate_id_input)],
+    service: Annotated[AsyncAnalyticsService, Depends(get_analytics_services)],
+    days: Annotated[int, Query(ge=1, le=3650)] = 30,
+    limit: Annotated[int, Query(ge=1, le=100)] = 10,
+) -> list[StorePriceModel]:
+    """Companies with the lowest last price of a product in the last `days`"""
+
+    return await service.cheapest_companies(id, days, limit)
+
+
+@router.get("/companies/{id}/prices", status_code=status.HTTP_200_OK)
+async def get_company_prices(
+    id: Annotated[int, Depends(validate_id_input)],
+    service: Annotated[AsyncAnalyticsService, Depends(get_analytics_services)],
+    period: Annotated[DateRange, Depends(get_period)],
+    product_id: int | None = None,
+) -> list[DailyPriceModel]:
+    """Price per day of the products sold by a company"""
+
+    return await service.company_prices(id, product_id, period.start, period.end)
+
+
+@router.get("/users/{id}/spending", status_code=status.HTTP_200_OK)
+async def get_monthly_spending(
+    id: Annotated[int, Depends(validate_id_input)],
+    service: Annotated[AsyncAnalyticsService, Depends(get_analytics_services)],
+    period: Annotated[DateRange, Depends(get_period)],
+) -> list[MonthlySpendingModel]:
+    """Spending of a user per month"""
+
+    return await service.monthly_spending(id, period.start, period.end)
@@ -1,9 +1,15 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Response, status, HTTPException
 
 from drivers.rest.dependencies import get_companies_services, validate_id_input
-from services import CompanyService
+from drivers.rest.pagination import (
+    Pagination,
+    get_pagination,
+    ndjson_response,
+    page_response,
+)
+from services.aio import AsyncCompanyService
 from ..schemas.companies import CompanyModel, CompanyPatchRequestModel
 
 __all__ = ["router"]
@@ -13,19 +19,25 @@ router = APIRouter(prefix="/companies")
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_all_companies(
-    service: Annotated[CompanyService, Depends(get_companies_services)]
+    service: Annotated[AsyncCompanyService, Depends(get_companies_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[CompanyModel]:
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id))
 
-    return service.find_all()
+    models = await service.find_page(pagination.after_id, pagination.limit)
+
+    return page_response(response, models, pagination)
 
 
 @router.get("/{id}", status_code=status.HTTP_200_OK)
 async def get_company(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[CompanyService, Depends(get_companies_services)],
+    service: Annotated[AsyncCompanyService, Depends(get_companies_services)],
 ) -> None:
 
-    company = service.find_by_id(id)
+    company = await service.find_by_id(id)
 
     return company
 
@@ -34,18 +46,18 @@ async def get_company(
 async def update_company(
     id: Annotated[int, Depends(validate_id_input)],
     company: CompanyPatchRequestModel,
-    service: Annotated[CompanyService, Depends(get_companies_services)],
+    service: Annotated[AsyncCompanyService, Depends(get_companies_services)],
 ) -> None:
 
-    service.update(id, company)
+    await service.update(id, company)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_company(
     company: CompanyPatchRequestModel,
-    service: Annotated[CompanyService, Depends(get_companies_services)],
+    service: Annotated[AsyncCompanyService, Depends(get_companies_services)],
 ) -> CompanyModel:
-    model = service.save(company)
+    model = await service.save(company)
 
     return model
 
@@ -53,20 +65,20 @@ async def create_company(
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_company(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[CompanyService, Depends(get_companies_services)],
+    service: Annotated[AsyncCompanyService, Depends(get_companies_services)],
 ) -> None:
     """Delete a company by it's ID
 
     Args:
         id (int): The company ID
     """
-    service.delete(id)
+    await service.delete(id)
 
 
 @router.get("/cnpj/{cnpj}", status_code=status.HTTP_200_OK)
 async def get_company_by_cnpj(
     cnpj: str,
-    service: Annotated[CompanyService, Depends(get_companies_services)],
+    service: Annotated[AsyncCompanyService, Depends(get_companies_services)],
 ) -> None:
 
     if cnpj == "":
@@ -75,6 +87,6 @@ async def get_company_by_cnpj(
             detail="CNPJ da empresa é obrigatório",
         )
 
-    company = service.get_by_cnpj(cnpj=cnpj)
+    company = await service.get_by_cnpj(cnpj=cnpj)
 
     return company
@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+
+from drivers.export import ARROW_STREAM_MEDIA_TYPE, ipc_stream
+from drivers.rest.dependencies import get_exports_repository
+from repositories.aio import AsyncExportRepository
+from repositories.export import EXPORTS
+
+__all__ = ["router"]
+
+router = APIRouter(prefix="/exports")
+
+
+@router.get(
+    "/{name}",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={200: {"content": {ARROW_STREAM_MEDIA_TYPE: {}}}},
+)
+async def export_table(
+    name: str,
+    repository: Annotated[AsyncExportRepository, Depends(get_exports_repository)],
+    since: Annotated[
+        datetime | None, Query(description="Only the rows created after it.")
+    ] = None,
+    chunk_size: Annotated[int, Query(ge=1, le=100_000)] = 50_000,
+) -> StreamingResponse:
+    """Stream a table, or the items joined to their invoices, products and companies
+    with `compras`, as Arrow record batches"""
+
+    if name not in EXPORTS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"A exportação '{name}' não existe.",
+        )
+
+    export = EXPORTS[name]
+    batches = repository.batches(export, since, chunk_size)
+
+    return StreamingResponse(
+        ipc_stream(export, batches), media_type=ARROW_STREAM_MEDIA_TYPE
+    )
@@ -1,63 +1,166 @@
-from typing import Annotated
-
-from fastapi import APIRouter, Depends, status
+import json
+from typing import Annotated, AsyncIterator, Awaitable, Callable
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
 
-from drivers.rest.dependencies import get_invoices_services, validate_id_input
+from drivers.rest.dependencies import (
+    get_analytics_refresh,
+    get_invoices_services,
+    get_receipts_services,
+    validate_id_input,
+)
 from drivers.rest.schemas.invoices import (
+    InvoiceFullModel,
     InvoiceModel,
     InvoicePatchRequestModel,
     InvoicePostRequestModel,
 )
-from services import InvoiceService
+from drivers.rest.pagination import (
+    Pagination,
+    get_pagination,
+    ndjson_response,
+    page_response,
+)
+from drivers.rest.schemas.receipts import BulkReceiptsModel
+from services.aio import AsyncInvoiceService, AsyncReceiptService
 
 __all__ = ["router"]
 
 router = APIRouter(prefix="/invoices")
 
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_all_invoices(
-    service: Annotated[InvoiceService, Depends(get_invoices_services)]
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[InvoiceModel]:
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id))
 
-    return service.find_all()
+    models = await service.find_page(pagination.after_id, pagination.limit)
+
+    return page_response(response, models, pagination)
 
 
 @router.get("/{id}", status_code=status.HTTP_200_OK)
 async def get_invoice(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[InvoiceService, Depends(get_invoices_services)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
 ) -> None:
 
-    invoice = service.find_by_id(id)
+    invoice = await service.find_by_id(id)
 
     return invoice
 
 
+@router.get("/{id}/full", status_code=status.HTTP_200_OK)
+async def get_full_invoice(
+    id: Annotated[int, Depends(validate_id_input)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
+) -> InvoiceFullModel:
+    """Get an invoice with its company, user and items
+
+    Args:
+        id (int): The invoice ID
+    """
+
+    return await service.find_full_by_id(id)
+
+
 @router.patch("/{id}", status_code=status.HTTP_200_OK)
 async def update_invoice(
     id: Annotated[int, Depends(validate_id_input)],
     invoice: InvoicePatchRequestModel,
-    service: Annotated[InvoiceService, Depends(get_invoices_services)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
 ) -> None:
 
-    service.update(id, invoice)
+    await service.update(id, invoice)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_invoice(
     invoice: InvoicePostRequestModel,
-    service: Annotated[InvoiceService, Depends(get_invoices_services)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
 ) -> InvoiceModel:
-    entity = service.save(invoice)
+    model = await service.save(invoice)
+
+    return model
+
+
+@router.post("/bulk", status_code=status.HTTP_200_OK)
+async def create_invoices_in_bulk(
+    request: Request,
+    service: Annotated[AsyncReceiptService, Depends(get_receipts_services)],
+    refresh: Annotated[Callable[[], Awaitable[None]], Depends(get_analytics_refresh)],
+    background_tasks: BackgroundTasks,
+) -> BulkReceiptsModel:
+    """Create or update many invoices, with their companies and items
+
+    The body is a JSON array of receipts or, with an NDJSON content type, a receipt
+    per line, which is read as it arrives. Invalid receipts are reported and skipped.
+    The analytics are refreshed after the response when any invoice was saved.
+    """
+
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPES):
+        report = await service.import_all(_read_lines(request))
+    else:
+        report = await service.import_all(await _read_list(request))
+
+    if report.created or report.updated:
+        background_tasks.add_task(refresh)
+
+    return report
+
+
+async def _read_list(request: Request) -> AsyncIterator[dict]:
+    try:
+        receipts = json.loads(await request.body())
+    except ValueError:
+        receipts = None
+
+    if not isinstance(receipts, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="O corpo deve ser uma lista de notas em JSON ou NDJSON.",
+        )
+
+    return _iterate(receipts)
 
-    return InvoiceModel.from_entity(entity)
+
+async def _read_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+
+    async for chunk in request.stream():
+        *lines, buffer = (buffer + chunk).split(b"\n")
+
+        for line in lines:
+            if line.strip():
+                yield line
+
+    if buffer.strip():
+        yield buffer
+
+
+async def _iterate(receipts: list) -> AsyncIterator[dict]:
+    for receipt in receipts:
+        yield receipt
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_invoice(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[InvoiceService, Depends(get_invoices_services)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
 ) -> None:
     """Delete a invoice by it's ID
 
@@ -65,22 +168,34 @@ async def delete_invoice(
         id (int): The invoice ID
     """
 
-    service.delete(id)
+    await service.delete(id)
 
 
 @router.get("/companies/{id}", status_code=status.HTTP_200_OK)
 async def get_all_invoices_by_company(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[InvoiceService, Depends(get_invoices_services)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[InvoiceModel]:
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id, company_id=id))
 
-    return service.find_by_company(id)
+    models = await service.find_by_company(id, pagination.after_id, pagination.limit)
+
+    return page_response(response, models, pagination)
 
 
 @router.get("/users/{id}", status_code=status.HTTP_200_OK)
 async def get_all_invoices_by_user(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[InvoiceService, Depends(get_invoices_services)],
+    service: Annotated[AsyncInvoiceService, Depends(get_invoices_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[InvoiceModel]:
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id, user_id=id))
+
+    models = await service.find_by_user(id, pagination.after_id, pagination.limit)
 
-    return service.find_by_user(id)
+    return page_response(response, models, pagination)
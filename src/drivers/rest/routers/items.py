@@ -1,6 +1,6 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
 from drivers.rest.dependencies import get_items_services, validate_id_input
 from drivers.rest.schemas.items import (
@@ -8,7 +8,13 @@ from drivers.rest.schemas.items import (
     ItemPatchRequestModel,
     ItemPostRequestModel,
 )
-from services import ItemService
+from drivers.rest.pagination import (
+    Pagination,
+    get_pagination,
+    ndjson_response,
+    page_response,
+)
+from services.aio import AsyncItemService
 
 __all__ = ["router"]
 
@@ -17,19 +23,25 @@ router = APIRouter(prefix="/items")
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_all_items(
-    service: Annotated[ItemService, Depends(get_items_services)]
+    service: Annotated[AsyncItemService, Depends(get_items_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[ItemModel]:
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id))
+
+    models = await service.find_page(pagination.after_id, pagination.limit)
 
-    return service.find_all()
+    return page_response(response, models, pagination)
 
 
 @router.get("/{id}", status_code=status.HTTP_200_OK)
 async def get_item(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[ItemService, Depends(get_items_services)],
+    service: Annotated[AsyncItemService, Depends(get_items_services)],
 ) -> None:
 
-    item = service.find_by_id(id)
+    item = await service.find_by_id(id)
 
     return item
 
@@ -38,18 +50,18 @@ async def get_item(
 async def update_item(
     id: Annotated[int, Depends(validate_id_input)],
     item: ItemPatchRequestModel,
-    service: Annotated[ItemService, Depends(get_items_services)],
+    service: Annotated[AsyncItemService, Depends(get_items_services)],
 ) -> None:
 
-    service.update(id, item)
+    await service.update(id, item)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_item(
     item: ItemPostRequestModel,
-    service: Annotated[ItemService, Depends(get_items_services)],
+    service: Annotated[AsyncItemService, Depends(get_items_services)],
 ) -> ItemModel:
-    entity = service.save(item)
+    entity = await service.save(item)
 
     return entity
 
@@ -57,7 +69,7 @@ async def create_item(
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_item(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[ItemService, Depends(get_items_services)],
+    service: Annotated[AsyncItemService, Depends(get_items_services)],
 ) -> None:
     """Delete a item by it's ID
 
@@ -65,13 +77,21 @@ async def delete_item(
         id (int): The item ID
     """
 
-    service.delete(id)
+    await service.delete(id)
 
 
 @router.get("/invoices/{id}", status_code=status.HTTP_200_OK)
 async def get_by_invoice_id(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[ItemService, Depends(get_items_services)],
+    service: Annotated[AsyncItemService, Depends(get_items_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[ItemModel]:
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id, invoice_id=id))
+
+    models = await service.find_page(
+        pagination.after_id, pagination.limit, invoice_id=id
+    )
 
-    return service.find_all(invoice_id=id)
+    return page_response(response, models, pagination)
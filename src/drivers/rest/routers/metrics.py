@@ -0,0 +1,18 @@
+from fastapi import APIRouter, status
+
+from settings.database import pool_metrics
+
+__all__ = ["router"]
+
+router = APIRouter(prefix="/metrics")
+
+
+@router.get("/database", status_code=status.HTTP_200_OK)
+async def get_database_metrics() -> dict[str, dict[str, float]]:
+    """Connection pools of this process, used to size them to the number of workers
+
+    `waiting` counts the requests waiting for a connection and `timeouts` the ones
+    that gave up after `DATABASE_POOL_TIMEOUT` seconds.
+    """
+
+    return {name: metrics.to_dict() for name, metrics in pool_metrics().items()}
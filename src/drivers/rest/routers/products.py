@@ -1,10 +1,20 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Query, Response, status, HTTPException
 
 from drivers.rest.dependencies import get_products_services, validate_id_input
-from drivers.rest.schemas.products import ProductModel, ProductPatchRequestModel
-from services import ProductService
+from drivers.rest.schemas.products import (
+    ProductModel,
+    ProductPatchRequestModel,
+    ProductSearchModel,
+)
+from drivers.rest.pagination import (
+    Pagination,
+    get_pagination,
+    ndjson_response,
+    page_response,
+)
+from services.aio import AsyncProductService
 
 __all__ = ["router"]
 
@@ -13,17 +23,39 @@ router = APIRouter(prefix="/products")
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_all_products(
-    service: Annotated[ProductService, Depends(get_products_services)]
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
 ) -> list[ProductModel]:
-    return service.find_all()
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id))
+
+    models = await service.find_page(pagination.after_id, pagination.limit)
+
+    return page_response(response, models, pagination)
+
+
+@router.get("/search", status_code=status.HTTP_200_OK)
+async def search_products(
+    q: Annotated[str, Query(min_length=2, max_length=200)],
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[ProductSearchModel]:
+    """Search the products by description, the best matches first
+
+    Matches the words of `q` or their prefixes, ignoring case and accents, similar
+    descriptions such as "LEITE INT UHT 1L" for "leite integral uht", and codes.
+    """
+
+    return await service.search(q, limit)
 
 
 @router.get("/{id}", status_code=status.HTTP_200_OK)
 async def get_product(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[ProductService, Depends(get_products_services)],
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
 ) -> None:
-    product = service.find_by_id(id)
+    product = await service.find_by_id(id)
 
     return product
 
@@ -32,19 +64,19 @@ async def get_product(
 async def update_product(
     id: Annotated[int, Depends(validate_id_input)],
     product: ProductPatchRequestModel,
-    service: Annotated[ProductService, Depends(get_products_services)],
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
 ) -> None:
 
-    service.update(id, product)
+    await service.update(id, product)
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_product(
     product: ProductPatchRequestModel,
-    service: Annotated[ProductService, Depends(get_products_services)],
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
 ) -> ProductModel:
 
-    model = service.save(product)
+    model = await service.save(product)
 
     return model
 
@@ -52,7 +84,7 @@ async def create_product(
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_product(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[ProductService, Depends(get_products_services)],
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
 ) -> None:
     """Delete a product by it's ID
 
@@ -60,13 +92,13 @@ async def delete_product(
         id (int): The product ID
     """
 
-    service.delete(id)
+    await service.delete(id)
 
 
 @router.get("/code/{code}", status_code=status.HTTP_200_OK)
 async def get_product_by_code(
     code: str,
-    service: Annotated[ProductService, Depends(get_products_services)],
+    service: Annotated[AsyncProductService, Depends(get_products_services)],
 ) -> ProductModel:
 
     if code == "":
@@ -75,6 +107,6 @@ async def get_product_by_code(
             detail="Código do produto é obrigatório",
         )
 
-    products = service.find_by_code(code=code)
+    products = await service.find_by_code(code=code)
 
     return products
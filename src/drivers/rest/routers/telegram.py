@@ -0,0 +1,45 @@
+import hmac
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, status
+from telebot.async_telebot import AsyncTeleBot
+from telebot.types import Update
+
+from drivers.rest.dependencies import get_telegram_bot
+from settings.environment import EnvironmentSettings, get_environment_variables
+
+__all__ = ["router"]
+
+router = APIRouter(prefix="/telegram")
+
+
+def validate_secret_token(
+    env: Annotated[EnvironmentSettings, Depends(get_environment_variables)],
+    x_telegram_bot_api_secret_token: Annotated[str, Header()] = "",
+) -> None:
+    secret = env.TELEGRAM_WEBHOOK_SECRET
+
+    if secret and not hmac.compare_digest(x_telegram_bot_api_secret_token, secret):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token secreto inválido.",
+        )
+
+
+@router.post(
+    "/webhook",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(validate_secret_token)],
+    include_in_schema=False,
+)
+async def telegram_webhook(
+    update: Annotated[dict[str, Any], Body()],
+    bot: Annotated[AsyncTeleBot, Depends(get_telegram_bot)],
+) -> None:
+    """Receive an update sent by Telegram to the webhook of the bot
+
+    The handlers only enqueue the invoices, so the update is answered right away
+    and Telegram does not send it again.
+    """
+
+    await bot.process_new_updates([Update.de_json(update)])
@@ -1,14 +1,27 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 
-from drivers.rest.dependencies import get_users_services, validate_id_input
+from drivers.rest.dependencies import (
+    DateRange,
+    get_period,
+    get_users_services,
+    validate_id_input,
+)
 from drivers.rest.schemas.users import (
     UserModel,
     UserPatchRequestModel,
     UserPostRequestModel,
+    UserSummaryModel,
+)
+from drivers.rest.pagination import (
+    Pagination,
+    get_pagination,
+    ndjson_response,
+    page_response,
 )
-from services import UserService
+from services.aio import AsyncUserService
+from services.summary import Period
 
 __all__ = ["router"]
 
@@ -17,34 +30,57 @@ router = APIRouter(prefix="/users")
 
 @router.get("/", status_code=status.HTTP_200_OK)
 async def get_all_users(
-    username: str, service: Annotated[UserService, Depends(get_users_services)]
+    service: Annotated[AsyncUserService, Depends(get_users_services)],
+    pagination: Annotated[Pagination, Depends(get_pagination)],
+    response: Response,
+    username: str | None = None,
 ) -> list[UserModel] | UserModel:
 
     if username:
-        user = service.find_by_username(username)
+        user = await service.find_by_username(username)
 
         return user
 
-    return service.find_all()
+    if pagination.stream:
+        return ndjson_response(service.stream(pagination.after_id))
+
+    models = await service.find_page(pagination.after_id, pagination.limit)
+
+    return page_response(response, models, pagination)
 
 
 @router.get("/{id}", status_code=status.HTTP_200_OK)
 async def get_user(
     id: int,
-    service: Annotated[UserService, Depends(get_users_services)],
+    service: Annotated[AsyncUserService, Depends(get_users_services)],
 ) -> UserModel:
-    user = service.find_by_id(id)
+    user = await service.find_by_id(id)
 
     return user
 
 
+@router.get("/{id}/summary", status_code=status.HTTP_200_OK)
+async def get_user_summary(
+    id: Annotated[int, Depends(validate_id_input)],
+    service: Annotated[AsyncUserService, Depends(get_users_services)],
+    dates: Annotated[DateRange, Depends(get_period)],
+    period: Period = "month",
+) -> UserSummaryModel:
+    """Spending and taxes of a user in total, per store and per period
+
+    Invoices are filtered by their issue date, between `start` and `end` inclusive.
+    """
+
+    return await service.summary(id, dates.start, dates.end, period)
+
+
 @router.patch("/{id}", status_code=status.HTTP_200_OK)
 async def update_user(
     id: Annotated[int, Depends(validate_id_input)],
     user: UserPatchRequestModel,
-    service: Annotated[UserService, Depends(get_users_services)],
+    service: Annotated[AsyncUserService, Depends(get_users_services)],
 ) -> None:
-    service.update(id, user)
+    await service.update(id, user)
 
     return user
 
@@ -52,16 +88,16 @@ async def update_user(
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_user(
     user: UserPostRequestModel,
-    service: Annotated[UserService, Depends(get_users_services)],
+    service: Annotated[AsyncUserService, Depends(get_users_services)],
 ) -> UserModel:
-    model = service.save(user)
+    model = await service.save(user)
     return model
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_user(
     id: Annotated[int, Depends(validate_id_input)],
-    service: Annotated[UserService, Depends(get_users_services)],
+    service: Annotated[AsyncUserService, Depends(get_users_services)],
 ) -> None:
     """Delete a user by it's ID
 
@@ -69,4 +105,4 @@ async def delete_user(
         id (int): The user ID
     """
 
-    service.delete(id)
+    await service.delete(id)
@@ -0,0 +1,29 @@
+from datetime import date
+
+from pydantic import BaseModel
+
+
+class DailyPriceModel(BaseModel):
+    day: date
+    min_price: float
+    max_price: float
+    average_price: float
+    quantity: float
+    count: int
+    product_id: int | None = None
+    product_description: str | None = None
+
+
+class StorePriceModel(BaseModel):
+    company_id: int
+    company_name: str
+    day: date
+    average_price: float
+    min_price: float
+
+
+class MonthlySpendingModel(BaseModel):
+    month: date
+    total: float
+    invoices: int
+    items: int
@@ -2,6 +2,10 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from .companies import CompanyModel
+from .items import ItemModel
+from .users import UserModel
+
 
 class InvoicePatchRequestModel(BaseModel):
     access_key: str
@@ -25,3 +29,10 @@ class InvoiceModel(InvoicePostRequestModel):
     id: int
 
     created_on: datetime = datetime.now()
+
+
+class InvoiceFullModel(InvoiceModel):
+    company: CompanyModel | None = None
+    user: UserModel | None = None
+    items: list[ItemModel] = []
+    total: float = 0.0
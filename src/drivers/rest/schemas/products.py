@@ -10,3 +10,7 @@ class ProductPatchRequestModel(BaseModel):
 class ProductModel(ProductPatchRequestModel):
     id: int
     created_on: datetime = datetime.now()
+
+
+class ProductSearchModel(ProductModel):
+    score: float
@@ -0,0 +1,69 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel, Field
+
+
+class ReceiptInvoiceModel(BaseModel):
+    access_key: str = Field(min_length=44, max_length=44, pattern=r"^\d+$")
+    number: str
+    series: str
+    authorization_protocol: str = ""
+    authorization_date: datetime | None = None
+    issue_date: datetime | None = None
+    federal_tax: float = 0.0
+    state_tax: float = 0.0
+    municipal_tax: float = 0.0
+    source_tax: str = ""
+    user_id: int | None = None
+
+
+class ReceiptCompanyModel(BaseModel):
+    name: str
+    cnpj: str = Field(min_length=1)
+    street: str = ""
+    number: str = ""
+    complement: str = ""
+    neighborhood: str = ""
+    city: str = ""
+    state: str = ""
+    zip_code: str = ""
+
+
+class ReceiptItemModel(BaseModel):
+    code: str
+    description: str
+    quantity: float = Field(gt=0)
+    unit_price: float = Field(ge=0)
+    unity_of_measurement: str = ""
+
+
+class ReceiptModel(BaseModel):
+    invoice: ReceiptInvoiceModel
+    company: ReceiptCompanyModel
+    items: list[ReceiptItemModel] = Field(min_length=1)
+
+
+class ReceiptStatus(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+    FAILED = "failed"
+
+
+class ReceiptResultModel(BaseModel):
+    index: int
+    status: ReceiptStatus
+    access_key: str | None = None
+    invoice_id: int | None = None
+    errors: list[str] = []
+
+
+class BulkReceiptsModel(BaseModel):
+    created: int = 0
+    updated: int = 0
+    duplicate: int = 0
+    invalid: int = 0
+    failed: int = 0
+    results: list[ReceiptResultModel] = []
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import date, datetime
 from pydantic import BaseModel
 
 
@@ -14,3 +14,41 @@ class UserPostRequestModel(UserPatchRequestModel):
 class UserModel(UserPostRequestModel):
     id: int
     created_on: datetime = datetime.now()
+
+
+class TaxSummaryModel(BaseModel):
+    federal: float
+    state: float
+    municipal: float
+    total: float
+    share: float
+
+
+class StoreSpendingModel(BaseModel):
+    company_id: int | None
+    company_name: str | None
+    total: float
+    invoices: int
+    items: int
+    share: float
+
+
+class PeriodSpendingModel(BaseModel):
+    start: date
+    total: float
+    invoices: int
+    items: int
+    taxes: float
+
+
+class UserSummaryModel(BaseModel):
+    user_id: int
+    start: date | None = None
+    end: date | None = None
+    total: float = 0.0
+    invoices: int = 0
+    items: int = 0
+    average_invoice: float = 0.0
+    taxes: TaxSummaryModel
+    stores: list[StoreSpendingModel] = []
+    periods: list[PeriodSpendingModel] = []
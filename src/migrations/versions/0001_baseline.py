@@ -0,0 +1,119 @@
+"""Baseline, the tables created by schema.sql before migrations existed
+
+Databases created with the original schema.sql must be stamped instead of
+upgraded, with `alembic stamp 0001`, and then upgraded to the latest revision.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-05-20 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def created_on() -> sa.Column:
+    return sa.Column(
+        "data_criacao",
+        sa.DateTime(),
+        nullable=False,
+        server_default=sa.text("CURRENT_TIMESTAMP"),
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        "usuarios",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("primeiro_nome", sa.String(100), nullable=False),
+        sa.Column("ultimo_nome", sa.String(100), nullable=False),
+        sa.Column("nome_usuario", sa.String(100), nullable=False),
+        created_on(),
+    )
+    op.create_table(
+        "empresas",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("cnpj", sa.String(20), nullable=False),
+        sa.Column("razao_social", sa.Text(), nullable=False),
+        sa.Column("logradouro", sa.Text()),
+        sa.Column("numero", sa.Text()),
+        sa.Column("complemento", sa.Text()),
+        sa.Column("bairro", sa.Text()),
+        sa.Column("municipio", sa.Text()),
+        sa.Column("uf", sa.String(2)),
+        sa.Column("cep", sa.String(10)),
+        created_on(),
+        sa.UniqueConstraint("cnpj", name="empresas_unique"),
+    )
+    op.create_table(
+        "produtos",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("codigo", sa.String(), nullable=False),
+        sa.Column("descricao", sa.Text(), nullable=False),
+        created_on(),
+    )
+    op.create_table(
+        "notas_fiscais",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "id_empresa",
+            sa.BigInteger(),
+            sa.ForeignKey("empresas.id", ondelete="SET NULL", onupdate="CASCADE"),
+        ),
+        sa.Column(
+            "id_usuario",
+            sa.BigInteger(),
+            sa.ForeignKey("usuarios.id", ondelete="SET NULL", onupdate="CASCADE"),
+        ),
+        sa.Column("chave_acesso", sa.String(50), nullable=False),
+        sa.Column("numero", sa.String(), nullable=False),
+        sa.Column("serie", sa.String(), nullable=False),
+        sa.Column("protocolo_autorizacao", sa.String(), nullable=False),
+        sa.Column("data_autorizacao", sa.DateTime()),
+        sa.Column("data_emissao", sa.DateTime()),
+        sa.Column(
+            "tributacao_federal", sa.Numeric(), nullable=False, server_default="0.0"
+        ),
+        sa.Column(
+            "tributacao_estadual", sa.Numeric(), nullable=False, server_default="0.0"
+        ),
+        sa.Column(
+            "tributacao_municipal", sa.Numeric(), nullable=False, server_default="0.0"
+        ),
+        sa.Column("fonte", sa.String()),
+        created_on(),
+    )
+    op.create_table(
+        "itens_nota",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "id_produto",
+            sa.BigInteger(),
+            sa.ForeignKey("produtos.id", ondelete="SET NULL", onupdate="CASCADE"),
+        ),
+        sa.Column(
+            "id_nota_fiscal",
+            sa.BigInteger(),
+            sa.ForeignKey("notas_fiscais.id", ondelete="SET NULL", onupdate="CASCADE"),
+        ),
+        sa.Column("quantidade", sa.Numeric(), server_default="0"),
+        sa.Column("preco_unitario", sa.Numeric(), nullable=False, server_default="0.0"),
+        sa.Column("unidade_medida", sa.String()),
+        created_on(),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("itens_nota")
+    op.drop_table("notas_fiscais")
+    op.drop_table("produtos")
+    op.drop_table("empresas")
+    op.drop_table("usuarios")
@@ -0,0 +1,42 @@
+"""Turn the bigserial foreign keys into nullable bigint columns
+
+schema.sql declared the foreign keys as bigserial, which made them NOT NULL with
+a sequence default, so invoices without an user could not be saved and
+ON DELETE SET NULL failed.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-05-20 10:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEYS = [
+    ("notas_fiscais", "id_empresa"),
+    ("notas_fiscais", "id_usuario"),
+    ("itens_nota", "id_produto"),
+    ("itens_nota", "id_nota_fiscal"),
+]
+
+
+def upgrade() -> None:
+    for table, column in FOREIGN_KEYS:
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT, "
+            f"ALTER COLUMN {column} DROP NOT NULL"
+        )
+        op.execute(f"DROP SEQUENCE IF EXISTS {table}_{column}_seq")
+
+
+def downgrade() -> None:
+    # The sequences are not restored, the columns only become mandatory again
+    for table, column in FOREIGN_KEYS:
+        op.alter_column(table, column, nullable=False)
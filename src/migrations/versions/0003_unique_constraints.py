@@ -0,0 +1,85 @@
+"""Unique access key, product (code, description) and item (invoice, product)
+
+Duplicates created before the constraints existed are merged into the oldest row.
+Items of the same product in an invoice are merged summing their quantities, as the
+ingestion does, while the items of an invoice saved twice are only copies.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-05-20 10:20:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DELETE_DUPLICATED_ITEMS = """
+    DELETE FROM itens_nota AS i USING itens_nota AS o
+    WHERE i.id_nota_fiscal = o.id_nota_fiscal
+        AND i.id_produto = o.id_produto
+        AND i.id > o.id
+    """
+
+
+def upgrade() -> None:
+    # Point items to the oldest of the duplicated products and invoices
+    op.execute("""
+        UPDATE itens_nota AS i SET id_produto = d.id_original
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY codigo, descricao) AS id_original
+            FROM produtos
+        ) AS d
+        WHERE i.id_produto = d.id AND d.id <> d.id_original
+        """)
+    # The oldest item of a product in an invoice gets the quantities of the others
+    op.execute("""
+        UPDATE itens_nota AS i SET quantidade = d.quantidade
+        FROM (
+            SELECT MIN(id) AS id, SUM(quantidade) AS quantidade
+            FROM itens_nota
+            GROUP BY id_nota_fiscal, id_produto
+            HAVING COUNT(*) > 1
+        ) AS d
+        WHERE i.id = d.id
+        """)
+    op.execute(DELETE_DUPLICATED_ITEMS)
+    op.execute("""
+        DELETE FROM produtos AS p USING produtos AS o
+        WHERE p.codigo = o.codigo AND p.descricao = o.descricao AND p.id > o.id
+        """)
+    op.execute("""
+        UPDATE itens_nota AS i SET id_nota_fiscal = d.id_original
+        FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY chave_acesso) AS id_original
+            FROM notas_fiscais
+        ) AS d
+        WHERE i.id_nota_fiscal = d.id AND d.id <> d.id_original
+        """)
+    op.execute("""
+        DELETE FROM notas_fiscais AS n USING notas_fiscais AS o
+        WHERE n.chave_acesso = o.chave_acesso AND n.id > o.id
+        """)
+    # Items left duplicated are copies from the invoices saved more than once
+    op.execute(DELETE_DUPLICATED_ITEMS)
+
+    op.create_unique_constraint(
+        "notas_fiscais_chave_acesso_unique", "notas_fiscais", ["chave_acesso"]
+    )
+    op.create_unique_constraint(
+        "produtos_codigo_descricao_unique", "produtos", ["codigo", "descricao"]
+    )
+    op.create_unique_constraint(
+        "itens_nota_nota_produto_unique", "itens_nota", ["id_nota_fiscal", "id_produto"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("itens_nota_nota_produto_unique", "itens_nota")
+    op.drop_constraint("produtos_codigo_descricao_unique", "produtos")
+    op.drop_constraint("notas_fiscais_chave_acesso_unique", "notas_fiscais")
@@ -0,0 +1,46 @@
+"""Indexes for the columns the repositories and routes filter on
+
+The access key, the invoice of an item and the product code are already covered
+by the unique constraints of 0003, as their leading column. The indexes are built concurrently, without locking the
+tables against writes.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-05-20 10:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_notas_fiscais_id_empresa", "notas_fiscais", ["id_empresa"]),
+    ("ix_notas_fiscais_id_usuario", "notas_fiscais", ["id_usuario"]),
+    ("ix_itens_nota_id_produto", "itens_nota", ["id_produto"]),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in INDEXES:
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True, if_exists=True
+            )
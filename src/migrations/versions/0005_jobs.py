@@ -0,0 +1,64 @@
+"""Job queue of the invoices sent to the Telegram bot
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-05-27 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tarefas",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column("id_chat", sa.BigInteger(), nullable=True),
+        sa.Column("origem", sa.Text(), nullable=True),
+        sa.Column("situacao", sa.String(), nullable=False, server_default="pending"),
+        sa.Column("tentativas", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_tentativas", sa.Integer(), nullable=False, server_default="3"),
+        sa.Column("ultimo_erro", sa.Text(), nullable=True),
+        sa.Column(
+            "id_nota_fiscal",
+            sa.BigInteger(),
+            sa.ForeignKey("notas_fiscais.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+        # In UTC, set by the workers
+        sa.Column("executar_em", sa.DateTime(), nullable=False),
+        sa.Column("bloqueada_em", sa.DateTime(), nullable=True),
+        sa.Column(
+            "data_criacao",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+        sa.Column(
+            "data_atualizacao",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+        ),
+    )
+    op.create_index("ix_tarefas_id_chat", "tarefas", ["id_chat"])
+    op.create_index(
+        "ix_tarefas_pendentes",
+        "tarefas",
+        ["executar_em"],
+        postgresql_where=sa.text("situacao = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tarefas_pendentes", table_name="tarefas")
+    op.drop_index("ix_tarefas_id_chat", table_name="tarefas")
+    op.drop_table("tarefas")
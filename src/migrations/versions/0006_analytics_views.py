@@ -0,0 +1,68 @@
+"""Materialized views of the daily prices and the monthly spending
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-06-03 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE MATERIALIZED VIEW precos_diarios AS
+        SELECT
+            i.id_produto,
+            n.id_empresa,
+            n.data_emissao::date AS dia,
+            min(i.preco_unitario)::float AS preco_minimo,
+            max(i.preco_unitario)::float AS preco_maximo,
+            (sum(i.preco_unitario * i.quantidade) / nullif(sum(i.quantidade), 0))::float
+                AS preco_medio,
+            sum(i.quantidade)::float AS quantidade,
+            count(*) AS ocorrencias
+        FROM itens_nota i
+        JOIN notas_fiscais n ON n.id = i.id_nota_fiscal
+        WHERE i.id_produto IS NOT NULL
+            AND n.id_empresa IS NOT NULL
+            AND n.data_emissao IS NOT NULL
+        GROUP BY i.id_produto, n.id_empresa, n.data_emissao::date
+        """)
+    # A unique index is required to refresh the view concurrently
+    op.execute(
+        "CREATE UNIQUE INDEX ux_precos_diarios "
+        "ON precos_diarios (id_produto, id_empresa, dia)"
+    )
+    op.execute(
+        "CREATE INDEX ix_precos_diarios_empresa "
+        "ON precos_diarios (id_empresa, id_produto, dia)"
+    )
+    op.execute("""
+        CREATE MATERIALIZED VIEW gastos_mensais AS
+        SELECT
+            n.id_usuario,
+            date_trunc('month', n.data_emissao)::date AS mes,
+            sum(i.preco_unitario * i.quantidade)::float AS total,
+            count(DISTINCT n.id) AS notas,
+            count(*) AS itens
+        FROM notas_fiscais n
+        JOIN itens_nota i ON i.id_nota_fiscal = n.id
+        WHERE n.id_usuario IS NOT NULL AND n.data_emissao IS NOT NULL
+        GROUP BY n.id_usuario, date_trunc('month', n.data_emissao)::date
+        """)
+    op.execute(
+        "CREATE UNIQUE INDEX ux_gastos_mensais ON gastos_mensais (id_usuario, mes)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW gastos_mensais")
+    op.execute("DROP MATERIALIZED VIEW precos_diarios")
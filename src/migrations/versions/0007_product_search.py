@@ -0,0 +1,55 @@
+"""Full text and trigram indexes to search the products by description
+
+Descriptions are searched lowercased and without accents, by the immutable
+normalizar_busca function, which indexes require. The indexes are built
+concurrently, without locking the products against writes.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-06-10 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = {
+    "ix_produtos_busca_texto": (
+        "gin (to_tsvector('portuguese'::regconfig, normalizar_busca(descricao)))"
+    ),
+    "ix_produtos_busca_trigramas": "gin (normalizar_busca(descricao) gin_trgm_ops)",
+}
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent is only stable, as its dictionary could change, the dictionary is
+    # given explicitly so that the function can be declared immutable
+    op.execute("""
+        CREATE OR REPLACE FUNCTION normalizar_busca(texto text) RETURNS text
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+        AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, texto)) $$
+        """)
+
+    with op.get_context().autocommit_block():
+        for name, definition in INDEXES.items():
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON produtos USING {definition}"
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name in INDEXES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+    # The extensions are kept, other objects may depend on them
+    op.execute("DROP FUNCTION IF EXISTS normalizar_busca(text)")
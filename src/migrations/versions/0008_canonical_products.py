@@ -0,0 +1,118 @@
+"""Canonical products, the same product sold under different codes or descriptions
+
+The daily prices view is created again with the canonical product of each row, so
+that the prices of every product of a canonical one are queried together.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-06-17 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DAILY_PRICES = """
+    CREATE MATERIALIZED VIEW precos_diarios AS
+    SELECT
+        i.id_produto,
+        {canonical}
+        n.id_empresa,
+        n.data_emissao::date AS dia,
+        min(i.preco_unitario)::float AS preco_minimo,
+        max(i.preco_unitario)::float AS preco_maximo,
+        (sum(i.preco_unitario * i.quantidade) / nullif(sum(i.quantidade), 0))::float
+            AS preco_medio,
+        sum(i.quantidade)::float AS quantidade,
+        count(*) AS ocorrencias
+    FROM itens_nota i
+    JOIN notas_fiscais n ON n.id = i.id_nota_fiscal
+    {join}
+    WHERE i.id_produto IS NOT NULL
+        AND n.id_empresa IS NOT NULL
+        AND n.data_emissao IS NOT NULL
+    GROUP BY i.id_produto, {canonical} n.id_empresa, n.data_emissao::date
+    """
+
+
+def upgrade() -> None:
+    op.create_table(
+        "produtos_canonicos",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("codigo", sa.String(), nullable=True),
+        sa.Column("chave", sa.Text(), nullable=False),
+        sa.Column("descricao", sa.Text(), nullable=True),
+        sa.Column("data_criacao", sa.DateTime(), nullable=True),
+    )
+    op.create_index(
+        "ux_produtos_canonicos_codigo",
+        "produtos_canonicos",
+        ["codigo"],
+        unique=True,
+        postgresql_where=sa.text("codigo IS NOT NULL"),
+    )
+    op.create_index(
+        "ux_produtos_canonicos_chave",
+        "produtos_canonicos",
+        ["chave"],
+        unique=True,
+        postgresql_where=sa.text("codigo IS NULL"),
+    )
+    # A nullable column without a default does not rewrite the table
+    op.add_column(
+        "produtos",
+        sa.Column(
+            "id_produto_canonico",
+            sa.Integer(),
+            sa.ForeignKey("produtos_canonicos.id", ondelete="SET NULL"),
+            nullable=True,
+        ),
+    )
+    _create_daily_prices(canonical=True)
+
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_produtos_id_produto_canonico "
+            "ON produtos (id_produto_canonico)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_produtos_id_produto_canonico")
+
+    _create_daily_prices(canonical=False)
+    op.drop_column("produtos", "id_produto_canonico")
+    op.drop_table("produtos_canonicos")
+
+
+def _create_daily_prices(canonical: bool) -> None:
+    op.execute("DROP MATERIALIZED VIEW precos_diarios")
+    op.execute(
+        DAILY_PRICES.format(
+            canonical="p.id_produto_canonico," if canonical else "",
+            join="JOIN produtos p ON p.id = i.id_produto" if canonical else "",
+        )
+    )
+    # A unique index is required to refresh the view concurrently
+    op.execute(
+        "CREATE UNIQUE INDEX ux_precos_diarios "
+        "ON precos_diarios (id_produto, id_empresa, dia)"
+    )
+    op.execute(
+        "CREATE INDEX ix_precos_diarios_empresa "
+        "ON precos_diarios (id_empresa, id_produto, dia)"
+    )
+
+    if canonical:
+        op.execute(
+            "CREATE INDEX ix_precos_diarios_canonico "
+            "ON precos_diarios (id_produto_canonico, dia)"
+        )
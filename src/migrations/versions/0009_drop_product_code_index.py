@@ -0,0 +1,29 @@
+"""Drop the index of the product code, created by 0004 before it was removed
+
+The code is the leading column of produtos_codigo_descricao_unique, which serves
+the same lookups, the index only made the writes slower.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2024-06-24 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_produtos_codigo")
+
+
+def downgrade() -> None:
+    # 0004 no longer creates the index, there is nothing to restore
+    pass
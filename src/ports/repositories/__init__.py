@@ -1,8 +1,8 @@
 from abc import ABC
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 from domain import Entity
 
-__all__ = ["Repository"]
+__all__ = ["Repository", "AsyncRepository"]
 
 
 class Repository(ABC):
@@ -19,5 +19,41 @@ class Repository(ABC):
     def find_all(self, **filters: dict[str, Any]) -> list[Entity]:
         pass
 
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[Entity]:
+        pass
+
+    def stream(self, after_id: int = 0, **filters: dict[str, Any]) -> Iterator[Entity]:
+        pass
+
     def update(self, int: id, entity: Entity) -> None:
         pass
+
+
+class AsyncRepository(ABC):
+
+    async def save(self, entity: Entity) -> Entity:
+        pass
+
+    async def delete(self, id: int) -> None:
+        pass
+
+    async def find_by_id(self, id: int) -> Entity:
+        pass
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[Entity]:
+        pass
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[Entity]:
+        pass
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[Entity]:
+        pass
+
+    async def update(self, id: int, entity: Entity) -> None:
+        pass
@@ -1,9 +1,9 @@
 from abc import ABC
-from typing import Any
+from typing import Any, AsyncIterator, Iterator
 
 from pydantic import BaseModel
 
-__all__ = ["Service"]
+__all__ = ["Service", "AsyncService"]
 
 
 class Service(ABC):
@@ -20,5 +20,43 @@ class Service(ABC):
     def find_all(self, **filters: dict[str, Any]) -> list[BaseModel]:
         pass
 
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[BaseModel]:
+        pass
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> Iterator[BaseModel]:
+        pass
+
     def update(self, id: int, model: BaseModel) -> None:
         pass
+
+
+class AsyncService(ABC):
+
+    async def save(self, model: BaseModel) -> BaseModel:
+        pass
+
+    async def delete(self, id: int) -> None:
+        pass
+
+    async def find_by_id(self, id: int) -> BaseModel:
+        pass
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[BaseModel]:
+        pass
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[BaseModel]:
+        pass
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[BaseModel]:
+        pass
+
+    async def update(self, id: int, model: BaseModel) -> None:
+        pass
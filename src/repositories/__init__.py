@@ -1,13 +1,21 @@
+from .analytics import AnalyticsRepository
+from .canonical import CanonicalProductRepository
 from .company import CompanyRepository
+from .export import ExportRepository
 from .invoice import InvoiceRepository
 from .product import ProductRepository
 from .item import ItemRepository
+from .job import JobRepository
 from .user import UserRepository
 
 __all__ = [
+    "AnalyticsRepository",
+    "CanonicalProductRepository",
     "CompanyRepository",
+    "ExportRepository",
     "InvoiceRepository",
     "ProductRepository",
     "ItemRepository",
+    "JobRepository",
     "UserRepository",
 ]
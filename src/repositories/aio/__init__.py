@@ -0,0 +1,23 @@
+from .analytics import AsyncAnalyticsRepository
+from .canonical import AsyncCanonicalProductRepository
+from .company import AsyncCompanyRepository
+from .export import AsyncExportRepository
+from .invoice import AsyncInvoiceRepository
+from .product import AsyncProductRepository
+from .item import AsyncItemRepository
+from .job import AsyncJobRepository
+from .receipt import AsyncReceiptRepository
+from .user import AsyncUserRepository
+
+__all__ = [
+    "AsyncAnalyticsRepository",
+    "AsyncCanonicalProductRepository",
+    "AsyncCompanyRepository",
+    "AsyncExportRepository",
+    "AsyncInvoiceRepository",
+    "AsyncProductRepository",
+    "AsyncItemRepository",
+    "AsyncJobRepository",
+    "AsyncReceiptRepository",
+    "AsyncUserRepository",
+]
@@ -0,0 +1,212 @@
+from datetime import date
+
+from sqlalchemy import ColumnElement, Select, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.schema import CompanySchema, ProductSchema
+from database.views import daily_prices, monthly_spending
+from domain import DailyPrice, MonthlySpending, StorePrice
+from repositories.analytics import (
+    ENTER_QUEUE,
+    LEAVE_QUEUE,
+    REFRESH_LOCK,
+    REFRESH_VIEWS,
+)
+
+__all__ = ["AsyncAnalyticsRepository"]
+
+
+class AsyncAnalyticsRepository:
+    """Prices and spending read from the materialized views, never from the items."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def refresh(self) -> bool:
+        """Refresh every view, after the refresh running, if any, as
+        `AnalyticsRepository.refresh` does."""
+        connection = await self.session.connection()
+
+        try:
+            if not await self.session.scalar(ENTER_QUEUE):
+                await self.session.rollback()
+                return False
+
+            await self.session.execute(REFRESH_LOCK)
+            await self.session.execute(LEAVE_QUEUE)
+
+            for statement in REFRESH_VIEWS:
+                await self.session.execute(statement)
+
+            await self.session.commit()
+        except Exception:
+            await connection.invalidate()
+            await self.session.rollback()
+            raise
+
+        return True
+
+    async def find_product_prices(
+        self,
+        product_id: int,
+        company_id: int = None,
+        start: date = None,
+        end: date = None,
+    ) -> list[DailyPrice]:
+        """Daily prices of a product and of the products with the same canonical
+        product, in every company or in a single one."""
+        prices = daily_prices.c
+        statement = (
+            select(
+                prices.day,
+                func.min(prices.min_price),
+                func.max(prices.max_price),
+                # Weighted by the quantity sold in each company
+                func.sum(prices.average_price * prices.quantity)
+                / func.nullif(func.sum(prices.quantity), 0),
+                func.sum(prices.quantity),
+                func.sum(prices.count),
+            )
+            .where(_same_product(product_id))
+            .group_by(prices.day)
+            .order_by(prices.day)
+        )
+
+        if company_id is not None:
+            statement = statement.where(prices.company_id == company_id)
+
+        rows = await self.session.execute(_between(statement, start, end))
+
+        return [
+            DailyPrice(
+                day=day,
+                min_price=min_price,
+                max_price=max_price,
+                average_price=average_price,
+                quantity=quantity,
+                count=count,
+                product_id=product_id,
+            )
+            for day, min_price, max_price, average_price, quantity, count in rows
+        ]
+
+    async def find_company_prices(
+        self,
+        company_id: int,
+        product_id: int = None,
+        start: date = None,
+        end: date = None,
+    ) -> list[DailyPrice]:
+        """Daily prices of the products sold by a company."""
+        prices = daily_prices.c
+        statement = (
+            select(daily_prices, ProductSchema.description)
+            .join(ProductSchema, ProductSchema.id == prices.product_id)
+            .where(prices.company_id == company_id)
+            .order_by(prices.product_id, prices.day)
+        )
+
+        if product_id is not None:
+            statement = statement.where(prices.product_id == product_id)
+
+        rows = await self.session.execute(_between(statement, start, end))
+
+        return [
+            DailyPrice(
+                day=row.day,
+                min_price=row.min_price,
+                max_price=row.max_price,
+                average_price=row.average_price,
+                quantity=row.quantity,
+                count=row.count,
+                product_id=row.product_id,
+                product_description=row.description,
+            )
+            for row in rows
+        ]
+
+    async def find_cheapest_companies(
+        self, product_id: int, since: date, limit: int = 10
+    ) -> list[StorePrice]:
+        """Companies ordered by the last price of the product, or of the products with
+        the same canonical product, since a day."""
+        prices = daily_prices.c
+        latest = (
+            select(prices.company_id, func.max(prices.day).label("day"))
+            .where(_same_product(product_id), prices.day >= since)
+            .group_by(prices.company_id)
+            .subquery()
+        )
+        average_price = func.sum(prices.average_price * prices.quantity) / func.nullif(
+            func.sum(prices.quantity), 0
+        )
+        statement = (
+            select(
+                prices.company_id,
+                CompanySchema.name,
+                prices.day,
+                average_price,
+                func.min(prices.min_price),
+            )
+            .join(
+                latest,
+                (latest.c.company_id == prices.company_id)
+                & (latest.c.day == prices.day),
+            )
+            .join(CompanySchema, CompanySchema.id == prices.company_id)
+            .where(_same_product(product_id))
+            .group_by(prices.company_id, CompanySchema.name, prices.day)
+            .order_by(average_price, prices.company_id)
+            .limit(limit)
+        )
+        rows = await self.session.execute(statement)
+
+        return [StorePrice(*row) for row in rows]
+
+    async def find_monthly_spending(
+        self, user_id: int, start: date = None, end: date = None
+    ) -> list[MonthlySpending]:
+        spending = monthly_spending.c
+        statement = (
+            select(
+                spending.month,
+                spending.total,
+                spending.invoice_count,
+                spending.item_count,
+            )
+            .where(spending.user_id == user_id)
+            .order_by(spending.month)
+        )
+
+        if start is not None:
+            statement = statement.where(spending.month >= start.replace(day=1))
+        if end is not None:
+            statement = statement.where(spending.month <= end)
+
+        rows = await self.session.execute(statement)
+
+        return [MonthlySpending(*row) for row in rows]
+
+
+def _same_product(product_id: int) -> ColumnElement[bool]:
+    # Rows of the products without a canonical product have a null canonical id,
+    # which equals nothing
+    canonical_id = (
+        select(ProductSchema.canonical_id)
+        .where(ProductSchema.id == product_id)
+        .scalar_subquery()
+    )
+
+    return or_(
+        daily_prices.c.product_id == product_id,
+        daily_prices.c.canonical_id == canonical_id,
+    )
+
+
+def _between(statement: Select, start: date = None, end: date = None) -> Select:
+    if start is not None:
+        statement = statement.where(daily_prices.c.day >= start)
+    if end is not None:
+        statement = statement.where(daily_prices.c.day <= end)
+
+    return statement
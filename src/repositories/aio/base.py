@@ -0,0 +1,83 @@
+from typing import Any, AsyncIterator, Callable
+
+from sqlalchemy import Select, delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from domain import Entity
+from ports.repositories import AsyncRepository
+
+__all__ = ["SchemaRepository"]
+
+
+class SchemaRepository(AsyncRepository):
+    """Asynchronous queries shared by the repositories of a single table.
+
+    Subclasses set the mapped `schema`, the function converting its rows into
+    entities and the loader `options` needed by that function.
+    """
+
+    schema: type = None
+    to_entity: Callable[[Any], Entity] = None
+    options: tuple = ()
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def delete(self, id: int) -> None:
+        await self.session.execute(delete(self.schema).where(self.schema.id == id))
+        await self.session.commit()
+
+    async def find_by_id(self, id: int) -> Entity:
+        row = await self.session.get(self.schema, id, options=self.options)
+
+        return self.to_entity(row) if row else None
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[Entity]:
+        rows = await self.session.scalars(self._select(**filters))
+
+        return [self.to_entity(row) for row in rows]
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[Entity]:
+        """Find up to `limit` entities with an id greater than `after_id`, ordered by id."""
+        statement = self._select(after_id, **filters).limit(limit)
+        rows = await self.session.scalars(statement)
+
+        return [self.to_entity(row) for row in rows]
+
+    async def stream(
+        self, after_id: int = 0, batch_size: int = 1000, **filters: dict[str, Any]
+    ) -> AsyncIterator[Entity]:
+        """Iterate over the entities with an id greater than `after_id`, ordered by id.
+
+        Rows are fetched `batch_size` at a time from a server side cursor, in a session
+        of its own, which is closed when the iteration ends.
+        """
+        statement = self._select(after_id, **filters)
+        statement = statement.execution_options(yield_per=batch_size)
+
+        async with AsyncSession(self.session.bind) as session:
+            async for row in await session.stream_scalars(statement):
+                yield self.to_entity(row)
+
+    async def _add(self, row: Any) -> Any:
+        """Insert a row and commit, rolling back if a constraint is violated."""
+        self.session.add(row)
+
+        try:
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+
+        return row
+
+    def _select(self, after_id: int = None, **filters: dict[str, Any]) -> Select:
+        statement = select(self.schema).options(*self.options).filter_by(**filters)
+
+        if after_id is None:
+            return statement
+
+        return statement.where(self.schema.id > after_id).order_by(self.schema.id)
@@ -0,0 +1,37 @@
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from canonical import CanonicalProduct, ProductRecord
+from repositories.canonical import assign_statement, assignments, canonical_statements
+
+__all__ = ["AsyncCanonicalProductRepository"]
+
+
+class AsyncCanonicalProductRepository:
+    """Assigns the canonical products of the products as they are saved."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def assign(self, records: Iterable[ProductRecord]) -> int:
+        """Assign the products without a canonical product, without committing them."""
+        records = list(records)
+        ids = {}
+
+        for inserts, lookup in canonical_statements(
+            CanonicalProduct.of(record.code, record.description) for record in records
+        ):
+            for statement in inserts:
+                await self.session.execute(statement)
+
+            for id, code, key in await self.session.execute(lookup):
+                ids[(code, "") if code else ("", key)] = id
+
+        rows = assignments(records, ids)
+
+        if rows:
+            connection = await self.session.connection()
+            await connection.execute(assign_statement(), rows)
+
+        return len(rows)
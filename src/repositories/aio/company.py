@@ -0,0 +1,23 @@
+from database.schema import CompanySchema
+from domain import Company
+from repositories.mappers import to_company_entity, to_company_schema
+from .base import SchemaRepository
+
+__all__ = ["AsyncCompanyRepository"]
+
+
+class AsyncCompanyRepository(SchemaRepository):
+    schema = CompanySchema
+    to_entity = staticmethod(to_company_entity)
+
+    async def save(self, entity: Company) -> Company:
+        company = await self._add(to_company_schema(entity))
+
+        return to_company_entity(company)
+
+    async def update(self, id: int, company: Company) -> None:
+        schema = to_company_schema(company)
+        schema.id = id
+
+        await self.session.merge(schema)
+        await self.session.commit()
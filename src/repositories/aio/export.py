@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from repositories.export import Export
+
+__all__ = ["AsyncExportRepository"]
+
+
+class AsyncExportRepository:
+    """Reads whole tables in chunks from a server side cursor, whatever their size."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def batches(
+        self,
+        export: Export,
+        since: datetime = None,
+        chunk_size: int = 50_000,
+        until: datetime = None,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Iterate over the rows created after `since` and up to `until`, `chunk_size` at a time.
+
+        Rows are read in a session of its own, which is closed when the iteration
+        ends, so that they can be streamed after the request session is closed.
+        """
+        async with AsyncSession(self.session.bind) as session:
+            result = await session.stream(export.query(since, chunk_size, until))
+
+            async for rows in result.partitions():
+                yield rows
@@ -0,0 +1,48 @@
+from typing import Any
+from database.schema import InvoiceSchema
+from domain import EletronicInvoice
+from repositories.mappers import (
+    to_full_invoice_entity,
+    to_invoice_entity,
+    to_invoice_schema,
+)
+from repositories.statements import select_full_invoices
+from scrapers.utils import to_database_time
+from .base import SchemaRepository
+
+__all__ = ["AsyncInvoiceRepository"]
+
+
+class AsyncInvoiceRepository(SchemaRepository):
+    schema = InvoiceSchema
+    to_entity = staticmethod(to_invoice_entity)
+
+    async def save(self, entity: EletronicInvoice) -> EletronicInvoice:
+        invoice = await self._add(to_invoice_schema(entity))
+
+        return to_invoice_entity(invoice)
+
+    async def find_full(self, **filters: dict[str, Any]) -> EletronicInvoice:
+        """Find an invoice with its company, user, items and products, in two queries."""
+        invoices = await self.session.scalars(select_full_invoices(**filters))
+        invoice = invoices.first()
+
+        return to_full_invoice_entity(invoice) if invoice else None
+
+    async def update(self, id: int, entity: EletronicInvoice) -> None:
+        invoice = InvoiceSchema(
+            id=id,
+            access_key=entity.access_key,
+            number=entity.number,
+            series=entity.series,
+            issue_date=to_database_time(entity.issue_date),
+            authorization_protocol=entity.authorization_protocol,
+            authorization_date=to_database_time(entity.authorization_date),
+            federal_tax=entity.taxes.federal,
+            state_tax=entity.taxes.state,
+            city_tax=entity.taxes.municipal,
+            source=entity.taxes.source,
+        )
+
+        await self.session.merge(invoice)
+        await self.session.commit()
@@ -0,0 +1,40 @@
+from sqlalchemy.orm import joinedload
+
+from database.schema import ItemSchema
+from domain import Item
+from repositories.mappers import to_item_entity
+from .base import SchemaRepository
+
+__all__ = ["AsyncItemRepository"]
+
+
+class AsyncItemRepository(SchemaRepository):
+    schema = ItemSchema
+    to_entity = staticmethod(to_item_entity)
+    # Lazy loading is not available to asynchronous sessions
+    options = (joinedload(ItemSchema.product),)
+
+    async def save(self, entity: Item) -> Item:
+        item = await self._add(
+            ItemSchema(
+                product_id=entity.product_id,
+                invoice_id=entity.invoice_id,
+                quantity=entity.quantity,
+                unit_price=entity.unit_price,
+                unity_of_measurement=entity.unity_of_measurement,
+            )
+        )
+        await self.session.refresh(item, ["product"])
+
+        return to_item_entity(item)
+
+    async def update(self, id: int, entity: Item) -> None:
+        item = ItemSchema(
+            id=id,
+            quantity=entity.quantity,
+            unit_price=entity.unit_price,
+            unity_of_measurement=entity.unity_of_measurement,
+        )
+
+        await self.session.merge(item)
+        await self.session.commit()
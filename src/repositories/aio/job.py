@@ -0,0 +1,53 @@
+from sqlalchemy import select
+
+from database.schema import JobSchema
+from domain import Job, JobStatus
+from repositories.job import utcnow
+from repositories.mappers import to_job_entity
+from .base import SchemaRepository
+
+__all__ = ["AsyncJobRepository"]
+
+
+class AsyncJobRepository(SchemaRepository):
+    """Enqueues jobs from the event loop, they are claimed by the workers with the
+    synchronous JobRepository."""
+
+    schema = JobSchema
+    to_entity = staticmethod(to_job_entity)
+
+    async def save(self, entity: Job) -> Job:
+        return (await self.save_all([entity]))[0]
+
+    async def save_all(self, entities: list[Job]) -> list[Job]:
+        """Enqueue the jobs to run now, in a single transaction."""
+        now = utcnow()
+        jobs = [
+            JobSchema(
+                chat_id=entity.chat_id,
+                source=entity.source,
+                status=JobStatus.PENDING.value,
+                attempts=0,
+                max_attempts=entity.max_attempts,
+                run_at=now,
+                created_on=now,
+                updated_on=now,
+            )
+            for entity in entities
+        ]
+
+        self.session.add_all(jobs)
+        await self.session.commit()
+
+        return [to_job_entity(job) for job in jobs]
+
+    async def find_latest(self, chat_id: int, limit: int = 5) -> list[Job]:
+        """Find the last jobs enqueued by a chat, the newest first."""
+        jobs = await self.session.scalars(
+            select(JobSchema)
+            .where(JobSchema.chat_id == chat_id)
+            .order_by(JobSchema.id.desc())
+            .limit(limit)
+        )
+
+        return [to_job_entity(job) for job in jobs]
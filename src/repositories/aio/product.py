@@ -0,0 +1,95 @@
+import re
+from typing import Any
+
+from sqlalchemy import Select, case, func, literal_column, or_, select
+
+from canonical import ProductRecord
+from database.schema import ProductSchema
+from domain import Product, normalize_product_code
+from repositories.mappers import to_product_entity
+from .base import SchemaRepository
+from .canonical import AsyncCanonicalProductRepository
+
+__all__ = ["AsyncProductRepository", "search_terms"]
+
+PORTUGUESE = literal_column("'portuguese'::regconfig")
+
+# Letters and digits only, the operators of a full text query are left out
+WORD = re.compile(r"[^\W_]+")
+
+
+class AsyncProductRepository(SchemaRepository):
+    schema = ProductSchema
+    to_entity = staticmethod(to_product_entity)
+
+    async def save(self, entity: Product) -> Product:
+        """Insert a product with its canonical product, in a single transaction."""
+        product = ProductSchema(code=entity.code, description=entity.description)
+        self.session.add(product)
+
+        try:
+            await self.session.flush()
+            await AsyncCanonicalProductRepository(self.session).assign(
+                [ProductRecord(product.id, product.code, product.description)]
+            )
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        return to_product_entity(product)
+
+    async def update(self, id: int, entity: Product) -> None:
+        product = ProductSchema(id=id, code=entity.code, description=entity.description)
+
+        await self.session.merge(product)
+        await self.session.commit()
+
+    def _select(self, after_id: int = None, **filters: dict[str, Any]) -> Select:
+        # Codes are looked up as stored, so that unpadded codes are found
+        if "code" in filters:
+            filters["code"] = normalize_product_code(filters["code"])
+
+        return super()._select(after_id, **filters)
+
+    async def search(self, query: str, limit: int = 20) -> list[tuple[Product, float]]:
+        """Find the products whose description matches the words of the query, or
+        their prefixes, or is similar to it, the best matches first.
+
+        Uses the full text and trigram indexes of the descriptions, created by the
+        migrations on Postgres.
+        """
+        terms = search_terms(query)
+        normalized = func.normalizar_busca(query)
+        description = func.normalizar_busca(ProductSchema.description)
+        score = func.word_similarity(normalized, description)
+        # Trigrams of the query found in a word of the description
+        conditions = [normalized.op("<%")(description)]
+
+        if query.strip().isdigit():
+            is_code = ProductSchema.code == normalize_product_code(query)
+            conditions.append(is_code)
+            score = score + case((is_code, 1.0), else_=0.0)
+
+        if terms:
+            vector = func.to_tsvector(PORTUGUESE, description)
+            ts_query = func.to_tsquery(PORTUGUESE, func.normalizar_busca(terms))
+            conditions.append(vector.op("@@")(ts_query))
+            score = score + func.ts_rank_cd(vector, ts_query)
+
+        score = score.label("score")
+        statement = (
+            select(ProductSchema, score)
+            .where(or_(*conditions))
+            .order_by(score.desc(), ProductSchema.id)
+            .limit(limit)
+        )
+        rows = await self.session.execute(statement)
+
+        return [(to_product_entity(product), score) for product, score in rows]
+
+
+def search_terms(query: str) -> str:
+    """Full text query matching descriptions with every word of `query` or a word
+    starting with it, as "leite:* & integr:*"."""
+    return " & ".join(f"{word}:*" for word in WORD.findall(query))
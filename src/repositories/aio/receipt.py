@@ -0,0 +1,355 @@
+from typing import Iterator
+
+from sqlalchemy import delete, func, literal, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from canonical import ProductRecord
+from database.schema import (
+    CompanySchema,
+    InvoiceSchema,
+    ItemSchema,
+    ProductSchema,
+    UserSchema,
+)
+from domain import EletronicInvoice
+from scrapers.utils import to_database_time
+from .canonical import AsyncCanonicalProductRepository
+
+__all__ = ["AsyncReceiptRepository"]
+
+# Postgres accepts at most 32767 parameters in a statement
+MAX_PARAMETERS = 30_000
+
+
+class AsyncReceiptRepository:
+    """Upserts many invoices with their companies, products and items at once.
+
+    Each table is written by a few multi-row statements, whatever the number of
+    invoices, instead of a statement per invoice. Rows are sent sorted by their
+    unique keys, so that concurrent imports lock them in the same order and do not
+    deadlock.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def upsert_all(self, entities: list[EletronicInvoice]) -> list[bool]:
+        """Upsert the invoices in a single transaction, rolled back if any statement fails.
+
+        The items of the invoices that are not in the entities anymore are deleted,
+        and the ids of the entities are filled in place. The entities must not repeat
+        an access key.
+
+        Args:
+            entities (list[EletronicInvoice]): invoices with their company and items
+
+        Returns:
+            list[bool]: whether each invoice was inserted, rather than updated
+        """
+        if not entities:
+            return []
+
+        try:
+            invoices = await self._upsert(entities)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        return [invoices[entity.access_key][1] for entity in entities]
+
+    async def find_user_ids(self, ids: set[int]) -> set[int]:
+        """Find which of the user ids exist, with a query per `MAX_PARAMETERS` ids."""
+        ids = sorted(ids)
+        found = set()
+
+        for start in range(0, len(ids), MAX_PARAMETERS):
+            result = await self.session.scalars(
+                select(UserSchema.id).where(
+                    UserSchema.id.in_(ids[start : start + MAX_PARAMETERS])
+                )
+            )
+            found.update(result)
+
+        return found
+
+    async def _upsert(
+        self, entities: list[EletronicInvoice]
+    ) -> dict[str, tuple[int, bool]]:
+        companies = await self._upsert_companies(entities)
+        for entity in entities:
+            entity.company.id = entity.company_id = companies[entity.company.cnpj]
+
+        invoices = await self._upsert_invoices(entities)
+        for entity in entities:
+            entity.id = invoices[entity.access_key][0]
+
+        products = await self._upsert_products(entities)
+        await AsyncCanonicalProductRepository(self.session).assign(
+            ProductRecord(id, code, description)
+            for (code, description), id in products.items()
+        )
+        for entity in entities:
+            for item in entity.items:
+                item.invoice_id = entity.id
+                item.product.id = item.product_id = products[
+                    (item.product.code, item.product.description)
+                ]
+
+        await self._upsert_items(entities)
+        await self._delete_stale_items(
+            [entity for entity in entities if not invoices[entity.access_key][1]]
+        )
+
+        return invoices
+
+    async def _upsert_companies(
+        self, entities: list[EletronicInvoice]
+    ) -> dict[str, int]:
+        companies = {entity.company.cnpj: entity.company for entity in entities}
+        rows = [
+            {
+                "cnpj": company.cnpj,
+                "name": company.name,
+                "street": company.address.street,
+                "number": company.address.number,
+                "neighborhood": company.address.neighborhood,
+                "city": company.address.city,
+                "state": company.address.state,
+                "complement": company.address.complement,
+                "zip_code": company.address.zip_code,
+            }
+            for _, company in sorted(companies.items())
+        ]
+        ids = {}
+
+        for batch in _batches(rows):
+            statement = insert(CompanySchema).values(batch)
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=[CompanySchema.cnpj],
+                set_={
+                    CompanySchema.name: excluded.razao_social,
+                    CompanySchema.street: excluded.logradouro,
+                    CompanySchema.number: excluded.numero,
+                    CompanySchema.neighborhood: excluded.bairro,
+                    CompanySchema.city: excluded.municipio,
+                    CompanySchema.state: excluded.uf,
+                    CompanySchema.complement: excluded.complemento,
+                    CompanySchema.zip_code: excluded.cep,
+                },
+            ).returning(CompanySchema.id, CompanySchema.cnpj)
+
+            ids.update({cnpj: id for id, cnpj in await self.session.execute(statement)})
+
+        return ids
+
+    async def _upsert_invoices(
+        self, entities: list[EletronicInvoice]
+    ) -> dict[str, tuple[int, bool]]:
+        rows = [
+            {
+                "user_id": entity.user_id or None,
+                "company_id": entity.company_id,
+                "access_key": entity.access_key,
+                "number": entity.number,
+                "series": entity.series,
+                "issue_date": to_database_time(entity.issue_date) or None,
+                "authorization_protocol": entity.authorization_protocol,
+                "authorization_date": to_database_time(entity.authorization_date)
+                or None,
+                "federal_tax": entity.taxes.federal,
+                "state_tax": entity.taxes.state,
+                "city_tax": entity.taxes.municipal,
+                "source": entity.taxes.source,
+            }
+            for entity in sorted(entities, key=lambda entity: entity.access_key)
+        ]
+        connection = await self.session.connection()
+        postgres = connection.dialect.name == "postgresql"
+        ids = {}
+
+        for batch in _batches(rows):
+            existing = set() if postgres else await self._existing_keys(batch)
+            statement = insert(InvoiceSchema).values(batch)
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=[InvoiceSchema.access_key],
+                set_={
+                    # The owner of an existing invoice is kept when none is given
+                    InvoiceSchema.user_id: func.coalesce(
+                        excluded.id_usuario, InvoiceSchema.user_id
+                    ),
+                    InvoiceSchema.company_id: excluded.id_empresa,
+                    InvoiceSchema.number: excluded.numero,
+                    InvoiceSchema.series: excluded.serie,
+                    InvoiceSchema.issue_date: excluded.data_emissao,
+                    InvoiceSchema.authorization_protocol: excluded.protocolo_autorizacao,
+                    InvoiceSchema.authorization_date: excluded.data_autorizacao,
+                    InvoiceSchema.federal_tax: excluded.tributacao_federal,
+                    InvoiceSchema.state_tax: excluded.tributacao_estadual,
+                    InvoiceSchema.city_tax: excluded.tributacao_municipal,
+                    InvoiceSchema.source: excluded.fonte,
+                },
+            ).returning(
+                InvoiceSchema.id,
+                InvoiceSchema.access_key,
+                # xmax is only zero for the rows inserted by the statement
+                (literal_column("xmax = 0") if postgres else literal(None)).label(
+                    "inserted"
+                ),
+            )
+
+            result = await self.session.execute(statement)
+            ids.update(
+                {
+                    key: (id, inserted if postgres else key not in existing)
+                    for id, key, inserted in result
+                }
+            )
+
+        return ids
+
+    async def _existing_keys(self, rows: list[dict]) -> set[str]:
+        # Only Postgres has xmax, other databases read the invoices stored before
+        # the upsert, which is only safe without concurrent imports
+        keys = [row["access_key"] for row in rows]
+        result = await self.session.scalars(
+            select(InvoiceSchema.access_key).where(InvoiceSchema.access_key.in_(keys))
+        )
+
+        return set(result)
+
+    async def _upsert_products(
+        self, entities: list[EletronicInvoice]
+    ) -> dict[tuple[str, str], int]:
+        keys = {
+            (item.product.code, item.product.description)
+            for entity in entities
+            for item in entity.items
+        }
+        rows = [
+            {"code": code, "description": description}
+            for code, description in sorted(keys)
+        ]
+        ids = {}
+
+        for batch in _batches(rows):
+            # Existing rows are left untouched and read back by their keys
+            statement = (
+                insert(ProductSchema)
+                .values(batch)
+                .on_conflict_do_nothing(
+                    index_elements=[ProductSchema.code, ProductSchema.description]
+                )
+                .returning(
+                    ProductSchema.id, ProductSchema.code, ProductSchema.description
+                )
+            )
+
+            result = await self.session.execute(statement)
+            ids.update({(code, description): id for id, code, description in result})
+
+            missing = [
+                (row["code"], row["description"])
+                for row in batch
+                if (row["code"], row["description"]) not in ids
+            ]
+            if missing:
+                result = await self.session.execute(
+                    select(
+                        ProductSchema.id, ProductSchema.code, ProductSchema.description
+                    ).where(
+                        tuple_(ProductSchema.code, ProductSchema.description).in_(
+                            missing
+                        )
+                    )
+                )
+                ids.update(
+                    {(code, description): id for id, code, description in result}
+                )
+
+        return ids
+
+    async def _upsert_items(self, entities: list[EletronicInvoice]) -> None:
+        # An invoice has a single item per product, the quantities of repeated
+        # products are summed, as a pair repeated in a statement would make it fail
+        rows: dict[tuple[int, int], dict] = {}
+
+        for entity in entities:
+            for item in entity.items:
+                key = (item.invoice_id, item.product_id)
+
+                if key in rows:
+                    rows[key]["quantity"] += item.quantity
+                    continue
+
+                rows[key] = {
+                    "invoice_id": item.invoice_id,
+                    "product_id": item.product_id,
+                    "quantity": item.quantity,
+                    "unit_price": item.unit_price,
+                    "unity_of_measurement": item.unity_of_measurement,
+                }
+
+        for batch in _batches([rows[key] for key in sorted(rows)]):
+            statement = insert(ItemSchema).values(batch)
+            excluded = statement.excluded
+            statement = statement.on_conflict_do_update(
+                index_elements=[ItemSchema.invoice_id, ItemSchema.product_id],
+                set_={
+                    ItemSchema.quantity: excluded.quantidade,
+                    ItemSchema.unit_price: excluded.preco_unitario,
+                    ItemSchema.unity_of_measurement: excluded.unidade_medida,
+                },
+            )
+            await self.session.execute(statement)
+
+    async def _delete_stale_items(self, entities: list[EletronicInvoice]) -> None:
+        pairs = [
+            {"invoice_id": entity.id, "product_id": item.product_id}
+            for entity in entities
+            for item in entity.items
+        ]
+        emptied = sorted(entity.id for entity in entities if not entity.items)
+
+        for batch in _batches(pairs, key="invoice_id"):
+            ids = {pair["invoice_id"] for pair in batch}
+            await self.session.execute(
+                delete(ItemSchema).where(
+                    ItemSchema.invoice_id.in_(ids),
+                    tuple_(ItemSchema.invoice_id, ItemSchema.product_id).not_in(
+                        [(pair["invoice_id"], pair["product_id"]) for pair in batch]
+                    ),
+                )
+            )
+
+        # Invoices updated without items have none left
+        for start in range(0, len(emptied), MAX_PARAMETERS):
+            await self.session.execute(
+                delete(ItemSchema).where(
+                    ItemSchema.invoice_id.in_(emptied[start : start + MAX_PARAMETERS])
+                )
+            )
+
+
+def _batches(rows: list[dict], key: str = None) -> Iterator[list[dict]]:
+    """Split the rows so that each statement stays under the parameters limit.
+
+    When `key` is given, rows with the same value of it stay in the same batch.
+    """
+    if not rows:
+        return
+
+    size = max(MAX_PARAMETERS // (len(rows[0]) + 1), 1)
+    batch = []
+
+    for row in rows:
+        if len(batch) >= size and (key is None or row[key] != batch[-1][key]):
+            yield batch
+            batch = []
+
+        batch.append(row)
+
+    yield batch
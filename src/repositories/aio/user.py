@@ -0,0 +1,71 @@
+from datetime import date, timedelta
+from typing import Sequence
+
+from sqlalchemy import Row, select
+
+from database.schema import CompanySchema, InvoiceSchema, ItemSchema, UserSchema
+from domain import User
+from repositories.mappers import to_user_entity
+from .base import SchemaRepository
+
+__all__ = ["AsyncUserRepository"]
+
+
+class AsyncUserRepository(SchemaRepository):
+    schema = UserSchema
+    to_entity = staticmethod(to_user_entity)
+
+    async def save(self, entity: User) -> User:
+        user = await self._add(
+            UserSchema(
+                first_name=entity.first_name,
+                last_name=entity.last_name,
+                username=entity.username,
+            )
+        )
+
+        return to_user_entity(user)
+
+    async def update(self, id: int, entity: User) -> None:
+        user = UserSchema(
+            id=id,
+            first_name=entity.first_name,
+            last_name=entity.last_name,
+        )
+
+        await self.session.merge(user)
+        await self.session.commit()
+
+    async def find_purchases(
+        self, id: int, start: date = None, end: date = None
+    ) -> Sequence[Row]:
+        """Items bought by the user, issued between two days, as rows of invoice id,
+        company id, company name, issue date, quantity, unit price and the federal,
+        state and municipal taxes of the invoice, in a single query."""
+        statement = (
+            select(
+                InvoiceSchema.id,
+                InvoiceSchema.company_id,
+                CompanySchema.name,
+                InvoiceSchema.issue_date,
+                ItemSchema.quantity,
+                ItemSchema.unit_price,
+                InvoiceSchema.federal_tax,
+                InvoiceSchema.state_tax,
+                InvoiceSchema.city_tax,
+            )
+            .join(ItemSchema, ItemSchema.invoice_id == InvoiceSchema.id)
+            .outerjoin(CompanySchema, CompanySchema.id == InvoiceSchema.company_id)
+            .where(InvoiceSchema.user_id == id)
+        )
+
+        if start is not None:
+            statement = statement.where(InvoiceSchema.issue_date >= start)
+        if end is not None:
+            statement = statement.where(
+                InvoiceSchema.issue_date < end + timedelta(days=1)
+            )
+
+        result = await self.session.execute(statement)
+
+        return result.all()
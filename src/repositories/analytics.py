@@ -0,0 +1,69 @@
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.views import MATERIALIZED_VIEWS
+
+__all__ = [
+    "AnalyticsRepository",
+    "ENTER_QUEUE",
+    "LEAVE_QUEUE",
+    "REFRESH_LOCK",
+    "REFRESH_VIEWS",
+]
+
+logger = logging.getLogger(__name__)
+
+# A refresh may miss the changes committed while it runs, so a single refresh waits
+# for it, holding the queue lock. The callers finding the queue taken skip theirs,
+# the queued refresh starts after their changes
+ENTER_QUEUE = text("SELECT pg_try_advisory_lock(hashtext('nfce_analytics_queue'))")
+LEAVE_QUEUE = text("SELECT pg_advisory_unlock(hashtext('nfce_analytics_queue'))")
+# Refreshes run one at a time, the lock is held until the end of the transaction
+REFRESH_LOCK = text("SELECT pg_advisory_xact_lock(hashtext('nfce_analytics'))")
+
+# CONCURRENTLY keeps the views readable while they are refreshed
+REFRESH_VIEWS = [
+    text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+    for view in MATERIALIZED_VIEWS
+]
+
+
+class AnalyticsRepository:
+    """Refreshes the materialized views behind the analytics endpoints."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def refresh(self) -> bool:
+        """Refresh every view, after the refresh running, if any.
+
+        Returns:
+            bool: whether the views were refreshed, rather than left to the refresh
+                already queued
+        """
+        connection = self.session.connection()
+
+        try:
+            if not self.session.scalar(ENTER_QUEUE):
+                logger.info("A refresh of the analytics is already queued")
+                self.session.rollback()
+                return False
+
+            self.session.execute(REFRESH_LOCK)
+            # The changes committed from now on are left to the next refresh
+            self.session.execute(LEAVE_QUEUE)
+
+            for statement in REFRESH_VIEWS:
+                self.session.execute(statement)
+
+            self.session.commit()
+        except Exception:
+            # The queue lock outlives the transaction, closing the connection
+            # releases it
+            connection.invalidate()
+            self.session.rollback()
+            raise
+
+        return True
@@ -0,0 +1,359 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, scoped_session
+
+from domain import Company, Product, normalize_product_code
+from repositories.company import CompanyRepository
+from repositories.product import ProductRepository
+
+__all__ = [
+    "CacheBackend",
+    "LruCache",
+    "CachedCompanyRepository",
+    "CachedProductRepository",
+    "on_commit",
+]
+
+_PENDING = "cache_on_commit"
+
+
+class CacheBackend(ABC):
+    """Key-value store used by the cached repositories.
+
+    Values are domain entities, a backend out of the process, such as Redis, must
+    serialize them.
+    """
+
+    @abstractmethod
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, *keys: Hashable) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> dict[str, int]:
+        raise NotImplementedError
+
+
+class LruCache(CacheBackend):
+    """Thread safe in-process cache, bounded in size and in the age of its entries.
+
+    The least recently used entry is evicted when the cache is full, and entries
+    older than `ttl` seconds are dropped when they are read. Values are shared with
+    every caller, so the entities read from the cache must not be changed.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes a LruCache object.
+
+        Args:
+            max_size (int, optional): Maximum number of entries. Defaults to 10000.
+            ttl (float, optional): Seconds an entry is kept, forever if zero or less. Defaults to 3600.
+            clock (Callable[[], float], optional): Source of the current time. Defaults to time.monotonic.
+        """
+        self.max_size = max(max_size, 1)
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = self.misses = self.evictions = 0
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and entry[0] < self.clock():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        expires_at = self.clock() + self.ttl if self.ttl > 0 else float("inf")
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys: Hashable) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def on_commit(session: Session | scoped_session, callback: Callable[[], None]) -> None:
+    """Run `callback` once the current transaction of the session commits.
+
+    The callback is discarded if the transaction rolls back, so rows that were never
+    committed do not reach the cache.
+    """
+    if isinstance(session, scoped_session):
+        session = session.registry()
+
+    if _PENDING not in session.info:
+        session.info[_PENDING] = []
+        event.listen(session, "after_commit", _run_pending)
+        event.listen(session, "after_soft_rollback", _drop_pending)
+
+    session.info[_PENDING].append(callback)
+
+
+def _run_pending(session: Session) -> None:
+    callbacks, session.info[_PENDING] = session.info[_PENDING], []
+
+    for callback in callbacks:
+        callback()
+
+
+def _drop_pending(session: Session, previous_transaction) -> None:
+    # Savepoints rolling back drop the callbacks too, which only costs cache misses
+    session.info[_PENDING] = []
+
+
+class CachedCompanyRepository(CompanyRepository):
+    """Company repository reading through a cache keyed by id and by CNPJ."""
+
+    def __init__(self, session: Session, cache: CacheBackend):
+        super().__init__(session)
+        self.cache = cache
+
+    def find_by_id(self, id: int) -> Company:
+        company = self.cache.get(("company", "id", id))
+
+        if company is None:
+            company = super().find_by_id(id)
+            self._store(company)
+
+        return company
+
+    def find_by_cnpj(self, cnpj: str) -> Company:
+        """Find the company with the given CNPJ, or None."""
+        company = self.cache.get(("company", "cnpj", cnpj))
+
+        if company is None:
+            companies = super().find_all(cnpj=cnpj)
+            company = companies[0] if companies else None
+            self._store(company)
+
+        return company
+
+    def find_all(self, **filters) -> list[Company]:
+        if filters.keys() == {"cnpj"}:
+            company = self.find_by_cnpj(filters["cnpj"])
+            return [company] if company else []
+
+        return super().find_all(**filters)
+
+    def save(self, entity: Company) -> Company:
+        company = super().save(entity)
+        self._store(company)
+
+        return company
+
+    def upsert(self, entity: Company) -> Company:
+        """Return the cached company with the same CNPJ, or upsert it otherwise.
+
+        A company seldom changes, so one already cached is not updated until its
+        entry expires. The upserted company is cached once the transaction commits.
+        """
+        company = self.cache.get(("company", "cnpj", entity.cnpj))
+
+        if company is None:
+            company = super().upsert(entity)
+            on_commit(self.session, lambda: self._store(company))
+
+        return company
+
+    def update(self, id: int, company: Company) -> None:
+        keys = self._keys(id, company.cnpj)
+        super().update(id, company)
+        self.cache.delete(*keys)
+
+    def delete(self, id: int) -> None:
+        keys = self._keys(id)
+        super().delete(id)
+        self.cache.delete(*keys)
+
+    def _store(self, company: Company | None) -> None:
+        if company is None:
+            return
+
+        self.cache.set(("company", "id", company.id), company)
+        self.cache.set(("company", "cnpj", company.cnpj), company)
+
+    def _keys(self, id: int, cnpj: str = None) -> list[tuple]:
+        """Keys of the company, under its current and its new CNPJ."""
+        current = self.cache.get(("company", "id", id)) or super().find_by_id(id)
+        cnpjs = {cnpj, current.cnpj if current else None} - {None}
+
+        return [("company", "id", id)] + [("company", "cnpj", cnpj) for cnpj in cnpjs]
+
+
+class CachedProductRepository(ProductRepository):
+    """Product repository reading through a cache keyed by id, by code and by
+    (code, description) pair."""
+
+    def __init__(self, session: Session, cache: CacheBackend):
+        super().__init__(session)
+        self.cache = cache
+
+    def find_by_id(self, id: int) -> Product:
+        product = self.cache.get(("product", "id", id))
+
+        if product is None:
+            product = super().find_by_id(id)
+
+            if product is not None:
+                self._store(product)
+
+        return product
+
+    def find_all(self, **filters) -> list[Product]:
+        if filters.keys() != {"code"}:
+            return super().find_all(**filters)
+
+        # Codes are cached as stored, so that saving a product invalidates every
+        # lookup of its code
+        code = normalize_product_code(filters["code"])
+        key = ("product", "code", code)
+        products = self.cache.get(key)
+
+        if products is None:
+            products = super().find_all(code=code)
+            self.cache.set(key, products)
+
+        return products
+
+    def find_all_by_keys(self, keys: list[tuple[str, str]]) -> list[Product]:
+        products, missing = self._lookup(keys)
+        found = super().find_all_by_keys(missing)
+
+        for product in found:
+            self._store(product)
+
+        return products + found
+
+    def save(self, entity: Product) -> Product:
+        product = super().save(entity)
+        self._store(product, new=True)
+
+        return product
+
+    def upsert_all(self, entities: list[Product]) -> list[Product]:
+        """Upsert only the products missing from the cache.
+
+        The upserted products are cached once the transaction commits.
+        """
+        products, missing = self._lookup(
+            [(entity.code, entity.description) for entity in entities]
+        )
+        missing = set(missing)
+        upserted = super().upsert_all(
+            [
+                entity
+                for entity in entities
+                if (entity.code, entity.description) in missing
+            ]
+        )
+
+        def store():
+            for product in upserted:
+                self._store(product, new=True)
+
+        if upserted:
+            on_commit(self.session, store)
+
+        return products + upserted
+
+    def update(self, id: int, entity: Product) -> None:
+        keys = self._keys(id, entity)
+        super().update(id, entity)
+        self.cache.delete(*keys)
+
+    def delete(self, id: int) -> None:
+        keys = self._keys(id)
+        super().delete(id)
+        self.cache.delete(*keys)
+
+    def _lookup(
+        self, keys: list[tuple[str, str]]
+    ) -> tuple[list[Product], list[tuple[str, str]]]:
+        products, missing = [], []
+
+        for code, description in keys:
+            product = self.cache.get(("product", "key", code, description))
+
+            if product is None:
+                missing.append((code, description))
+            else:
+                products.append(product)
+
+        return products, missing
+
+    def _store(self, product: Product, new: bool = False) -> None:
+        self.cache.set(("product", "id", product.id), product)
+        self.cache.set(("product", "key", product.code, product.description), product)
+
+        if new:
+            # The products of its code are cached without it
+            self.cache.delete(("product", "code", product.code))
+
+    def _keys(self, id: int, entity: Product = None) -> list[tuple]:
+        """Keys of the product, under its current and its new code and description."""
+        current = self.cache.get(("product", "id", id)) or super().find_by_id(id)
+        keys = [("product", "id", id)]
+
+        for product in (current, entity):
+            if product is not None:
+                keys.append(("product", "key", product.code, product.description))
+                keys.append(("product", "code", product.code))
+
+        return keys
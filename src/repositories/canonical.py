@@ -0,0 +1,332 @@
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Iterator
+
+from sqlalchemy import Insert, Select, Update, bindparam, delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from canonical import CanonicalProduct, Cluster, ProductRecord, cluster
+from database.schema import CanonicalProductSchema, ProductSchema
+
+__all__ = [
+    "CanonicalProductRepository",
+    "ReclusterReport",
+    "assign_statement",
+    "assignments",
+    "canonical_statements",
+]
+
+logger = logging.getLogger(__name__)
+
+# Canonical products looked up or inserted by a statement, far under the limit of
+# parameters of a statement
+CHUNK_SIZE = 1000
+
+canonicals = CanonicalProductSchema.__table__
+products = ProductSchema.__table__
+
+
+@dataclass
+class ReclusterReport:
+    products: int = 0
+    clusters: int = 0
+    created: int = 0
+    deleted: int = 0
+    remapped: int = 0
+
+
+def canonical_statements(
+    canonical: Iterable[CanonicalProduct],
+) -> Iterator[tuple[list[Insert], Select]]:
+    """Statements inserting the canonical products missing, then selecting them all.
+
+    Canonical products with a GTIN are identified by it, the others by the words of
+    their description. The inserts do nothing for the existing ones, so concurrent
+    imports neither fail nor create duplicates.
+    """
+    unique = {_identity(product): product for product in canonical if product.key}
+    ordered = [unique[identity] for identity in sorted(unique)]
+
+    for start in range(0, len(ordered), CHUNK_SIZE):
+        chunk = ordered[start : start + CHUNK_SIZE]
+        rows = [
+            {
+                "codigo": product.gtin,
+                "chave": product.key,
+                "descricao": product.description,
+            }
+            for product in chunk
+        ]
+        coded = [row for row in rows if row["codigo"]]
+        uncoded = [row for row in rows if not row["codigo"]]
+        statements = []
+
+        if coded:
+            statements.append(
+                insert(canonicals)
+                .values(coded)
+                .on_conflict_do_nothing(
+                    index_elements=[canonicals.c.codigo],
+                    index_where=canonicals.c.codigo.is_not(None),
+                )
+            )
+        if uncoded:
+            statements.append(
+                insert(canonicals)
+                .values(uncoded)
+                .on_conflict_do_nothing(
+                    index_elements=[canonicals.c.chave],
+                    index_where=canonicals.c.codigo.is_(None),
+                )
+            )
+
+        lookup = select(canonicals.c.id, canonicals.c.codigo, canonicals.c.chave).where(
+            or_(
+                canonicals.c.codigo.in_([row["codigo"] for row in coded]),
+                canonicals.c.codigo.is_(None)
+                & canonicals.c.chave.in_([row["chave"] for row in uncoded]),
+            )
+        )
+
+        yield statements, lookup
+
+
+def assign_statement() -> Update:
+    """Statement setting the canonical product of a product that has none, run once per row."""
+    return (
+        update(products)
+        .where(
+            products.c.id == bindparam("product_id"),
+            products.c.id_produto_canonico.is_(None),
+        )
+        .values(id_produto_canonico=bindparam("canonical_id"))
+    )
+
+
+def assignments(
+    records: Iterable[ProductRecord], ids: dict[tuple[str, str], int]
+) -> list[dict]:
+    """Parameters of the assign statement, for the products with a canonical id."""
+    rows = []
+
+    for record in records:
+        id = ids.get(_identity(CanonicalProduct.of(record.code, record.description)))
+
+        if id is not None:
+            rows.append({"product_id": record.id, "canonical_id": id})
+
+    return rows
+
+
+def _identity(product: CanonicalProduct) -> tuple[str, str]:
+    return (product.gtin, "") if product.gtin else ("", product.key)
+
+
+class CanonicalProductRepository:
+    """Maps the products to the canonical products, the same goods whatever their code
+    or description.
+
+    Products are assigned when they are saved, to the canonical product with the same
+    GTIN, or with the same words in the description when they have no GTIN. Products
+    with similar descriptions are only merged by `recluster`.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def assign(self, records: Iterable[ProductRecord]) -> int:
+        """Assign the products without a canonical product, without committing them.
+
+        Products that already have one keep it.
+
+        Returns:
+            int: products matched to a canonical product, assigned before or not
+        """
+        records = list(records)
+        ids = {}
+
+        for inserts, lookup in canonical_statements(
+            CanonicalProduct.of(record.code, record.description) for record in records
+        ):
+            for statement in inserts:
+                self.session.execute(statement)
+
+            for id, code, key in self.session.execute(lookup):
+                ids[(code, "") if code else ("", key)] = id
+
+        rows = assignments(records, ids)
+
+        if rows:
+            self.session.connection().execute(assign_statement(), rows)
+
+        return len(rows)
+
+    def assign_pending(self, batch_size: int = 1000) -> int:
+        """Assign every product without a canonical product, committing each batch.
+
+        Returns:
+            int: products assigned
+        """
+        assigned = after_id = 0
+
+        while True:
+            rows = self.session.execute(
+                select(ProductSchema.id, ProductSchema.code, ProductSchema.description)
+                .where(
+                    ProductSchema.canonical_id.is_(None), ProductSchema.id > after_id
+                )
+                .order_by(ProductSchema.id)
+                .limit(batch_size)
+            ).all()
+
+            if not rows:
+                return assigned
+
+            try:
+                assigned += self.assign(ProductRecord(*row) for row in rows)
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+
+            after_id = rows[-1].id
+
+    def recluster(
+        self, threshold: float = 0.8, max_block: int = 1000
+    ) -> ReclusterReport:
+        """Cluster every product again, in a single transaction.
+
+        Each cluster keeps the canonical product most of its products already have,
+        so that the canonical ids stay stable between runs. The canonical products
+        left without products are deleted.
+        """
+        report = ReclusterReport()
+
+        try:
+            rows = self.session.execute(
+                select(
+                    ProductSchema.id,
+                    ProductSchema.code,
+                    ProductSchema.description,
+                    ProductSchema.canonical_id,
+                )
+            ).all()
+            current = {row.id: row.canonical_id for row in rows}
+            records = [ProductRecord(*row[:3]) for row in rows]
+            clusters = [
+                found
+                for found in cluster(records, threshold, max_block)
+                if found.gtin or found.key
+            ]
+            report.products, report.clusters = len(records), len(clusters)
+
+            targets = self._reuse(clusters, current)
+            kept = {id for id in targets.values() if id is not None}
+            existing = set(self.session.scalars(select(CanonicalProductSchema.id)))
+
+            # Kept canonical products are given placeholders first, so that no unique
+            # index is violated while they take the values of one another
+            self._update_canonicals(
+                [{"id": id, "code": None, "key": f"#{id}"} for id in kept]
+            )
+            self._remap(clusters, targets, current, report)
+
+            orphans = existing - kept
+            if orphans:
+                self.session.execute(
+                    delete(CanonicalProductSchema).where(
+                        CanonicalProductSchema.id.in_(orphans)
+                    )
+                )
+            report.deleted = len(orphans)
+
+            self._update_canonicals(
+                [
+                    {
+                        "id": targets[index],
+                        "code": found.gtin,
+                        "key": found.key,
+                        "description": found.description,
+                    }
+                    for index, found in enumerate(clusters)
+                    if targets[index] is not None
+                ]
+            )
+
+            created = {
+                index: CanonicalProductSchema(
+                    code=found.gtin, key=found.key, description=found.description
+                )
+                for index, found in enumerate(clusters)
+                if targets[index] is None
+            }
+            self.session.add_all(created.values())
+            self.session.flush()
+            targets.update({index: schema.id for index, schema in created.items()})
+            report.created = len(created)
+
+            self._remap(clusters, targets, current, report)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        logger.info("Products clustered again: %s", report)
+
+        return report
+
+    @staticmethod
+    def _reuse(
+        clusters: list[Cluster], current: dict[int, int]
+    ) -> dict[int, int | None]:
+        # Larger clusters choose first, a canonical product is kept by one cluster
+        targets, taken = {}, set()
+
+        for index in sorted(range(len(clusters)), key=lambda i: -len(clusters[i].ids)):
+            ids = Counter(
+                current[id] for id in clusters[index].ids if current[id] is not None
+            )
+            targets[index] = next(
+                (id for id, _ in ids.most_common() if id not in taken), None
+            )
+            taken.add(targets[index])
+
+        return targets
+
+    def _update_canonicals(self, rows: list[dict]) -> None:
+        if rows:
+            self.session.execute(update(CanonicalProductSchema), rows)
+
+    def _remap(
+        self,
+        clusters: list[Cluster],
+        targets: dict[int, int | None],
+        current: dict[int, int],
+        report: ReclusterReport,
+    ) -> None:
+        """Point the products at the canonical product of their cluster.
+
+        Products of clusters without a canonical product yet are left without one, and
+        products in no cluster lose theirs.
+        """
+        mapped = {
+            id: targets[index]
+            for index, found in enumerate(clusters)
+            for id in found.ids
+        }
+        rows = [
+            {"id": id, "canonical_id": mapped.get(id)}
+            for id, canonical_id in current.items()
+            if mapped.get(id) != canonical_id
+        ]
+
+        if rows:
+            self.session.execute(update(ProductSchema), rows)
+
+        for row in rows:
+            if row["canonical_id"] is not None:
+                report.remapped += 1
+
+            current[row["id"]] = row["canonical_id"]
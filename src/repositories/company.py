@@ -1,6 +1,10 @@
-from sqlalchemy.orm import Session
+from typing import Iterator
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Query, Session
 from ports.repositories import Repository
-from domain import Company, Address
+from repositories.mappers import to_company_entity, to_company_schema
+from domain import Company
 from database.schema import CompanySchema
 
 
@@ -10,7 +14,23 @@ class CompanyRepository(Repository):
         self.session = session
 
     def save(self, entity: Company) -> Company:
-        company = CompanySchema(
+        company = to_company_schema(entity)
+
+        self.session.add(company)
+
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise
+
+        self.session.refresh(company)
+
+        return to_company_entity(company)
+
+    def upsert(self, entity: Company) -> Company:
+        """Insert the company or update the one with the same CNPJ, without committing it."""
+        statement = insert(CompanySchema).values(
             cnpj=entity.cnpj,
             name=entity.name,
             street=entity.address.street,
@@ -20,14 +40,26 @@ class CompanyRepository(Repository):
             state=entity.address.state,
             complement=entity.address.complement,
             zip_code=entity.address.zip_code,
-            created_on=entity.created_on,
         )
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[CompanySchema.cnpj],
+            set_={
+                CompanySchema.name: excluded.razao_social,
+                CompanySchema.street: excluded.logradouro,
+                CompanySchema.number: excluded.numero,
+                CompanySchema.neighborhood: excluded.bairro,
+                CompanySchema.city: excluded.municipio,
+                CompanySchema.state: excluded.uf,
+                CompanySchema.complement: excluded.complemento,
+                CompanySchema.zip_code: excluded.cep,
+            },
+        ).returning(CompanySchema)
+        company = self.session.scalars(
+            statement, execution_options={"populate_existing": True}
+        ).one()
 
-        self.session.add(company)
-        self.session.commit()
-        self.session.refresh(company)
-
-        return CompanyRepository.__to_entity(company)
+        return to_company_entity(company)
 
     def delete(self, id: int) -> None:
         self.session.query(CompanySchema).filter_by(id=id).delete()
@@ -37,15 +69,44 @@ class CompanyRepository(Repository):
     def find_by_id(self, id: int) -> Company:
         company = self.session.query(CompanySchema).get(id)
 
-        return CompanyRepository.__to_entity(company) if company else None
+        return to_company_entity(company) if company else None
 
     def find_all(self, **filters) -> list[Company]:
         companies = self.session.query(CompanySchema).filter_by(**filters).all()
 
         return (
-            [CompanyRepository.__to_entity(company) for company in companies]
-            if companies
-            else []
+            [to_company_entity(company) for company in companies] if companies else []
+        )
+
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters
+    ) -> list[Company]:
+        """Find up to `limit` entities with an id greater than `after_id`, ordered by id."""
+        companies = self.__query(self.session, after_id, **filters).limit(limit).all()
+
+        return [to_company_entity(row) for row in companies]
+
+    def stream(
+        self, after_id: int = 0, batch_size: int = 1000, **filters
+    ) -> Iterator[Company]:
+        """Iterate over the entities with an id greater than `after_id`, ordered by id.
+
+        Rows are fetched `batch_size` at a time from a server side cursor, in a session
+        of its own, which is closed when the iteration ends.
+        """
+        with Session(self.session.get_bind()) as session:
+            query = self.__query(session, after_id, **filters)
+
+            for row in query.yield_per(batch_size):
+                yield to_company_entity(row)
+
+    @staticmethod
+    def __query(session: Session, after_id: int, **filters) -> Query:
+        return (
+            session.query(CompanySchema)
+            .filter_by(**filters)
+            .filter(CompanySchema.id > after_id)
+            .order_by(CompanySchema.id)
         )
 
     def update(self, id: int, company: Company) -> None:
@@ -64,23 +125,3 @@ class CompanyRepository(Repository):
         )
         self.session.merge(company)
         self.session.commit()
-
-    @staticmethod
-    def __to_entity(company: CompanySchema):
-        address = Address(
-            street=company.street,
-            number=company.number,
-            neighborhood=company.neighborhood,
-            city=company.city,
-            state=company.state,
-            complement=company.complement,
-            zip_code=company.zip_code,
-        )
-
-        return Company(
-            id=company.id,
-            name=company.name,
-            cnpj=company.cnpj,
-            address=address,
-            created_on=company.created_on,
-        )
@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Iterator, Sequence
+
+from sqlalchemy import Column, Row, Select, select, text
+from sqlalchemy.orm import Session
+
+from database.schema import CompanySchema, InvoiceSchema, ItemSchema, ProductSchema
+
+__all__ = ["EXPORTS", "Export", "ExportRepository"]
+
+invoices = InvoiceSchema.__table__
+items = ItemSchema.__table__
+products = ProductSchema.__table__
+companies = CompanySchema.__table__
+
+# Start of the oldest transaction of the other sessions, in the time zone of the
+# session as the creation times are stored
+OLDEST_TRANSACTION = text(
+    "SELECT LOCALTIMESTAMP, min(xact_start)::timestamp FROM pg_stat_activity "
+    "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+)
+
+
+@dataclass(frozen=True)
+class Export:
+    """Rows exported together, new rows being told apart by `created_on`.
+
+    Rows updated in place keep their creation time, so updates are never exported
+    again by the incremental exports.
+    """
+
+    name: str
+    statement: Select
+    created_on: Column
+    partition_by: Column
+
+    @property
+    def columns(self) -> list[Column]:
+        return list(self.statement.selected_columns)
+
+    def query(
+        self, since: datetime = None, chunk_size: int = 50_000, until: datetime = None
+    ) -> Select:
+        """Rows created after `since` and up to `until`, fetched `chunk_size` at a time."""
+        statement = self.statement.execution_options(yield_per=chunk_size)
+
+        if since is not None:
+            statement = statement.where(self.created_on > since)
+
+        if until is not None:
+            statement = statement.where(self.created_on <= until)
+
+        return statement
+
+
+def _table(table, partition_by: str = "data_criacao") -> Export:
+    return Export(
+        name=table.name,
+        statement=select(table).order_by(table.c.id),
+        created_on=table.c.data_criacao,
+        partition_by=table.c[partition_by],
+    )
+
+
+# The items with their invoice, product and company, as most analyses need them
+purchases = Export(
+    name="compras",
+    statement=select(
+        items.c.id,
+        items.c.id_nota_fiscal,
+        invoices.c.chave_acesso,
+        invoices.c.data_emissao,
+        invoices.c.id_usuario,
+        invoices.c.id_empresa,
+        companies.c.cnpj,
+        companies.c.razao_social,
+        companies.c.municipio,
+        companies.c.uf,
+        items.c.id_produto,
+        products.c.codigo,
+        products.c.descricao,
+        items.c.quantidade,
+        items.c.preco_unitario,
+        (items.c.quantidade * items.c.preco_unitario).label("preco_total"),
+        items.c.unidade_medida,
+        items.c.data_criacao,
+    )
+    .join(invoices, invoices.c.id == items.c.id_nota_fiscal)
+    .join(products, products.c.id == items.c.id_produto)
+    .join(companies, companies.c.id == invoices.c.id_empresa, isouter=True)
+    .order_by(items.c.id),
+    created_on=items.c.data_criacao,
+    partition_by=invoices.c.data_emissao,
+)
+
+EXPORTS = {
+    export.name: export
+    for export in (
+        _table(invoices, partition_by="data_emissao"),
+        _table(items),
+        _table(products),
+        _table(companies),
+        purchases,
+    )
+}
+
+
+class ExportRepository:
+    """Reads whole tables in chunks from a server side cursor, whatever their size."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def batches(
+        self,
+        export: Export,
+        since: datetime = None,
+        chunk_size: int = 50_000,
+        until: datetime = None,
+    ) -> Iterator[Sequence[Row]]:
+        """Iterate over the rows created after `since` and up to `until`, `chunk_size` at a time."""
+        result = self.session.execute(export.query(since, chunk_size, until))
+
+        yield from result.partitions()
+
+    def horizon(self, lag: timedelta = timedelta(minutes=1)) -> datetime:
+        """Latest creation time under which no row can be committed anymore.
+
+        The creation time is set when a row is inserted, not when it is committed, so
+        the rows of a transaction still open may be committed with an earlier time
+        than the rows already exported. The horizon is the start of the oldest open
+        transaction, less `lag` for the difference between the clocks of the
+        application and the database.
+        """
+        if self.session.get_bind().dialect.name != "postgresql":
+            # Other databases store the time in UTC given by the application
+            return datetime.now(UTC).replace(tzinfo=None) - lag
+
+        now, oldest = self.session.execute(OLDEST_TRANSACTION).one()
+
+        return min(now, oldest or now) - lag
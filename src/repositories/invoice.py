@@ -1,8 +1,17 @@
-from typing import Any
+from typing import Any, Iterator
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from database.schema import InvoiceSchema
-from domain import EletronicInvoice, Taxes
+from domain import EletronicInvoice
 from ports.repositories import Repository
-from sqlalchemy.orm import Session
+from repositories.mappers import (
+    to_full_invoice_entity,
+    to_invoice_entity,
+    to_invoice_schema,
+)
+from repositories.statements import select_full_invoices
+from sqlalchemy.orm import Query, Session
 
 
 class InvoiceRepository(Repository):
@@ -13,26 +22,64 @@ class InvoiceRepository(Repository):
     def save(self, entity: EletronicInvoice) -> EletronicInvoice:
         # TODO: If the invoice already exists, raise exception
 
-        invoice = InvoiceSchema(
-            user_id=entity.user.id,
-            company_id=entity.company.id,
-            access_key=entity.access_key,
-            number=entity.number,
-            series=entity.series,
-            issue_date=entity.issue_date,
-            authorization_protocol=entity.authorization_protocol,
-            authorization_date=entity.authorization_date,
-            federal_tax=entity.taxes.federal,
-            state_tax=entity.taxes.state,
-            city_tax=entity.taxes.municipal,
-            source=entity.taxes.source,
-        )
+        invoice = to_invoice_schema(entity)
 
         self.session.add(invoice)
-        self.session.commit()
+
+        try:
+            self.session.commit()
+        except IntegrityError:
+            self.session.rollback()
+            raise
+
         self.session.refresh(invoice)
 
-        return InvoiceRepository.__to_entity(invoice)
+        return to_invoice_entity(invoice)
+
+    def upsert(self, entity: EletronicInvoice) -> EletronicInvoice:
+        """Insert the invoice or update the one with the same access key, without committing it.
+
+        The owner of an existing invoice is kept when the entity has no user.
+        """
+        schema = to_invoice_schema(entity)
+        statement = insert(InvoiceSchema).values(
+            user_id=schema.user_id,
+            company_id=schema.company_id,
+            access_key=schema.access_key,
+            number=schema.number,
+            series=schema.series,
+            issue_date=schema.issue_date,
+            authorization_protocol=schema.authorization_protocol,
+            authorization_date=schema.authorization_date,
+            federal_tax=schema.federal_tax,
+            state_tax=schema.state_tax,
+            city_tax=schema.city_tax,
+            source=schema.source,
+        )
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[InvoiceSchema.access_key],
+            set_={
+                InvoiceSchema.user_id: func.coalesce(
+                    excluded.id_usuario, InvoiceSchema.user_id
+                ),
+                InvoiceSchema.company_id: excluded.id_empresa,
+                InvoiceSchema.number: excluded.numero,
+                InvoiceSchema.series: excluded.serie,
+                InvoiceSchema.issue_date: excluded.data_emissao,
+                InvoiceSchema.authorization_protocol: excluded.protocolo_autorizacao,
+                InvoiceSchema.authorization_date: excluded.data_autorizacao,
+                InvoiceSchema.federal_tax: excluded.tributacao_federal,
+                InvoiceSchema.state_tax: excluded.tributacao_estadual,
+                InvoiceSchema.city_tax: excluded.tributacao_municipal,
+                InvoiceSchema.source: excluded.fonte,
+            },
+        ).returning(InvoiceSchema)
+        invoice = self.session.scalars(
+            statement, execution_options={"populate_existing": True}
+        ).one()
+
+        return to_invoice_entity(invoice)
 
     def delete(self, id: int) -> None:
         invoice = self.session.query(InvoiceSchema).filter_by(id=id).first()
@@ -42,11 +89,58 @@ class InvoiceRepository(Repository):
 
     def find_by_id(self, id: int) -> EletronicInvoice:
         invoice = self.session.query(InvoiceSchema).filter_by(id=id).first()
-        return InvoiceRepository.__to_entity(invoice) if invoice else None
+        return to_invoice_entity(invoice) if invoice else None
+
+    def find_full(self, **filters: dict[str, Any]) -> EletronicInvoice:
+        """Find an invoice with its company, user, items and products, in two queries."""
+        invoice = self.session.scalars(select_full_invoices(**filters)).first()
+
+        return to_full_invoice_entity(invoice) if invoice else None
+
+    def find_full_by_access_keys(self, keys: list[str]) -> list[EletronicInvoice]:
+        """Find the invoices with any of the access keys, as `find_full` does."""
+        if not keys:
+            return []
+
+        statement = select_full_invoices().where(InvoiceSchema.access_key.in_(keys))
+        invoices = self.session.scalars(statement).unique().all()
+
+        return [to_full_invoice_entity(invoice) for invoice in invoices]
 
     def find_all(self, **filters: dict[str, Any]) -> list[EletronicInvoice]:
         invoices = self.session.query(InvoiceSchema).filter_by(**filters).all()
-        return [InvoiceRepository.__to_entity(invoice) for invoice in invoices]
+        return [to_invoice_entity(invoice) for invoice in invoices]
+
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters
+    ) -> list[EletronicInvoice]:
+        """Find up to `limit` entities with an id greater than `after_id`, ordered by id."""
+        invoices = self.__query(self.session, after_id, **filters).limit(limit).all()
+
+        return [to_invoice_entity(row) for row in invoices]
+
+    def stream(
+        self, after_id: int = 0, batch_size: int = 1000, **filters
+    ) -> Iterator[EletronicInvoice]:
+        """Iterate over the entities with an id greater than `after_id`, ordered by id.
+
+        Rows are fetched `batch_size` at a time from a server side cursor, in a session
+        of its own, which is closed when the iteration ends.
+        """
+        with Session(self.session.get_bind()) as session:
+            query = self.__query(session, after_id, **filters)
+
+            for row in query.yield_per(batch_size):
+                yield to_invoice_entity(row)
+
+    @staticmethod
+    def __query(session: Session, after_id: int, **filters) -> Query:
+        return (
+            session.query(InvoiceSchema)
+            .filter_by(**filters)
+            .filter(InvoiceSchema.id > after_id)
+            .order_by(InvoiceSchema.id)
+        )
 
     def update(self, id: int, entity: EletronicInvoice) -> None:
         invoice = InvoiceSchema(
@@ -64,28 +158,3 @@ class InvoiceRepository(Repository):
         )
         self.session.merge(invoice)
         self.session.commit()
-
-    @staticmethod
-    def __to_entity(invoice: InvoiceSchema) -> EletronicInvoice:
-
-        taxes = Taxes(
-            federal=invoice.federal_tax,
-            state=invoice.state_tax,
-            municipal=invoice.city_tax,
-            source=invoice.source,
-        )
-
-        return EletronicInvoice(
-            id=invoice.id,
-            access_key=invoice.access_key,
-            number=invoice.number,
-            series=invoice.series,
-            issue_date=invoice.issue_date,
-            authorization_protocol=invoice.authorization_protocol,
-            authorization_date=invoice.authorization_date,
-            company_id=invoice.company_id,
-            user_id=invoice.user_id,
-            taxes=taxes,
-            items=[],
-            totals=[],
-        )
@@ -1,8 +1,11 @@
-from typing import Any
+from typing import Any, Iterator
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
 from database.schema import ItemSchema
-from domain import Item, Product
+from domain import Item
 from ports.repositories import Repository
-from sqlalchemy.orm import Session
+from repositories.mappers import to_item_entity
+from sqlalchemy.orm import Query, Session, joinedload
 
 
 class ItemRepository(Repository):
@@ -22,17 +25,101 @@ class ItemRepository(Repository):
         self.session.commit()
         self.session.refresh(invoice)
 
+    def upsert_all(self, entities: list[Item]) -> None:
+        """Insert the items or update the ones of the same invoice and product, without committing them.
+
+        The entities must not repeat a (invoice, product) pair. Rows are upserted
+        sorted by that pair, so that concurrent ingestions lock them in the same order
+        and do not deadlock.
+        """
+        if not entities:
+            return
+
+        statement = insert(ItemSchema).values(
+            [
+                {
+                    "product_id": entity.product_id,
+                    "invoice_id": entity.invoice_id,
+                    "quantity": entity.quantity,
+                    "unit_price": entity.unit_price,
+                    "unity_of_measurement": entity.unity_of_measurement,
+                }
+                for entity in sorted(
+                    entities, key=lambda entity: (entity.invoice_id, entity.product_id)
+                )
+            ]
+        )
+        excluded = statement.excluded
+        statement = statement.on_conflict_do_update(
+            index_elements=[ItemSchema.invoice_id, ItemSchema.product_id],
+            set_={
+                ItemSchema.quantity: excluded.quantidade,
+                ItemSchema.unit_price: excluded.preco_unitario,
+                ItemSchema.unity_of_measurement: excluded.unidade_medida,
+            },
+        )
+        self.session.execute(statement)
+
+    def delete_all_except(self, invoice_id: int, product_ids: list[int]) -> None:
+        """Delete the items of the invoice whose product is not listed, without committing."""
+        self.session.execute(
+            delete(ItemSchema).where(
+                ItemSchema.invoice_id == invoice_id,
+                ItemSchema.product_id.not_in(product_ids),
+            )
+        )
+
     def delete(self, id: int) -> None:
         self.session.query(ItemSchema).filter_by(id=id).delete()
         self.session.commit()
 
     def find_by_id(self, id: int) -> Item:
-        item = self.session.query(ItemSchema).filter_by(id=id).first()
-        return ItemRepository.__to_entity(item) if item else None
+        item = (
+            self.session.query(ItemSchema)
+            .options(joinedload(ItemSchema.product))
+            .filter_by(id=id)
+            .first()
+        )
+        return to_item_entity(item) if item else None
 
     def find_all(self, **filters: dict[str, Any]) -> list[Item]:
-        items = self.session.query(ItemSchema).filter_by(**filters).all()
-        return [ItemRepository.__to_entity(item) for item in items]
+        items = (
+            self.session.query(ItemSchema)
+            .options(joinedload(ItemSchema.product))
+            .filter_by(**filters)
+            .all()
+        )
+        return [to_item_entity(item) for item in items]
+
+    def find_page(self, after_id: int = 0, limit: int = 100, **filters) -> list[Item]:
+        """Find up to `limit` entities with an id greater than `after_id`, ordered by id."""
+        items = self.__query(self.session, after_id, **filters).limit(limit).all()
+
+        return [to_item_entity(row) for row in items]
+
+    def stream(
+        self, after_id: int = 0, batch_size: int = 1000, **filters
+    ) -> Iterator[Item]:
+        """Iterate over the entities with an id greater than `after_id`, ordered by id.
+
+        Rows are fetched `batch_size` at a time from a server side cursor, in a session
+        of its own, which is closed when the iteration ends.
+        """
+        with Session(self.session.get_bind()) as session:
+            query = self.__query(session, after_id, **filters)
+
+            for row in query.yield_per(batch_size):
+                yield to_item_entity(row)
+
+    @staticmethod
+    def __query(session: Session, after_id: int, **filters) -> Query:
+        return (
+            session.query(ItemSchema)
+            .options(joinedload(ItemSchema.product))
+            .filter_by(**filters)
+            .filter(ItemSchema.id > after_id)
+            .order_by(ItemSchema.id)
+        )
 
     def update(self, id: int, entity: Item) -> None:
         item = ItemSchema(
@@ -43,16 +130,3 @@ class ItemRepository(Repository):
         )
         self.session.merge(item)
         self.session.commit()
-
-    @staticmethod
-    def __to_entity(item: Any) -> Item:
-        product = Product(item.product_id, item.product.code, item.product.description)
-        return Item(
-            id=item.id,
-            invoice_id=item.invoice_id,
-            product_id=item.product_id,
-            product=product,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            unity_of_measurement=item.unity_of_measurement,
-        )
@@ -0,0 +1,216 @@
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+from database.schema import JobSchema
+from domain import Job, JobStatus
+from ports.repositories import Repository
+from repositories.mappers import to_job_entity
+
+
+def utcnow() -> datetime:
+    """Current time in UTC, without time zone as the columns store it."""
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class JobRepository(Repository):
+    """Queue of jobs stored in a table, claimed by the workers with SKIP LOCKED."""
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def save(self, entity: Job) -> Job:
+        return self.save_all([entity])[0]
+
+    def save_all(self, entities: list[Job]) -> list[Job]:
+        """Enqueue the jobs to run now, in a single transaction."""
+        now = utcnow()
+        jobs = [
+            JobSchema(
+                chat_id=entity.chat_id,
+                source=entity.source,
+                status=JobStatus.PENDING.value,
+                attempts=0,
+                max_attempts=entity.max_attempts,
+                run_at=now,
+                created_on=now,
+                updated_on=now,
+            )
+            for entity in entities
+        ]
+
+        self.session.add_all(jobs)
+        self.session.commit()
+
+        return [to_job_entity(job) for job in jobs]
+
+    def claim(self, limit: int = 1) -> list[Job]:
+        """Mark up to `limit` due jobs as running and return them.
+
+        The jobs are locked with SKIP LOCKED, so concurrent workers never claim the
+        same job nor wait for each other.
+        """
+        now = utcnow()
+        due = (
+            select(JobSchema.id)
+            .where(
+                JobSchema.status == JobStatus.PENDING.value,
+                JobSchema.run_at <= now,
+            )
+            .order_by(JobSchema.run_at, JobSchema.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(JobSchema)
+            .where(JobSchema.id.in_(due.scalar_subquery()))
+            .values(
+                status=JobStatus.RUNNING.value,
+                attempts=JobSchema.attempts + 1,
+                locked_at=now,
+                updated_on=now,
+            )
+            .returning(JobSchema)
+        )
+        jobs = self.session.scalars(
+            statement,
+            execution_options={
+                "populate_existing": True,
+                "synchronize_session": False,
+            },
+        ).all()
+        self.session.commit()
+
+        return [to_job_entity(job) for job in jobs]
+
+    def complete(self, id: int, invoice_id: int = None) -> None:
+        self.__set(
+            id,
+            status=JobStatus.DONE.value,
+            invoice_id=invoice_id,
+            last_error=None,
+            locked_at=None,
+        )
+
+    def fail(self, job: Job, error: str, backoff: float = 30.0) -> Job:
+        """Retry the job after an exponential backoff, or move it to the dead jobs
+        once it has used every attempt."""
+        if job.attempts >= job.max_attempts:
+            job.status = JobStatus.DEAD
+        else:
+            job.status = JobStatus.PENDING
+            job.run_at = utcnow() + timedelta(
+                seconds=backoff * 2 ** max(job.attempts - 1, 0)
+            )
+
+        job.last_error = error
+        values = {"run_at": job.run_at} if job.status is JobStatus.PENDING else {}
+        self.__set(
+            job.id,
+            status=job.status.value,
+            last_error=error,
+            locked_at=None,
+            **values,
+        )
+
+        return job
+
+    def release_stale(self, timeout: float) -> int:
+        """Enqueue again the jobs running for longer than `timeout` seconds, whose
+        worker probably died.
+
+        Jobs that used every attempt are moved to the dead jobs instead, so that a
+        page killing its worker is not retried forever.
+        """
+        now = utcnow()
+        result = self.session.execute(
+            update(JobSchema)
+            .where(
+                JobSchema.status == JobStatus.RUNNING.value,
+                JobSchema.locked_at < now - timedelta(seconds=timeout),
+            )
+            .values(
+                status=case(
+                    (
+                        JobSchema.attempts >= JobSchema.max_attempts,
+                        JobStatus.DEAD.value,
+                    ),
+                    else_=JobStatus.PENDING.value,
+                ),
+                last_error=case(
+                    (
+                        JobSchema.attempts >= JobSchema.max_attempts,
+                        "Worker stopped while running the job",
+                    ),
+                    else_=JobSchema.last_error,
+                ),
+                locked_at=None,
+                run_at=now,
+                updated_on=now,
+            ),
+            execution_options={"synchronize_session": False},
+        )
+        self.session.commit()
+
+        return result.rowcount
+
+    def retry_dead(self) -> int:
+        """Enqueue again every dead job, with its attempts reset."""
+        now = utcnow()
+        result = self.session.execute(
+            update(JobSchema)
+            .where(JobSchema.status == JobStatus.DEAD.value)
+            .values(
+                status=JobStatus.PENDING.value,
+                attempts=0,
+                run_at=now,
+                updated_on=now,
+            ),
+            execution_options={"synchronize_session": False},
+        )
+        self.session.commit()
+
+        return result.rowcount
+
+    def delete(self, id: int) -> None:
+        self.session.query(JobSchema).filter_by(id=id).delete()
+        self.session.commit()
+
+    def find_by_id(self, id: int) -> Job:
+        job = self.session.get(JobSchema, id, populate_existing=True)
+
+        return to_job_entity(job) if job else None
+
+    def find_all(self, **filters: dict[str, Any]) -> list[Job]:
+        jobs = self.session.query(JobSchema).filter_by(**filters).all()
+
+        return [to_job_entity(job) for job in jobs]
+
+    def find_latest(self, chat_id: int, limit: int = 5) -> list[Job]:
+        """Find the last jobs enqueued by a chat, the newest first."""
+        jobs = self.session.scalars(
+            select(JobSchema)
+            .where(JobSchema.chat_id == chat_id)
+            .order_by(JobSchema.id.desc())
+            .limit(limit)
+        ).all()
+
+        return [to_job_entity(job) for job in jobs]
+
+    def last_completed_at(self) -> datetime | None:
+        """When the last job was completed, None if no job was completed yet."""
+        return self.session.scalar(
+            select(func.max(JobSchema.updated_on)).where(
+                JobSchema.status == JobStatus.DONE.value
+            )
+        )
+
+    def __set(self, id: int, **values) -> None:
+        self.session.execute(
+            update(JobSchema)
+            .where(JobSchema.id == id)
+            .values(updated_on=utcnow(), **values),
+            execution_options={"synchronize_session": False},
+        )
+        self.session.commit()
@@ -0,0 +1,166 @@
+from database.schema import (
+    CompanySchema,
+    InvoiceSchema,
+    ItemSchema,
+    JobSchema,
+    ProductSchema,
+    UserSchema,
+)
+from domain import (
+    Address,
+    Company,
+    EletronicInvoice,
+    Item,
+    Job,
+    JobStatus,
+    Product,
+    Taxes,
+    User,
+)
+from scrapers.utils import to_database_time
+
+__all__ = [
+    "to_company_entity",
+    "to_company_schema",
+    "to_full_invoice_entity",
+    "to_invoice_entity",
+    "to_invoice_schema",
+    "to_item_entity",
+    "to_job_entity",
+    "to_product_entity",
+    "to_user_entity",
+]
+
+
+def to_company_schema(entity: Company) -> CompanySchema:
+    return CompanySchema(
+        cnpj=entity.cnpj,
+        name=entity.name,
+        street=entity.address.street,
+        number=entity.address.number,
+        neighborhood=entity.address.neighborhood,
+        city=entity.address.city,
+        state=entity.address.state,
+        complement=entity.address.complement,
+        zip_code=entity.address.zip_code,
+        created_on=entity.created_on,
+    )
+
+
+def to_company_entity(company: CompanySchema):
+    address = Address(
+        street=company.street,
+        number=company.number,
+        neighborhood=company.neighborhood,
+        city=company.city,
+        state=company.state,
+        complement=company.complement,
+        zip_code=company.zip_code,
+    )
+
+    return Company(
+        id=company.id,
+        name=company.name,
+        cnpj=company.cnpj,
+        address=address,
+        created_on=company.created_on,
+    )
+
+
+def to_invoice_schema(entity: EletronicInvoice) -> InvoiceSchema:
+    return InvoiceSchema(
+        user_id=entity.user.id if entity.user else entity.user_id or None,
+        company_id=entity.company.id if entity.company else entity.company_id,
+        access_key=entity.access_key,
+        number=entity.number,
+        series=entity.series,
+        issue_date=to_database_time(entity.issue_date) or None,
+        authorization_protocol=entity.authorization_protocol,
+        authorization_date=to_database_time(entity.authorization_date) or None,
+        federal_tax=entity.taxes.federal,
+        state_tax=entity.taxes.state,
+        city_tax=entity.taxes.municipal,
+        source=entity.taxes.source,
+    )
+
+
+def to_invoice_entity(invoice: InvoiceSchema) -> EletronicInvoice:
+
+    taxes = Taxes(
+        federal=invoice.federal_tax,
+        state=invoice.state_tax,
+        municipal=invoice.city_tax,
+        source=invoice.source,
+    )
+
+    return EletronicInvoice(
+        id=invoice.id,
+        access_key=invoice.access_key,
+        number=invoice.number,
+        series=invoice.series,
+        issue_date=invoice.issue_date,
+        authorization_protocol=invoice.authorization_protocol,
+        authorization_date=invoice.authorization_date,
+        company_id=invoice.company_id,
+        user_id=invoice.user_id,
+        taxes=taxes,
+        items=[],
+        totals=[],
+    )
+
+
+def to_item_entity(item: ItemSchema) -> Item:
+    product = Product(item.product_id, item.product.code, item.product.description)
+    return Item(
+        id=item.id,
+        invoice_id=item.invoice_id,
+        product_id=item.product_id,
+        product=product,
+        quantity=item.quantity,
+        unit_price=item.unit_price,
+        unity_of_measurement=item.unity_of_measurement,
+    )
+
+
+def to_job_entity(job: JobSchema) -> Job:
+    return Job(
+        id=job.id,
+        chat_id=job.chat_id,
+        source=job.source,
+        status=JobStatus(job.status),
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        last_error=job.last_error,
+        invoice_id=job.invoice_id,
+        run_at=job.run_at,
+        created_on=job.created_on,
+    )
+
+
+def to_product_entity(product: ProductSchema) -> Product:
+    return Product(
+        id=product.id,
+        code=product.code,
+        description=product.description,
+        created_on=product.created_on,
+    )
+
+
+def to_user_entity(user: UserSchema) -> User:
+    return User(
+        id=user.id,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        username=user.username,
+        created_on=user.created_on,
+    )
+
+
+def to_full_invoice_entity(invoice: InvoiceSchema) -> EletronicInvoice:
+    """Convert an invoice whose company, user, items and products are loaded."""
+    entity = to_invoice_entity(invoice)
+    entity.company = to_company_entity(invoice.company) if invoice.company else None
+    entity.user = to_user_entity(invoice.user) if invoice.user else None
+    entity.items = [to_item_entity(item) for item in invoice.items]
+
+    return entity
@@ -1,7 +1,13 @@
-from sqlalchemy.orm import Session
+from typing import Iterator
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Query, Session
+from canonical import ProductRecord
 from database.schema import ProductSchema
 from ports.repositories import Repository
-from domain import Product
+from repositories.mappers import to_product_entity
+from domain import Product, normalize_product_code
+from .canonical import CanonicalProductRepository
 
 
 class ProductRepository(Repository):
@@ -13,13 +19,71 @@ class ProductRepository(Repository):
         product = ProductSchema(code=entity.code, description=entity.description)
 
         self.session.add(product)
-        self.session.commit()
+
+        try:
+            self.session.flush()
+            CanonicalProductRepository(self.session).assign(
+                [ProductRecord(product.id, product.code, product.description)]
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
         self.session.refresh(product)
 
         return Product(
             id=product.id, code=product.code, description=product.description
         )
 
+    def upsert_all(self, entities: list[Product]) -> list[Product]:
+        """Insert the products that do not exist yet, without committing them.
+
+        Existing rows are left untouched and read back by their (code, description)
+        pairs. Rows are inserted sorted by that pair, so that concurrent ingestions
+        lock them in the same order and do not deadlock.
+        """
+        if not entities:
+            return []
+
+        keys = sorted({(entity.code, entity.description) for entity in entities})
+        statement = (
+            insert(ProductSchema)
+            .values(
+                [
+                    {"code": code, "description": description}
+                    for code, description in keys
+                ]
+            )
+            .on_conflict_do_nothing(
+                index_elements=[ProductSchema.code, ProductSchema.description]
+            )
+            .returning(ProductSchema)
+        )
+        inserted = [
+            to_product_entity(product)
+            for product in self.session.scalars(
+                statement, execution_options={"populate_existing": True}
+            ).all()
+        ]
+        found = {(product.code, product.description) for product in inserted}
+
+        return inserted + self.find_all_by_keys(
+            [key for key in keys if key not in found]
+        )
+
+    def find_all_by_keys(self, keys: list[tuple[str, str]]) -> list[Product]:
+        """Find, with a single query, the products matching any (code, description) pair."""
+        if not keys:
+            return []
+
+        statement = select(ProductSchema).where(
+            tuple_(ProductSchema.code, ProductSchema.description).in_(keys)
+        )
+        products = self.session.scalars(statement).all()
+
+        return [to_product_entity(product) for product in products]
+
     def delete(self, id: int) -> None:
         self.session.query(ProductSchema).filter_by(id=id).delete()
         self.session.commit()
@@ -27,15 +91,44 @@ class ProductRepository(Repository):
 
     def find_by_id(self, id: int) -> Product:
         product = self.session.query(ProductSchema).get(id)
-        return self.__to_entity(product) if product else None
+        return to_product_entity(product) if product else None
 
     def find_all(self, **filters) -> list[Product]:
-        products = self.session.query(ProductSchema).filter_by(**filters).all()
+        products = (
+            self.session.query(ProductSchema).filter_by(**_normalized(filters)).all()
+        )
+
+        return [to_product_entity(product) for product in products] if products else []
+
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters
+    ) -> list[Product]:
+        """Find up to `limit` entities with an id greater than `after_id`, ordered by id."""
+        products = self.__query(self.session, after_id, **filters).limit(limit).all()
+
+        return [to_product_entity(row) for row in products]
+
+    def stream(
+        self, after_id: int = 0, batch_size: int = 1000, **filters
+    ) -> Iterator[Product]:
+        """Iterate over the entities with an id greater than `after_id`, ordered by id.
+
+        Rows are fetched `batch_size` at a time from a server side cursor, in a session
+        of its own, which is closed when the iteration ends.
+        """
+        with Session(self.session.get_bind()) as session:
+            query = self.__query(session, after_id, **filters)
+
+            for row in query.yield_per(batch_size):
+                yield to_product_entity(row)
 
+    @staticmethod
+    def __query(session: Session, after_id: int, **filters) -> Query:
         return (
-            [ProductRepository.__to_entity(product) for product in products]
-            if products
-            else []
+            session.query(ProductSchema)
+            .filter_by(**_normalized(filters))
+            .filter(ProductSchema.id > after_id)
+            .order_by(ProductSchema.id)
         )
 
     def update(self, id: int, entity: Product) -> None:
@@ -43,11 +136,10 @@ class ProductRepository(Repository):
         self.session.merge(product)
         self.session.commit()
 
-    @staticmethod
-    def __to_entity(product: ProductSchema) -> Product:
-        return Product(
-            id=product.id,
-            code=product.code,
-            description=product.description,
-            created_on=product.created_on,
-        )
+
+def _normalized(filters: dict) -> dict:
+    """Filters with the product code as stored, so that unpadded codes are found."""
+    if "code" in filters:
+        filters = {**filters, "code": normalize_product_code(filters["code"])}
+
+    return filters
@@ -0,0 +1,23 @@
+from sqlalchemy import Select, select
+from sqlalchemy.orm import joinedload, selectinload
+
+from database.schema import InvoiceSchema, ItemSchema
+
+__all__ = ["select_full_invoices"]
+
+
+def select_full_invoices(**filters) -> Select:
+    """Select invoices together with their company, user, items and products.
+
+    The company and the user are joined to the invoices, and the items of every
+    selected invoice are loaded with their products by a single extra query.
+    """
+    return (
+        select(InvoiceSchema)
+        .filter_by(**filters)
+        .options(
+            joinedload(InvoiceSchema.company),
+            joinedload(InvoiceSchema.user),
+            selectinload(InvoiceSchema.items).joinedload(ItemSchema.product),
+        )
+    )
@@ -1,6 +1,8 @@
-from sqlalchemy.orm import Session
+from typing import Iterator
+from sqlalchemy.orm import Query, Session
 from database.schema import UserSchema
 from ports.repositories import Repository
+from repositories.mappers import to_user_entity
 from domain import User
 
 
@@ -35,12 +37,41 @@ class UserRepository(Repository):
 
     def find_by_id(self, id: int) -> User:
         user = self.session.query(UserSchema).get(id)
-        return self.__to_entity(user) if user else None
+        return to_user_entity(user) if user else None
 
     def find_all(self, **filters) -> list[User]:
         users = self.session.query(UserSchema).filter_by(**filters).all()
 
-        return [UserRepository.__to_entity(user) for user in users] if users else []
+        return [to_user_entity(user) for user in users] if users else []
+
+    def find_page(self, after_id: int = 0, limit: int = 100, **filters) -> list[User]:
+        """Find up to `limit` entities with an id greater than `after_id`, ordered by id."""
+        users = self.__query(self.session, after_id, **filters).limit(limit).all()
+
+        return [to_user_entity(row) for row in users]
+
+    def stream(
+        self, after_id: int = 0, batch_size: int = 1000, **filters
+    ) -> Iterator[User]:
+        """Iterate over the entities with an id greater than `after_id`, ordered by id.
+
+        Rows are fetched `batch_size` at a time from a server side cursor, in a session
+        of its own, which is closed when the iteration ends.
+        """
+        with Session(self.session.get_bind()) as session:
+            query = self.__query(session, after_id, **filters)
+
+            for row in query.yield_per(batch_size):
+                yield to_user_entity(row)
+
+    @staticmethod
+    def __query(session: Session, after_id: int, **filters) -> Query:
+        return (
+            session.query(UserSchema)
+            .filter_by(**filters)
+            .filter(UserSchema.id > after_id)
+            .order_by(UserSchema.id)
+        )
 
     def update(self, id: int, entity: User) -> None:
         user = UserSchema(
@@ -51,13 +82,3 @@ class UserRepository(Repository):
 
         self.session.merge(user)
         self.session.commit()
-
-    @staticmethod
-    def __to_entity(user: UserSchema) -> User:
-        return User(
-            id=user.id,
-            first_name=user.first_name,
-            last_name=user.last_name,
-            username=user.username,
-            created_on=user.created_on,
-        )
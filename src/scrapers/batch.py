@@ -0,0 +1,390 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+from urllib.parse import urlparse
+
+import requests
+
+from scrapers.scrapers import HttpNfceScraper
+from .exceptions import TimeoutException
+from .interfaces import Scraper
+from .utils import get_access_key
+
+__all__ = ["BatchResult", "BatchScraper", "RateLimiter", "get_url", "is_retryable"]
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class BatchResult:
+    source: str
+    url: str = ""
+    data: dict[str, Any] | None = None
+    error: Exception | None = None
+    attempts: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class RateLimiter:
+    """Token bucket limiting how many requests start per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initializes a RateLimiter object.
+
+        Args:
+            rate (float): Requests allowed per second, unlimited if zero or less.
+            burst (int, optional): Requests allowed at once after an idle period. Defaults to 1.
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                elapsed = now - self._updated_at
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class BatchScraper:
+    """Scrape many NFC-e concurrently, yielding each invoice as soon as it is parsed.
+
+    Requests to the same SEFAZ host are bounded by a per host semaphore and all of them
+    share a global rate limit. Requests failed by timeouts, connection errors or server
+    errors are retried with exponential backoff, other errors are returned at once.
+    """
+
+    def __init__(
+        self,
+        scraper: Scraper = None,
+        concurrency: int = 8,
+        per_host: int = 2,
+        rate: float = 5.0,
+        retries: int = 3,
+        backoff: float = 1.0,
+        key_url: str = "",
+    ):
+        """
+        Initializes a BatchScraper object.
+
+        Args:
+            scraper (Scraper, optional): Scraper used for each URL, it must be thread safe. Defaults to HttpNfceScraper.
+            concurrency (int, optional): Maximum number of invoices scraped at the same time. Defaults to 8.
+            per_host (int, optional): Maximum number of concurrent requests to the same host. Defaults to 2.
+            rate (float, optional): Maximum number of requests started per second. Defaults to 5.0.
+            retries (int, optional): Attempts for each invoice before giving up on a retryable error. Defaults to 3.
+            backoff (float, optional): Seconds to wait before the first retry, doubled on each retry. Defaults to 1.0.
+            key_url (str, optional): URL template with a `{key}` placeholder, used to scrape access keys.
+                Defaults to "", meaning that access keys are rejected.
+        """
+        self.scraper = scraper or HttpNfceScraper()
+        self.concurrency = max(concurrency, 1)
+        self.per_host = max(per_host, 1)
+        self.rate = rate
+        self.retries = max(retries, 1)
+        self.backoff = backoff
+        self.key_url = key_url
+
+    async def scrape(
+        self, sources: Iterable[str] | AsyncIterable[str]
+    ) -> AsyncIterator[BatchResult]:
+        """Scrape NFC-e URLs or access keys, yielding results in completion order.
+
+        Args:
+            sources (Iterable[str] | AsyncIterable[str]): URLs or access keys, consumed lazily
+
+        Yields:
+            BatchResult: parsed invoice or the error of each source
+        """
+        limiter = RateLimiter(self.rate, burst=self.per_host)
+        hosts: dict[str, asyncio.Semaphore] = {}
+        pending: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+
+        tasks = [asyncio.create_task(self._produce(sources, pending))]
+        tasks += [
+            asyncio.create_task(self._work(pending, results, limiter, hosts))
+            for _ in range(self.concurrency)
+        ]
+
+        try:
+            running = self.concurrency
+            while running:
+                result = await results.get()
+
+                if result is _DONE:
+                    running -= 1
+                    continue
+
+                yield result
+        finally:
+            for task in tasks:
+                task.cancel()
+
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def scrape_all(self, sources: Iterable[str]) -> list[BatchResult]:
+        """Scrape every source and wait for all of them, for synchronous callers.
+
+        Args:
+            sources (Iterable[str]): URLs or access keys
+
+        Returns:
+            list[BatchResult]: results in completion order
+        """
+
+        async def collect():
+            return [result async for result in self.scrape(sources)]
+
+        return asyncio.run(collect())
+
+    async def _produce(
+        self, sources: Iterable[str] | AsyncIterable[str], pending: asyncio.Queue
+    ) -> None:
+        try:
+            async for source in _iterate(sources):
+                await pending.put(source)
+        except Exception:
+            logger.exception("Failed to read the sources to scrape")
+
+        for _ in range(self.concurrency):
+            await pending.put(_DONE)
+
+    async def _work(
+        self,
+        pending: asyncio.Queue,
+        results: asyncio.Queue,
+        limiter: RateLimiter,
+        hosts: dict[str, asyncio.Semaphore],
+    ) -> None:
+        try:
+            while (source := await pending.get()) is not _DONE:
+                result = await self._scrape_one(source, limiter, hosts)
+                await results.put(result)
+        finally:
+            await results.put(_DONE)
+
+    async def _scrape_one(
+        self,
+        source: str,
+        limiter: RateLimiter,
+        hosts: dict[str, asyncio.Semaphore],
+    ) -> BatchResult:
+        result = BatchResult(source=source.strip())
+
+        try:
+            result.url = self._get_url(result.source)
+        except ValueError as e:
+            result.error = e
+            return result
+
+        host = urlparse(result.url).netloc
+        semaphore = hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+
+        while result.attempts < self.retries:
+            result.attempts += 1
+
+            async with semaphore:
+                await limiter.acquire()
+
+                try:
+                    result.data = await asyncio.to_thread(self.scraper.get, result.url)
+                    result.error = None
+                    return result
+                except Exception as e:
+                    result.error = e
+
+                    if not is_retryable(e):
+                        return result
+
+            if result.attempts < self.retries:
+                delay = self.backoff * 2 ** (result.attempts - 1)
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        logger.warning(
+            "Giving up %s after %d attempts: %s",
+            result.url,
+            result.attempts,
+            result.error,
+        )
+        return result
+
+    def _get_url(self, source: str) -> str:
+        return get_url(source, self.key_url)
+
+
+def get_url(source: str, key_url: str = "") -> str:
+    """Get the URL of a NFC-e from its URL or its access key.
+
+    Args:
+        source (str): URL or access key
+        key_url (str, optional): URL template with a `{key}` placeholder. Defaults to "",
+            meaning that access keys are rejected.
+
+    Raises:
+        ValueError: if the source is neither an URL nor an access key that can be scraped
+
+    Returns:
+        str: URL of the NFC-e
+    """
+    source = source.strip()
+
+    if urlparse(source).scheme in ("http", "https"):
+        return source
+
+    access_key = get_access_key(source)
+
+    if not access_key:
+        raise ValueError(f"'{source}' is neither an URL nor an access key")
+
+    if not key_url:
+        raise ValueError(f"No URL template to scrape the access key {access_key}")
+
+    return key_url.format(key=access_key)
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a scraping error is transient, as network and server errors are, and worth retrying.
+
+    Args:
+        error (Exception): error raised by the scraper
+
+    Returns:
+        bool: True for timeouts, connection errors and HTTP 429 or 5xx responses
+    """
+    if isinstance(error, requests.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return status == 429 or status >= 500
+
+    return isinstance(
+        error, (TimeoutException, requests.ConnectionError, requests.Timeout)
+    )
+
+
+async def _iterate(sources: Iterable[str] | AsyncIterable[str]) -> AsyncIterator[str]:
+    if hasattr(sources, "__aiter__"):
+        async for source in sources:
+            yield source
+        return
+
+    # Sources may be read from files or stdin, so they are read out of the event loop
+    iterator = iter(sources)
+    while (source := await asyncio.to_thread(next, iterator, _DONE)) is not _DONE:
+        yield source
+
+
+def _read_sources(files: list[str]) -> Iterable[str]:
+    for file in files:
+        # The standard streams are left open for the rest of the process
+        opened = nullcontext(sys.stdin) if file == "-" else open(file, encoding="utf-8")
+
+        with opened as stream:
+            for line in stream:
+                if line.strip():
+                    yield line.strip()
+
+
+async def _run(args: argparse.Namespace) -> int:
+    batch = BatchScraper(
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        rate=args.rate,
+        retries=args.retries,
+        backoff=args.backoff,
+        key_url=args.key_url,
+    )
+    sources = args.sources or _read_sources(args.input)
+    opened = (
+        open(args.output, "w", encoding="utf-8")
+        if args.output
+        else nullcontext(sys.stdout)
+    )
+
+    succeeded = failed = 0
+    started_at = time.perf_counter()
+
+    with opened as output:
+        async for result in batch.scrape(sources):
+            if not result.ok:
+                failed += 1
+                logger.error("Failed to scrape %s: %s", result.source, result.error)
+                continue
+
+            succeeded += 1
+            output.write(json.dumps(result.data, default=str, ensure_ascii=False))
+            output.write("\n")
+
+    elapsed = time.perf_counter() - started_at
+    logger.info(
+        "Scraped %d invoices (%d failed) in %.1fs, %.2f invoices/s",
+        succeeded,
+        failed,
+        elapsed,
+        succeeded / elapsed if elapsed else 0.0,
+    )
+
+    return 1 if failed else 0
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m scrapers.batch",
+        description="Scrape many NFC-e concurrently and print them as JSON lines.",
+    )
+    parser.add_argument("sources", nargs="*", help="NFC-e URLs or access keys.")
+    parser.add_argument(
+        "-i",
+        "--input",
+        action="append",
+        default=[],
+        help="File with one URL or access key per line, '-' for stdin.",
+    )
+    parser.add_argument("-o", "--output", help="JSON lines file, stdout if omitted.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=5.0, help="Requests/second.")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=1.0)
+    parser.add_argument(
+        "--key-url",
+        default="",
+        help="URL template with a {key} placeholder used for access keys.",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.sources and not args.input:
+        args.input = ["-"]
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,21 @@
 import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from queue import Empty, LifoQueue
+from typing import Callable, Iterator
+
+from selenium.common.exceptions import TimeoutException as WebDriverTimeoutException
+from selenium.common.exceptions import WebDriverException
 from selenium.webdriver import Firefox
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.firefox.service import Service
+from selenium.webdriver.remote.webdriver import WebDriver
 from webdriver_manager.firefox import GeckoDriverManager
 
+from .exceptions import BrowserPoolExhaustedException
 
-__all__ = ["get_browser"]
+__all__ = ["get_browser", "get_browser_pool", "BrowserPool"]
 
 
 def get_browser() -> Firefox:
@@ -19,10 +29,180 @@ def get_browser() -> Firefox:
 
     WEBDRIVER_PATH = os.environ.get("WEBDRIVER_PATH")
 
-    if not os.path.exists(WEBDRIVER_PATH):
+    if not WEBDRIVER_PATH or not os.path.exists(WEBDRIVER_PATH):
         WEBDRIVER_PATH = GeckoDriverManager().install()
 
     service = Service(WEBDRIVER_PATH)
     browser = Firefox(service=service, options=options)
 
     return browser
+
+
+class BrowserPool:
+    """A bounded pool of long-lived browsers.
+
+    Browsers are created lazily, handed out one at a time and, when returned,
+    either reset (cookies and web storage cleared) for the next borrower or
+    recycled when they crashed or already loaded `max_pages` pages.
+    """
+
+    def __init__(
+        self,
+        size: int = 2,
+        max_pages: int = 100,
+        timeout: float | None = None,
+        factory: Callable[[], WebDriver] = get_browser,
+    ):
+        """
+        Initializes a BrowserPool object.
+
+        Args:
+            size (int, optional): Maximum number of browsers alive at the same time. Defaults to 2.
+            max_pages (int, optional): Pages a browser may load before being recycled. Defaults to 100.
+            timeout (float, optional): Seconds to wait for a free browser, forever if None. Defaults to None.
+            factory (Callable[[], WebDriver], optional): Creates new browsers. Defaults to get_browser.
+        """
+        if size < 1:
+            raise ValueError("size must be greater than zero")
+
+        self.size = size
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.factory = factory
+
+        self._idle: LifoQueue[WebDriver] = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._pages: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def browser(self) -> Iterator[WebDriver]:
+        """Borrow a browser from the pool, returning it when the block exits.
+
+        Raises:
+            BrowserPoolExhaustedException: if no browser is available within `timeout`.
+
+        Yields:
+            WebDriver: a healthy browser with a clean state
+        """
+        browser = self.acquire()
+        healthy = True
+
+        try:
+            yield browser
+        except WebDriverTimeoutException:
+            raise
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            self.release(browser, healthy=healthy)
+
+    def acquire(self) -> WebDriver:
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise BrowserPoolExhaustedException(self.timeout)
+
+        try:
+            while True:
+                try:
+                    browser = self._idle.get_nowait()
+                except Empty:
+                    return self._create()
+
+                if self._is_healthy(browser):
+                    return browser
+
+                self._discard(browser)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, browser: WebDriver, healthy: bool = True) -> None:
+        try:
+            with self._lock:
+                pages = self._pages.get(id(browser), 0) + 1
+                self._pages[id(browser)] = pages
+
+            if not healthy or self._closed or pages >= self.max_pages:
+                self._discard(browser)
+            elif self._reset(browser):
+                self._idle.put(browser)
+            else:
+                self._discard(browser)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Quit every idle browser and refuse new borrowers."""
+        self._closed = True
+
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Empty:
+                break
+
+    def __enter__(self) -> "BrowserPool":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def _create(self) -> WebDriver:
+        browser = self.factory()
+
+        with self._lock:
+            self._pages[id(browser)] = 0
+
+        return browser
+
+    def _discard(self, browser: WebDriver) -> None:
+        with self._lock:
+            self._pages.pop(id(browser), None)
+
+        try:
+            browser.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(browser: WebDriver) -> bool:
+        try:
+            browser.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _reset(browser: WebDriver) -> bool:
+        try:
+            browser.execute_script(
+                "window.localStorage.clear(); window.sessionStorage.clear();"
+            )
+        except Exception:
+            # Pages without web storage (e.g. about:blank) refuse the script
+            pass
+
+        try:
+            browser.delete_all_cookies()
+            browser.get("about:blank")
+            return True
+        except Exception:
+            return False
+
+
+@lru_cache
+def get_browser_pool() -> BrowserPool:
+    """Get the browser pool shared by every scraper of the process
+
+    Returns:
+        BrowserPool: pool sized by the BROWSER_POOL_SIZE and BROWSER_MAX_PAGES environment variables
+    """
+    return BrowserPool(
+        size=int(os.environ.get("BROWSER_POOL_SIZE", 2)),
+        max_pages=int(os.environ.get("BROWSER_MAX_PAGES", 100)),
+    )
@@ -0,0 +1,233 @@
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from scrapers.parsers import NfceParser
+from .interfaces import Parser, Scraper
+from .utils import get_access_key
+
+__all__ = ["PageCache", "CachedScraper", "encode_datetime", "decode_datetime"]
+
+logger = logging.getLogger(__name__)
+
+PAGE_SUFFIX = ".html.gz"
+DATA_SUFFIX = ".json.gz"
+
+
+class PageCache:
+    """Compressed on-disk store of NFC-e pages and of their parsed data, keyed by access key.
+
+    Files are spread in sub directories named after the first digits of the key. Once
+    the files take more than `max_bytes`, the least recently read ones are removed
+    until they take less than 90% of it. Parsed data is stored per parser version, so
+    pages are parsed again after the parser changes.
+
+    Processes sharing the directory, such as the workers of a WorkerPool, do not see
+    the files written by each other until the directory is scanned again, which
+    happens before evicting and every time a process wrote 10% of `max_bytes`. The
+    directory may therefore exceed `max_bytes` by up to 10% of it per process.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 512 * 1024**2):
+        """
+        Initializes a PageCache object.
+
+        Args:
+            directory (str | Path): Directory of the cache, created if it does not exist.
+            max_bytes (int, optional): Maximum size of the files, in bytes. Defaults to 512MiB.
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._sizes: dict[Path, int] = {}
+        self._written = 0
+        self.size = 0
+        self._scan()
+
+    def get_page(self, key: str) -> str | None:
+        content = self._read(self._path(key, PAGE_SUFFIX))
+
+        return content.decode("utf-8") if content is not None else None
+
+    def set_page(self, key: str, source: str) -> None:
+        self._write(self._path(key, PAGE_SUFFIX), source.encode("utf-8"))
+
+    def get_data(self, key: str, version: int | str) -> dict[str, Any] | None:
+        content = self._read(self._path(key, f".v{version}{DATA_SUFFIX}"))
+
+        return (
+            json.loads(content, object_hook=decode_datetime)
+            if content is not None
+            else None
+        )
+
+    def set_data(self, key: str, version: int | str, data: dict[str, Any]) -> None:
+        content = json.dumps(data, default=encode_datetime, ensure_ascii=False)
+        self._write(self._path(key, f".v{version}{DATA_SUFFIX}"), content.encode())
+
+    def pages(self) -> Iterator[tuple[str, str]]:
+        """Iterate over the access keys and sources of every archived page."""
+        for path in sorted(self.directory.glob(f"*/*{PAGE_SUFFIX}")):
+            key = path.name.removesuffix(PAGE_SUFFIX)
+            source = self.get_page(key)
+
+            if source is not None:
+                yield key, source
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / key[:4] / f"{key}{suffix}"
+
+    def _read(self, path: Path) -> bytes | None:
+        try:
+            content = gzip.decompress(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError):
+            logger.warning("Removing the corrupted cache file %s", path)
+            self._remove(path)
+            return None
+
+        # The modification time orders the files by their last use
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+        return content
+
+    def _write(self, path: Path, content: bytes) -> None:
+        content = gzip.compress(content)
+        path.parent.mkdir(exist_ok=True)
+
+        # Readers never see a partially written file
+        with tempfile.NamedTemporaryFile(dir=path.parent, delete=False) as file:
+            file.write(content)
+
+        os.replace(file.name, path)
+
+        with self._lock:
+            self.size += len(content) - self._sizes.get(path, 0)
+            self._sizes[path] = len(content)
+            self._written += len(content)
+
+            if self.size > self.max_bytes or self._written > self.max_bytes * 0.1:
+                # Counts the files written or removed by the other processes
+                self._scan()
+
+            if self.size > self.max_bytes:
+                self._evict()
+
+    def _scan(self) -> None:
+        sizes = {}
+
+        for path in self.directory.glob("*/*.gz"):
+            try:
+                sizes[path] = path.stat().st_size
+            except FileNotFoundError:
+                pass
+
+        self._sizes = sizes
+        self.size = sum(sizes.values())
+        self._written = 0
+
+    def _evict(self) -> None:
+        paths = sorted(self._sizes, key=_modified_at, reverse=True)
+
+        while paths and self.size > self.max_bytes * 0.9:
+            self._discard(paths.pop())
+
+    def _remove(self, path: Path) -> None:
+        with self._lock:
+            self._discard(path)
+
+    def _discard(self, path: Path) -> None:
+        self.size -= self._sizes.pop(path, 0)
+        path.unlink(missing_ok=True)
+
+
+class CachedScraper(Scraper):
+    """Scraper answering the invoices it has already scraped from a PageCache.
+
+    The access key is taken from the URL before any request is made. URLs without one
+    are always scraped.
+    """
+
+    def __init__(self, scraper: Scraper, cache: PageCache, parser: Parser = None):
+        """
+        Initializes a CachedScraper object.
+
+        Args:
+            scraper (Scraper): Scraper used for the pages missing from the cache.
+            cache (PageCache): Cache of pages and parsed data.
+            parser (Parser, optional): Parser of the cached pages. Defaults to the parser of the scraper.
+        """
+        self.scraper = scraper
+        self.cache = cache
+        self.parser = parser or getattr(scraper, "parser", None) or NfceParser()
+
+    def get(self, url: str) -> dict[str, Any]:
+        key = get_access_key(url)
+
+        if not key:
+            return self.scraper.get(url)
+
+        data = self.cache.get_data(key, self.parser.VERSION)
+
+        if data is not None:
+            return data
+
+        source = self.cache.get_page(key)
+        cached = source is not None
+
+        if not cached:
+            source = self.scraper.fetch(url)
+
+        data = self.parser.parse(self.parser.load(source))
+
+        # Error pages, such as an invoice not yet available, are scraped again
+        if data.get("itens"):
+            if not cached:
+                self.cache.set_page(key, source)
+
+            self.cache.set_data(key, self.parser.VERSION, data)
+
+        return data
+
+    def fetch(self, url: str) -> str:
+        key = get_access_key(url)
+        source = self.cache.get_page(key) if key else None
+
+        return source if source is not None else self.scraper.fetch(url)
+
+    def wait_page_load(self) -> None:
+        self.scraper.wait_page_load()
+
+
+def _modified_at(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def encode_datetime(value: Any) -> Any:
+    """`default` of json.dumps, writing datetimes as `{"__datetime__": iso}`."""
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def decode_datetime(value: dict[str, Any]) -> Any:
+    """`object_hook` of json.loads, reading the datetimes written by encode_datetime."""
+    if value.keys() == {"__datetime__"}:
+        return datetime.fromisoformat(value["__datetime__"])
+
+    return value
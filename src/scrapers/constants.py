@@ -4,9 +4,6 @@ UNWANTED_WORDS = [
     r"Qtde.:",
     r"Código:",
     r"CNPJ:",
-    r"\(",
-    r"\)",
-    r"\n",
-    r"\r",
-    r"\t",
-]
\ No newline at end of file
+]
+
+UNWANTED_CHARACTERS = "()\n\r\t"
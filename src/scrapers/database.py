@@ -1,12 +1,13 @@
 from typing import Any
+from canonical import ProductRecord
 from domain import EletronicInvoice, Company, Item, Product, Totals, Taxes, Address
-from repositories import InvoiceRepository
+from repositories import CanonicalProductRepository, InvoiceRepository
 from repositories.company import CompanyRepository
 from repositories.item import ItemRepository
 from repositories.product import ProductRepository
 
 
-def _dict_to_entity(data: dict[str, Any]) -> EletronicInvoice:
+def dict_to_entity(data: dict[str, Any]) -> EletronicInvoice:
     """Transform a dictionary into an entity."""
 
     address = Address(
@@ -26,7 +27,8 @@ def _dict_to_entity(data: dict[str, Any]) -> EletronicInvoice:
             product_id=0,
             product=Product(
                 id=0,
-                code=f"{int(item['codigo_produto']):0>15}",
+                # The entity zero pads the code, as every lookup of it does
+                code=item["codigo_produto"],
                 description=item["descricao_produto"],
             ),
             quantity=item["quantidade"],
@@ -74,44 +76,89 @@ def save_invoice(
     company_repository: CompanyRepository,
     product_repository: ProductRepository,
     item_repository: ItemRepository,
-):
-    """Save the invoice data into the database."""
-
-    entity = _dict_to_entity(invoice)
-
-    invoices = invoice_repository.find_all(access_key=entity.access_key)
+    user_id: int = None,
+) -> EletronicInvoice:
+    """Save the invoice data into the database.
+
+    Every statement runs in the same transaction, which is committed once at the end
+    and rolled back if any of them fails. Companies, invoices, products and items are
+    upserted against their unique constraints, so saving the same invoice twice, even
+    concurrently, neither fails nor creates duplicates.
+    """
+
+    entity = dict_to_entity(invoice)
+    entity.user_id = user_id
+    session = invoice_repository.session
+
+    try:
+        upsert_invoice(
+            entity,
+            invoice_repository,
+            company_repository,
+            product_repository,
+            item_repository,
+        )
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
 
-    companies = company_repository.find_all(cnpj=entity.company.cnpj)
+    return entity
 
-    if len(companies) == 1:
-        entity.company = companies[0].id
-    else:
-        entity.company = company_repository.save(entity.company)
 
-    if len(invoices) == 1:
-        entity.id = invoices[0].id
-    else:
-        _entity = invoice_repository.save(entity)
-        entity.id = _entity.id
+def upsert_invoice(
+    entity: EletronicInvoice,
+    invoice_repository: InvoiceRepository,
+    company_repository: CompanyRepository,
+    product_repository: ProductRepository,
+    item_repository: ItemRepository,
+) -> EletronicInvoice:
+    """Upsert the invoice with its company, products and items, without committing them.
+
+    The items of the invoice that are not in the entity anymore are deleted. The ids
+    of the entity are filled in place.
+    """
+
+    entity.company = company_repository.upsert(entity.company)
+    entity.company_id = entity.company.id
+    entity.id = invoice_repository.upsert(entity).id
+
+    entity.items = merge_items(entity.items)
+    products = product_repository.upsert_all([item.product for item in entity.items])
+    ids = {(product.code, product.description): product.id for product in products}
+    CanonicalProductRepository(product_repository.session).assign(
+        ProductRecord(product.id, product.code, product.description)
+        for product in products
+    )
 
     for item in entity.items:
         item.invoice_id = entity.id
+        item.product_id = ids[(item.product.code, item.product.description)]
+        item.product.id = item.product_id
 
-        products = product_repository.find_all(
-            code=item.product.code, description=item.product.description
-        )
+    item_repository.upsert_all(entity.items)
+    item_repository.delete_all_except(
+        entity.id, [item.product_id for item in entity.items]
+    )
 
-        if len(products) == 1:
-            item.product_id = products[0].id
-        else:
-            product = product_repository.save(item.product)
-            item.product_id = product.id
+    return entity
 
-        items = item_repository.find_all(
-            invoice_id=item.invoice_id, product_id=item.product_id
-        )
 
-        if len(items) == 1:
-            item.id = items[0].id
+def merge_items(items: list[Item]) -> list[Item]:
+    """Merge the items of the same product, summing their quantities.
+
+    An invoice has a single item per product, and a product listed more than once
+    in the same upsert statement would make it fail.
+    """
+
+    merged: dict[tuple[str, str], Item] = {}
+
+    for item in items:
+        key = (item.product.code, item.product.description)
+
+        if key in merged:
+            merged[key].quantity += item.quantity
         else:
-            item = item_repository.save(item)
+            merged[key] = item
+
+    return list(merged.values())
@@ -4,4 +4,14 @@ class TimeoutException(Exception):
         timeout: int = 0,
         message: str = "Timed out waiting {timout}s for page to load",
     ):
+        self.timeout = timeout
         super().__init__(message.format(timout=self.timeout))
+
+
+class BrowserPoolExhaustedException(TimeoutException):
+    def __init__(
+        self,
+        timeout: float = 0,
+        message: str = "Timed out waiting {timout}s for a free browser",
+    ):
+        super().__init__(timeout, message)
@@ -1,16 +1,30 @@
 from abc import ABC, abstractmethod
 from typing import Any
+from bs4 import BeautifulSoup
 
 __all__ = ["Parser", "ContentParser", "InfoParser", "Scraper"]
 
 
 class Parser(ABC):
     CONTENT_SELECTOR = ""
+    # Bumped whenever the parsed data changes, so cached data is parsed again
+    VERSION = 1
 
     @abstractmethod
     def parse(self, page) -> dict[str, Any]:
         pass
 
+    def load(self, source: str | bytes) -> Any:
+        """Turn a page source into the page object expected by `parse`.
+
+        Args:
+            source (str | bytes): Page source
+
+        Returns:
+            Any: BeautifulSoup tree of the page
+        """
+        return BeautifulSoup(source, "html.parser")
+
     def _get_content(self, page: Any) -> Any:
         if not self.CONTENT_SELECTOR:
             raise ValueError("CONTENT_SELECTOR must be defined")
@@ -39,6 +53,18 @@ class Scraper(ABC):
         """
         raise NotImplementedError("Method 'get' must be implemented")
 
+    @abstractmethod
+    def fetch(self, url: str) -> str:
+        """Download the raw page source of an URL, without parsing it.
+
+        Args:
+            url (str): URL to download
+
+        Returns:
+            str: Page source
+        """
+        raise NotImplementedError("Method 'fetch' must be implemented")
+
     @abstractmethod
     def wait_page_load(self) -> None:
         """Wait for the page to load"""
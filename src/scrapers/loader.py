@@ -0,0 +1,511 @@
+import argparse
+import csv
+import io
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+
+from domain import EletronicInvoice
+from scrapers.cache import decode_datetime
+from scrapers.database import dict_to_entity, merge_items
+from scrapers.utils import to_database_time
+
+__all__ = ["CopyLoader", "LoadReport", "read_records"]
+
+logger = logging.getLogger(__name__)
+
+INVOICE_COLUMNS = (
+    "ordem",
+    "chave_acesso",
+    "numero",
+    "serie",
+    "data_emissao",
+    "protocolo_autorizacao",
+    "data_autorizacao",
+    "tributacao_federal",
+    "tributacao_estadual",
+    "tributacao_municipal",
+    "fonte",
+    "cnpj",
+    "razao_social",
+    "logradouro",
+    "numero_endereco",
+    "complemento",
+    "bairro",
+    "municipio",
+    "uf",
+    "cep",
+)
+
+ITEM_COLUMNS = (
+    "chave_acesso",
+    "codigo",
+    "descricao",
+    "quantidade",
+    "preco_unitario",
+    "unidade_medida",
+)
+
+# Rows are deleted on commit, so each batch starts with empty staging tables
+CREATE_STAGING_TABLES = """
+CREATE TEMP TABLE IF NOT EXISTS carga_notas (
+    ordem bigint NOT NULL,
+    chave_acesso text NOT NULL,
+    numero text NOT NULL,
+    serie text NOT NULL,
+    data_emissao timestamp,
+    protocolo_autorizacao text NOT NULL,
+    data_autorizacao timestamp,
+    tributacao_federal double precision,
+    tributacao_estadual double precision,
+    tributacao_municipal double precision,
+    fonte text,
+    cnpj text NOT NULL,
+    razao_social text NOT NULL,
+    logradouro text,
+    numero_endereco text,
+    complemento text,
+    bairro text,
+    municipio text,
+    uf text,
+    cep text
+) ON COMMIT DELETE ROWS;
+
+CREATE TEMP TABLE IF NOT EXISTS carga_itens (
+    chave_acesso text NOT NULL,
+    codigo text NOT NULL,
+    descricao text NOT NULL,
+    quantidade double precision,
+    preco_unitario double precision,
+    unidade_medida text
+) ON COMMIT DELETE ROWS;
+"""
+
+# The last invoice read of a company gives its name and address
+MERGE_COMPANIES = """
+INSERT INTO empresas (cnpj, razao_social, logradouro, numero, complemento, bairro, municipio, uf, cep)
+SELECT DISTINCT ON (cnpj)
+    cnpj, razao_social, logradouro, numero_endereco, complemento, bairro, municipio, uf, cep
+FROM carga_notas
+ORDER BY cnpj, ordem DESC
+ON CONFLICT (cnpj) DO UPDATE SET
+    razao_social = excluded.razao_social,
+    logradouro = excluded.logradouro,
+    numero = excluded.numero,
+    complemento = excluded.complemento,
+    bairro = excluded.bairro,
+    municipio = excluded.municipio,
+    uf = excluded.uf,
+    cep = excluded.cep
+"""
+
+MERGE_INVOICES = """
+INSERT INTO notas_fiscais (
+    id_empresa, chave_acesso, numero, serie, data_emissao, protocolo_autorizacao,
+    data_autorizacao, tributacao_federal, tributacao_estadual, tributacao_municipal, fonte
+)
+SELECT
+    e.id, n.chave_acesso, n.numero, n.serie, n.data_emissao, n.protocolo_autorizacao,
+    n.data_autorizacao, coalesce(n.tributacao_federal, 0), coalesce(n.tributacao_estadual, 0),
+    coalesce(n.tributacao_municipal, 0), n.fonte
+FROM carga_notas n
+JOIN empresas e ON e.cnpj = n.cnpj
+ORDER BY n.chave_acesso
+ON CONFLICT (chave_acesso) DO UPDATE SET
+    id_empresa = excluded.id_empresa,
+    numero = excluded.numero,
+    serie = excluded.serie,
+    data_emissao = excluded.data_emissao,
+    protocolo_autorizacao = excluded.protocolo_autorizacao,
+    data_autorizacao = excluded.data_autorizacao,
+    tributacao_federal = excluded.tributacao_federal,
+    tributacao_estadual = excluded.tributacao_estadual,
+    tributacao_municipal = excluded.tributacao_municipal,
+    fonte = excluded.fonte
+"""
+
+MERGE_PRODUCTS = """
+INSERT INTO produtos (codigo, descricao)
+SELECT DISTINCT codigo, descricao
+FROM carga_itens
+ORDER BY codigo, descricao
+ON CONFLICT (codigo, descricao) DO NOTHING
+"""
+
+DELETE_STALE_ITEMS = """
+DELETE FROM itens_nota t
+USING notas_fiscais n, carga_notas c
+WHERE t.id_nota_fiscal = n.id
+    AND n.chave_acesso = c.chave_acesso
+    AND NOT EXISTS (
+        SELECT 1
+        FROM carga_itens i
+        JOIN produtos p ON p.codigo = i.codigo AND p.descricao = i.descricao
+        WHERE i.chave_acesso = c.chave_acesso AND p.id = t.id_produto
+    )
+"""
+
+MERGE_ITEMS = """
+INSERT INTO itens_nota (id_nota_fiscal, id_produto, quantidade, preco_unitario, unidade_medida)
+SELECT n.id, p.id, i.quantidade, coalesce(i.preco_unitario, 0), i.unidade_medida
+FROM carga_itens i
+JOIN notas_fiscais n ON n.chave_acesso = i.chave_acesso
+JOIN produtos p ON p.codigo = i.codigo AND p.descricao = i.descricao
+ORDER BY n.id, p.id
+ON CONFLICT (id_nota_fiscal, id_produto) DO UPDATE SET
+    quantidade = excluded.quantidade,
+    preco_unitario = excluded.preco_unitario,
+    unidade_medida = excluded.unidade_medida
+"""
+
+MERGE_STATEMENTS = (
+    MERGE_COMPANIES,
+    MERGE_INVOICES,
+    MERGE_PRODUCTS,
+    DELETE_STALE_ITEMS,
+    MERGE_ITEMS,
+)
+
+
+@dataclass
+class LoadReport:
+    invoices: int = 0
+    items: int = 0
+    failed: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        rows = self.invoices + self.items
+        return rows / self.elapsed if self.elapsed else 0.0
+
+
+class CopyLoader:
+    """Load parsed invoices with COPY, for backfills too large for INSERT statements.
+
+    Each batch of invoices is copied into temporary staging tables and merged into
+    `empresas`, `notas_fiscais`, `produtos` and `itens_nota` by a few set-based
+    statements, which resolve the foreign keys by CNPJ, access key and product code
+    and description. Invoices already stored are updated, and their items that are
+    not in the new data are deleted. Every batch is committed on its own, so an
+    interrupted load can simply run again.
+    """
+
+    def __init__(self, connection: Any, batch_size: int = 10_000):
+        """
+        Initializes a CopyLoader object.
+
+        Args:
+            connection (Any): psycopg2 connection, such as `Engine.raw_connection()`.
+            batch_size (int, optional): Invoices merged in each transaction. Defaults to 10_000.
+        """
+        self.connection = connection
+        self.batch_size = max(batch_size, 1)
+
+    def load(self, records: Iterable[dict[str, Any]]) -> LoadReport:
+        """Load the invoices.
+
+        Args:
+            records (Iterable[dict[str, Any]]): invoices in the format of the parsers
+
+        Returns:
+            LoadReport: invoices and items loaded and records that could not be read
+        """
+        report = LoadReport()
+        started_at = time.perf_counter()
+        records = iter(records)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(CREATE_STAGING_TABLES)
+            self.connection.commit()
+
+            while batch := list(islice(records, self.batch_size)):
+                entities = self._to_entities(batch, report)
+                items = self._merge(cursor, entities)
+
+                report.invoices += len(entities)
+                report.items += items
+                report.batches += 1
+                report.elapsed = time.perf_counter() - started_at
+
+                logger.info(
+                    "Loaded %d invoices and %d items, %.0f rows/s",
+                    report.invoices,
+                    report.items,
+                    report.rows_per_second,
+                )
+
+        report.elapsed = time.perf_counter() - started_at
+
+        return report
+
+    def _merge(self, cursor: Any, entities: list[EletronicInvoice]) -> int:
+        invoices, items = io.StringIO(), io.StringIO()
+        count = write_rows(entities, invoices, items)
+
+        try:
+            cursor.copy_expert(_copy("carga_notas", INVOICE_COLUMNS), invoices)
+            cursor.copy_expert(_copy("carga_itens", ITEM_COLUMNS), items)
+
+            for statement in MERGE_STATEMENTS:
+                cursor.execute(statement)
+
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            raise
+
+        return count
+
+    @staticmethod
+    def _to_entities(
+        batch: list[dict[str, Any]], report: LoadReport
+    ) -> list[EletronicInvoice]:
+        # An invoice read twice in the batch is loaded once, with its last data
+        entities: dict[str, EletronicInvoice] = {}
+
+        for record in batch:
+            try:
+                entity = dict_to_entity(record)
+            except Exception as e:
+                report.failed += 1
+                logger.error("Incomplete invoice: %r", e)
+                continue
+
+            if not entity.access_key or not entity.company.cnpj:
+                report.failed += 1
+                logger.error("Invoice without access key or CNPJ: %s", entity.number)
+                continue
+
+            entities.pop(entity.access_key, None)
+            entities[entity.access_key] = entity
+
+        return list(entities.values())
+
+
+def write_rows(
+    entities: list[EletronicInvoice], invoices: TextIO, items: TextIO
+) -> int:
+    """Write the rows of the staging tables as CSV.
+
+    Args:
+        entities (list[EletronicInvoice]): invoices with distinct access keys
+        invoices (TextIO): file receiving the rows of `carga_notas`
+        items (TextIO): file receiving the rows of `carga_itens`
+
+    Returns:
+        int: number of item rows, after merging the items of the same product
+    """
+    invoice_writer, item_writer = csv.writer(invoices), csv.writer(items)
+    count = 0
+
+    for order, entity in enumerate(entities):
+        company, address = entity.company, entity.company.address
+        invoice_writer.writerow(
+            (
+                order,
+                entity.access_key,
+                entity.number,
+                entity.series,
+                _timestamp(entity.issue_date),
+                entity.authorization_protocol,
+                _timestamp(entity.authorization_date),
+                entity.taxes.federal,
+                entity.taxes.state,
+                entity.taxes.municipal,
+                entity.taxes.source,
+                company.cnpj,
+                company.name,
+                address.street,
+                address.number,
+                address.complement,
+                address.neighborhood,
+                address.city,
+                address.state,
+                address.zip_code,
+            )
+        )
+
+        for item in merge_items(entity.items):
+            item_writer.writerow(
+                (
+                    entity.access_key,
+                    item.product.code,
+                    item.product.description,
+                    item.quantity,
+                    item.unit_price,
+                    item.unity_of_measurement,
+                )
+            )
+            count += 1
+
+    invoices.seek(0)
+    items.seek(0)
+
+    return count
+
+
+def read_records(paths: Iterable[str]) -> Iterator[dict[str, Any]]:
+    """Read invoices from JSON or NDJSON dumps, `-` being NDJSON from the standard input.
+
+    A JSON file holds an invoice or a list of them. Datetimes may be ISO strings or
+    encoded as in the PageCache.
+
+    Args:
+        paths (Iterable[str]): dump files
+
+    Yields:
+        dict[str, Any]: invoices in the format of the parsers
+    """
+    for path in paths:
+        if path == "-":
+            yield from _read_lines(sys.stdin)
+        elif path.endswith((".ndjson", ".jsonl")):
+            with open(path, encoding="utf-8") as file:
+                yield from _read_lines(file)
+        else:
+            data = json.loads(
+                Path(path).read_text(encoding="utf-8"), object_hook=decode_datetime
+            )
+            yield from data if isinstance(data, list) else [data]
+
+
+def _read_lines(file: TextIO) -> Iterator[dict[str, Any]]:
+    for line in file:
+        if line.strip():
+            yield json.loads(line, object_hook=decode_datetime)
+
+
+def _copy(table: str, columns: tuple[str, ...]) -> str:
+    # Empty text columns are read as empty strings, and only as NULL elsewhere
+    text = [column for column in columns if column not in _NULLABLE]
+    return (
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN "
+        f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(text)}))"
+    )
+
+
+_NULLABLE = {
+    "ordem",
+    "data_emissao",
+    "data_autorizacao",
+    "tributacao_federal",
+    "tributacao_estadual",
+    "tributacao_municipal",
+    "quantidade",
+    "preco_unitario",
+}
+
+
+def _timestamp(value: datetime | str | None) -> str | None:
+    # The columns have no time zone, Postgres would drop the offset of a text
+    if isinstance(value, str) and value:
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+
+    if isinstance(value, datetime):
+        return to_database_time(value).isoformat(sep=" ")
+
+    return value or None
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m scrapers.loader",
+        description="Load parsed NFC-e invoices with COPY, for large backfills.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        default=["-"],
+        help="JSON or NDJSON dumps, `-` reads NDJSON from the standard input.",
+    )
+    parser.add_argument(
+        "--pages",
+        action="store_true",
+        help="The paths are saved pages or archives of them, parsed before loading.",
+    )
+    parser.add_argument(
+        "--urls",
+        action="store_true",
+        help="The paths list NFC-e URLs, one per line, scraped before loading.",
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    from repositories import AnalyticsRepository, CanonicalProductRepository
+    from settings.database import Engine, SessionLocal
+
+    records = _records(args)
+    connection = Engine.raw_connection()
+
+    try:
+        report = CopyLoader(connection, args.batch_size).load(records)
+    finally:
+        connection.close()
+
+    if report.invoices:
+        with SessionLocal() as session:
+            # The merge statements insert the products, their canonical products
+            # are assigned afterwards
+            CanonicalProductRepository(session).assign_pending()
+            AnalyticsRepository(session).refresh()
+
+    logger.info(
+        "Loaded %d invoices and %d items in %d batches, %.1fs, %.0f rows/s, %d failed",
+        report.invoices,
+        report.items,
+        report.batches,
+        report.elapsed,
+        report.rows_per_second,
+        report.failed,
+    )
+
+    return 1 if report.failed else 0
+
+
+def _records(args: argparse.Namespace) -> Iterator[dict[str, Any]]:
+    if args.pages:
+        from scrapers.reparse import parse_pages, read_pages
+
+        for page in parse_pages(read_pages(args.paths), workers=args.workers):
+            if page.ok:
+                yield page.data
+            else:
+                logger.error("Failed to parse %s: %s", page.source, page.error)
+    elif args.urls:
+        from scrapers.pipeline import ScrapingPipeline
+
+        lines = _read_lines_of(args.paths)
+        urls = (line.strip() for line in lines if line.strip())
+
+        for result in ScrapingPipeline(workers=args.workers).scrape(urls):
+            if result.ok:
+                yield result.data
+    else:
+        yield from read_records(args.paths)
+
+
+def _read_lines_of(paths: list[str]) -> Iterator[str]:
+    for path in paths:
+        if path == "-":
+            yield from sys.stdin
+        else:
+            with open(path, encoding="utf-8") as file:
+                yield from file
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,15 @@
 import re
 from datetime import datetime
+from html.parser import HTMLParser
 from typing import Any
-from .utils import to_float, sanitize_text, clean_text, remove_consecutive_spaces
+from .utils import (
+    to_float,
+    to_floats,
+    sanitize_text,
+    sanitize_texts,
+    clean_text,
+    remove_consecutive_spaces,
+)
 from .interfaces import Parser, ContentParser, InfoParser
 
 __all__ = [
@@ -12,6 +20,7 @@ __all__ = [
     "ItemsParser",
     "TotalsParser",
     "NfceParser",
+    "StreamingNfceParser",
 ]
 
 
@@ -19,7 +28,12 @@ class AddressParser(ContentParser):
     def parse(self, page: Any) -> dict[str, Any]:
         content = self._get_content(page)
         info = content.find_all("div", class_="text")
-        text = sanitize_text(info[1].text)
+
+        return self.parse_text(info[1].text)
+
+    def parse_text(self, text: str) -> dict[str, Any]:
+        """Build the address from the text of its `div`."""
+        text = sanitize_text(text)
         address = text.upper().split(",")
 
         labels = [
@@ -51,8 +65,12 @@ class CompanyParser(ContentParser):
         info = content.find_all("div", class_="text")
         name = content.find_all("div", class_="txtTopo")[0].text
 
+        return self.parse_texts(info[0].text, name)
+
+    def parse_texts(self, cnpj: str, name: str) -> dict[str, Any]:
+        """Build the company from the texts of its CNPJ and name."""
         result = {
-            "cnpj": clean_text(info[0].text),
+            "cnpj": clean_text(cnpj),
             "razao_social": sanitize_text(name).upper(),
         }
 
@@ -64,8 +82,19 @@ class InformacoesNotaParser(InfoParser):
 
     def parse(self, page) -> dict:
         content = self._get_content(page)
+        access_key = content.find("span", class_="chave").text
+
+        try:
+            info_contents = content.find("ul", class_="ui-listview").find("li").contents
+        except Exception:
+            info_contents = []
+
+        return self.parse_contents(access_key, info_contents)
+
+    def parse_contents(self, access_key: str, info_contents: list) -> dict:
+        """Build the invoice information from its access key and the contents of the first `li`."""
         result = {
-            "chave_acesso": clean_text(content.find("span", class_="chave").text),
+            "chave_acesso": clean_text(access_key),
             "numero": "",
             "serie": "",
             "data_emissao": "",
@@ -74,11 +103,10 @@ class InformacoesNotaParser(InfoParser):
         }
         DATE_FORMAT = "%d/%m/%Y %H:%M:%S%z"
         try:
-            info_contents = content.find("ul", class_="ui-listview").find("li").contents
             info_contents = [
                 info
                 for info in info_contents
-                if info != "\n" and info.name != "br" and info.name != "strong"
+                if info != "\n" and getattr(info, "name", None) not in ("br", "strong")
             ]
 
             date_str = "".join(info_contents[2].split("\n")[0].rsplit(":", 1))
@@ -107,14 +135,21 @@ class InformacoesNotaParser(InfoParser):
 
 
 class TaxParser(InfoParser):
+    PATTERN = re.compile(
+        r"trib *aprox: *R\$ *(\d+[.,]\d+) *fed *R\$ *(\d+[.,]\d+) *est *R\$ *(\d+[.,]\d+) *mun *fonte: *(\w+)",
+        re.IGNORECASE,
+    )
+
     def parse(self, page) -> dict:
         content = self._get_content(page)
-        taxpayer_info = content.findAll("div")[-3].find("ul").text.strip()
-        pattern = re.compile(
-            r"trib *aprox: *R\$ *(\d+[.,]\d+) *fed *R\$ *(\d+[.,]\d+) *est *R\$ *(\d+[.,]\d+) *mun *fonte: *(\w+)",
-            re.IGNORECASE,
-        )
-        matches = pattern.match(taxpayer_info)
+        taxpayer_info = content.findAll("div")[-3].find("ul").text
+        attribute = content.parent.find("span", class_="totalNumb txtObs")
+
+        return self.parse_texts(taxpayer_info, attribute.text if attribute else None)
+
+    def parse_texts(self, taxpayer_info: str, total_taxes: str | None) -> dict:
+        """Build the taxes from the taxpayer information, or from the total taxes without it."""
+        matches = self.PATTERN.match(taxpayer_info.strip())
 
         taxes = {
             "federal": 0.0,
@@ -123,8 +158,7 @@ class TaxParser(InfoParser):
             "fonte": "",
         }
         if not matches:
-            attribute = content.parent.find("span", class_="totalNumb txtObs")
-            tax = to_float(attribute.text) if attribute else 0.0
+            tax = to_float(total_taxes) if total_taxes is not None else 0.0
             taxes["federal"] = tax
         else:
             taxes["federal"] = to_float(matches.group(1))
@@ -140,25 +174,35 @@ class ItemsParser(ContentParser):
         content = self._get_content(page)
         items_table = content.find("table", id="tabResult")
 
-        products = items_table.find_all("span", class_="txtTit")
-        codes = items_table.find_all("span", class_="RCod")
-        quantities = items_table.find_all("span", class_="Rqtd")
-        uoms = items_table.find_all("span", class_="RUN")
-        unitary_prices = items_table.find_all("span", class_="RvlUnit")
-
-        columns = zip(products, codes, quantities, uoms, unitary_prices)
-
-        return {"itens": self._get_items(columns)}
+        columns = [
+            [span.text for span in items_table.find_all("span", class_=name)]
+            for name in ("txtTit", "RCod", "Rqtd", "RUN", "RvlUnit")
+        ]
 
-    def _get_items(self, columns):
+        return {"itens": self.get_items(*columns)}
+
+    def get_items(
+        self,
+        products: list[str],
+        codes: list[str],
+        quantities: list[str],
+        uoms: list[str],
+        unitary_prices: list[str],
+    ) -> dict[str, Any]:
+        """Build the items from the texts of each column of the items table."""
         items = {}
 
-        for product, code, quantity, uom, unitary_price in columns:
-            code = sanitize_text(code.text)
-            quantity = to_float(quantity.text)
-            price = to_float(unitary_price.text)
-            uom = sanitize_text(uom.text).upper()
-            product_description = sanitize_text(product.text).upper()
+        columns = zip(
+            sanitize_texts(products),
+            sanitize_texts(codes),
+            to_floats(quantities),
+            sanitize_texts(uoms),
+            to_floats(unitary_prices),
+        )
+
+        for product, code, quantity, uom, price in columns:
+            uom = uom.upper()
+            product_description = product.upper()
 
             if code in items.keys():
                 items[code]["quantidade"] += quantity
@@ -181,9 +225,27 @@ class TotalsParser(ContentParser):
     def parse(self, page) -> dict[str, Any]:
         content = page.find("div", id=self.CONTENT_SELECTOR)
         payment_type = content.find_all("label", class_="tx")[0].text
+
+        lines = []
+
+        for total in content.find_all("div", id="linhaTotal"):
+            label = total.find("label")
+
+            if label is None:
+                continue
+
+            value = total.find("span")
+            lines.append((label.string, value.text if value else None))
+
+        return self.parse_lines(payment_type, lines)
+
+    def parse_lines(
+        self, payment_type: str, lines: list[tuple[str | None, str | None]]
+    ) -> dict[str, Any]:
+        """Build the totals from the (label, value) texts of each `linhaTotal` line."""
         payment_type = sanitize_text(payment_type)
 
-        totals = self.__get_totals(content, payment_type)
+        totals = self.__get_totals(lines, payment_type)
         values = self.__get_values(totals)
 
         return {
@@ -194,25 +256,24 @@ class TotalsParser(ContentParser):
             "tipo_pagamento": payment_type.upper(),
         }
 
-    def __get_totals(self, content: Any, payment_type: str) -> list:
-        totals_line = content.find_all("div", id="linhaTotal")
-
+    def __get_totals(self, lines: list, payment_type: str) -> list:
         totals = []
 
-        for total in totals_line:
-            label = total.find("label")
-
-            if label is None or sanitize_text(label.string) == payment_type:
+        for label, value in lines:
+            if sanitize_text(label) == payment_type:
                 continue
 
-            totals.append(total)
+            totals.append((label, value))
 
         return totals
 
     def __get_values(self, totals: list) -> dict:
         values = {"moeda": "R$"}
-        for total in totals:
-            label = sanitize_text(total.find("label").string)
+        for label, value in totals:
+            if value is None:
+                raise ValueError(f"Total line '{label}' has no value")
+
+            label = sanitize_text(label)
             if label.lower().startswith("valor total"):
                 values["moeda"] = label.split(" ")[-1].strip().upper()
 
@@ -222,7 +283,7 @@ class TotalsParser(ContentParser):
                 else label.replace("R$:", "").strip()
             )
 
-            values[label] = to_float(total.find("span").text)
+            values[label] = to_float(value)
 
         return values
 
@@ -251,3 +312,403 @@ class NfceParser(Parser):
                 data[name] = {}
 
         return data
+
+
+class _Element:
+    """Placeholder for a child tag of the invoice information list."""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+
+class _Frame:
+    __slots__ = (
+        "tag",
+        "index",
+        "role",
+        "children",
+        "string",
+        "last_text",
+        "text",
+        "targets",
+        "first_list",
+        "lists",
+    )
+
+    def __init__(self, tag: str, index: int):
+        self.tag = tag
+        self.index = index
+        self.role = ""
+        self.children = 0
+        self.string = None
+        self.last_text = False
+        self.text = None
+        self.targets = None
+        self.first_list = None
+        self.lists = None
+
+
+class _NfceDocument(HTMLParser):
+    """Collects, in a single pass over the page source, the texts used by the NFC-e section parsers.
+
+    It mirrors the `find`/`find_all` lookups of the section parsers so that the results are the
+    same as parsing a BeautifulSoup tree, without building the tree.
+    """
+
+    VOID_ELEMENTS = frozenset(
+        (
+            "area",
+            "base",
+            "br",
+            "col",
+            "embed",
+            "hr",
+            "img",
+            "input",
+            "link",
+            "meta",
+            "param",
+            "source",
+            "track",
+            "wbr",
+        )
+    )
+    ITEM_COLUMNS = ("txtTit", "RCod", "Rqtd", "RUN", "RvlUnit")
+    PRESERVE_WHITESPACE = frozenset(("pre", "textarea"))
+    ASCII_SPACES = str.maketrans("", "", " \n\t\x0c\r")
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: list[_Frame] = []
+        self.captures: list[_Frame] = []
+        self.count = 0
+
+        self.conteudo = self.infos = self.table = False
+        self.in_conteudo = self.in_infos = self.in_table = False
+        self.infos_parent = -1
+
+        self.company_names: list[str] = []
+        self.texts: list[str] = []
+        self.payment_types: list[str] = []
+        self.items: dict[str, list[str]] = {name: [] for name in self.ITEM_COLUMNS}
+        self.lines: list[list] = []
+        self.line: list | None = None
+
+        self.access_keys: list[str] = []
+        self.listview = self.listview_item = False
+        self.info_contents: list = []
+        self.info_lists: list[list] = []
+        self.total_taxes: list[tuple[set[int], str]] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self._add_child(tag)
+
+        if tag in self.VOID_ELEMENTS:
+            return
+
+        self.count += 1
+        frame = _Frame(tag, self.count)
+        attributes = dict(attrs)
+        element_id = attributes.get("id")
+        classes = (attributes.get("class") or "").split()
+
+        if tag == "div":
+            self._start_div(frame, element_id, classes)
+        elif tag == "span":
+            self._start_span(frame, attributes.get("class"), classes)
+        elif tag == "label" and self.in_conteudo:
+            self._start_label(frame, classes)
+        elif tag == "table" and self.in_conteudo and element_id == "tabResult":
+            self._start_table(frame)
+        elif tag == "ul" and self.in_infos:
+            self._start_list(frame, classes)
+        elif tag == "li" and self.listview and not self.listview_item:
+            self._start_list_item(frame)
+
+        self.stack.append(frame)
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        self.handle_starttag(tag, attrs)
+
+        if tag not in self.VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str) -> None:
+        if not any(frame.tag == tag for frame in self.stack):
+            return
+
+        while self.stack:
+            frame = self.stack.pop()
+            self._end(frame)
+
+            if frame.tag == tag:
+                break
+
+    def handle_data(self, data: str) -> None:
+        if not data.translate(self.ASCII_SPACES) and not any(
+            frame.tag in self.PRESERVE_WHITESPACE for frame in self.stack
+        ):
+            # BeautifulSoup collapses whitespace-only strings
+            data = "\n" if "\n" in data else " "
+
+        for frame in self.captures:
+            frame.text.append(data)
+
+        if not self.stack:
+            return
+
+        parent = self.stack[-1]
+
+        if parent.last_text:
+            if parent.string is not None:
+                parent.string += data
+        else:
+            parent.children += 1
+            parent.last_text = True
+            parent.string = data if parent.children == 1 else None
+
+        if parent.role == "info_item":
+            if self.info_contents and isinstance(self.info_contents[-1], str):
+                self.info_contents[-1] += data
+            else:
+                self.info_contents.append(data)
+
+    def handle_comment(self, data: str) -> None:
+        if self.stack:
+            parent = self.stack[-1]
+            parent.children += 1
+            parent.string = None
+            parent.last_text = False
+
+    def close(self) -> None:
+        super().close()
+
+        while self.stack:
+            self._end(self.stack.pop())
+
+    def _add_child(self, tag: str) -> None:
+        if not self.stack:
+            return
+
+        parent = self.stack[-1]
+        parent.children += 1
+        parent.string = None
+        parent.last_text = False
+
+        if parent.role == "info_item":
+            self.info_contents.append(_Element(tag))
+
+    def _start_div(self, frame: _Frame, element_id: str, classes: list[str]) -> None:
+        if element_id == "conteudo" and not self.conteudo:
+            self.conteudo = self.in_conteudo = True
+            frame.role = "conteudo"
+            return
+
+        if element_id == "infos" and not self.infos:
+            self.infos = self.in_infos = True
+            self.infos_parent = self.stack[-1].index if self.stack else 0
+            frame.role = "infos"
+            return
+
+        if self.in_infos:
+            frame.first_list = [None]
+            self.info_lists.append(frame.first_list)
+
+        if self.in_conteudo:
+            if element_id == "linhaTotal":
+                frame.role = "line"
+                self.line = [None, None, None]
+            if "txtTopo" in classes:
+                self._capture(frame, "company_name")
+            if "text" in classes:
+                self._capture(frame, "text")
+
+    def _start_span(self, frame: _Frame, class_name: str, classes: list[str]) -> None:
+        if self.in_table:
+            for column in self.ITEM_COLUMNS:
+                if column in classes:
+                    self._capture(frame, column)
+
+        if self.in_infos and "chave" in classes:
+            self._capture(frame, "access_key")
+
+        if class_name == "totalNumb txtObs":
+            self._capture(frame, "total_taxes")
+
+        if self.line is not None and self.line[1] is None:
+            self.line[1] = ""
+            self._capture(frame, "line_value")
+
+    def _start_label(self, frame: _Frame, classes: list[str]) -> None:
+        if "tx" in classes:
+            self._capture(frame, "payment_type")
+
+        if self.line is not None and self.line[2] is None:
+            self.line[2] = True
+            frame.role = "line_label"
+
+    def _start_table(self, frame: _Frame) -> None:
+        if not self.table:
+            self.table = self.in_table = True
+            frame.role = "table"
+
+    def _start_list_item(self, frame: _Frame) -> None:
+        if any(open_frame.role == "listview" for open_frame in self.stack):
+            self.listview_item = True
+            frame.role = "info_item"
+
+    def _start_list(self, frame: _Frame, classes: list[str]) -> None:
+        if not self.listview and "ui-listview" in classes:
+            self.listview = True
+            frame.role = "listview"
+
+        for open_frame in self.stack:
+            if open_frame.first_list is not None and open_frame.first_list[0] is None:
+                open_frame.first_list[0] = ""
+                frame.lists = frame.lists or []
+                frame.lists.append(open_frame.first_list)
+
+        if frame.lists:
+            self._capture(frame, "list")
+
+    def _capture(self, frame: _Frame, target: str) -> None:
+        if frame.text is None:
+            frame.text = []
+            frame.targets = []
+            self.captures.append(frame)
+
+        frame.targets.append(target)
+
+    def _end(self, frame: _Frame) -> None:
+        string = frame.string if frame.children == 1 else None
+
+        if self.stack:
+            parent = self.stack[-1]
+            parent.string = string if parent.children == 1 else None
+
+        if frame.text is not None:
+            self.captures.remove(frame)
+            text = "".join(frame.text)
+
+            for target in frame.targets:
+                self._store(frame, target, text)
+
+        if frame.role == "conteudo":
+            self.in_conteudo = False
+        elif frame.role == "infos":
+            self.in_infos = False
+        elif frame.role == "table":
+            self.in_table = False
+        elif frame.role == "line":
+            self.lines.append(self.line)
+            self.line = None
+        elif frame.role == "line_label" and self.line is not None:
+            self.line[0] = string
+
+    def _store(self, frame: _Frame, target: str, text: str) -> None:
+        if target == "text":
+            self.texts.append(text)
+        elif target == "company_name":
+            self.company_names.append(text)
+        elif target == "payment_type":
+            self.payment_types.append(text)
+        elif target == "access_key":
+            self.access_keys.append(text)
+        elif target == "list":
+            for first_list in frame.lists:
+                first_list[0] = text
+        elif target == "line_value" and self.line is not None:
+            self.line[1] = text
+        elif target == "total_taxes":
+            ancestors = {open_frame.index for open_frame in self.stack}
+            self.total_taxes.append((ancestors | {0}, text))
+        elif target in self.items:
+            self.items[target].append(text)
+
+
+class StreamingNfceParser(Parser):
+    """Parse the page source of a NFC-e in a single pass, without building a BeautifulSoup tree.
+
+    It produces the same dictionary as NfceParser, reusing the section parsers to interpret
+    the collected texts.
+    """
+
+    def __init__(self):
+        self.address = AddressParser()
+        self.company = CompanyParser()
+        self.info = InformacoesNotaParser()
+        self.taxes = TaxParser()
+        self.totals = TotalsParser()
+        self.items = ItemsParser()
+
+    def load(self, source: str | bytes) -> str:
+        return (
+            source.decode("utf-8", "replace") if isinstance(source, bytes) else source
+        )
+
+    def parse(self, page: str) -> dict[str, Any]:
+        document = _NfceDocument()
+        document.feed(page if isinstance(page, str) else str(page))
+        document.close()
+
+        sections = {
+            "endereco": self._parse_address,
+            "empresa": self._parse_company,
+            "informacoes": self._parse_info,
+            "tributos": self._parse_taxes,
+            "totais": self._parse_totals,
+            "itens": self._parse_items,
+        }
+
+        data = {}
+        for name, parse in sections.items():
+            try:
+                data[name] = parse(document)
+            except Exception:
+                data[name] = {}
+
+        return data
+
+    def _parse_address(self, document: _NfceDocument) -> dict[str, Any]:
+        return self.address.parse_text(document.texts[1])
+
+    def _parse_company(self, document: _NfceDocument) -> dict[str, Any]:
+        return self.company.parse_texts(document.texts[0], document.company_names[0])
+
+    def _parse_info(self, document: _NfceDocument) -> dict[str, Any]:
+        return self.info.parse_contents(document.access_keys[0], document.info_contents)
+
+    def _parse_taxes(self, document: _NfceDocument) -> dict[str, Any]:
+        taxpayer_info = document.info_lists[-3][0]
+
+        if taxpayer_info is None:
+            raise ValueError("Tax information not found")
+
+        total_taxes = next(
+            (
+                text
+                for ancestors, text in document.total_taxes
+                if document.infos_parent in ancestors
+            ),
+            None,
+        )
+
+        return self.taxes.parse_texts(taxpayer_info, total_taxes)
+
+    def _parse_totals(self, document: _NfceDocument) -> dict[str, Any]:
+        if not document.conteudo:
+            raise ValueError("Content not found")
+
+        lines = [(label, value) for label, value, found in document.lines if found]
+
+        return self.totals.parse_lines(document.payment_types[0], lines)
+
+    def _parse_items(self, document: _NfceDocument) -> dict[str, Any]:
+        if not document.table:
+            raise ValueError("Items table not found")
+
+        columns = [document.items[name] for name in document.ITEM_COLUMNS]
+
+        return self.items.get_items(*columns)
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterable, Iterator
+
+from scrapers.batch import BatchResult
+from scrapers.parsers import NfceParser
+from scrapers.scrapers import HttpNfceScraper
+from .interfaces import Parser, Scraper
+
+__all__ = ["ScrapingPipeline"]
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+_parser: Parser = None
+
+
+class ScrapingPipeline:
+    """Fetch NFC-e pages in threads and parse them in a pool of processes.
+
+    Fetchers push the downloaded pages into a queue, from which they are sent to the
+    parser processes, so downloads and parsing overlap. At most `window` pages are
+    fetched ahead of the last result delivered, which keeps the memory bounded when
+    parsing or the consumer falls behind. Results are delivered in input order.
+    """
+
+    def __init__(
+        self,
+        scraper: Scraper = None,
+        parser: Parser = None,
+        fetchers: int = 4,
+        workers: int = None,
+        window: int = 32,
+    ):
+        """
+        Initializes a ScrapingPipeline object.
+
+        Args:
+            scraper (Scraper, optional): Scraper whose `fetch` downloads the pages, it must be thread safe.
+                Defaults to HttpNfceScraper.
+            parser (Parser, optional): Parser run in the worker processes, it must be picklable.
+                Defaults to NfceParser.
+            fetchers (int, optional): Number of threads fetching pages. Defaults to 4.
+            workers (int, optional): Number of parser processes. Defaults to the number of CPUs.
+            window (int, optional): Maximum number of pages fetched ahead of the results. Defaults to 32.
+        """
+        self.scraper = scraper or HttpNfceScraper()
+        self.parser = parser or NfceParser()
+        self.fetchers = max(fetchers, 1)
+        self.workers = workers
+        self.window = max(window, 1)
+
+    def scrape(self, urls: Iterable[str]) -> Iterator[BatchResult]:
+        """Scrape the URLs, yielding their results in the same order.
+
+        Args:
+            urls (Iterable[str]): NFC-e URLs, consumed lazily
+
+        Yields:
+            BatchResult: parsed invoice or the error of each URL
+        """
+        fetching = _Fetching(self.scraper, enumerate(urls), self.window)
+        threads = [
+            threading.Thread(target=fetching.fetch, daemon=True)
+            for _ in range(self.fetchers)
+        ]
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_initialize, initargs=(self.parser,)
+        )
+        pending: dict[int, tuple[BatchResult, Future | None]] = {}
+        running, next_index = len(threads), 0
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                running = self._submit(
+                    fetching.pages, executor, pending, running, next_index
+                )
+
+                if next_index not in pending:
+                    break
+
+                result, future = pending.pop(next_index)
+                next_index += 1
+                fetching.slots.release()
+
+                yield self._resolve(result, future)
+        finally:
+            fetching.stop()
+            executor.shutdown(cancel_futures=True)
+
+    def scrape_all(self, urls: Iterable[str]) -> list[BatchResult]:
+        """Scrape every URL and wait for all of them.
+
+        Args:
+            urls (Iterable[str]): NFC-e URLs
+
+        Returns:
+            list[BatchResult]: results in input order
+        """
+        return list(self.scrape(urls))
+
+    @staticmethod
+    def _submit(
+        pages: queue.Queue,
+        executor: ProcessPoolExecutor,
+        pending: dict[int, tuple[BatchResult, Future | None]],
+        running: int,
+        next_index: int,
+    ) -> int:
+        """Send every page fetched so far to the parsers, blocking only while the
+        next result is not fetched yet, and return the fetchers still running."""
+        while running:
+            try:
+                page = pages.get(block=next_index not in pending)
+            except queue.Empty:
+                break
+
+            if page is _DONE:
+                running -= 1
+                continue
+
+            index, result, source = page
+            future = executor.submit(_parse, source) if result.ok else None
+            pending[index] = (result, future)
+
+        return running
+
+    @staticmethod
+    def _resolve(result: BatchResult, future: Future | None) -> BatchResult:
+        if future is None:
+            logger.warning("Failed to fetch %s: %s", result.url, result.error)
+            return result
+
+        try:
+            result.data = future.result()
+        except Exception as e:
+            logger.warning("Failed to parse %s: %s", result.url, e)
+            result.error = e
+
+        return result
+
+
+class _Fetching:
+    """State shared by the fetcher threads of a run of the pipeline."""
+
+    def __init__(
+        self, scraper: Scraper, sources: Iterator[tuple[int, str]], window: int
+    ):
+        self.scraper = scraper
+        self.sources = sources
+        self.lock = threading.Lock()
+        self.slots = threading.Semaphore(window)
+        self.stopped = threading.Event()
+        self.pages: queue.Queue = queue.Queue()
+
+    def fetch(self) -> None:
+        try:
+            while not self.stopped.is_set():
+                self.slots.acquire()
+
+                with self.lock:
+                    index, url = next(self.sources, (None, None))
+
+                if index is None or self.stopped.is_set():
+                    # Wakes up the next fetcher waiting for a slot, to stop too
+                    self.slots.release()
+                    break
+
+                self.pages.put((index, *self._fetch_one(url)))
+        except Exception:
+            logger.exception("Failed to read the URLs to scrape")
+        finally:
+            self.pages.put(_DONE)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.slots.release()
+
+    def _fetch_one(self, url: str) -> tuple[BatchResult, str | None]:
+        result = BatchResult(source=url, url=url, attempts=1)
+
+        try:
+            return result, self.scraper.fetch(url)
+        except Exception as e:
+            result.error = e
+            return result, None
+
+
+def _initialize(parser: Parser) -> None:
+    global _parser
+    _parser = parser
+
+
+def _parse(source: str) -> dict[str, Any]:
+    return _parser.parse(_parser.load(source))
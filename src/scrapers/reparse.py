@@ -0,0 +1,394 @@
+import argparse
+import gzip
+import logging
+import math
+import os
+import sys
+import tarfile
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy.orm import Session
+
+from domain import EletronicInvoice
+from repositories import (
+    CompanyRepository,
+    InvoiceRepository,
+    ItemRepository,
+    ProductRepository,
+)
+from scrapers.database import dict_to_entity, merge_items, upsert_invoice
+from scrapers.parsers import StreamingNfceParser
+from scrapers.scrapers import META_CHARSET
+from scrapers.utils import to_database_time
+
+__all__ = ["ParsedPage", "read_pages", "parse_pages", "diff_invoice", "Reparser"]
+
+logger = logging.getLogger(__name__)
+
+PAGE_SUFFIXES = (".html", ".htm", ".html.gz")
+
+_parser = None
+
+
+@dataclass
+class ParsedPage:
+    source: str
+    data: dict[str, Any] | None = None
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class ReparseReport:
+    parsed: int = 0
+    failed: int = 0
+    unchanged: int = 0
+    corrected: int = 0
+    missing: int = 0
+    changes: dict[str, int] = field(default_factory=dict)
+
+
+def read_pages(paths: Iterable[str | Path]) -> Iterator[tuple[str, bytes]]:
+    """Read the saved pages of directories, tar or zip archives and single files.
+
+    Directories are walked recursively, including the ones of a PageCache, and gzip
+    compressed pages are decompressed.
+
+    Args:
+        paths (Iterable[str | Path]): directories, archives or pages
+
+    Yields:
+        tuple[str, bytes]: name and content of every page
+    """
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from _read_directory(path)
+        elif tarfile.is_tarfile(path):
+            yield from _read_tar(path)
+        elif zipfile.is_zipfile(path):
+            yield from _read_zip(path)
+        else:
+            yield str(path), _decompress(path.name, path.read_bytes())
+
+
+def parse_pages(
+    pages: Iterable[tuple[str, bytes]],
+    workers: int = None,
+    chunk_size: int = 16,
+    window: int = None,
+) -> Iterator[ParsedPage]:
+    """Parse pages in a pool of processes, yielding them in the order they were read.
+
+    Pages are read lazily, at most `window` chunks are sent to the processes ahead of
+    the results, so that large archives are not read into memory at once.
+
+    Args:
+        pages (Iterable[tuple[str, bytes]]): name and content of the pages
+        workers (int, optional): number of processes. Defaults to the number of CPUs.
+        chunk_size (int, optional): pages sent to a process at once. Defaults to 16.
+        window (int, optional): chunks parsed ahead of the results. Defaults to twice
+            the number of processes.
+
+    Yields:
+        ParsedPage: parsed data or the error of each page
+    """
+    workers = workers or os.cpu_count() or 1
+    window = max(window or 2 * workers, 1)
+    pages = iter(pages)
+    pending: deque[Future] = deque()
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while chunk := list(islice(pages, max(chunk_size, 1))):
+            pending.append(executor.submit(_parse_chunk, chunk))
+
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def diff_invoice(parsed: EletronicInvoice, stored: EletronicInvoice) -> list[str]:
+    """List the fields of the stored invoice that differ from the parsed one.
+
+    Args:
+        parsed (EletronicInvoice): invoice parsed again, with merged items
+        stored (EletronicInvoice): invoice in the database, with its company and items
+
+    Returns:
+        list[str]: names of the changed fields, empty if the invoice is up to date
+    """
+    changes = [
+        name
+        for name in ("number", "series", "authorization_protocol")
+        if (getattr(parsed, name) or "") != (getattr(stored, name) or "")
+    ]
+    changes += [
+        name
+        for name in ("issue_date", "authorization_date")
+        if to_database_time(getattr(parsed, name))
+        != to_database_time(getattr(stored, name))
+    ]
+    changes += [
+        f"taxes.{name}"
+        for name in ("federal", "state", "municipal")
+        if not _equal(getattr(parsed.taxes, name), getattr(stored.taxes, name))
+    ]
+
+    if (parsed.taxes.source or "") != (stored.taxes.source or ""):
+        changes.append("taxes.source")
+
+    if stored.company is None or parsed.company.cnpj != stored.company.cnpj:
+        changes.append("company")
+
+    if _items(parsed) != _items(stored):
+        changes.append("items")
+
+    return changes
+
+
+class Reparser:
+    """Compare parsed invoices with the stored ones and correct the differences in bulk."""
+
+    def __init__(
+        self, session: Session, batch_size: int = 200, insert_missing: bool = False
+    ):
+        """
+        Initializes a Reparser object.
+
+        Args:
+            session (Session): database session, committed once per batch
+            batch_size (int, optional): invoices compared and corrected at once. Defaults to 200.
+            insert_missing (bool, optional): save the invoices missing from the database. Defaults to False.
+        """
+        self.session = session
+        self.batch_size = max(batch_size, 1)
+        self.insert_missing = insert_missing
+        self.invoices = InvoiceRepository(session)
+        self.companies = CompanyRepository(session)
+        self.products = ProductRepository(session)
+        self.items = ItemRepository(session)
+
+    def run(self, pages: Iterable[ParsedPage], dry_run: bool = False) -> ReparseReport:
+        report = ReparseReport()
+        pages = iter(pages)
+
+        while batch := list(islice(pages, self.batch_size)):
+            entities = self._to_entities(batch, report)
+            corrections = self._diff(entities, report)
+
+            if dry_run or not corrections:
+                continue
+
+            try:
+                for entity in corrections:
+                    upsert_invoice(
+                        entity, self.invoices, self.companies, self.products, self.items
+                    )
+                self.session.commit()
+            except Exception:
+                self.session.rollback()
+                raise
+
+        return report
+
+    def _to_entities(
+        self, batch: list[ParsedPage], report: ReparseReport
+    ) -> dict[str, EletronicInvoice]:
+        entities = {}
+
+        for page in batch:
+            if not page.ok:
+                report.failed += 1
+                logger.error("Failed to parse %s: %s", page.source, page.error)
+                continue
+
+            try:
+                entity = dict_to_entity(page.data)
+                # The owner of a stored invoice is kept by the upsert
+                entity.user_id = None
+            except Exception as e:
+                report.failed += 1
+                logger.error("Incomplete invoice in %s: %r", page.source, e)
+                continue
+
+            if not entity.access_key:
+                report.failed += 1
+                logger.error("No access key in %s", page.source)
+                continue
+
+            report.parsed += 1
+            entities[entity.access_key] = entity
+
+        return entities
+
+    def _diff(
+        self, entities: dict[str, EletronicInvoice], report: ReparseReport
+    ) -> list[EletronicInvoice]:
+        stored = {
+            invoice.access_key: invoice
+            for invoice in self.invoices.find_full_by_access_keys(list(entities))
+        }
+        corrections = []
+
+        for key, entity in entities.items():
+            if key not in stored:
+                report.missing += 1
+                if self.insert_missing:
+                    corrections.append(entity)
+                continue
+
+            entity.items = merge_items(entity.items)
+            changes = diff_invoice(entity, stored[key])
+
+            if not changes:
+                report.unchanged += 1
+                continue
+
+            logger.info("Invoice %s changed: %s", key, ", ".join(changes))
+            report.corrected += 1
+            for change in changes:
+                report.changes[change] = report.changes.get(change, 0) + 1
+
+            corrections.append(entity)
+
+        return corrections
+
+
+def _read_directory(path: Path) -> Iterator[tuple[str, bytes]]:
+    for file in sorted(path.rglob("*")):
+        if file.is_file() and file.name.endswith(PAGE_SUFFIXES):
+            yield str(file), _decompress(file.name, file.read_bytes())
+
+
+def _read_tar(path: Path) -> Iterator[tuple[str, bytes]]:
+    with tarfile.open(path) as archive:
+        for member in archive:
+            if member.isfile() and member.name.endswith(PAGE_SUFFIXES):
+                content = archive.extractfile(member).read()
+                yield f"{path}:{member.name}", _decompress(member.name, content)
+
+
+def _read_zip(path: Path) -> Iterator[tuple[str, bytes]]:
+    with zipfile.ZipFile(path) as archive:
+        for name in archive.namelist():
+            if name.endswith(PAGE_SUFFIXES):
+                yield f"{path}:{name}", _decompress(name, archive.read(name))
+
+
+def _parse_chunk(pages: list[tuple[str, bytes]]) -> list[ParsedPage]:
+    return [_parse(page) for page in pages]
+
+
+def _parse(page: tuple[str, bytes]) -> ParsedPage:
+    global _parser
+
+    if _parser is None:
+        _parser = StreamingNfceParser()
+
+    source, content = page
+
+    try:
+        data = _parser.parse(_parser.load(_decode(content)))
+    except Exception as e:
+        return ParsedPage(source, error=repr(e))
+
+    return ParsedPage(source, data=data)
+
+
+def _decompress(name: str, content: bytes) -> bytes:
+    return gzip.decompress(content) if name.endswith(".gz") else content
+
+
+def _decode(content: bytes) -> str:
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        match = META_CHARSET.search(content[:2048])
+        encoding = match.group(1).decode() if match else "latin-1"
+        return content.decode(encoding, "replace")
+
+
+def _equal(a: float | None, b: float | None) -> bool:
+    return math.isclose(a or 0.0, b or 0.0, abs_tol=1e-6)
+
+
+def _items(invoice: EletronicInvoice) -> dict[tuple[str, str], tuple]:
+    return {
+        (item.product.code, item.product.description): (
+            round(item.quantity or 0.0, 4),
+            round(item.unit_price or 0.0, 4),
+            item.unity_of_measurement or "",
+        )
+        for item in invoice.items
+    }
+
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m scrapers.reparse",
+        description="Parse saved NFC-e pages again and correct the invoices stored from them.",
+    )
+    parser.add_argument(
+        "paths", nargs="+", help="Directories, tar or zip archives or page files."
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report the changes only."
+    )
+    parser.add_argument(
+        "--insert-missing",
+        action="store_true",
+        help="Save the invoices that are not in the database.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    from repositories import AnalyticsRepository
+    from settings.database import SessionLocal
+
+    started_at = time.perf_counter()
+    pages = parse_pages(read_pages(args.paths), workers=args.workers)
+
+    with SessionLocal() as session:
+        reparser = Reparser(session, args.batch_size, args.insert_missing)
+        report = reparser.run(pages, dry_run=args.dry_run)
+
+        if not args.dry_run and (
+            report.corrected or (args.insert_missing and report.missing)
+        ):
+            AnalyticsRepository(session).refresh()
+
+    elapsed = time.perf_counter() - started_at
+    total = report.parsed + report.failed
+    logger.info(
+        "Parsed %d pages (%d failed) in %.1fs, %.2f invoices/s: "
+        "%d unchanged, %d %s, %d missing%s",
+        total,
+        report.failed,
+        elapsed,
+        total / elapsed if elapsed else 0.0,
+        report.unchanged,
+        report.corrected,
+        "to correct" if args.dry_run else "corrected",
+        report.missing,
+        f", changed fields {report.changes}" if report.changes else "",
+    )
+
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,9 @@
+import re
 from typing import Any
-from bs4 import BeautifulSoup
+import requests
+from requests.adapters import HTTPAdapter
 
-from scrapers.browsers import get_browser
+from scrapers.browsers import BrowserPool, get_browser, get_browser_pool
 from scrapers.parsers import NfceParser
 from .interfaces import Parser, Scraper
 from selenium.common.exceptions import TimeoutException as WebDriverTimeoutException
@@ -11,7 +13,17 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from .exceptions import TimeoutException
 
-__all__ = ["NfceScraper"]
+__all__ = ["NfceScraper", "HttpNfceScraper"]
+
+META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([\w-]+)""", re.IGNORECASE)
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:124.0) Gecko/20100101 Firefox/124.0",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "pt-BR,pt;q=0.9",
+    "Connection": "keep-alive",
+}
 
 
 class NfceScraper(Scraper):
@@ -25,6 +37,7 @@ class NfceScraper(Scraper):
         parser: Parser = NfceParser(),
         id_to_wait: str = "tabResult",
         timeout: int = 5,
+        pool: BrowserPool = None,
     ):
         """
         Initializes a Scraper object.
@@ -34,36 +47,133 @@ class NfceScraper(Scraper):
             parser (Parser, optional): The content parser object used to parse the scraped data. Defaults to NfceParser.
             id_to_wait (str, optional): The ID of the element to wait for before scraping. Defaults to "tabResult".
             timeout (int, optional): The maximum time, in seconds, to wait for the element to appear. Defaults to 5.
+            pool (BrowserPool, optional): Pool to borrow browsers from instead of owning one. Defaults to None.
         """
         self.parser = parser
         self.timeout = timeout
         self.id_to_wait = id_to_wait
-        self.browser = browser or get_browser()
+        self.pool = pool
+        self.browser = browser or (None if pool else get_browser())
 
     def get(self, url: str) -> dict[str, Any]:
-        try:
-            self.browser.get(url)
-            self.wait_page_load()
-            page = self._get_page()
-            data = self.parser.parse(page)
-            return data
+        source = self.fetch(url)
+        page = self.parser.load(source)
+        data = self.parser.parse(page)
 
-        except WebDriverTimeoutException as e:
-            raise TimeoutException(self.timeout) from e
+        return data
+
+    def fetch(self, url: str) -> str:
+        if self.pool is None:
+            try:
+                return self._fetch(self.browser, url)
+            finally:
+                self.browser.quit()
 
-        finally:
-            self.browser.quit()
+        with self.pool.browser() as browser:
+            return self._fetch(browser, url)
 
-    def _get_page(self) -> BeautifulSoup:
-        source = self.browser.page_source
-        soup = BeautifulSoup(source, "html.parser")
+    def _fetch(self, browser: WebDriver, url: str) -> str:
+        try:
+            browser.get(url)
+            self.wait_page_load(browser)
+            return browser.page_source
 
-        return soup
+        except WebDriverTimeoutException as e:
+            raise TimeoutException(self.timeout) from e
 
-    def wait_page_load(self) -> None:
+    def wait_page_load(self, browser: WebDriver = None) -> None:
         if not self.id_to_wait:
             return
 
         at_given_id = (By.ID, self.id_to_wait)
         element_is_present = EC.presence_of_element_located(at_given_id)
-        WebDriverWait(self.browser, self.timeout).until(element_is_present)
+        WebDriverWait(browser or self.browser, self.timeout).until(element_is_present)
+
+
+class HttpNfceScraper(Scraper):
+    """NFCe scraper that downloads the server-rendered page over HTTP, without a browser.
+    Pages whose content is only rendered by JavaScript are scraped by a fallback scraper.
+    """
+
+    def __init__(
+        self,
+        parser: Parser = NfceParser(),
+        id_to_wait: str = "tabResult",
+        timeout: int = 5,
+        session: requests.Session = None,
+        fallback: Scraper = None,
+        pool_size: int = 10,
+    ):
+        """
+        Initializes a HttpNfceScraper object.
+
+        Args:
+            parser (Parser, optional): The content parser object used to parse the scraped data. Defaults to NfceParser.
+            id_to_wait (str, optional): The ID of the element that must be in the page source, otherwise the page is
+                considered to require JavaScript. Defaults to "tabResult".
+            timeout (int, optional): The maximum time, in seconds, to wait for the server. Defaults to 5.
+            session (requests.Session, optional): HTTP session reused across requests. Defaults to a pooled session.
+            fallback (Scraper, optional): Scraper used for pages that require JavaScript. Defaults to a NfceScraper
+                backed by the shared browser pool.
+            pool_size (int, optional): Maximum number of kept-alive connections per host. Defaults to 10.
+        """
+        self.parser = parser
+        self.timeout = timeout
+        self.id_to_wait = id_to_wait
+        self.session = session or self._get_session(pool_size)
+        self._fallback = fallback
+        self._content_marker = re.compile(
+            rf"""id=["']?{re.escape(id_to_wait)}["'\s>]"""
+        )
+
+    @property
+    def fallback(self) -> Scraper:
+        if self._fallback is None:
+            self._fallback = NfceScraper(
+                parser=self.parser,
+                id_to_wait=self.id_to_wait,
+                timeout=self.timeout,
+                pool=get_browser_pool(),
+            )
+
+        return self._fallback
+
+    def get(self, url: str) -> dict[str, Any]:
+        source = self.fetch(url)
+        page = self.parser.load(source)
+        data = self.parser.parse(page)
+
+        return data
+
+    def fetch(self, url: str) -> str:
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.Timeout as e:
+            raise TimeoutException(self.timeout) from e
+
+        if "charset" not in response.headers.get("Content-Type", "").lower():
+            match = META_CHARSET.search(response.content[:2048])
+            response.encoding = match.group(1).decode() if match else "utf-8"
+
+        source = response.text
+
+        if self.id_to_wait and not self._content_marker.search(source):
+            return self.fallback.fetch(url)
+
+        return source
+
+    def wait_page_load(self) -> None:
+        # The page is complete as soon as the response is downloaded
+        pass
+
+    @staticmethod
+    def _get_session(pool_size: int) -> requests.Session:
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+
+        session = requests.Session()
+        session.headers.update(DEFAULT_HEADERS)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+        return session
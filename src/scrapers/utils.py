@@ -1,7 +1,30 @@
 import re
-from .constants import UNWANTED_WORDS
-
-__all__ = ["sanitize_text", "clean_text", "to_float"]
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Iterable
+from zoneinfo import ZoneInfo
+from .constants import UNWANTED_WORDS, UNWANTED_CHARACTERS
+
+__all__ = [
+    "sanitize_text",
+    "sanitize_texts",
+    "clean_text",
+    "to_float",
+    "to_floats",
+    "get_access_key",
+    "to_database_time",
+]
+
+UNWANTED_WORDS_PATTERN = re.compile("|".join(UNWANTED_WORDS))
+UNWANTED_CHARACTERS_TABLE = str.maketrans("", "", UNWANTED_CHARACTERS)
+CLEAN_TEXT_PATTERN = re.compile(r"[\s.\-/]")
+CONSECUTIVE_SPACES_PATTERN = re.compile(r"[\s\t\n ]+")
+WHITESPACE_PATTERN = re.compile(r"\s")
+ACCESS_KEY_PATTERN = re.compile(r"(?<!\d)\d{44}(?!\d)")
+
+# Every unwanted word has a colon, texts without one skip the regular expression
+_WORD_MARKER = ":" if all(":" in word for word in UNWANTED_WORDS) else ""
+_SEPARATOR = "\x00"
 
 
 def sanitize_text(text: str) -> str:
@@ -15,13 +38,37 @@ def sanitize_text(text: str) -> str:
     """
 
     try:
-        words_to_remove = re.compile("|".join(UNWANTED_WORDS))
-        text = words_to_remove.sub("", text)
-        return text.strip()
+        if _WORD_MARKER in text:
+            text = UNWANTED_WORDS_PATTERN.sub("", text)
+        return text.translate(UNWANTED_CHARACTERS_TABLE).strip()
     except Exception:
         return ""
 
 
+def sanitize_texts(texts: Iterable[str]) -> list[str]:
+    """Sanitize a column of texts at once, as `sanitize_text` does for each of them
+
+    Args:
+        texts (Iterable[str]): texts to be sanitized
+
+    Returns:
+        list[str]: sanitized texts, in the same order
+    """
+    texts = [text if isinstance(text, str) else "" for text in texts]
+    joined = _SEPARATOR.join(texts)
+
+    if _WORD_MARKER in joined:
+        joined = UNWANTED_WORDS_PATTERN.sub("", joined)
+
+    sanitized = joined.translate(UNWANTED_CHARACTERS_TABLE).split(_SEPARATOR)
+
+    if len(sanitized) != len(texts):
+        # A text had the separator or a word matched across two texts
+        return [sanitize_text(text) for text in texts]
+
+    return [text.strip() for text in sanitized]
+
+
 def clean_text(text: str) -> str:
     """Clean text to remove unwanted characters
 
@@ -32,7 +79,7 @@ def clean_text(text: str) -> str:
         str: cleared text
     """
     try:
-        text = re.sub(r"[\s.\-/]", "", sanitize_text(text))
+        text = CLEAN_TEXT_PATTERN.sub("", sanitize_text(text))
         return text.strip()
     except Exception:
         return ""
@@ -57,6 +104,37 @@ def to_float(
         float: converted string
     """
     number = sanitize_text(str(number))
+
+    return _parse_float(number, radix, decimal_separator, default)
+
+
+def to_floats(
+    numbers: Iterable[Any],
+    radix: str = ",",
+    decimal_separator: str = ".",
+    default: float = 0.0,
+) -> list[float]:
+    """Convert a column of strings to floating point numbers, as `to_float` does for each of them
+
+    Args:
+        numbers (Iterable[Any]): strings to be converted
+        radix (str, optional): radix point separator. Defaults to ",".
+        decimal_separator (str, optional): decimal separator. Defaults to ".".
+        default (float, optional): default value to return in case of error. Defaults to 0.0.
+
+    Returns:
+        list[float]: converted strings, in the same order
+    """
+    numbers = sanitize_texts(str(number) for number in numbers)
+
+    return [
+        _parse_float(number, radix, decimal_separator, default) for number in numbers
+    ]
+
+
+def _parse_float(
+    number: str, radix: str, decimal_separator: str, default: float
+) -> float:
     if number == "":
         return default
 
@@ -77,4 +155,38 @@ def remove_consecutive_spaces(text: str | list[str]) -> str:
     """
     text = " ".join(text) if isinstance(text, list) else text
 
-    return re.sub(r"[\s\t\n ]+", " ", text).strip()
+    return CONSECUTIVE_SPACES_PATTERN.sub(" ", text).strip()
+
+
+def get_access_key(text: str) -> str:
+    """Extract the 44 digits access key of a NFC-e from an URL or free text
+
+    Args:
+        text (str): QR Code URL or access key, possibly grouped by spaces
+
+    Returns:
+        str: the access key, or an empty string if there is none
+    """
+    match = ACCESS_KEY_PATTERN.search(WHITESPACE_PATTERN.sub("", str(text)))
+
+    return match.group(0) if match else ""
+
+
+def to_database_time(value: datetime | None) -> datetime | None:
+    """Convert a datetime to the time the timestamp columns store, without time zone.
+
+    Postgres converts the aware datetimes saved by the ORM, as parsed from the pages
+    with their -03:00 offset, to the time zone of the session, `DATABASE_TIMEZONE`
+    must be that time zone. Naive datetimes are returned as they are.
+    """
+    if not isinstance(value, datetime) or value.tzinfo is None:
+        return value
+
+    return value.astimezone(_database_timezone()).replace(tzinfo=None)
+
+
+@lru_cache
+def _database_timezone() -> ZoneInfo:
+    from settings.environment import get_environment_variables
+
+    return ZoneInfo(get_environment_variables().DATABASE_TIMEZONE)
@@ -0,0 +1,17 @@
+from .analytics import AsyncAnalyticsService
+from .company import AsyncCompanyService
+from .invoice import AsyncInvoiceService
+from .item import AsyncItemService
+from .product import AsyncProductService
+from .receipt import AsyncReceiptService
+from .user import AsyncUserService
+
+__all__ = [
+    "AsyncAnalyticsService",
+    "AsyncProductService",
+    "AsyncCompanyService",
+    "AsyncInvoiceService",
+    "AsyncItemService",
+    "AsyncReceiptService",
+    "AsyncUserService",
+]
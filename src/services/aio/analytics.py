@@ -0,0 +1,60 @@
+from datetime import date, timedelta
+
+from drivers.rest.schemas.analytics import (
+    DailyPriceModel,
+    MonthlySpendingModel,
+    StorePriceModel,
+)
+from repositories.aio import AsyncAnalyticsRepository
+
+__all__ = ["AsyncAnalyticsService"]
+
+
+class AsyncAnalyticsService:
+    """Price history and spending, as of the last refresh of the analytics."""
+
+    def __init__(self, repository: AsyncAnalyticsRepository):
+        self.repository = repository
+
+    async def product_prices(
+        self,
+        product_id: int,
+        company_id: int = None,
+        start: date = None,
+        end: date = None,
+    ) -> list[DailyPriceModel]:
+        entities = await self.repository.find_product_prices(
+            product_id, company_id, start, end
+        )
+
+        return [DailyPriceModel(**vars(entity)) for entity in entities]
+
+    async def company_prices(
+        self,
+        company_id: int,
+        product_id: int = None,
+        start: date = None,
+        end: date = None,
+    ) -> list[DailyPriceModel]:
+        entities = await self.repository.find_company_prices(
+            company_id, product_id, start, end
+        )
+
+        return [DailyPriceModel(**vars(entity)) for entity in entities]
+
+    async def cheapest_companies(
+        self, product_id: int, days: int = 30, limit: int = 10
+    ) -> list[StorePriceModel]:
+        since = date.today() - timedelta(days=days)
+        entities = await self.repository.find_cheapest_companies(
+            product_id, since, limit
+        )
+
+        return [StorePriceModel(**vars(entity)) for entity in entities]
+
+    async def monthly_spending(
+        self, user_id: int, start: date = None, end: date = None
+    ) -> list[MonthlySpendingModel]:
+        entities = await self.repository.find_monthly_spending(user_id, start, end)
+
+        return [MonthlySpendingModel(**vars(entity)) for entity in entities]
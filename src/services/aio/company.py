@@ -0,0 +1,67 @@
+from typing import Any, AsyncIterator
+from sqlalchemy.exc import IntegrityError
+from drivers.rest.schemas.companies import CompanyModel, CompanyPatchRequestModel
+from ports.services import AsyncService
+from repositories.aio import AsyncCompanyRepository
+from services.exceptions import EntityNotExists, from_integrity_error
+from services.mappers import to_company_entity
+
+__all__ = ["AsyncCompanyService"]
+
+
+class AsyncCompanyService(AsyncService):
+    __entity_name__ = "Empresa"
+
+    def __init__(self, repository: AsyncCompanyRepository):
+        self.repository = repository
+
+    async def save(self, model: CompanyPatchRequestModel) -> CompanyModel:
+        try:
+            entity = await self.repository.save(to_company_entity(model))
+        except IntegrityError as e:
+            raise from_integrity_error(self.__entity_name__, e) from e
+
+        return CompanyModel(**vars(entity))
+
+    async def delete(self, id: int) -> None:
+        await self.find_by_id(id)
+        await self.repository.delete(id)
+
+    async def find_by_id(self, id: int) -> CompanyModel:
+        entity = await self.repository.find_by_id(id)
+
+        if entity is None:
+            raise EntityNotExists(self.__entity_name__)
+
+        return CompanyModel(**vars(entity))
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[CompanyModel]:
+        entities = await self.repository.find_all(**filters)
+
+        return [CompanyModel(**vars(entity)) for entity in entities]
+
+    async def get_by_cnpj(self, cnpj: str) -> CompanyModel:
+        entities = await self.repository.find_all(cnpj=cnpj)
+
+        if not entities:
+            raise EntityNotExists(self.__entity_name__)
+
+        return CompanyModel(**vars(entities[0]))
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[CompanyModel]:
+        entities = await self.repository.find_page(after_id, limit, **filters)
+
+        return [CompanyModel(**vars(entity)) for entity in entities]
+
+    async def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[CompanyModel]:
+        async for entity in self.repository.stream(after_id, **filters):
+            yield CompanyModel(**vars(entity))
+
+    async def update(self, id: int, model: CompanyPatchRequestModel) -> None:
+        await self.find_by_id(id)
+
+        await self.repository.update(id, to_company_entity(model))
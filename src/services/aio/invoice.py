@@ -0,0 +1,116 @@
+from typing import Any, AsyncIterator
+from sqlalchemy.exc import IntegrityError
+from domain.entities.entities import EletronicInvoice
+from domain.value_objects.value_objects import Taxes
+from drivers.rest.schemas.invoices import (
+    InvoiceFullModel,
+    InvoiceModel,
+    InvoicePatchRequestModel,
+    InvoicePostRequestModel,
+)
+from ports.services import AsyncService
+from repositories.aio import AsyncInvoiceRepository
+from services.exceptions import EntityNotExists, from_integrity_error
+from services.mappers import (
+    to_full_invoice_model,
+    to_invoice_entity,
+    to_invoice_model,
+)
+
+__all__ = ["AsyncInvoiceService"]
+
+
+class AsyncInvoiceService(AsyncService):
+    __entity_name__ = "Nota Fiscal Eletrônica"
+
+    def __init__(self, repository: AsyncInvoiceRepository):
+        self.repository = repository
+
+    async def save(self, model: InvoicePostRequestModel) -> InvoiceModel:
+        try:
+            entity = await self.repository.save(to_invoice_entity(model))
+        except IntegrityError as e:
+            raise from_integrity_error(self.__entity_name__, e) from e
+
+        return to_invoice_model(entity)
+
+    async def delete(self, id: int) -> None:
+        await self.find_by_id(id)
+        await self.repository.delete(id)
+
+    async def find_by_id(self, id: int) -> InvoiceModel:
+        entity = await self.repository.find_by_id(id)
+
+        if entity is None:
+            raise EntityNotExists(self.__entity_name__)
+
+        return to_invoice_model(entity)
+
+    async def find_full_by_id(self, id: int) -> InvoiceFullModel:
+        entity = await self.repository.find_full(id=id)
+
+        if entity is None:
+            raise EntityNotExists(self.__entity_name__)
+
+        return to_full_invoice_model(entity)
+
+    async def find_by_company(
+        self, company_id: int, after_id: int = 0, limit: int = 100
+    ) -> list[InvoiceModel]:
+        entities = await self.repository.find_page(
+            after_id, limit, company_id=company_id
+        )
+
+        if not entities and after_id == 0:
+            raise EntityNotExists(self.__entity_name__)
+
+        return [to_invoice_model(entity) for entity in entities]
+
+    async def find_by_user(
+        self, user_id: int, after_id: int = 0, limit: int = 100
+    ) -> list[InvoiceModel]:
+        entities = await self.repository.find_page(after_id, limit, user_id=user_id)
+
+        if not entities and after_id == 0:
+            raise EntityNotExists(self.__entity_name__)
+
+        return [to_invoice_model(entity) for entity in entities]
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[InvoiceModel]:
+        entities = await self.repository.find_all(**filters)
+
+        return [to_invoice_model(entity) for entity in entities]
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[InvoiceModel]:
+        entities = await self.repository.find_page(after_id, limit, **filters)
+
+        return [to_invoice_model(entity) for entity in entities]
+
+    async def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[InvoiceModel]:
+        async for entity in self.repository.stream(after_id, **filters):
+            yield to_invoice_model(entity)
+
+    async def update(self, id: int, model: InvoicePatchRequestModel) -> None:
+        await self.find_by_id(id)
+
+        taxes = Taxes(
+            federal=model.federal_tax,
+            state=model.state_tax,
+            municipal=model.municipal_tax,
+            source=model.source_tax,
+        )
+        entity = EletronicInvoice(
+            id=id,
+            access_key=model.access_key,
+            number=model.number,
+            series=model.series,
+            issue_date=model.issue_date,
+            authorization_protocol=model.authorization_protocol,
+            authorization_date=model.authorization_date,
+            taxes=taxes,
+        )
+        await self.repository.update(id, entity)
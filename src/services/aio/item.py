@@ -0,0 +1,69 @@
+from typing import Any, AsyncIterator
+from sqlalchemy.exc import IntegrityError
+from domain.entities.entities import Item
+from drivers.rest.schemas.items import (
+    ItemModel,
+    ItemPatchRequestModel,
+    ItemPostRequestModel,
+)
+from ports.services import AsyncService
+from repositories.aio import AsyncItemRepository
+from services.exceptions import EntityNotExists, from_integrity_error
+from services.mappers import to_item_model
+
+__all__ = ["AsyncItemService"]
+
+
+class AsyncItemService(AsyncService):
+
+    def __init__(self, repository: AsyncItemRepository):
+        self.repository = repository
+
+    async def save(self, model: ItemPostRequestModel) -> ItemModel:
+        try:
+            entity = await self.repository.save(Item(**vars(model)))
+        except IntegrityError as e:
+            raise from_integrity_error("Item", e) from e
+
+        return to_item_model(entity)
+
+    async def delete(self, id: int) -> None:
+        await self.find_by_id(id)
+
+        await self.repository.delete(id)
+
+    async def find_by_id(self, id: int) -> ItemModel:
+        entity = await self.repository.find_by_id(id)
+
+        if entity is None:
+            raise EntityNotExists("Item")
+
+        return to_item_model(entity)
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[ItemModel]:
+        entities = await self.repository.find_all(**filters)
+
+        return [to_item_model(entity) for entity in entities]
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[ItemModel]:
+        entities = await self.repository.find_page(after_id, limit, **filters)
+
+        return [to_item_model(entity) for entity in entities]
+
+    async def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[ItemModel]:
+        async for entity in self.repository.stream(after_id, **filters):
+            yield to_item_model(entity)
+
+    async def update(self, id: int, model: ItemPatchRequestModel) -> None:
+        await self.find_by_id(id)
+        item = Item(
+            id=id,
+            quantity=model.quantity,
+            unit_price=model.unit_price,
+            unity_of_measurement=model.unity_of_measurement,
+        )
+        await self.repository.update(id, item)
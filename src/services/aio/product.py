@@ -0,0 +1,78 @@
+from typing import Any, AsyncIterator
+from sqlalchemy.exc import IntegrityError
+from domain.entities.entities import Product
+from drivers.rest.schemas.products import (
+    ProductModel,
+    ProductPatchRequestModel,
+    ProductSearchModel,
+)
+from ports.services import AsyncService
+from repositories.aio import AsyncProductRepository
+from services.exceptions import EntityNotExists, from_integrity_error
+
+__all__ = ["AsyncProductService"]
+
+
+class AsyncProductService(AsyncService):
+
+    def __init__(self, repository: AsyncProductRepository):
+        self.repository = repository
+
+    async def save(self, model: ProductPatchRequestModel) -> ProductModel:
+        try:
+            entity = await self.repository.save(Product(**vars(model)))
+        except IntegrityError as e:
+            raise from_integrity_error("Produto", e) from e
+
+        return ProductModel(**vars(entity))
+
+    async def delete(self, id: int) -> None:
+        await self.find_by_id(id)
+
+        await self.repository.delete(id)
+
+    async def find_by_id(self, id: int) -> ProductModel:
+        entity = await self.repository.find_by_id(id)
+
+        if entity is None:
+            raise EntityNotExists("Produto")
+
+        return ProductModel(**vars(entity))
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[ProductModel]:
+        entities = await self.repository.find_all(**filters)
+
+        return [ProductModel(**vars(entity)) for entity in entities]
+
+    async def search(self, query: str, limit: int = 20) -> list[ProductSearchModel]:
+        results = await self.repository.search(query, limit)
+
+        return [
+            ProductSearchModel(**vars(entity), score=score) for entity, score in results
+        ]
+
+    async def find_by_code(self, code: str) -> ProductModel:
+        entities = await self.repository.find_all(code=code)
+
+        if not entities:
+            raise EntityNotExists("Produto")
+
+        return ProductModel(**vars(entities[0]))
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[ProductModel]:
+        entities = await self.repository.find_page(after_id, limit, **filters)
+
+        return [ProductModel(**vars(entity)) for entity in entities]
+
+    async def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[ProductModel]:
+        async for entity in self.repository.stream(after_id, **filters):
+            yield ProductModel(**vars(entity))
+
+    async def update(self, id: int, model: ProductPatchRequestModel) -> None:
+        await self.find_by_id(id)
+
+        await self.repository.update(id, Product(**vars(model)))
@@ -0,0 +1,156 @@
+import logging
+from typing import Any, AsyncIterable
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+
+from drivers.rest.schemas.receipts import (
+    BulkReceiptsModel,
+    ReceiptModel,
+    ReceiptResultModel,
+    ReceiptStatus,
+)
+from repositories.aio import AsyncReceiptRepository
+from services.mappers import to_receipt_entity
+
+__all__ = ["AsyncReceiptService"]
+
+logger = logging.getLogger(__name__)
+
+SAVE_FAILED = "Não foi possível salvar a nota fiscal, tente novamente mais tarde"
+UNKNOWN_USER = "invoice.user_id: Usuário não encontrado"
+
+
+class AsyncReceiptService:
+    """Imports many receipts, an invoice with its company and items each, at once.
+
+    Receipts are validated one by one and saved in batches, so an invalid receipt
+    or a failed batch does not stop the import, and the outcome of every receipt is
+    reported.
+    """
+
+    def __init__(self, repository: AsyncReceiptRepository, batch_size: int = 1000):
+        self.repository = repository
+        self.batch_size = max(batch_size, 1)
+
+    async def import_all(
+        self, records: AsyncIterable[str | bytes | dict[str, Any]]
+    ) -> BulkReceiptsModel:
+        """Validate and upsert the receipts.
+
+        Args:
+            records (AsyncIterable[str | bytes | dict[str, Any]]): receipts as JSON
+                documents or already decoded objects
+
+        Returns:
+            BulkReceiptsModel: outcome of every receipt, in the order they were sent
+        """
+        report = BulkReceiptsModel()
+        batch: list[tuple[int, ReceiptModel]] = []
+        index = 0
+
+        async for record in records:
+            try:
+                batch.append((index, _validate(record)))
+            except ValidationError as e:
+                self._report(report, index, ReceiptStatus.INVALID, errors=_errors(e))
+
+            index += 1
+
+            if len(batch) >= self.batch_size:
+                await self._save(batch, report)
+                batch = []
+
+        await self._save(batch, report)
+        report.results.sort(key=lambda result: result.index)
+
+        return report
+
+    async def _save(
+        self, batch: list[tuple[int, ReceiptModel]], report: BulkReceiptsModel
+    ) -> None:
+        # A receipt sent again replaces the previous one, as a statement cannot
+        # upsert the same invoice twice
+        latest = {model.invoice.access_key: index for index, model in batch}
+        # Unknown owners are looked up at once, they would fail the whole batch
+        users = await self.repository.find_user_ids(
+            {model.invoice.user_id for _, model in batch if model.invoice.user_id}
+        )
+        receipts = []
+
+        for index, model in batch:
+            key, user_id = model.invoice.access_key, model.invoice.user_id
+
+            if latest[key] != index:
+                self._report(report, index, ReceiptStatus.DUPLICATE, key)
+            elif user_id and user_id not in users:
+                self._report(
+                    report, index, ReceiptStatus.INVALID, key, errors=[UNKNOWN_USER]
+                )
+            else:
+                receipts.append((index, to_receipt_entity(model)))
+
+        if not receipts:
+            return
+
+        try:
+            created = await self.repository.upsert_all(
+                [entity for _, entity in receipts]
+            )
+        except SQLAlchemyError as e:
+            # The database error may disclose the schema or the data of other
+            # receipts, it is only logged
+            logger.exception(
+                "Failed to import %d receipts: %s",
+                len(receipts),
+                getattr(e, "orig", None) or e,
+            )
+
+            for index, entity in receipts:
+                self._report(
+                    report,
+                    index,
+                    ReceiptStatus.FAILED,
+                    entity.access_key,
+                    errors=[SAVE_FAILED],
+                )
+            return
+
+        for (index, entity), inserted in zip(receipts, created):
+            status = ReceiptStatus.CREATED if inserted else ReceiptStatus.UPDATED
+            self._report(report, index, status, entity.access_key, entity.id)
+
+    @staticmethod
+    def _report(
+        report: BulkReceiptsModel,
+        index: int,
+        status: ReceiptStatus,
+        access_key: str = None,
+        invoice_id: int = None,
+        errors: list[str] = None,
+    ) -> None:
+        counter = status.value
+        setattr(report, counter, getattr(report, counter) + 1)
+        report.results.append(
+            ReceiptResultModel(
+                index=index,
+                status=status,
+                access_key=access_key,
+                invoice_id=invoice_id,
+                errors=errors or [],
+            )
+        )
+
+
+def _validate(record: str | bytes | dict[str, Any]) -> ReceiptModel:
+    if isinstance(record, (str, bytes)):
+        return ReceiptModel.model_validate_json(record)
+
+    return ReceiptModel.model_validate(record)
+
+
+def _errors(error: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(map(str, detail['loc'])) or 'receipt'}: {detail['msg']}"
+        for detail in error.errors()
+    ]
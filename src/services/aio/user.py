@@ -0,0 +1,104 @@
+import asyncio
+from datetime import date
+from typing import Any, AsyncIterator, Sequence
+
+from sqlalchemy import Row
+
+from domain.entities.entities import User
+from drivers.rest.schemas.users import (
+    UserModel,
+    UserPatchRequestModel,
+    UserPostRequestModel,
+    UserSummaryModel,
+)
+from ports.services import AsyncService
+from repositories.aio import AsyncUserRepository
+from services.exceptions import EntityAlreadyExists, EntityNotExists
+from services.summary import Period, Purchases, summarize
+
+__all__ = ["AsyncUserService"]
+
+
+class AsyncUserService(AsyncService):
+    __entity_name__ = "Usuário"
+
+    def __init__(self, repository: AsyncUserRepository):
+        self.repository = repository
+
+    async def save(self, model: UserPostRequestModel) -> UserModel:
+        if await self.repository.find_all(username=model.username):
+            raise EntityAlreadyExists(self.__entity_name__)
+
+        user = User(
+            first_name=model.first_name,
+            last_name=model.last_name,
+            username=model.username,
+        )
+
+        entity = await self.repository.save(user)
+
+        return UserModel(**vars(entity))
+
+    async def delete(self, id: int) -> None:
+        await self.find_by_id(id)
+
+        await self.repository.delete(id)
+
+    async def find_by_id(self, id: int) -> UserModel:
+        entity = await self.repository.find_by_id(id)
+
+        if entity is None:
+            raise EntityNotExists(self.__entity_name__)
+
+        return UserModel(**vars(entity))
+
+    async def find_by_username(self, username: str) -> UserModel:
+        entities = await self.repository.find_all(username=username)
+
+        if not entities:
+            raise EntityNotExists(self.__entity_name__)
+
+        return UserModel(**vars(entities[0]))
+
+    async def find_all(self, **filters: dict[str, Any]) -> list[UserModel]:
+        entities = await self.repository.find_all(**filters)
+
+        return [UserModel(**vars(entity)) for entity in entities]
+
+    async def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[UserModel]:
+        entities = await self.repository.find_page(after_id, limit, **filters)
+
+        return [UserModel(**vars(entity)) for entity in entities]
+
+    async def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> AsyncIterator[UserModel]:
+        async for entity in self.repository.stream(after_id, **filters):
+            yield UserModel(**vars(entity))
+
+    async def update(self, id: int, model: UserPatchRequestModel) -> None:
+        await self.find_by_id(id)
+
+        await self.repository.update(id, User(**vars(model)))
+
+    async def summary(
+        self,
+        id: int,
+        start: date = None,
+        end: date = None,
+        period: Period = "month",
+    ) -> UserSummaryModel:
+        await self.find_by_id(id)
+
+        rows = await self.repository.find_purchases(id, start, end)
+
+        # Years of purchases take a while to sum up, the event loop is left free
+        return await asyncio.to_thread(_summarize, id, rows, period, start, end)
+
+
+def _summarize(
+    id: int, rows: Sequence[Row], period: Period, start: date, end: date
+) -> UserSummaryModel:
+    return summarize(id, Purchases.from_rows(rows), period, start, end)
@@ -1,10 +1,11 @@
-from typing import Any
-from domain.entities.entities import Company, Address
+from typing import Any, Iterator
+from sqlalchemy.exc import IntegrityError
 from ports.services import Service
 from repositories import CompanyRepository
 
 from drivers.rest.schemas.companies import CompanyModel, CompanyPatchRequestModel
-from services.exceptions import EntityAlreadyExists, EntityNotExists
+from services.mappers import to_company_entity
+from services.exceptions import EntityNotExists, from_integrity_error
 
 __all__ = ["CompanyService"]
 
@@ -16,11 +17,11 @@ class CompanyService(Service):
         self.repository = repository
 
     def save(self, model: CompanyPatchRequestModel) -> CompanyModel:
-        companies = self.find_all(cnpj=model.cnpj)
-        if len(companies) > 0:
-            raise EntityAlreadyExists(self.__entity_name__)
+        try:
+            entity = self.repository.save(to_company_entity(model))
+        except IntegrityError as e:
+            raise from_integrity_error(self.__entity_name__, e) from e
 
-        entity = self.repository.save(self.__from_model(model))
         return CompanyModel(**vars(entity))
 
     def delete(self, id: int) -> None:
@@ -40,19 +41,25 @@ class CompanyService(Service):
     def get_by_cnpj(self, cnpj: str) -> CompanyModel:
         entity = self.repository.find_all(cnpj=cnpj)
 
-        if None is None or len(entity) == 0:
+        if not entity:
             raise EntityNotExists(self.__entity_name__)
 
         return CompanyModel(**vars(entity[0]))
 
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[CompanyModel]:
+        entities = self.repository.find_page(after_id, limit, **filters)
+
+        return [CompanyModel(**vars(entity)) for entity in entities]
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> Iterator[CompanyModel]:
+        for entity in self.repository.stream(after_id, **filters):
+            yield CompanyModel(**vars(entity))
+
     def update(self, id: int, model: CompanyPatchRequestModel) -> None:
         self.find_by_id(id)
 
-        self.repository.update(id, self.__from_model(model))
-
-    def __from_model(self, model: CompanyPatchRequestModel):
-        address = Address(
-            street=model.street, number=model.number, city=model.city, state=model.state
-        )
-        company = Company(name=model.name, cnpj=model.cnpj, address=address)
-        return company
+        self.repository.update(id, to_company_entity(model))
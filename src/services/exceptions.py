@@ -1,3 +1,6 @@
+from sqlalchemy.exc import IntegrityError
+
+
 class EntityException(Exception):
 
     def __init__(self, entity: str, *args, **kwargs):
@@ -16,3 +19,28 @@ class EntityAlreadyExists(EntityException):
 
 class EntityNotFound(EntityException):
     pass
+
+
+class EntityInvalid(EntityException):
+    pass
+
+
+# SQLSTATE of the violations of unique constraints
+UNIQUE_VIOLATION = "23505"
+
+
+def from_integrity_error(entity: str, error: IntegrityError) -> EntityException:
+    """Exception telling why the entity was not saved.
+
+    Only the violations of unique constraints mean the entity already exists,
+    missing references and required values make it invalid.
+    """
+    code = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+
+    if code is None:
+        # Other databases, e.g. SQLite in the tests, have no SQLSTATE
+        unique = "UNIQUE constraint failed" in str(error.orig)
+    else:
+        unique = code == UNIQUE_VIOLATION
+
+    return EntityAlreadyExists(entity) if unique else EntityInvalid(entity)
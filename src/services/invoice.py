@@ -1,18 +1,17 @@
-from typing import Any
+from typing import Any, Iterator
+from sqlalchemy.exc import IntegrityError
 from domain.entities.entities import (
-    Company,
     EletronicInvoice,
-    User,
 )
 from domain.value_objects.value_objects import Taxes
 from drivers.rest.schemas.invoices import (
     InvoiceModel,
-    InvoicePostRequestModel,
     InvoicePatchRequestModel,
 )
 from ports.services import Service
 from repositories import InvoiceRepository
-from services.exceptions import EntityAlreadyExists, EntityNotExists
+from services.mappers import to_invoice_entity, to_invoice_model
+from services.exceptions import EntityNotExists, from_integrity_error
 
 __all__ = ["InvoiceService"]
 
@@ -24,16 +23,12 @@ class InvoiceService(Service):
         self.repository = repository
 
     def save(self, model: InvoiceModel) -> InvoiceModel:
-        invoices = self.find_all(
-            access_key=model.access_key, number=model.number, series=model.series
-        )
-
-        if len(invoices) > 0:
-            raise EntityAlreadyExists(self.__entity_name__)
-
-        entity = self.repository.save(self.__from_model(model))
+        try:
+            entity = self.repository.save(to_invoice_entity(model))
+        except IntegrityError as e:
+            raise from_integrity_error(self.__entity_name__, e) from e
 
-        return InvoiceModel(**vars(entity))
+        return to_invoice_model(entity)
 
     def delete(self, id: int) -> None:
         self.find_by_id(id)
@@ -45,101 +40,45 @@ class InvoiceService(Service):
         if entity is None:
             raise EntityNotExists(self.__entity_name__)
 
-        return (
-            InvoiceModel(
-                id=entity.id,
-                company_id=entity.company_id,
-                user_id=entity.user_id,
-                access_key=entity.access_key,
-                number=entity.number,
-                series=entity.series,
-                issue_date=entity.issue_date,
-                authorization_protocol=entity.authorization_protocol,
-                authorization_date=entity.authorization_date,
-                federal_tax=entity.taxes.federal,
-                state_tax=entity.taxes.state,
-                municipal_tax=entity.taxes.municipal,
-                source_tax=entity.taxes.source,
-                created_on=entity.created_on,
-            )
-            if entity
-            else None
-        )
+        return to_invoice_model(entity)
 
-    def find_by_company(self, company_id: int) -> list[InvoiceModel]:
-        entities = self.repository.find_all(company_id=company_id)
+    def find_by_company(
+        self, company_id: int, after_id: int = 0, limit: int = 100
+    ) -> list[InvoiceModel]:
+        entities = self.repository.find_page(after_id, limit, company_id=company_id)
 
-        if entities is None or len(entities) == 0:
+        if not entities and after_id == 0:
             raise EntityNotExists(self.__entity_name__)
 
-        return [
-            InvoiceModel(
-                id=entity.id,
-                company_id=entity.company_id,
-                user_id=entity.user_id,
-                access_key=entity.access_key,
-                number=entity.number,
-                series=entity.series,
-                issue_date=entity.issue_date,
-                authorization_protocol=entity.authorization_protocol,
-                authorization_date=entity.authorization_date,
-                federal_tax=entity.taxes.federal,
-                state_tax=entity.taxes.state,
-                municipal_tax=entity.taxes.municipal,
-                source_tax=entity.taxes.source,
-                created_on=entity.created_on,
-            )
-            for entity in entities
-        ]
-
-    def find_by_user(self, user_id: int) -> list[InvoiceModel]:
-        entities = self.repository.find_all(user_id=user_id)
-
-        if entities is None or len(entities) == 0:
+        return [to_invoice_model(entity) for entity in entities]
+
+    def find_by_user(
+        self, user_id: int, after_id: int = 0, limit: int = 100
+    ) -> list[InvoiceModel]:
+        entities = self.repository.find_page(after_id, limit, user_id=user_id)
+
+        if not entities and after_id == 0:
             raise EntityNotExists(self.__entity_name__)
 
-        return [
-            InvoiceModel(
-                id=entity.id,
-                company_id=entity.company_id,
-                user_id=entity.user_id,
-                access_key=entity.access_key,
-                number=entity.number,
-                series=entity.series,
-                issue_date=entity.issue_date,
-                authorization_protocol=entity.authorization_protocol,
-                authorization_date=entity.authorization_date,
-                federal_tax=entity.taxes.federal,
-                state_tax=entity.taxes.state,
-                municipal_tax=entity.taxes.municipal,
-                source_tax=entity.taxes.source,
-                created_on=entity.created_on,
-            )
-            for entity in entities
-        ]
+        return [to_invoice_model(entity) for entity in entities]
 
     def find_all(self, **filters: dict[str, Any]) -> list[InvoiceModel]:
         entities = self.repository.find_all(**filters)
 
-        return [
-            InvoiceModel(
-                id=entity.id,
-                company_id=entity.company_id,
-                user_id=entity.user_id,
-                access_key=entity.access_key,
-                number=entity.number,
-                series=entity.series,
-                issue_date=entity.issue_date,
-                authorization_protocol=entity.authorization_protocol,
-                authorization_date=entity.authorization_date,
-                federal_tax=entity.taxes.federal,
-                state_tax=entity.taxes.state,
-                municipal_tax=entity.taxes.municipal,
-                source_tax=entity.taxes.source,
-                created_on=entity.created_on,
-            )
-            for entity in entities
-        ]
+        return [to_invoice_model(entity) for entity in entities]
+
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[InvoiceModel]:
+        entities = self.repository.find_page(after_id, limit, **filters)
+
+        return [to_invoice_model(entity) for entity in entities]
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> Iterator[InvoiceModel]:
+        for entity in self.repository.stream(after_id, **filters):
+            yield to_invoice_model(entity)
 
     def update(self, id: int, entity: InvoicePatchRequestModel) -> None:
         self.find_by_id(id)
@@ -161,22 +100,3 @@ class InvoiceService(Service):
             taxes=taxes,
         )
         self.repository.update(id, model)
-
-    def __from_model(self, model: InvoicePostRequestModel) -> EletronicInvoice:
-        invoice = EletronicInvoice(
-            user=User(model.user_id),
-            company=Company(model.company_id),
-            access_key=model.access_key,
-            number=model.number,
-            series=model.series,
-            issue_date=model.issue_date,
-            authorization_protocol=model.authorization_protocol,
-            authorization_date=model.authorization_date,
-            taxes=Taxes(
-                federal=model.federal_tax,
-                state=model.state_tax,
-                municipal=model.municipal_tax,
-                source=model.source_tax,
-            ),
-        )
-        return invoice
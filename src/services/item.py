@@ -1,8 +1,9 @@
-from typing import Any
+from typing import Any, Iterator
 from domain.entities.entities import Item
 from drivers.rest.schemas.items import ItemModel, ItemPostRequestModel
 from ports.services import Service
 from repositories import ItemRepository
+from services.mappers import to_item_model
 from services.exceptions import EntityAlreadyExists, EntityNotExists
 
 __all__ = ["ItemService"]
@@ -36,17 +37,30 @@ class ItemService(Service):
         if entity is None:
             raise EntityNotExists("Item")
 
-        return self.__to_model(entity)
+        return to_item_model(entity)
 
     def find_by_invoice_id(self, invoice_id: int) -> list[ItemModel]:
         entities = self.repository.find_all(invoice_id=invoice_id)
 
-        return [self.__to_model(item) for item in entities]
+        return [to_item_model(item) for item in entities]
 
     def find_all(self, **filters: dict[str, Any]) -> list[ItemModel]:
         entities = self.repository.find_all(**filters)
 
-        return [self.__to_model(item) for item in entities]
+        return [to_item_model(item) for item in entities]
+
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[ItemModel]:
+        entities = self.repository.find_page(after_id, limit, **filters)
+
+        return [to_item_model(entity) for entity in entities]
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> Iterator[ItemModel]:
+        for entity in self.repository.stream(after_id, **filters):
+            yield to_item_model(entity)
 
     def update(self, id: int, model: ItemModel) -> None:
         self.find_by_id(id)
@@ -57,16 +71,3 @@ class ItemService(Service):
             unity_of_measurement=model.unity_of_measurement,
         )
         self.repository.update(id, item)
-
-    def __to_model(self, entity: Item) -> ItemModel:
-        return ItemModel(
-            id=entity.id,
-            invoice_id=entity.invoice_id,
-            product_id=entity.product_id,
-            product_code=entity.product.code,
-            product_description=entity.product.description,
-            quantity=entity.quantity,
-            unit_price=entity.unit_price,
-            unity_of_measurement=entity.unity_of_measurement,
-            created_on=entity.created_on,
-        )
@@ -0,0 +1,143 @@
+from domain.entities.entities import (
+    Address,
+    Company,
+    EletronicInvoice,
+    Item,
+    Product,
+    User,
+)
+from domain.value_objects.value_objects import Taxes
+from drivers.rest.schemas.companies import CompanyModel, CompanyPatchRequestModel
+from drivers.rest.schemas.invoices import (
+    InvoiceFullModel,
+    InvoiceModel,
+    InvoicePostRequestModel,
+)
+from drivers.rest.schemas.items import ItemModel
+from drivers.rest.schemas.receipts import ReceiptModel
+from drivers.rest.schemas.users import UserModel
+from scrapers.utils import to_database_time
+
+__all__ = [
+    "to_company_entity",
+    "to_full_invoice_model",
+    "to_invoice_entity",
+    "to_invoice_model",
+    "to_item_model",
+    "to_receipt_entity",
+]
+
+
+def to_company_entity(model: CompanyPatchRequestModel) -> Company:
+    address = Address(
+        street=model.street, number=model.number, city=model.city, state=model.state
+    )
+    company = Company(name=model.name, cnpj=model.cnpj, address=address)
+    return company
+
+
+def to_invoice_model(entity: EletronicInvoice) -> InvoiceModel:
+    return InvoiceModel(
+        id=entity.id,
+        company_id=entity.company_id,
+        user_id=entity.user_id,
+        access_key=entity.access_key,
+        number=entity.number,
+        series=entity.series,
+        issue_date=entity.issue_date,
+        authorization_protocol=entity.authorization_protocol,
+        authorization_date=entity.authorization_date,
+        federal_tax=entity.taxes.federal,
+        state_tax=entity.taxes.state,
+        municipal_tax=entity.taxes.municipal,
+        source_tax=entity.taxes.source,
+        created_on=entity.created_on,
+    )
+
+
+def to_invoice_entity(model: InvoicePostRequestModel) -> EletronicInvoice:
+    invoice = EletronicInvoice(
+        user=User(model.user_id),
+        company=Company(model.company_id),
+        access_key=model.access_key,
+        number=model.number,
+        series=model.series,
+        issue_date=model.issue_date,
+        authorization_protocol=model.authorization_protocol,
+        authorization_date=model.authorization_date,
+        taxes=Taxes(
+            federal=model.federal_tax,
+            state=model.state_tax,
+            municipal=model.municipal_tax,
+            source=model.source_tax,
+        ),
+    )
+    return invoice
+
+
+def to_item_model(entity: Item) -> ItemModel:
+    return ItemModel(
+        id=entity.id,
+        invoice_id=entity.invoice_id,
+        product_id=entity.product_id,
+        product_code=entity.product.code,
+        product_description=entity.product.description,
+        quantity=entity.quantity,
+        unit_price=entity.unit_price,
+        unity_of_measurement=entity.unity_of_measurement,
+        created_on=entity.created_on,
+    )
+
+
+def to_full_invoice_model(entity: EletronicInvoice) -> InvoiceFullModel:
+    items = [to_item_model(item) for item in entity.items]
+
+    return InvoiceFullModel(
+        **to_invoice_model(entity).model_dump(),
+        company=CompanyModel(**vars(entity.company)) if entity.company else None,
+        user=UserModel(**vars(entity.user)) if entity.user else None,
+        items=items,
+        total=round(sum(item.quantity * item.unit_price for item in items), 2),
+    )
+
+
+def to_receipt_entity(model: ReceiptModel) -> EletronicInvoice:
+    invoice, company = model.invoice, model.company
+
+    return EletronicInvoice(
+        user_id=invoice.user_id,
+        company=Company(
+            name=company.name,
+            cnpj=company.cnpj,
+            address=Address(
+                street=company.street,
+                number=company.number,
+                complement=company.complement,
+                neighborhood=company.neighborhood,
+                city=company.city,
+                state=company.state,
+                zip_code=company.zip_code,
+            ),
+        ),
+        items=[
+            Item(
+                product=Product(code=item.code, description=item.description),
+                quantity=item.quantity,
+                unit_price=item.unit_price,
+                unity_of_measurement=item.unity_of_measurement,
+            )
+            for item in model.items
+        ],
+        access_key=invoice.access_key,
+        number=invoice.number,
+        series=invoice.series,
+        issue_date=to_database_time(invoice.issue_date),
+        authorization_protocol=invoice.authorization_protocol,
+        authorization_date=to_database_time(invoice.authorization_date),
+        taxes=Taxes(
+            federal=invoice.federal_tax,
+            state=invoice.state_tax,
+            municipal=invoice.municipal_tax,
+            source=invoice.source_tax,
+        ),
+    )
@@ -1,9 +1,10 @@
-from typing import Any
+from typing import Any, Iterator
+from sqlalchemy.exc import IntegrityError
 from domain.entities.entities import Product
 from drivers.rest.schemas.products import ProductModel
 from ports.services import Service
 from repositories import ProductRepository
-from services.exceptions import EntityAlreadyExists, EntityNotExists
+from services.exceptions import EntityNotExists, from_integrity_error
 
 __all__ = ["ProductService"]
 
@@ -14,14 +15,10 @@ class ProductService(Service):
         self.repository = repository
 
     def save(self, model: ProductModel) -> ProductModel:
-        products = self.repository.find_all(
-            code=model.code, description=model.description
-        )
-
-        if products:
-            raise EntityAlreadyExists("Produto")
-
-        entity = self.repository.save(Product(**vars(model)))
+        try:
+            entity = self.repository.save(Product(**vars(model)))
+        except IntegrityError as e:
+            raise from_integrity_error("Produto", e) from e
 
         return ProductModel(**vars(entity))
 
@@ -44,12 +41,25 @@ class ProductService(Service):
         return [ProductModel(**vars(entity)) for entity in entities]
 
     def find_by_code(self, code: str) -> ProductModel:
-        entity = self.repository.find_all(code=code)
+        entities = self.repository.find_all(code=code)
 
-        if entity is None:
+        if not entities:
             raise EntityNotExists("Produto")
 
-        return ProductModel(**vars(entity[0]))
+        return ProductModel(**vars(entities[0]))
+
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[ProductModel]:
+        entities = self.repository.find_page(after_id, limit, **filters)
+
+        return [ProductModel(**vars(entity)) for entity in entities]
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> Iterator[ProductModel]:
+        for entity in self.repository.stream(after_id, **filters):
+            yield ProductModel(**vars(entity))
 
     def update(self, id: int, model: ProductModel) -> None:
         self.find_by_id(id)
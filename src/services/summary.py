@@ -0,0 +1,205 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Literal, Sequence
+
+import numpy as np
+
+from drivers.rest.schemas.users import (
+    PeriodSpendingModel,
+    StoreSpendingModel,
+    TaxSummaryModel,
+    UserSummaryModel,
+)
+
+__all__ = ["Period", "Purchases", "summarize"]
+
+Period = Literal["day", "week", "month", "year"]
+
+UNKNOWN_COMPANY = -1
+
+
+@dataclass
+class Purchases:
+    """Items bought by a user as columns, an element per item.
+
+    The taxes are those of the invoice of the item, repeated on each of its items.
+    """
+
+    invoice_id: np.ndarray
+    company_id: np.ndarray
+    issue_date: np.ndarray
+    quantity: np.ndarray
+    unit_price: np.ndarray
+    federal_tax: np.ndarray
+    state_tax: np.ndarray
+    municipal_tax: np.ndarray
+    company_names: dict[int, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[tuple]) -> "Purchases":
+        """Build the columns from rows of invoice id, company id, company name,
+        issue date, quantity, unit price and federal, state and municipal taxes."""
+        columns = list(zip(*rows)) if rows else [()] * 9
+        (
+            invoice_id,
+            company_id,
+            company_name,
+            issue_date,
+            quantity,
+            unit_price,
+            federal_tax,
+            state_tax,
+            municipal_tax,
+        ) = columns
+
+        invoice_ids = np.array(invoice_id, dtype=np.int64)
+        # Converting datetimes is slow, the date of each invoice is converted once
+        _, first, inverse = np.unique(
+            invoice_ids, return_index=True, return_inverse=True
+        )
+        invoice_dates = np.array(
+            [issue_date[i] for i in first.tolist()], dtype="datetime64[s]"
+        )
+
+        return cls(
+            invoice_id=invoice_ids,
+            company_id=_numbers(company_id, UNKNOWN_COMPANY).astype(np.int64),
+            issue_date=invoice_dates[inverse],
+            quantity=_numbers(quantity),
+            unit_price=_numbers(unit_price),
+            federal_tax=_numbers(federal_tax),
+            state_tax=_numbers(state_tax),
+            municipal_tax=_numbers(municipal_tax),
+            company_names=dict(zip(company_id, company_name)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.invoice_id)
+
+
+def summarize(
+    user_id: int,
+    purchases: Purchases,
+    period: Period = "month",
+    start: date = None,
+    end: date = None,
+) -> UserSummaryModel:
+    """Spending and taxes of a user, in total, per store and per period.
+
+    Every aggregate is computed over whole columns, without a Python loop per item.
+    """
+    totals = purchases.quantity * purchases.unit_price
+    total = float(totals.sum())
+
+    # Taxes are per invoice, counted once whatever the number of its items
+    invoice_ids, first = np.unique(purchases.invoice_id, return_index=True)
+    federal = purchases.federal_tax[first]
+    state = purchases.state_tax[first]
+    municipal = purchases.municipal_tax[first]
+    invoice_taxes = federal + state + municipal
+    taxes = float(invoice_taxes.sum())
+
+    return UserSummaryModel(
+        user_id=user_id,
+        start=start,
+        end=end,
+        total=total,
+        invoices=len(invoice_ids),
+        items=len(purchases),
+        average_invoice=total / len(invoice_ids) if len(invoice_ids) else 0.0,
+        taxes=TaxSummaryModel(
+            federal=float(federal.sum()),
+            state=float(state.sum()),
+            municipal=float(municipal.sum()),
+            total=taxes,
+            share=taxes / total if total else 0.0,
+        ),
+        stores=_stores(purchases, totals, total, purchases.company_id[first]),
+        periods=_periods(
+            purchases, totals, period, purchases.issue_date[first], invoice_taxes
+        ),
+    )
+
+
+def _stores(
+    purchases: Purchases,
+    totals: np.ndarray,
+    total: float,
+    invoice_companies: np.ndarray,
+) -> list[StoreSpendingModel]:
+    companies, inverse = np.unique(purchases.company_id, return_inverse=True)
+    spent = np.bincount(inverse, weights=totals, minlength=len(companies))
+    items = np.bincount(inverse, minlength=len(companies))
+    invoices = np.bincount(
+        np.searchsorted(companies, invoice_companies), minlength=len(companies)
+    )
+
+    ids = [
+        None if company == UNKNOWN_COMPANY else company
+        for company in companies.tolist()
+    ]
+
+    return [
+        StoreSpendingModel(
+            company_id=ids[i],
+            company_name=purchases.company_names.get(ids[i]),
+            total=float(spent[i]),
+            invoices=int(invoices[i]),
+            items=int(items[i]),
+            share=float(spent[i] / total) if total else 0.0,
+        )
+        for i in np.argsort(-spent, kind="stable").tolist()
+    ]
+
+
+def _periods(
+    purchases: Purchases,
+    totals: np.ndarray,
+    period: Period,
+    invoice_dates: np.ndarray,
+    invoice_taxes: np.ndarray,
+) -> list[PeriodSpendingModel]:
+    # Items of invoices without an issue date are left out of the periods only
+    dated = ~np.isnat(purchases.issue_date)
+    starts, inverse = np.unique(
+        _truncate(purchases.issue_date[dated], period), return_inverse=True
+    )
+    spent = np.bincount(inverse, weights=totals[dated], minlength=len(starts))
+    items = np.bincount(inverse, minlength=len(starts))
+
+    dated_invoices = ~np.isnat(invoice_dates)
+    index = np.searchsorted(starts, _truncate(invoice_dates[dated_invoices], period))
+    invoices = np.bincount(index, minlength=len(starts))
+    taxes = np.bincount(
+        index, weights=invoice_taxes[dated_invoices], minlength=len(starts)
+    )
+
+    return [
+        PeriodSpendingModel(
+            start=day,
+            total=float(spent[i]),
+            invoices=int(invoices[i]),
+            items=int(items[i]),
+            taxes=float(taxes[i]),
+        )
+        for i, day in enumerate(starts.astype("datetime64[D]").tolist())
+    ]
+
+
+def _truncate(dates: np.ndarray, period: Period) -> np.ndarray:
+    days = dates.astype("datetime64[D]")
+
+    if period == "day":
+        return days
+    if period == "week":
+        # Weeks start on monday, the epoch being a thursday
+        return days - (days.astype(np.int64) + 3) % 7
+    if period == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+
+    return days.astype("datetime64[Y]").astype("datetime64[D]")
+
+
+def _numbers(values: Sequence, missing: float = 0.0) -> np.ndarray:
+    # None becomes NaN in a float array
+    return np.nan_to_num(np.array(values, dtype=np.float64), nan=missing)
@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Iterator
 from domain.entities.entities import User
 from drivers.rest.schemas.users import (
     UserModel,
@@ -19,9 +19,7 @@ class UserService(Service):
         self.repository = repository
 
     def save(self, model: UserPostRequestModel) -> UserModel:
-        _entity = self.find_by_username(model.username)
-
-        if _entity:
+        if self.repository.find_all(username=model.username):
             raise EntityAlreadyExists(self.__entity_name__)
 
         user = User(
@@ -60,6 +58,19 @@ class UserService(Service):
 
         return [UserModel(**vars(entity)) for entity in entities]
 
+    def find_page(
+        self, after_id: int = 0, limit: int = 100, **filters: dict[str, Any]
+    ) -> list[UserModel]:
+        entities = self.repository.find_page(after_id, limit, **filters)
+
+        return [UserModel(**vars(entity)) for entity in entities]
+
+    def stream(
+        self, after_id: int = 0, **filters: dict[str, Any]
+    ) -> Iterator[UserModel]:
+        for entity in self.repository.stream(after_id, **filters):
+            yield UserModel(**vars(entity))
+
     def update(self, id: int, model: UserPatchRequestModel) -> None:
         self.find_by_id(id)
 
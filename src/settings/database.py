@@ -1,20 +1,120 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from contextlib import contextmanager
+from typing import Any, Iterator
 
-from .environment import get_environment_variables
+from sqlalchemy import URL, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from .environment import EnvironmentSettings, get_environment_variables
+from .pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, PoolMetrics
+
+__all__ = [
+    "Engine",
+    "SessionLocal",
+    "AsyncEngine",
+    "AsyncSessionLocal",
+    "engine_options",
+    "session_scope",
+    "pool_metrics",
+    "get_db_connection",
+    "get_async_db_connection",
+]
 
 env = get_environment_variables()
 
-DATABASE_URL = f"{env.DATABASE_DIALECT}://{env.DATABASE_USERNAME}:{env.DATABASE_PASSWORD}@{env.DATABASE_HOSTNAME}:{env.DATABASE_PORT}/{env.DATABASE_NAME}"
+# Built from their parts, so that the credentials are escaped
+DATABASE_URL = URL.create(
+    env.DATABASE_DIALECT,
+    username=env.DATABASE_USERNAME,
+    password=env.DATABASE_PASSWORD,
+    host=env.DATABASE_HOSTNAME,
+    port=env.DATABASE_PORT,
+    database=env.DATABASE_NAME,
+)
+ASYNC_DATABASE_URL = DATABASE_URL.set(
+    drivername=f"{env.DATABASE_DIALECT}+{env.DATABASE_ASYNC_DRIVER}"
+)
+
+
+def engine_options(settings: EnvironmentSettings, asynchronous: bool = False) -> dict:
+    """Options of the engines, shared by the REST API, the bots and the workers.
+
+    Every process has its own pools, so at most `DATABASE_POOL_SIZE +
+    DATABASE_MAX_OVERFLOW` connections per engine and process are opened.
+
+    Args:
+        settings (EnvironmentSettings): settings of the database
+        asynchronous (bool, optional): options of an asyncio engine. Defaults to False.
+
+    Returns:
+        dict: keyword arguments of `create_engine` or `create_async_engine`
+    """
+    options = {
+        "echo": settings.DEBUG_MODE,
+        "poolclass": (
+            InstrumentedAsyncQueuePool if asynchronous else InstrumentedQueuePool
+        ),
+        "pool_size": settings.DATABASE_POOL_SIZE,
+        "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+        "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        "pool_recycle": settings.DATABASE_POOL_RECYCLE,
+        "pool_pre_ping": settings.DATABASE_POOL_PRE_PING,
+    }
+
+    if settings.DATABASE_STATEMENT_TIMEOUT > 0:
+        options["connect_args"] = _statement_timeout_args(
+            settings.DATABASE_STATEMENT_TIMEOUT, asynchronous
+        )
+
+    return options
+
+
+def _statement_timeout_args(milliseconds: int, asynchronous: bool) -> dict[str, Any]:
+    # Set when connecting, so it costs no round trip per checkout
+    if asynchronous:
+        return {"server_settings": {"statement_timeout": str(milliseconds)}}
 
-Engine = create_engine(DATABASE_URL, echo=env.DEBUG_MODE, future=True)
+    return {"options": f"-c statement_timeout={milliseconds}"}
+
+
+Engine = create_engine(DATABASE_URL, **engine_options(env))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=Engine)
 
+AsyncEngine = create_async_engine(
+    ASYNC_DATABASE_URL, **engine_options(env, asynchronous=True)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    AsyncEngine, autoflush=False, expire_on_commit=False
+)
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Session committed when the block ends, or rolled back if it raises."""
+    with SessionLocal() as session:
+        try:
+            yield session
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+
+def pool_metrics() -> dict[str, PoolMetrics]:
+    return {
+        "engine": Engine.pool.metrics(),
+        "async_engine": AsyncEngine.pool.metrics(),
+    }
+
 
 def get_db_connection():
-    db = scoped_session(SessionLocal)
-    try:
+    # The connection returns to the pool when the request ends
+    with SessionLocal() as db:
+        yield db
+
+
+async def get_async_db_connection():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
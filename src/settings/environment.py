@@ -14,13 +14,27 @@ class EnvironmentSettings(BaseSettings):
     API_VERSION: str = os.getenv("API_VERSION", "v1")
     APP_NAME: str = os.getenv("APP_NAME", "FastAPI")
     DATABASE_DIALECT: str = os.getenv("DATABASE_DIALECT", "postgresql")
+    DATABASE_ASYNC_DRIVER: str = os.getenv("DATABASE_ASYNC_DRIVER", "asyncpg")
     DATABASE_HOSTNAME: str = os.getenv("DATABASE_HOSTNAME", "localhost")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "")
     DATABASE_PASSWORD: str = os.getenv("DATABASE_PASSWORD", "")
     DATABASE_PORT: int = os.getenv("DATABASE_PORT", 5432)
     DATABASE_USERNAME: str = os.getenv("DATABASE_USERNAME", "")
+    DATABASE_POOL_SIZE: int = os.getenv("DATABASE_POOL_SIZE", 5)
+    DATABASE_MAX_OVERFLOW: int = os.getenv("DATABASE_MAX_OVERFLOW", 10)
+    DATABASE_POOL_TIMEOUT: float = os.getenv("DATABASE_POOL_TIMEOUT", 30)
+    DATABASE_POOL_RECYCLE: int = os.getenv("DATABASE_POOL_RECYCLE", 1800)
+    DATABASE_POOL_PRE_PING: bool = os.getenv("DATABASE_POOL_PRE_PING", True)
+    DATABASE_STATEMENT_TIMEOUT: int = os.getenv("DATABASE_STATEMENT_TIMEOUT", 0)
+    DATABASE_TIMEZONE: str = os.getenv("DATABASE_TIMEZONE", "UTC")
     DEBUG_MODE: bool = os.getenv("DEBUG_MODE", False)
     TELEGRAM_BOT_TOKEN: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
+    TELEGRAM_WEBHOOK_URL: str = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+    TELEGRAM_WEBHOOK_SECRET: str = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    TELEGRAM_WEBHOOK_STARTUP: bool = os.getenv("TELEGRAM_WEBHOOK_STARTUP", False)
+    BOT_WORKERS: int = os.getenv("BOT_WORKERS", 2)
+    JOB_MAX_ATTEMPTS: int = os.getenv("JOB_MAX_ATTEMPTS", 3)
+    ANALYTICS_REFRESH_INTERVAL: float = os.getenv("ANALYTICS_REFRESH_INTERVAL", 300)
 
     class Config:
         env_file = get_env_filename()
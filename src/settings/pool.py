@@ -0,0 +1,92 @@
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+__all__ = ["PoolMetrics", "InstrumentedQueuePool", "InstrumentedAsyncQueuePool"]
+
+
+@dataclass
+class PoolMetrics:
+    """Snapshot of a connection pool.
+
+    `waiting` counts the checkouts in progress, which wait for a free connection
+    when `checked_out` reaches `size + max_overflow`.
+    """
+
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiting: int
+    checkouts: int
+    timeouts: int
+    wait_time: float
+    max_wait_time: float
+
+    @property
+    def mean_wait_time(self) -> float:
+        return self.wait_time / self.checkouts if self.checkouts else 0.0
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "mean_wait_time": self.mean_wait_time}
+
+
+class _Instrumented:
+    """Measures how long the checkouts of a queue pool wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    def _do_get(self):
+        started_at = time.perf_counter()
+
+        with self._metrics_lock:
+            self._waiting += 1
+
+        try:
+            return super()._do_get()
+        except TimeoutError:
+            with self._metrics_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+
+            with self._metrics_lock:
+                self._waiting -= 1
+                self._checkouts += 1
+                self._wait_time += elapsed
+                self._max_wait_time = max(self._max_wait_time, elapsed)
+
+    def metrics(self) -> PoolMetrics:
+        with self._metrics_lock:
+            return PoolMetrics(
+                size=self.size(),
+                max_overflow=self._max_overflow,
+                checked_in=self.checkedin(),
+                checked_out=self.checkedout(),
+                overflow=max(self.overflow(), 0),
+                waiting=self._waiting,
+                checkouts=self._checkouts,
+                timeouts=self._timeouts,
+                wait_time=self._wait_time,
+                max_wait_time=self._max_wait_time,
+            )
+
+
+class InstrumentedQueuePool(_Instrumented, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_Instrumented, AsyncAdaptedQueuePool):
+    pass
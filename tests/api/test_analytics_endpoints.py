@@ -0,0 +1,69 @@
+from datetime import date
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from domain import DailyPrice, StorePrice
+from drivers.rest.dependencies import get_analytics_services
+from drivers.rest.routers import analytics_router
+from services.aio import AsyncAnalyticsService
+import pytest
+
+
+class FakeAnalyticsRepository:
+    def __init__(self):
+        self.calls = []
+
+    async def find_product_prices(self, *args):
+        self.calls.append(args)
+
+        return [DailyPrice(date(2024, 1, 2), 4.0, 6.0, 5.0, 2.0, 2, product_id=1)]
+
+    async def find_cheapest_companies(self, *args):
+        self.calls.append(args)
+
+        return [StorePrice(1, "MERCADO", date(2024, 1, 2), 5.0, 4.0)]
+
+
+@pytest.fixture
+def repository():
+    return FakeAnalyticsRepository()
+
+
+@pytest.fixture
+def client(repository):
+    app = FastAPI()
+    app.include_router(analytics_router)
+    app.dependency_overrides[get_analytics_services] = lambda: AsyncAnalyticsService(
+        repository
+    )
+
+    return TestClient(app)
+
+
+def test_product_prices_in_a_period(client, repository):
+    response = client.get(
+        "/analytics/products/1/prices",
+        params={"start": "2024-01-01", "end": "2024-01-31", "company_id": 3},
+    )
+
+    assert response.status_code == 200
+    assert response.json()[0]["average_price"] == 5.0
+    assert repository.calls == [(1, 3, date(2024, 1, 1), date(2024, 1, 31))]
+
+
+def test_a_period_ending_before_it_starts_is_rejected(client):
+    response = client.get(
+        "/analytics/products/1/prices",
+        params={"start": "2024-02-01", "end": "2024-01-01"},
+    )
+
+    assert response.status_code == 400
+
+
+def test_cheapest_companies_since_some_days_ago(client, repository):
+    response = client.get("/analytics/products/1/cheapest", params={"days": 7})
+
+    assert response.json()[0]["company_name"] == "MERCADO"
+    assert repository.calls[0][0] == 1
+    assert (date.today() - repository.calls[0][1]).days == 7
@@ -0,0 +1,161 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from drivers.rest.dependencies import get_analytics_refresh, get_receipts_services
+from drivers.rest.routers import invoices_router
+from repositories.aio.receipt import _batches
+from services.aio import AsyncReceiptService
+from services.aio.receipt import SAVE_FAILED, UNKNOWN_USER
+import pytest
+
+
+class FakeReceiptRepository:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+        self.ids = {}
+        self.users = {1}
+
+    async def find_user_ids(self, ids):
+        return ids & self.users
+
+    async def upsert_all(self, entities):
+        if self.fail:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+
+        self.batches.append([entity.access_key for entity in entities])
+        created = [entity.access_key not in self.ids for entity in entities]
+
+        for entity in entities:
+            entity.id = self.ids.setdefault(entity.access_key, len(self.ids) + 1)
+
+        return created
+
+
+def receipt(key: str, code: str = "1") -> dict:
+    return {
+        "invoice": {"access_key": key * 44, "number": "123", "series": "1"},
+        "company": {"name": "MERCADO", "cnpj": "12345678000100"},
+        "items": [
+            {"code": code, "description": "ARROZ", "quantity": 2, "unit_price": 5.5}
+        ],
+    }
+
+
+@pytest.fixture
+def repository():
+    return FakeReceiptRepository()
+
+
+@pytest.fixture
+def refreshes():
+    return []
+
+
+@pytest.fixture
+def client(repository, refreshes):
+    async def refresh():
+        refreshes.append(True)
+
+    app = FastAPI()
+    app.include_router(invoices_router)
+    app.dependency_overrides[get_receipts_services] = lambda: AsyncReceiptService(
+        repository, batch_size=2
+    )
+    app.dependency_overrides[get_analytics_refresh] = lambda: refresh
+
+    return TestClient(app)
+
+
+def test_bulk_import_reports_every_receipt(client, repository, refreshes):
+    receipts = [receipt("1"), receipt("2"), {"invoice": {}}, receipt("1", code="2")]
+
+    response = client.post("/invoices/bulk", json=receipts)
+    body = response.json()
+
+    assert response.status_code == 200
+    assert [result["status"] for result in body["results"]] == [
+        "created",
+        "created",
+        "invalid",
+        "updated",
+    ]
+    assert (body["created"], body["updated"], body["invalid"]) == (2, 1, 1)
+    assert body["results"][3]["invoice_id"] == body["results"][0]["invoice_id"]
+    assert "company: Field required" in body["results"][2]["errors"]
+    assert repository.batches == [["1" * 44, "2" * 44], ["1" * 44]]
+    assert refreshes == [True]
+
+
+def test_bulk_import_reads_ndjson_and_keeps_the_last_duplicate(client, repository):
+    lines = [json.dumps(receipt("1")), "{not json", json.dumps(receipt("1", "2"))]
+
+    response = client.post(
+        "/invoices/bulk",
+        content="\n".join(lines) + "\n",
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    body = response.json()
+
+    assert [result["status"] for result in body["results"]] == [
+        "duplicate",
+        "invalid",
+        "created",
+    ]
+    assert repository.batches == [["1" * 44]]
+
+
+def test_bulk_import_reports_failed_batches(repository):
+    repository.fail = True
+    app = FastAPI()
+    app.include_router(invoices_router)
+    app.dependency_overrides[get_receipts_services] = lambda: AsyncReceiptService(
+        repository
+    )
+    app.dependency_overrides[get_analytics_refresh] = lambda: None
+
+    body = TestClient(app).post("/invoices/bulk", json=[receipt("1")]).json()
+
+    assert body["failed"] == 1
+    assert body["results"][0]["errors"] == [SAVE_FAILED]
+    assert "connection lost" not in json.dumps(body)
+
+
+def test_bulk_import_reports_receipts_of_unknown_users(client, repository):
+    owned, unknown = receipt("1"), receipt("2")
+    owned["invoice"]["user_id"] = 1
+    unknown["invoice"]["user_id"] = 7
+
+    body = client.post("/invoices/bulk", json=[owned, unknown]).json()
+
+    assert [result["status"] for result in body["results"]] == ["created", "invalid"]
+    assert body["results"][1]["errors"] == [UNKNOWN_USER]
+    assert repository.batches == [["1" * 44]]
+
+
+def test_bulk_import_rejects_a_body_that_is_not_a_list(client):
+    response = client.post("/invoices/bulk", json=receipt("1"))
+
+    assert response.status_code == 400
+
+
+def test_bulk_import_does_not_refresh_the_analytics_without_changes(client, refreshes):
+    response = client.post("/invoices/bulk", json=[{"invoice": {}}])
+
+    assert response.json()["invalid"] == 1
+    assert refreshes == []
+
+
+def test_batches_keep_the_rows_of_a_group_together(monkeypatch):
+    monkeypatch.setattr("repositories.aio.receipt.MAX_PARAMETERS", 6)
+    rows = [{"invoice_id": id, "product_id": 0} for id in (1, 1, 1, 2, 3, 3)]
+
+    batches = list(_batches(rows, key="invoice_id"))
+
+    assert [[row["invoice_id"] for row in batch] for batch in batches] == [
+        [1, 1, 1],
+        [2, 3, 3],
+    ]
@@ -0,0 +1,199 @@
+import asyncio
+import io
+from datetime import UTC, datetime, timedelta
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from database.schema import (
+    CompanySchema,
+    InvoiceSchema,
+    ItemSchema,
+    ProductSchema,
+    Schema,
+)
+from drivers.export import (
+    ParquetExporter,
+    read_watermarks,
+    write_ipc_stream,
+    write_watermarks,
+)
+from drivers.rest.dependencies import get_exports_repository
+from drivers.rest.routers import exports_router
+from repositories import ExportRepository
+from repositories.aio import AsyncExportRepository
+from repositories.export import EXPORTS
+import pytest
+
+
+def add_invoices(session: Session, created_on: datetime) -> None:
+    company = CompanySchema(cnpj=f"{created_on:%m%d}", name="MERCADO")
+
+    for month in (1, 2):
+        invoice = InvoiceSchema(
+            access_key=f"{created_on:%m%d}{month}",
+            company=company,
+            issue_date=datetime(2024, month, 10),
+            created_on=created_on,
+        )
+        for i in range(3):
+            product = ProductSchema(
+                code=f"{created_on:%m}{month}{i}",
+                description=f"PRODUTO {i}",
+                created_on=created_on,
+            )
+            invoice.items.append(
+                ItemSchema(
+                    product=product,
+                    quantity=2,
+                    unit_price=1.5,
+                    created_on=created_on,
+                )
+            )
+        session.add(invoice)
+
+    session.commit()
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        add_invoices(session, datetime(2024, 3, 1))
+
+        yield session
+
+
+def test_parquet_export_is_partitioned_by_month(tmp_path, session):
+    export = EXPORTS["compras"]
+    batches = ExportRepository(session).batches(export, chunk_size=4)
+
+    report = ParquetExporter(tmp_path, run="1").write(export, batches)
+    table = ds.dataset(tmp_path / "compras", partitioning="hive").to_table()
+
+    assert report.rows == table.num_rows == 6
+    assert [path.parent.name for path in report.files] == ["mes=2024-01", "mes=2024-02"]
+    assert set(table.column("preco_total").to_pylist()) == {3.0}
+    assert report.last_created_on == datetime(2024, 3, 1)
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_incremental_export_adds_only_the_new_rows(tmp_path, session):
+    export = EXPORTS["itens_nota"]
+    repository = ExportRepository(session)
+    first = ParquetExporter(tmp_path, run="1").write(export, repository.batches(export))
+    write_watermarks(tmp_path, {export.name: first.last_created_on})
+    add_invoices(session, datetime(2024, 4, 1))
+
+    since = read_watermarks(tmp_path)[export.name]
+    second = ParquetExporter(tmp_path, run="2").write(
+        export, repository.batches(export, since)
+    )
+
+    assert (first.rows, second.rows) == (6, 6)
+    assert second.files == [tmp_path / "itens_nota" / "mes=2024-04" / "part-2.parquet"]
+    assert ds.dataset(tmp_path / "itens_nota").count_rows() == 12
+
+
+def test_incremental_export_stops_at_the_horizon(tmp_path, session):
+    export = EXPORTS["itens_nota"]
+    repository = ExportRepository(session)
+    add_invoices(session, datetime(2024, 6, 20))
+
+    # A transaction open since 04-15 commits its rows after the first export
+    first = ParquetExporter(tmp_path, run="1").write(
+        export, repository.batches(export, until=datetime(2024, 4, 15))
+    )
+    add_invoices(session, datetime(2024, 5, 16))
+    second = ParquetExporter(tmp_path, run="2").write(
+        export,
+        repository.batches(export, datetime(2024, 4, 15), until=repository.horizon()),
+    )
+
+    assert (first.rows, second.rows) == (6, 12)
+    assert ds.dataset(tmp_path / "itens_nota").count_rows() == 18
+
+
+def test_horizon_lags_behind_now(session):
+    horizon = ExportRepository(session).horizon(timedelta(minutes=5))
+
+    assert horizon < datetime.now(UTC).replace(tzinfo=None) - timedelta(minutes=4)
+
+
+def test_failed_parquet_export_leaves_no_file(tmp_path, session):
+    export = EXPORTS["notas_fiscais"]
+
+    def batches():
+        yield from ExportRepository(session).batches(export, chunk_size=1)
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        ParquetExporter(tmp_path).write(export, batches())
+
+    assert not [path for path in tmp_path.rglob("*") if path.is_file()]
+
+
+def test_ipc_stream_export(session):
+    export = EXPORTS["empresas"]
+    sink = io.BytesIO()
+
+    report = write_ipc_stream(sink, export, ExportRepository(session).batches(export))
+    table = pa.ipc.open_stream(sink.getvalue()).read_all()
+
+    assert report.rows == table.num_rows == 1
+    assert table.schema.field("data_criacao").type == pa.timestamp("us")
+
+
+@pytest.fixture
+def client():
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(Schema.metadata.create_all)
+            await connection.run_sync(
+                lambda connection: add_invoices(
+                    Session(connection), datetime(2024, 3, 1)
+                )
+            )
+
+    asyncio.run(setup())
+
+    app = FastAPI()
+    app.include_router(exports_router)
+    app.dependency_overrides[get_exports_repository] = lambda: AsyncExportRepository(
+        AsyncSession(engine)
+    )
+
+    yield TestClient(app)
+
+    asyncio.run(engine.dispose())
+
+
+def test_arrow_stream_endpoint(client):
+    response = client.get("/exports/produtos", params={"chunk_size": 2})
+    table = pa.ipc.open_stream(response.content).read_all()
+
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    assert table.column("descricao").to_pylist()[:3] == [
+        "PRODUTO 0",
+        "PRODUTO 1",
+        "PRODUTO 2",
+    ]
+
+
+def test_arrow_stream_endpoint_since(client):
+    response = client.get("/exports/produtos", params={"since": "2024-03-01"})
+
+    assert pa.ipc.open_stream(response.content).read_all().num_rows == 0
+
+
+def test_unknown_export(client):
+    assert client.get("/exports/usuarios").status_code == 404
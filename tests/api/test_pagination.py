@@ -0,0 +1,83 @@
+import asyncio
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import Session
+
+from database.schema import ProductSchema, Schema
+from drivers.rest.dependencies import get_products_repository
+from drivers.rest.pagination import NEXT_PAGE_HEADER
+from drivers.rest.routers import products_router
+from repositories.aio import AsyncProductRepository
+import pytest
+
+PRODUCTS = 7
+
+
+def add_products(connection) -> None:
+    with Session(connection) as session:
+        session.add_all(
+            ProductSchema(code=f"{id:0>13}", description=f"PRODUTO {id}")
+            for id in range(1, PRODUCTS + 1)
+        )
+        session.commit()
+
+
+@pytest.fixture
+def client():
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(Schema.metadata.create_all)
+            await connection.run_sync(add_products)
+
+    asyncio.run(setup())
+
+    async def repository():
+        # Sessions left open are collected with their connection, dropping the
+        # database in memory
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield AsyncProductRepository(session)
+
+    app = FastAPI()
+    app.include_router(products_router)
+    app.dependency_overrides[get_products_repository] = repository
+
+    yield TestClient(app)
+
+    asyncio.run(engine.dispose())
+
+
+def test_pages_continue_after_the_last_id(client):
+    first = client.get("/products/", params={"limit": 3})
+    second = client.get(
+        "/products/", params={"limit": 3, "after_id": first.headers[NEXT_PAGE_HEADER]}
+    )
+
+    assert [product["id"] for product in first.json()] == [1, 2, 3]
+    assert [product["id"] for product in second.json()] == [4, 5, 6]
+    assert second.headers[NEXT_PAGE_HEADER] == "6"
+
+
+def test_last_page_has_no_next_page_header(client):
+    response = client.get("/products/", params={"limit": 3, "after_id": 6})
+
+    assert [product["id"] for product in response.json()] == [7]
+    assert NEXT_PAGE_HEADER not in response.headers
+
+
+def test_stream_returns_every_row_as_json_lines(client):
+    response = client.get("/products/", params={"stream": True, "after_id": 2})
+    lines = response.text.splitlines()
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line)["id"] for line in lines] == [3, 4, 5, 6, 7]
+    assert json.loads(lines[0])["description"] == "PRODUTO 3"
+
+
+def test_page_size_is_limited(client):
+    assert client.get("/products/", params={"limit": 0}).status_code == 422
+    assert client.get("/products/", params={"after_id": -1}).status_code == 422
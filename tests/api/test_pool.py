@@ -0,0 +1,85 @@
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError
+
+from drivers.rest.routers import metrics_router
+from settings.database import engine_options
+from settings.environment import EnvironmentSettings
+from settings.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool
+import pytest
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.2,
+    )
+
+    yield engine
+
+    engine.dispose()
+
+
+def test_pool_metrics_count_waiters_and_timeouts(engine):
+    connection = engine.connect()
+
+    with pytest.raises(TimeoutError):
+        engine.connect()
+
+    waiter = threading.Thread(target=lambda: engine.connect().close())
+    waiter.start()
+    time.sleep(0.05)
+    waiting = engine.pool.metrics()
+    connection.close()
+    waiter.join()
+
+    metrics = engine.pool.metrics()
+
+    assert (waiting.checked_out, waiting.waiting) == (1, 1)
+    assert (metrics.checked_out, metrics.waiting) == (0, 0)
+    assert (metrics.checkouts, metrics.timeouts) == (3, 1)
+    assert metrics.max_wait_time >= 0.2
+    assert metrics.mean_wait_time == pytest.approx(metrics.wait_time / 3)
+
+
+def test_engine_options_follow_the_settings():
+    settings = EnvironmentSettings(
+        DATABASE_POOL_SIZE=20,
+        DATABASE_MAX_OVERFLOW=0,
+        DATABASE_POOL_PRE_PING=False,
+        DATABASE_STATEMENT_TIMEOUT=5000,
+    )
+
+    options = engine_options(settings)
+    async_options = engine_options(settings, asynchronous=True)
+
+    assert options["poolclass"] is InstrumentedQueuePool
+    assert (options["pool_size"], options["max_overflow"]) == (20, 0)
+    assert options["pool_pre_ping"] is False
+    assert options["connect_args"] == {"options": "-c statement_timeout=5000"}
+    assert async_options["poolclass"] is InstrumentedAsyncQueuePool
+    assert async_options["connect_args"] == {
+        "server_settings": {"statement_timeout": "5000"}
+    }
+    assert "connect_args" not in engine_options(EnvironmentSettings())
+
+
+def test_database_metrics_endpoint():
+    app = FastAPI()
+    app.include_router(metrics_router)
+
+    response = TestClient(app).get("/metrics/database")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"engine", "async_engine"}
+    assert {"checked_out", "waiting", "mean_wait_time"} <= set(
+        response.json()["engine"]
+    )
@@ -0,0 +1,88 @@
+import asyncio
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from domain import Product
+from drivers.rest.dependencies import get_products_repository
+from drivers.rest.routers import products_router
+from repositories.aio import AsyncProductRepository
+from repositories.aio.product import search_terms
+import pytest
+
+
+class FakeSession:
+    def __init__(self):
+        self.statements = []
+
+    async def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+        return []
+
+
+class FakeProductRepository:
+    async def search(self, query, limit=20):
+        return [
+            (Product(1, "7891000", "LEITE UHT INTEGRAL 1L", datetime(2024, 1, 1)), 1.5),
+            (Product(2, "7891001", "LEITE INT UHT 1L", datetime(2024, 1, 1)), 0.8),
+        ][:limit]
+
+
+def search(query: str):
+    session = FakeSession()
+    asyncio.run(AsyncProductRepository(session).search(query))
+
+    return session.statements[0]
+
+
+def test_search_terms_match_prefixes_of_every_word():
+    assert search_terms("Leite int. | UHT & (1L)") == "Leite:* & int:* & UHT:* & 1L:*"
+    assert search_terms("!!") == ""
+
+
+def test_search_uses_the_expressions_of_the_indexes():
+    sql = search("leite integral").string
+
+    assert (
+        "to_tsvector('portuguese'::regconfig, normalizar_busca(produtos.descricao)) "
+        "@@ to_tsquery('portuguese'::regconfig, normalizar_busca(" in sql
+    )
+    assert "<%% normalizar_busca(produtos.descricao)" in sql
+    assert "ORDER BY score DESC, produtos.id" in sql
+    assert "produtos.codigo =" not in sql
+
+
+def test_search_by_code_pads_it():
+    statement = search(" 7891000 ")
+
+    assert "produtos.codigo = %(codigo_1)s" in statement.string
+    assert statement.params["codigo_1"] == "000000007891000"
+
+
+@pytest.mark.parametrize("query", ["007891000100103", "7891000100103"])
+def test_search_finds_the_stored_codes(query):
+    # The scraper stores the codes with 15 digits
+    assert search(query).params["codigo_1"] == "007891000100103"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(products_router)
+    app.dependency_overrides[get_products_repository] = FakeProductRepository
+
+    return TestClient(app)
+
+
+def test_search_endpoint(client):
+    response = client.get("/products/search", params={"q": "leite integral"})
+
+    assert response.status_code == 200
+    assert [product["score"] for product in response.json()] == [1.5, 0.8]
+    assert response.json()[0]["code"] == "000000007891000"
+
+
+def test_search_endpoint_rejects_a_short_query(client):
+    assert client.get("/products/search", params={"q": "l"}).status_code == 422
@@ -0,0 +1,122 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from database.schema import Schema
+from domain import JobStatus
+from drivers.bots.async_telegram import create_bot
+from drivers.rest.dependencies import get_telegram_bot
+from drivers.rest.routers import telegram_router
+from repositories import JobRepository
+from settings.environment import EnvironmentSettings, get_environment_variables
+import pytest
+
+SECRET = "s3cr3t"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = tmp_path / "bot.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Schema.metadata.create_all(engine)
+
+    yield engine
+
+    engine.dispose()
+
+
+@pytest.fixture
+def bot(engine):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+    bot = create_bot(
+        "123:token",
+        async_sessionmaker(async_engine, expire_on_commit=False),
+        max_attempts=5,
+    )
+    bot.messages = []
+
+    async def send_message(chat_id, text, **kwargs):
+        bot.messages.append((chat_id, text))
+
+    async def reply_to(message, text, **kwargs):
+        bot.messages.append((message.chat.id, text))
+
+    bot.send_message = send_message
+    bot.reply_to = reply_to
+
+    return bot
+
+
+@pytest.fixture
+def client(bot):
+    app = FastAPI()
+    app.include_router(telegram_router)
+    app.dependency_overrides[get_telegram_bot] = lambda: bot
+    app.dependency_overrides[get_environment_variables] = lambda: (
+        EnvironmentSettings(TELEGRAM_WEBHOOK_SECRET=SECRET)
+    )
+
+    with TestClient(app) as client:
+        yield client
+
+
+def update(text: str, id: int = 1) -> dict:
+    return {
+        "update_id": id,
+        "message": {
+            "message_id": id,
+            "date": 1718000000,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 7, "is_bot": False, "first_name": "Ana"},
+            "text": text,
+            "entities": [
+                {"type": "bot_command", "offset": 0, "length": len(text.split()[0])}
+            ],
+        },
+    }
+
+
+def post(client: TestClient, body: dict, secret: str = SECRET):
+    return client.post(
+        "/telegram/webhook",
+        json=body,
+        headers={"X-Telegram-Bot-Api-Secret-Token": secret},
+    )
+
+
+def test_webhook_enqueues_the_invoices(client, bot, engine):
+    response = post(client, update("/nfce url http://a http://b"))
+
+    assert response.status_code == 200
+    assert bot.messages == [
+        (42, "Recebi 2 NFC-e, aviso assim que os dados forem salvos.")
+    ]
+
+    with Session(engine) as session:
+        jobs = JobRepository(session).find_latest(42)
+
+    assert [job.source for job in jobs] == ["http://b", "http://a"]
+    assert {(job.status, job.max_attempts) for job in jobs} == {(JobStatus.PENDING, 5)}
+
+
+def test_webhook_replies_the_status_and_invalid_commands(client, bot):
+    post(client, update("/status", 1))
+    post(client, update("/nfce chave 3224 0612", 2))
+    post(client, update("/nfce foo bar", 3))
+    post(client, update("/status", 4))
+
+    assert [text for _, text in bot.messages] == [
+        "Você ainda não enviou nenhuma NFC-e.",
+        "Recebi 1 NFC-e, aviso assim que os dados forem salvos.",
+        "Opção inválida. Por favor, escolha entre *URL* ou *CHAVE*.",
+        "Últimas NFC-e enviadas:\n- 32240612: na fila",
+    ]
+
+
+def test_webhook_rejects_a_wrong_secret_token(client, bot):
+    response = post(client, update("/ajuda"), secret="wrong")
+
+    assert response.status_code == 403
+    assert bot.messages == []
@@ -0,0 +1,170 @@
+import asyncio
+from datetime import date, datetime
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.schema import (
+    CompanySchema,
+    InvoiceSchema,
+    ItemSchema,
+    ProductSchema,
+    Schema,
+    UserSchema,
+)
+from drivers.rest.dependencies import get_users_repository
+from drivers.rest.exceptions_handler import exception_container
+from drivers.rest.routers import users_router
+from repositories.aio import AsyncUserRepository
+from services.aio import user as user_services
+from services.summary import Purchases, summarize
+import pytest
+
+ROWS = [
+    # invoice, company, name, issue date, quantity, price, federal, state, municipal
+    (1, 1, "MERCADO A", datetime(2024, 1, 8, 10), 2.0, 5.0, 1.0, 2.0, 0.0),
+    (1, 1, "MERCADO A", datetime(2024, 1, 8, 10), 1.0, 10.0, 1.0, 2.0, 0.0),
+    (2, 2, "MERCADO B", datetime(2024, 1, 14, 18), 3.0, 10.0, 0.5, 1.5, 1.0),
+    (3, 1, "MERCADO A", datetime(2024, 2, 1), 1.0, 40.0, None, None, None),
+    (4, None, None, None, 1.0, 20.0, 1.0, 0.0, 0.0),
+]
+
+
+def test_summary_totals_and_taxes_count_each_invoice_once():
+    summary = summarize(1, Purchases.from_rows(ROWS))
+
+    assert (summary.total, summary.invoices, summary.items) == (110.0, 4, 5)
+    assert summary.average_invoice == 27.5
+    assert (summary.taxes.federal, summary.taxes.state) == (2.5, 3.5)
+    assert summary.taxes.total == 7.0
+    assert summary.taxes.share == pytest.approx(7.0 / 110.0)
+
+
+def test_summary_per_store_ordered_by_spending():
+    stores = summarize(1, Purchases.from_rows(ROWS)).stores
+
+    assert [(store.company_name, store.total, store.invoices) for store in stores] == [
+        ("MERCADO A", 60.0, 2),
+        ("MERCADO B", 30.0, 1),
+        (None, 20.0, 1),
+    ]
+    assert stores[0].items == 3
+    assert sum(store.share for store in stores) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize(
+    "period, expected",
+    [
+        ("month", [(date(2024, 1, 1), 50.0, 2, 6.0), (date(2024, 2, 1), 40.0, 1, 0)]),
+        (
+            "week",
+            [
+                (date(2024, 1, 8), 50.0, 2, 6.0),
+                (date(2024, 1, 29), 40.0, 1, 0.0),
+            ],
+        ),
+    ],
+)
+def test_summary_per_period_leaves_undated_invoices_out(period, expected):
+    periods = summarize(1, Purchases.from_rows(ROWS), period).periods
+
+    assert [
+        (period.start, period.total, period.invoices, period.taxes)
+        for period in periods
+    ] == expected
+
+
+def test_summary_without_purchases():
+    summary = summarize(1, Purchases.from_rows([]))
+
+    assert (summary.total, summary.taxes.share, summary.stores) == (0.0, 0.0, [])
+
+
+@pytest.fixture
+def client():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(Schema.metadata.create_all)
+
+        async with sessions() as session:
+            user = UserSchema(first_name="Maria", last_name="Silva", username="maria")
+            company = CompanySchema(cnpj="1", name="MERCADO A")
+
+            for day, price in ((5, 2.0), (20, 3.0)):
+                invoice = InvoiceSchema(
+                    access_key=str(day),
+                    user=user,
+                    company=company,
+                    issue_date=datetime(2024, 3, day),
+                    federal_tax=0.5,
+                )
+                invoice.items.append(
+                    ItemSchema(
+                        product=ProductSchema(code=str(day), description="ARROZ"),
+                        quantity=2,
+                        unit_price=price,
+                    )
+                )
+                session.add(invoice)
+
+            await session.commit()
+
+    asyncio.run(setup())
+
+    async def repository():
+        async with sessions() as session:
+            yield AsyncUserRepository(session)
+
+    app = FastAPI()
+    app.include_router(users_router)
+    exception_container(app)
+    app.dependency_overrides[get_users_repository] = repository
+
+    yield TestClient(app)
+
+    asyncio.run(engine.dispose())
+
+
+def test_summary_endpoint(client):
+    response = client.get("/users/1/summary", params={"end": "2024-03-05"})
+    body = response.json()
+
+    assert response.status_code == 200
+    assert (body["total"], body["invoices"], body["taxes"]["total"]) == (4.0, 1, 0.5)
+    assert body["stores"][0]["company_name"] == "MERCADO A"
+    assert body["periods"] == [
+        {"start": "2024-03-01", "total": 4.0, "invoices": 1, "items": 1, "taxes": 0.5}
+    ]
+
+
+def test_summary_of_a_missing_user(client):
+    assert client.get("/users/2/summary").status_code == 400
+
+
+def test_summary_of_reversed_dates(client):
+    response = client.get(
+        "/users/1/summary", params={"start": "2024-03-05", "end": "2024-03-01"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_summary_is_computed_off_the_event_loop(client, monkeypatch):
+    loops = []
+
+    def record_loop(*args):
+        try:
+            loops.append(asyncio.get_running_loop())
+        except RuntimeError:
+            loops.append(None)
+
+        return summarize(*args)
+
+    monkeypatch.setattr(user_services, "summarize", record_loop)
+
+    assert client.get("/users/1/summary").status_code == 200
+    assert loops == [None]
@@ -0,0 +1,108 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from timeit import repeat, timeit
+
+from domain import Company, EletronicInvoice, Item, Taxes
+from services.summary import Purchases, summarize
+import pytest
+
+ITEMS = 300_000
+ITEMS_PER_INVOICE = 20
+
+
+def purchase_rows(items: int = ITEMS) -> list[tuple]:
+    generator = random.Random(0)
+    rows = []
+
+    for invoice in range(items // ITEMS_PER_INVOICE):
+        company = generator.randrange(50)
+        issue_date = datetime(2020, 1, 1) + timedelta(hours=invoice)
+        taxes = (generator.random(), generator.random(), generator.random())
+
+        for _ in range(ITEMS_PER_INVOICE):
+            rows.append(
+                (
+                    invoice,
+                    company,
+                    f"MERCADO {company}",
+                    issue_date,
+                    float(generator.randint(1, 5)),
+                    generator.random() * 100,
+                    *taxes,
+                )
+            )
+
+    return rows
+
+
+def to_invoices(rows: list[tuple]) -> list[EletronicInvoice]:
+    invoices = {}
+
+    for id, company, name, issue_date, quantity, price, *taxes in rows:
+        if id not in invoices:
+            invoices[id] = EletronicInvoice(
+                id=id,
+                company=Company(company, name=name),
+                issue_date=issue_date,
+                taxes=Taxes(*taxes),
+                items=[],
+            )
+        invoices[id].items.append(Item(quantity=quantity, unit_price=price))
+
+    return list(invoices.values())
+
+
+def entity_summary(rows: list[tuple]) -> tuple:
+    """The aggregates computed from entities, with their per object properties."""
+    invoices = to_invoices(rows)
+    stores = defaultdict(float)
+    months = defaultdict(float)
+    total = taxes = 0.0
+
+    for invoice in invoices:
+        spent = sum(item.total_price for item in invoice.items)
+        total += spent
+        taxes += invoice.taxes.total
+        stores[invoice.company.id] += spent
+        months[invoice.issue_date.strftime("%Y-%m")] += spent
+
+    return total, taxes, stores, months
+
+
+def test_summary_matches_entities():
+    rows = purchase_rows(ITEMS // 100)
+    summary = summarize(1, Purchases.from_rows(rows))
+    total, taxes, stores, months = entity_summary(rows)
+
+    assert summary.items == ITEMS // 100
+    assert summary.total == pytest.approx(total)
+    assert summary.taxes.total == pytest.approx(taxes)
+    assert len(summary.stores) == len(stores)
+    assert len(summary.periods) == len(months)
+
+
+@pytest.mark.benchmark
+def test_benchmark_summary_against_entities():
+    rows = purchase_rows()
+    baseline = timeit(lambda: entity_summary(rows), number=1)
+    optimized = timeit(lambda: summarize(1, Purchases.from_rows(rows)), number=1)
+
+    print(f"\nsummary of {ITEMS} items: {baseline:.2f}s -> {optimized:.2f}s")
+    assert optimized < baseline
+
+
+@pytest.mark.benchmark
+def test_benchmark_summary_scales_linearly():
+    small, large = purchase_rows(ITEMS // 10), purchase_rows()
+    purchases = Purchases.from_rows(small), Purchases.from_rows(large)
+
+    # The best of a few runs, the least disturbed by the rest of the machine
+    elapsed = [
+        min(repeat(lambda: summarize(1, columns), number=1, repeat=5))
+        for columns in purchases
+    ]
+
+    print(f"\nsummarize: {elapsed[0] * 1e3:.1f}ms -> {elapsed[1] * 1e3:.1f}ms")
+    # Ten times the items, far from the hundredfold of a quadratic algorithm
+    assert elapsed[1] < elapsed[0] * 30
@@ -0,0 +1,91 @@
+import random
+
+from canonical import (
+    ProductRecord,
+    UnionFind,
+    cluster,
+    description_key,
+    normalize_gtin,
+)
+import pytest
+
+
+@pytest.mark.parametrize(
+    "description, key",
+    [
+        ("LEITE UHT INTEGRAL 1L", "1l integral leite uht"),
+        ("LEITE INT. UHT 1000ML", "1l integral leite uht"),
+        ("Açúcar Refinado União 1 kg", "1kg acucar refinado uniao"),
+        ("CAFE PILAO TRAD. 500G", "0.5kg cafe pilao tradicional"),
+        ("OLEO DE SOJA 900 ML", "0.9l oleo soja"),
+        ("", ""),
+    ],
+)
+def test_description_key(description, key):
+    assert description_key(description) == key
+
+
+@pytest.mark.parametrize(
+    "code, gtin",
+    [
+        ("7891000100103", "07891000100103"),
+        ("0000007891000100103", "07891000100103"),
+        ("7891000100104", None),
+        ("12345", None),
+        ("", None),
+        ("SEM GTIN", None),
+    ],
+)
+def test_normalize_gtin(code, gtin):
+    assert normalize_gtin(code) == gtin
+
+
+def test_union_find_keeps_different_gtins_apart():
+    sets = UnionFind(["a", None, "b"])
+
+    assert sets.union(0, 1)
+    assert not sets.union(1, 2)
+    assert sorted(sets.sets()) == [[0, 1], [2]]
+
+
+def test_cluster_merges_gtins_and_similar_descriptions():
+    products = [
+        ProductRecord(1, "7891000100103", "LEITE UHT INTEGRAL 1L"),
+        ProductRecord(2, "123", "LEITE INT. UHT 1000ML"),
+        ProductRecord(3, "0007891000100103", "LEITE PIRAC. 1L"),
+        ProductRecord(4, "55", "LEITE UHT INTEGRAL PIRACANJUBA 1L"),
+        # Another size is another product, however similar the description
+        ProductRecord(5, "66", "LEITE UHT INTEGRAL 500ML"),
+        # And so is another GTIN
+        ProductRecord(6, "7891000053508", "LEITE UHT INTEGRAL 1L"),
+    ]
+
+    clusters = cluster(products)
+
+    assert [found.ids for found in clusters] == [[1, 2, 3, 4], [5], [6]]
+    assert [found.gtin for found in clusters] == [
+        "07891000100103",
+        None,
+        "07891000053508",
+    ]
+    assert clusters[0].key == "1l integral leite uht"
+
+
+def test_cluster_finds_the_near_duplicates_among_many_products():
+    words = [f"palavra{i}" for i in range(300)]
+    random.seed(1)
+    products = [
+        ProductRecord(i, str(i), " ".join(random.sample(words, 4))) for i in range(5000)
+    ]
+    # Near duplicates of the first products, with a word more
+    products += [
+        ProductRecord(10_000 + i, "", f"{products[i].description} {words[0]}X")
+        for i in range(10)
+    ]
+
+    clusters = cluster(products, threshold=0.8)
+    merged = [found.ids for found in clusters if len(found.ids) > 1]
+
+    assert [ids for ids in merged if max(ids) >= 10_000] == [
+        [i, 10_000 + i] for i in range(10)
+    ]
@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The modules under src import their siblings as top level packages, as they do when
+# running from the src directory
+sys.path.insert(0, str(Path(__file__).parents[1] / "src"))
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        help="Run the benchmarks, which compare timings and are skipped by default.",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: compares timings, only run with --benchmark"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks only run with --benchmark")
+
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
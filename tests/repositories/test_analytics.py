@@ -0,0 +1,213 @@
+import asyncio
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from database.schema import (
+    CanonicalProductSchema,
+    CompanySchema,
+    ProductSchema,
+    Schema,
+)
+from database.views import Views, daily_prices, monthly_spending
+from repositories import AnalyticsRepository
+from repositories.aio import AsyncAnalyticsRepository
+from repositories.analytics import LEAVE_QUEUE, REFRESH_LOCK, REFRESH_VIEWS
+from settings.database import async_sessionmaker
+import pytest
+
+TODAY = date.today()
+
+
+def price(product_id, company_id, days_ago, average, quantity=1.0, canonical_id=None):
+    return {
+        "product_id": product_id,
+        "canonical_id": canonical_id,
+        "company_id": company_id,
+        "day": TODAY - timedelta(days=days_ago),
+        "min_price": average,
+        "max_price": average,
+        "average_price": average,
+        "quantity": quantity,
+        "count": 1,
+    }
+
+
+async def create_repository():
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Schema.metadata.create_all)
+        await connection.run_sync(Views.create_all)
+        await connection.execute(
+            insert(daily_prices),
+            [
+                price(1, 1, 40, 4.0),
+                price(1, 1, 1, 6.0, quantity=3.0),
+                price(1, 2, 1, 5.0),
+                price(1, 2, 0, 7.0),
+                # The same canonical product, under different codes
+                price(3, 3, 1, 4.0, canonical_id=1),
+                price(4, 3, 1, 6.0, canonical_id=1),
+                price(4, 4, 2, 2.0, canonical_id=1),
+            ],
+        )
+        await connection.execute(
+            insert(monthly_spending),
+            [
+                {
+                    "user_id": 1,
+                    "month": date(2024, month, 1),
+                    "total": 100.0 * month,
+                    "invoice_count": month,
+                    "item_count": 10 * month,
+                }
+                for month in (1, 2, 3)
+            ],
+        )
+
+    session = async_sessionmaker(engine, expire_on_commit=False)()
+    session.add_all(
+        [
+            CompanySchema(id=1, name="MERCADO A"),
+            CompanySchema(id=2, name="MERCADO B"),
+            CompanySchema(id=3, name="MERCADO C"),
+            CompanySchema(id=4, name="MERCADO D"),
+            ProductSchema(id=1, code="1", description="ARROZ"),
+            CanonicalProductSchema(id=1, key="feijao"),
+            ProductSchema(id=3, code="3", description="FEIJAO", canonical_id=1),
+            ProductSchema(id=4, code="4", description="FEIJAO.", canonical_id=1),
+        ]
+    )
+    await session.commit()
+
+    return AsyncAnalyticsRepository(session)
+
+
+def run(method, *args, **kwargs):
+    async def call():
+        repository = await create_repository()
+
+        async with repository.session:
+            result = await getattr(repository, method)(*args, **kwargs)
+
+        await repository.session.bind.dispose()
+
+        return result
+
+    return asyncio.run(call())
+
+
+def test_product_prices_are_weighted_by_the_quantity_of_each_company():
+    prices = run("find_product_prices", 1, start=TODAY - timedelta(days=7))
+
+    assert [price.day for price in prices] == [
+        TODAY - timedelta(days=1),
+        TODAY,
+    ]
+    assert prices[0].average_price == pytest.approx((6.0 * 3 + 5.0) / 4)
+    assert (prices[0].min_price, prices[0].max_price) == (5.0, 6.0)
+    assert prices[0].count == 2
+
+
+def test_company_prices_carry_the_product_description():
+    prices = run("find_company_prices", 1)
+
+    assert [price.average_price for price in prices] == [4.0, 6.0]
+    assert {price.product_description for price in prices} == {"ARROZ"}
+
+
+def test_cheapest_companies_compare_their_last_price():
+    stores = run("find_cheapest_companies", 1, TODAY - timedelta(days=30))
+
+    assert [(store.company_name, store.average_price) for store in stores] == [
+        ("MERCADO A", 6.0),
+        ("MERCADO B", 7.0),
+    ]
+
+
+def test_prices_include_the_products_with_the_same_canonical_product():
+    prices = run("find_product_prices", 3)
+    stores = run("find_cheapest_companies", 3, TODAY - timedelta(days=30))
+
+    assert [(price.average_price, price.count) for price in prices] == [
+        (2.0, 1),
+        (5.0, 2),
+    ]
+    assert [(store.company_name, store.average_price) for store in stores] == [
+        ("MERCADO D", 2.0),
+        ("MERCADO C", 5.0),
+    ]
+
+
+def test_monthly_spending_between_two_days():
+    spending = run(
+        "find_monthly_spending", 1, start=date(2024, 2, 15), end=date(2024, 3, 31)
+    )
+
+    assert [(month.month.month, month.total) for month in spending] == [
+        (2, 200.0),
+        (3, 300.0),
+    ]
+
+
+class FakeConnection:
+    def __init__(self):
+        self.invalidated = False
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+class FakeSession:
+    def __init__(self, queued: bool = False, fail: bool = False):
+        self.queued = queued
+        self.fail = fail
+        self.connection_ = FakeConnection()
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def connection(self):
+        return self.connection_
+
+    def scalar(self, statement):
+        return not self.queued
+
+    def execute(self, statement):
+        if self.fail and statement is REFRESH_VIEWS[0]:
+            raise RuntimeError("canceling statement due to statement timeout")
+
+        self.statements.append(statement)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_refresh_waits_for_the_running_one_and_leaves_the_queue():
+    session = FakeSession()
+
+    assert AnalyticsRepository(session).refresh()
+    assert session.statements == [REFRESH_LOCK, LEAVE_QUEUE, *REFRESH_VIEWS]
+    assert session.commits == 1
+
+
+def test_refresh_is_left_to_the_queued_one():
+    session = FakeSession(queued=True)
+
+    assert not AnalyticsRepository(session).refresh()
+    assert (session.statements, session.rollbacks) == ([], 1)
+
+
+def test_failed_refresh_closes_the_connection_holding_the_queue():
+    session = FakeSession(fail=True)
+
+    with pytest.raises(RuntimeError):
+        AnalyticsRepository(session).refresh()
+
+    assert session.connection_.invalidated
+    assert session.rollbacks == 1
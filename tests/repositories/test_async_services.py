@@ -0,0 +1,262 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database.schema import Schema
+from drivers.rest.schemas.companies import CompanyPatchRequestModel
+from drivers.rest.schemas.invoices import InvoicePostRequestModel
+from drivers.rest.schemas.items import ItemPatchRequestModel, ItemPostRequestModel
+from drivers.rest.schemas.products import ProductPatchRequestModel
+from drivers.rest.schemas.users import UserPatchRequestModel, UserPostRequestModel
+from repositories.aio import (
+    AsyncCompanyRepository,
+    AsyncInvoiceRepository,
+    AsyncItemRepository,
+    AsyncProductRepository,
+    AsyncUserRepository,
+)
+from services.aio import (
+    AsyncCompanyService,
+    AsyncInvoiceService,
+    AsyncItemService,
+    AsyncProductService,
+    AsyncUserService,
+)
+from services.exceptions import EntityAlreadyExists, EntityNotExists
+import pytest
+
+SERVICES = {
+    "companies": (AsyncCompanyService, AsyncCompanyRepository),
+    "invoices": (AsyncInvoiceService, AsyncInvoiceRepository),
+    "items": (AsyncItemService, AsyncItemRepository),
+    "products": (AsyncProductService, AsyncProductRepository),
+    "users": (AsyncUserService, AsyncUserRepository),
+}
+
+COMPANY = CompanyPatchRequestModel(
+    name="MERCADO",
+    cnpj="12345678000100",
+    street="RUA UM",
+    number="8",
+    complement="",
+    neighborhood="CENTRO",
+    city="VITORIA",
+    state="ES",
+    zip_code="29000000",
+)
+
+
+@pytest.fixture
+def run():
+    """Run a call with the services, each in a session of its own as in a request."""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+    loop = asyncio.new_event_loop()
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(Schema.metadata.create_all)
+
+    loop.run_until_complete(setup())
+
+    def run(call):
+        async def in_session():
+            async with sessions() as session:
+                services = {
+                    name: service(repository(session))
+                    for name, (service, repository) in SERVICES.items()
+                }
+                return await call(services)
+
+        return loop.run_until_complete(in_session())
+
+    run.engine = engine
+    yield run
+
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+def invoice(
+    company_id: int, user_id: int, tzinfo: timezone = None
+) -> InvoicePostRequestModel:
+    return InvoicePostRequestModel(
+        access_key="1" * 44,
+        number="123",
+        series="1",
+        authorization_protocol="332240000123456",
+        authorization_date=datetime(2024, 6, 1, 10, 5, tzinfo=tzinfo),
+        issue_date=datetime(2024, 6, 1, 10, tzinfo=tzinfo),
+        federal_tax=1.5,
+        state_tax=2.5,
+        municipal_tax=0.0,
+        source_tax="IBPT",
+        company_id=company_id,
+        user_id=user_id,
+    )
+
+
+def test_user_is_created_and_found_by_username(run):
+    user = run(
+        lambda services: services["users"].save(
+            UserPostRequestModel(
+                first_name="Maria", last_name="Silva", username="maria"
+            )
+        )
+    )
+
+    found = run(lambda services: services["users"].find_by_username("maria"))
+
+    assert found.id == user.id
+    assert found.first_name == "Maria"
+
+    run(
+        lambda services: services["users"].update(
+            user.id, UserPatchRequestModel(first_name="Maria", last_name="Souza")
+        )
+    )
+    assert run(lambda services: services["users"].find_by_id(user.id)).last_name == (
+        "Souza"
+    )
+
+
+def test_duplicate_user_already_exists(run):
+    model = UserPostRequestModel(
+        first_name="Maria", last_name="Silva", username="maria"
+    )
+    run(lambda services: services["users"].save(model))
+
+    with pytest.raises(EntityAlreadyExists):
+        run(lambda services: services["users"].save(model))
+
+
+def test_company_is_found_by_cnpj_updated_and_deleted(run):
+    company = run(lambda services: services["companies"].save(COMPANY))
+
+    assert (
+        run(lambda services: services["companies"].get_by_cnpj(COMPANY.cnpj)) == company
+    )
+
+    renamed = COMPANY.model_copy(update={"name": "SUPERMERCADO"})
+    run(lambda services: services["companies"].update(company.id, renamed))
+    assert run(lambda services: services["companies"].find_by_id(company.id)).name == (
+        "SUPERMERCADO"
+    )
+
+    run(lambda services: services["companies"].delete(company.id))
+    with pytest.raises(EntityNotExists):
+        run(lambda services: services["companies"].find_by_id(company.id))
+
+
+def test_invoice_is_saved_with_its_items(run):
+    async def create(services):
+        company = await services["companies"].save(COMPANY)
+        user = await services["users"].save(
+            UserPostRequestModel(
+                first_name="Maria", last_name="Silva", username="maria"
+            )
+        )
+        saved = await services["invoices"].save(invoice(company.id, user.id))
+        product = await services["products"].save(
+            ProductPatchRequestModel(code="7891000100103", description="LEITE 1L")
+        )
+        item = await services["items"].save(
+            ItemPostRequestModel(
+                product_id=product.id,
+                invoice_id=saved.id,
+                quantity=2,
+                unit_price=4.5,
+                unity_of_measurement="UN",
+            )
+        )
+
+        return saved, product, item
+
+    saved, product, item = run(create)
+    full = run(lambda services: services["invoices"].find_full_by_id(saved.id))
+    by_company = run(
+        lambda services: services["invoices"].find_by_company(saved.company_id)
+    )
+
+    assert saved.access_key == "1" * 44
+    assert (item.product_id, item.invoice_id) == (product.id, saved.id)
+    assert item.product_description == "LEITE 1L"
+    assert full.company.name == "MERCADO"
+    assert full.user.username == "maria"
+    assert [(i.quantity, i.unit_price) for i in full.items] == [(2, 4.5)]
+    assert [model.id for model in by_company] == [saved.id]
+
+
+def test_item_is_updated(run):
+    async def create(services):
+        product = await services["products"].save(
+            ProductPatchRequestModel(code="1", description="ARROZ")
+        )
+        return await services["items"].save(
+            ItemPostRequestModel(
+                product_id=product.id,
+                invoice_id=1,
+                quantity=1,
+                unit_price=5.0,
+                unity_of_measurement="UN",
+            )
+        )
+
+    item = run(create)
+    run(
+        lambda services: services["items"].update(
+            item.id,
+            ItemPatchRequestModel(
+                quantity=3, unit_price=4.0, unity_of_measurement="KG"
+            ),
+        )
+    )
+
+    updated = run(lambda services: services["items"].find_by_id(item.id))
+    assert (updated.quantity, updated.unit_price, updated.unity_of_measurement) == (
+        3,
+        4.0,
+        "KG",
+    )
+
+
+def test_missing_entities_do_not_exist(run):
+    for name in ("companies", "invoices", "items", "products", "users"):
+        with pytest.raises(EntityNotExists):
+            run(lambda services: services[name].find_by_id(999))
+
+
+def test_dates_are_bound_without_time_zone(run):
+    # asyncpg refuses aware datetimes for the columns without time zone, the values
+    # are read before the dialect converts them
+    dates = []
+    event.listen(
+        run.engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, context, many: dates.extend(
+            value
+            for parameters in context.compiled_parameters
+            for value in parameters.values()
+            if isinstance(value, datetime)
+        ),
+    )
+
+    async def create(services):
+        company = await services["companies"].save(COMPANY)
+        user = await services["users"].save(
+            UserPostRequestModel(
+                first_name="Maria", last_name="Silva", username="maria"
+            )
+        )
+        return await services["invoices"].save(
+            invoice(company.id, user.id, timezone(timedelta(hours=-3)))
+        )
+
+    saved = run(create)
+    stored = run(lambda services: services["invoices"].find_by_id(saved.id))
+
+    assert dates and all(date.tzinfo is None for date in dates)
+    assert stored.issue_date == datetime(2024, 6, 1, 13)
+    assert stored.authorization_date == datetime(2024, 6, 1, 13, 5)
@@ -0,0 +1,203 @@
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import Session
+
+from database.schema import CompanySchema, ProductSchema, Schema
+from domain import Address, Company, Product
+from repositories.cache import (
+    CachedCompanyRepository,
+    CachedProductRepository,
+    LruCache,
+    on_commit,
+)
+from repositories.company import CompanyRepository
+from repositories.product import ProductRepository
+from services.exceptions import EntityNotExists
+from services.product import ProductService
+import pytest
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(CompanySchema(cnpj="12345678000100", name="MERCADO"))
+        session.add(ProductSchema(code="000000000000001", description="ARROZ"))
+        session.add(ProductSchema(code="000000000000002", description="FEIJAO"))
+        session.commit()
+
+        yield session
+
+
+@pytest.fixture
+def statements(session):
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    return statements
+
+
+def test_lru_cache_evicts_the_least_recently_used_entry():
+    cache = LruCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert cache.stats() == {
+        "size": 2,
+        "max_size": 2,
+        "hits": 3,
+        "misses": 1,
+        "evictions": 1,
+    }
+
+
+def test_lru_cache_expires_entries():
+    clock = Clock()
+    cache = LruCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 10
+    assert cache.get("a") == 1
+
+    clock.now = 10.5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_on_commit_runs_only_for_committed_transactions(session):
+    calls = []
+
+    session.scalars(select(ProductSchema)).all()
+    on_commit(session, lambda: calls.append("rolled back"))
+    session.rollback()
+    session.scalars(select(ProductSchema)).all()
+    on_commit(session, lambda: calls.append("committed"))
+    session.commit()
+    session.commit()
+
+    assert calls == ["committed"]
+
+
+def test_cached_company_is_read_once(session, statements):
+    repository = CachedCompanyRepository(session, LruCache())
+
+    first = repository.find_all(cnpj="12345678000100")
+    second = repository.find_all(cnpj="12345678000100")
+
+    assert first == second
+    assert first[0].name == "MERCADO"
+    assert len(statements) == 1
+    assert repository.find_by_id(first[0].id) is first[0]
+    assert len(statements) == 1
+
+
+def test_cached_company_upsert_skips_the_database(session, statements):
+    repository = CachedCompanyRepository(session, LruCache())
+    cached = repository.find_by_cnpj("12345678000100")
+    statements.clear()
+
+    company = repository.upsert(
+        Company(cnpj="12345678000100", name="MERCADO", address=Address())
+    )
+
+    assert company is cached
+    assert statements == []
+
+
+def test_cached_company_is_invalidated_on_update_and_delete(session):
+    cache = LruCache()
+    repository = CachedCompanyRepository(session, cache)
+    company = repository.find_by_cnpj("12345678000100")
+
+    company = Company(
+        id=company.id,
+        cnpj="98765432000100",
+        name="SUPERMERCADO",
+        address=Address(),
+        created_on=company.created_on,
+    )
+    repository.update(company.id, company)
+
+    assert repository.find_by_cnpj("12345678000100") is None
+    assert repository.find_by_id(company.id).name == "SUPERMERCADO"
+
+    repository.delete(company.id)
+
+    assert repository.find_by_id(company.id) is None
+    assert repository.find_by_cnpj("98765432000100") is None
+
+
+def test_cached_products_are_looked_up_by_key(session, statements):
+    repository = CachedProductRepository(session, LruCache())
+    keys = [("000000000000001", "ARROZ"), ("000000000000002", "FEIJAO")]
+
+    first = repository.find_all_by_keys(keys[:1])
+    statements.clear()
+    products = repository.find_all_by_keys(keys)
+
+    assert first[0] in products
+    assert {product.description for product in products} == {"ARROZ", "FEIJAO"}
+    # Only the product missing from the cache was queried
+    assert len(statements) == 1
+    assert repository.find_all_by_keys(keys[1:]) == products[1:]
+    assert len(statements) == 1
+
+
+def test_cached_products_by_code_are_invalidated_on_update(session):
+    repository = CachedProductRepository(session, LruCache())
+    product = repository.find_all(code="000000000000001")[0]
+
+    repository.update(
+        product.id, Product(code="000000000000001", description="ARROZ INTEGRAL")
+    )
+
+    assert [p.description for p in repository.find_all(code="000000000000001")] == [
+        "ARROZ INTEGRAL"
+    ]
+    assert repository.find_all_by_keys([("000000000000001", "ARROZ")]) == []
+
+
+def test_cached_products_by_unpadded_code_are_invalidated_on_save(session):
+    repository = CachedProductRepository(session, LruCache())
+    assert repository.find_all(code="3") == []
+
+    product = repository.save(Product(code="3", description="MACARRAO"))
+
+    assert repository.find_all(code="3") == [product]
+    assert repository.find_all(code="000000000000003") == [product]
+
+
+def test_cached_repositories_are_drop_in_replacements(session):
+    assert isinstance(CachedCompanyRepository(session, LruCache()), CompanyRepository)
+    assert isinstance(CachedProductRepository(session, LruCache()), ProductRepository)
+
+
+@pytest.mark.parametrize(
+    "repository",
+    [ProductRepository, lambda session: CachedProductRepository(session, LruCache())],
+    ids=["uncached", "cached"],
+)
+def test_products_are_found_by_code_with_or_without_the_cache(session, repository):
+    service = ProductService(repository(session))
+
+    assert service.find_by_code("2").description == "FEIJAO"
+    assert service.find_by_code("000000000000002").description == "FEIJAO"
+    with pytest.raises(EntityNotExists):
+        service.find_by_code("3")
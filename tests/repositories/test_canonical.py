@@ -0,0 +1,133 @@
+import asyncio
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from canonical import ProductRecord
+from database.schema import CanonicalProductSchema, ProductSchema, Schema
+from domain import Product
+from repositories import CanonicalProductRepository, ProductRepository
+from repositories.aio import AsyncProductRepository
+import pytest
+
+PRODUCTS = [
+    ("7891000100103", "LEITE UHT INTEGRAL 1L"),
+    ("0007891000100103", "LEITE PIRAC. 1L"),
+    ("123", "LEITE INT. UHT 1000ML"),
+    ("124", "LEITE UHT INTEGRAL 1L"),
+    ("55", "LEITE UHT INTEGRAL PIRACANJUBA 1L"),
+    ("66", "..."),
+]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            [
+                ProductSchema(id=id, code=code, description=description)
+                for id, (code, description) in enumerate(PRODUCTS, start=1)
+            ]
+        )
+        session.commit()
+
+        yield session
+
+
+def canonical_ids(session: Session) -> list[int | None]:
+    return list(
+        session.scalars(select(ProductSchema.canonical_id).order_by(ProductSchema.id))
+    )
+
+
+def test_assign_matches_the_gtin_or_the_words(session):
+    repository = CanonicalProductRepository(session)
+
+    assert repository.assign_pending(batch_size=2) == 5
+
+    ids = canonical_ids(session)
+    # The same GTIN, then the same words without a GTIN
+    assert ids[0] == ids[1]
+    assert ids[2] == ids[3] != ids[0]
+    assert ids[4] not in ids[:4]
+    # A description without words has no canonical product
+    assert ids[5] is None
+    assert session.scalar(select(CanonicalProductSchema.code).limit(1)) == (
+        "07891000100103"
+    )
+
+    # Products are assigned once, and saving them again changes nothing
+    assert repository.assign_pending() == 0
+    repository.assign([ProductRecord(3, "123", "LEITE UHT INTEGRAL PIRACANJUBA 1L")])
+    assert canonical_ids(session) == ids
+    assert len(session.scalars(select(CanonicalProductSchema)).all()) == 3
+
+
+def test_recluster_merges_similar_descriptions_and_keeps_the_ids(session):
+    repository = CanonicalProductRepository(session)
+    repository.assign_pending()
+    before = canonical_ids(session)
+
+    report = repository.recluster(threshold=0.8)
+    ids = canonical_ids(session)
+
+    assert (report.products, report.clusters) == (6, 1)
+    assert (report.created, report.deleted) == (0, 2)
+    assert ids[:5] == [before[0]] * 5
+    assert ids[5] is None
+
+    canonical = session.get(CanonicalProductSchema, before[0])
+    assert (canonical.code, canonical.key) == (
+        "07891000100103",
+        "1l integral leite uht",
+    )
+
+    # Nothing changes when clustering again
+    report = repository.recluster(threshold=0.8)
+    assert (report.created, report.deleted, report.remapped) == (0, 0, 0)
+    assert canonical_ids(session) == ids
+
+
+def test_recluster_splits_a_canonical_product(session):
+    repository = CanonicalProductRepository(session)
+    repository.assign_pending()
+    repository.recluster(threshold=0.8)
+
+    # Only the identical words are merged with a threshold of 1
+    report = repository.recluster(threshold=1.0)
+    ids = canonical_ids(session)
+
+    assert (report.clusters, report.created, report.remapped) == (2, 1, 1)
+    assert ids[0] == ids[1] == ids[2] == ids[3] != ids[4]
+
+
+def test_saved_product_is_assigned_at_once(session):
+    saved = ProductRepository(session).save(
+        Product(code="124", description="LEITE UHT INTEGRAL 1L")
+    )
+
+    assert session.get(ProductSchema, saved.id).canonical_id is not None
+
+
+def test_product_saved_by_the_api_is_assigned_at_once():
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async def save():
+        async with engine.begin() as connection:
+            await connection.run_sync(Schema.metadata.create_all)
+
+        async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+            saved = await AsyncProductRepository(session).save(
+                Product(code="7891000100103", description="LEITE UHT INTEGRAL 1L")
+            )
+            product = await session.get(ProductSchema, saved.id)
+
+        await engine.dispose()
+
+        return product.canonical_id
+
+    assert asyncio.run(save()) is not None
@@ -0,0 +1,66 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+
+from database.schema import (
+    CompanySchema,
+    InvoiceSchema,
+    ItemSchema,
+    ProductSchema,
+    Schema,
+    UserSchema,
+)
+from repositories import InvoiceRepository
+import pytest
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        company = CompanySchema(cnpj="12345678000100", name="MERCADO")
+        user = UserSchema(first_name="Maria", last_name="Silva", username="maria")
+        invoice = InvoiceSchema(access_key="1" * 44, company=company, user=user)
+        session.add(invoice)
+
+        for i in range(20):
+            product = ProductSchema(code=f"{i:0>13}", description=f"PRODUTO {i}")
+            invoice.items.append(
+                ItemSchema(product=product, quantity=2, unit_price=1.5)
+            )
+
+        session.commit()
+        session.expunge_all()
+
+        yield session
+
+
+def count_queries(session: Session) -> list[str]:
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    return statements
+
+
+def test_find_full_loads_the_aggregate_in_two_queries(session):
+    statements = count_queries(session)
+
+    invoice = InvoiceRepository(session).find_full(access_key="1" * 44)
+
+    assert invoice.company.name == "MERCADO"
+    assert invoice.user.username == "maria"
+    assert len(invoice.items) == 20
+    assert {item.product.description for item in invoice.items} == {
+        f"PRODUTO {i}" for i in range(20)
+    }
+    # Reading the aggregate did not lazy load anything
+    assert len(statements) == 2
+
+
+def test_find_full_returns_none_for_unknown_invoices(session):
+    assert InvoiceRepository(session).find_full(id=999) is None
@@ -0,0 +1,196 @@
+from datetime import timedelta
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from database.schema import JobSchema, Schema
+from domain import EletronicInvoice, Job, JobStatus
+from drivers.bots.worker import Worker, WorkerPool
+from repositories import JobRepository
+from repositories.job import utcnow
+from scrapers.interfaces import Scraper
+import pytest
+
+
+class FakeScraper(Scraper):
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.urls = []
+
+    def get(self, url: str):
+        self.urls.append(url)
+
+        if len(self.urls) <= self.failures:
+            raise ConnectionError("SEFAZ is down")
+
+        return {"url": url}
+
+    def fetch(self, url: str) -> str:
+        raise NotImplementedError
+
+    def wait_page_load(self) -> None:
+        pass
+
+
+class FakeBot:
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, text, **kwargs):
+        self.messages.append((chat_id, text))
+
+
+class SavingWorker(Worker):
+    def save(self, data):
+        return EletronicInvoice(id=None, access_key=data["url"], items=[])
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    return sessionmaker(engine)
+
+
+@pytest.fixture
+def repository(session_factory):
+    with session_factory() as session:
+        yield JobRepository(session)
+
+
+def make_due(session: Session) -> None:
+    session.execute(update(JobSchema).values(run_at=utcnow() - timedelta(seconds=1)))
+    session.commit()
+
+
+def test_claim_runs_each_job_once_in_order(repository):
+    repository.save_all([Job(chat_id=1, source=f"{i}") for i in range(3)])
+
+    first = repository.claim(limit=2)
+    second = repository.claim(limit=2)
+
+    assert [job.source for job in first] == ["0", "1"]
+    assert [job.source for job in second] == ["2"]
+    assert repository.claim() == []
+    assert {job.status for job in first + second} == {JobStatus.RUNNING}
+    assert {job.attempts for job in first + second} == {1}
+
+
+def test_failed_jobs_are_retried_with_backoff_and_then_dead(repository):
+    repository.save(Job(chat_id=1, source="url", max_attempts=2))
+
+    job = repository.fail(repository.claim()[0], "timeout", backoff=60)
+
+    assert job.status is JobStatus.PENDING
+    assert job.run_at > utcnow() + timedelta(seconds=50)
+    assert repository.claim() == []
+
+    make_due(repository.session)
+    job = repository.fail(repository.claim()[0], "timeout again", backoff=60)
+
+    assert job.status is JobStatus.DEAD
+    assert repository.find_by_id(job.id).last_error == "timeout again"
+    assert repository.retry_dead() == 1
+    assert repository.claim()[0].attempts == 1
+
+
+def test_abandoned_jobs_are_released(repository):
+    repository.save(Job(chat_id=1, source="url"))
+    job = repository.claim()[0]
+
+    assert repository.release_stale(timeout=60) == 0
+
+    repository.session.execute(
+        update(JobSchema).values(locked_at=utcnow() - timedelta(minutes=2))
+    )
+    assert repository.release_stale(timeout=60) == 1
+    assert repository.claim()[0].id == job.id
+
+
+def test_abandoned_jobs_without_attempts_left_are_dead(repository):
+    repository.save(Job(chat_id=1, source="url", max_attempts=1))
+    job = repository.claim()[0]
+    repository.session.execute(
+        update(JobSchema).values(locked_at=utcnow() - timedelta(minutes=2))
+    )
+
+    assert repository.release_stale(timeout=60) == 1
+    assert repository.claim() == []
+    assert repository.find_by_id(job.id).status is JobStatus.DEAD
+
+
+def test_worker_completes_jobs_and_replies(session_factory, repository):
+    bot, scraper = FakeBot(), FakeScraper()
+    worker = SavingWorker(bot, scraper, session_factory)
+    repository.save(Job(chat_id=7, source="https://nfce/1"))
+
+    worker.process(repository.claim()[0])
+
+    assert scraper.urls == ["https://nfce/1"]
+    assert repository.find_all()[0].status is JobStatus.DONE
+    assert bot.messages[0][0] == 7
+    assert "https://nfce/1" in bot.messages[0][1]
+
+
+def test_worker_tells_the_chat_once_the_job_is_dead(session_factory, repository):
+    bot, scraper = FakeBot(), FakeScraper(failures=2)
+    worker = SavingWorker(bot, scraper, session_factory, backoff=0)
+    repository.save(Job(chat_id=7, source="https://nfce/1", max_attempts=2))
+
+    worker.process(repository.claim()[0])
+    assert bot.messages == []
+
+    make_due(repository.session)
+    worker.process(repository.claim()[0])
+
+    job = repository.find_all()[0]
+    assert job.status is JobStatus.DEAD
+    assert "ConnectionError" in job.last_error
+    assert bot.messages == [(7, "Deu erro ao obter os dados da NFC-e https://nfce/1.")]
+
+
+def test_worker_fails_access_keys_without_an_url_template(session_factory, repository):
+    worker = SavingWorker(FakeBot(), FakeScraper(), session_factory)
+    repository.save(Job(chat_id=7, source="1" * 44, max_attempts=1))
+
+    worker.process(repository.claim()[0])
+
+    assert "No URL template" in repository.find_all()[0].last_error
+
+
+class FakeProcess:
+    def __init__(self, target, args, name, daemon):
+        self.name = name
+        self.alive = False
+        self.exitcode = None
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def join(self, timeout=None):
+        self.alive = False
+
+
+class FakeContext:
+    Process = FakeProcess
+
+
+def test_pool_starts_again_the_processes_that_died():
+    pool = WorkerPool(processes=2, refresh_interval=0, check_interval=60)
+    pool._context = FakeContext()
+    pool.start()
+    first, second = pool._workers
+    second.alive, second.exitcode = False, -9
+
+    assert pool.respawn() == 1
+    assert pool._workers[0] is first
+    assert pool._workers[1] is not second and pool._workers[1].is_alive()
+    assert pool._workers[1].name == "nfce-worker-1"
+
+    pool.stop()
+
+    assert pool.respawn() == 0
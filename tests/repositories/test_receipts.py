@@ -0,0 +1,172 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from database.schema import (
+    InvoiceSchema,
+    ItemSchema,
+    ProductSchema,
+    Schema,
+    UserSchema,
+)
+from drivers.rest.schemas.receipts import ReceiptModel
+from repositories.aio import AsyncReceiptRepository
+from services.mappers import to_receipt_entity
+import pytest
+
+
+def receipt(key: str, *codes: str):
+    return to_receipt_entity(
+        ReceiptModel.model_validate(
+            {
+                "invoice": {"access_key": key * 44, "number": "123", "series": "1"},
+                "company": {"name": "MERCADO", "cnpj": "12345678000100"},
+                "items": [
+                    {
+                        "code": code,
+                        "description": f"PRODUTO {code}",
+                        "quantity": 2,
+                        "unit_price": 5.5,
+                    }
+                    for code in codes
+                ],
+            }
+        )
+    )
+
+
+@pytest.fixture
+def run():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    loop = asyncio.new_event_loop()
+
+    async def setup():
+        async with engine.begin() as connection:
+            await connection.run_sync(Schema.metadata.create_all)
+
+    loop.run_until_complete(setup())
+
+    def run(call):
+        async def in_session():
+            async with AsyncSession(engine) as session:
+                return await call(session)
+
+        return loop.run_until_complete(in_session())
+
+    run.engine = engine
+    yield run
+
+    loop.run_until_complete(engine.dispose())
+    loop.close()
+
+
+async def stored_items(session: AsyncSession) -> set[tuple[str, str]]:
+    result = await session.execute(
+        select(InvoiceSchema.access_key, ProductSchema.description)
+        .join(ItemSchema, ItemSchema.invoice_id == InvoiceSchema.id)
+        .join(ProductSchema, ItemSchema.product_id == ProductSchema.id)
+    )
+
+    return {(key[0], description) for key, description in result}
+
+
+def test_upsert_all_tells_inserted_from_updated_invoices(run):
+    first = run(
+        lambda session: AsyncReceiptRepository(session).upsert_all(
+            [receipt("1", "A"), receipt("2", "A", "B")]
+        )
+    )
+    second = run(
+        lambda session: AsyncReceiptRepository(session).upsert_all(
+            [receipt("2", "B"), receipt("3", "C")]
+        )
+    )
+
+    assert first == [True, True]
+    assert second == [False, True]
+
+
+def test_upsert_all_fills_the_ids_and_reuses_products(run):
+    entities = [receipt("1", "A", "B"), receipt("2", "B")]
+
+    run(lambda session: AsyncReceiptRepository(session).upsert_all(entities))
+
+    products = {
+        item.product.code: item.product_id for e in entities for item in e.items
+    }
+    assert all(entity.id for entity in entities)
+    assert entities[0].items[1].product_id == entities[1].items[0].product_id
+    assert len(set(products.values())) == 2
+
+
+def test_upsert_all_deletes_the_items_not_sent_again(run):
+    # The API requires items, other callers may update an invoice without any
+    emptied = receipt("2", "A")
+    emptied.items = []
+
+    run(
+        lambda session: AsyncReceiptRepository(session).upsert_all(
+            [receipt("1", "A", "B"), receipt("2", "A", "C")]
+        )
+    )
+    run(
+        lambda session: AsyncReceiptRepository(session).upsert_all(
+            [receipt("1", "B"), emptied]
+        )
+    )
+
+    assert run(stored_items) == {("1", "PRODUTO B")}
+
+
+def test_upsert_all_binds_the_dates_without_time_zone(run):
+    dates = []
+    event.listen(
+        run.engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, context, many: dates.extend(
+            value
+            for parameters in context.compiled_parameters
+            for value in parameters.values()
+            if isinstance(value, datetime)
+        ),
+    )
+    entity = receipt("1", "A")
+    entity.issue_date = datetime(2024, 6, 1, 10, tzinfo=timezone(timedelta(hours=-3)))
+
+    run(lambda session: AsyncReceiptRepository(session).upsert_all([entity]))
+
+    assert datetime(2024, 6, 1, 13) in dates
+    assert all(date.tzinfo is None for date in dates)
+
+
+def test_upsert_all_reuses_the_products_of_the_scraped_invoices(run):
+    async def scraped(session):
+        # Stored as the scraper pads the codes of the pages
+        session.add(ProductSchema(code="007891000100103", description="PRODUTO X"))
+        await session.commit()
+
+    run(scraped)
+    entity = receipt("1", "7891000100103")
+    entity.items[0].product.description = "PRODUTO X"
+
+    run(lambda session: AsyncReceiptRepository(session).upsert_all([entity]))
+
+    codes = run(lambda session: session.scalars(select(ProductSchema.code)))
+    assert codes.all() == ["007891000100103"]
+
+
+def test_find_user_ids_returns_the_existing_ones(run):
+    async def add_user(session):
+        session.add(UserSchema(id=1, username="maria"))
+        await session.commit()
+
+    run(add_user)
+
+    assert run(
+        lambda session: AsyncReceiptRepository(session).find_user_ids({1, 2})
+    ) == {1}
+    assert run(
+        lambda session: AsyncReceiptRepository(session).find_user_ids(set())
+    ) == (set())
@@ -0,0 +1,108 @@
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database.schema import InvoiceSchema, ItemSchema, ProductSchema, Schema
+from domain import Item, Product
+from drivers.rest.schemas.products import ProductModel
+from repositories import ItemRepository, ProductRepository
+from services.exceptions import EntityAlreadyExists, EntityInvalid, from_integrity_error
+from services.product import ProductService
+import pytest
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        session.add(ProductSchema(id=1, code="000000000000001", description="ARROZ"))
+        session.add(InvoiceSchema(id=1, access_key="1" * 44))
+        session.commit()
+
+        yield session
+
+
+def capture(session: Session) -> list[tuple[str, tuple]]:
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, parameters, *args: statements.append(
+            (statement, parameters)
+        ),
+    )
+
+    return statements
+
+
+def test_product_upsert_reads_existing_rows_without_updating_them(session):
+    statements = capture(session)
+
+    products = ProductRepository(session).upsert_all(
+        [
+            Product(code="2", description="FEIJAO"),
+            Product(code="1", description="ARROZ"),
+        ]
+    )
+
+    assert {(product.code, product.description): product.id for product in products}[
+        ("000000000000001", "ARROZ")
+    ] == 1
+    assert len(products) == 2
+    assert not any(statement.startswith("UPDATE") for statement, _ in statements)
+    # The rows are sent sorted by (code, description)
+    assert statements[0][1][0] == "000000000000001"
+
+
+def test_item_upsert_sorts_the_rows_and_updates_the_existing_ones(session):
+    session.add_all(
+        [ProductSchema(id=id, code=str(id), description="P") for id in (2, 3)]
+    )
+    session.commit()
+    repository = ItemRepository(session)
+    repository.upsert_all([Item(invoice_id=1, product_id=3, quantity=1)])
+    statements = capture(session)
+
+    repository.upsert_all(
+        [
+            Item(invoice_id=1, product_id=id, quantity=id, unit_price=1.0)
+            for id in (3, 1, 2)
+        ]
+    )
+
+    statement, parameters = statements[0]
+    assert statement.startswith("INSERT INTO itens_nota (id_produto,")
+    assert parameters[::6] == (1, 2, 3)
+    quantities = dict(
+        session.execute(select(ItemSchema.product_id, ItemSchema.quantity)).all()
+    )
+    assert quantities == {1: 1.0, 2: 2.0, 3: 3.0}
+
+
+def test_only_unique_violations_mean_the_entity_exists(session):
+    service = ProductService(ProductRepository(session))
+
+    with pytest.raises(EntityAlreadyExists):
+        service.save(ProductModel(id=0, code="1", description="ARROZ"))
+
+
+class DatabaseError(Exception):
+    def __init__(self, pgcode: str):
+        self.pgcode = pgcode
+
+
+@pytest.mark.parametrize(
+    "pgcode, exception",
+    [
+        ("23505", EntityAlreadyExists),
+        # Foreign key and not null violations
+        ("23503", EntityInvalid),
+        ("23502", EntityInvalid),
+    ],
+)
+def test_integrity_errors_by_sqlstate(pgcode, exception):
+    error = IntegrityError("INSERT", {}, DatabaseError(pgcode))
+
+    assert type(from_integrity_error("Produto", error)) is exception
@@ -0,0 +1,132 @@
+import io
+import sys
+import threading
+import time
+
+import requests
+
+from scrapers import batch
+from scrapers.batch import BatchScraper, is_retryable
+from scrapers.exceptions import TimeoutException
+from scrapers.interfaces import Scraper
+
+
+class FakeScraper(Scraper):
+    def __init__(self, delays=None, errors=None):
+        self.delays = delays or {}
+        self.errors = errors or {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        with self.lock:
+            self.calls.append((url, time.monotonic()))
+            errors = self.errors.get(url)
+            error = errors.pop(0) if errors else None
+
+        time.sleep(self.delays.get(url, 0))
+
+        if error:
+            raise error
+
+        return {"url": url}
+
+    def fetch(self, url):
+        raise NotImplementedError
+
+    def wait_page_load(self):
+        pass
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+def test_results_are_yielded_in_completion_order():
+    urls = [f"https://sefaz.example/{index}" for index in range(4)]
+    scraper = FakeScraper(delays={urls[0]: 0.3, urls[1]: 0.2})
+    batch_scraper = BatchScraper(scraper, concurrency=4, per_host=4, rate=0)
+
+    results = batch_scraper.scrape_all(iter(urls))
+
+    assert [result.source for result in results] == [urls[2], urls[3], urls[1], urls[0]]
+    assert all(result.ok and result.attempts == 1 for result in results)
+
+
+def test_requests_are_rate_limited():
+    urls = [f"https://sefaz.example/{index}" for index in range(5)]
+    scraper = FakeScraper()
+    batch_scraper = BatchScraper(scraper, concurrency=5, per_host=1, rate=20)
+
+    batch_scraper.scrape_all(urls)
+
+    started = sorted(at for _, at in scraper.calls)
+    assert started[-1] - started[0] >= 4 / 20 * 0.9
+
+
+def test_transient_errors_are_retried_with_backoff():
+    url = "https://sefaz.example/1"
+    scraper = FakeScraper(
+        errors={url: [TimeoutException(5), http_error(503), requests.ConnectionError()]}
+    )
+    batch_scraper = BatchScraper(scraper, rate=0, retries=3, backoff=0.01)
+
+    [result] = batch_scraper.scrape_all([url])
+
+    assert isinstance(result.error, requests.ConnectionError)
+    assert result.attempts == 3
+    assert len(scraper.calls) == 3
+
+
+def test_invoice_is_returned_when_a_retry_succeeds():
+    url = "https://sefaz.example/1"
+    scraper = FakeScraper(errors={url: [http_error(429)]})
+    batch_scraper = BatchScraper(scraper, rate=0, retries=3, backoff=0.01)
+
+    [result] = batch_scraper.scrape_all([url])
+
+    assert result.ok
+    assert result.data == {"url": url}
+    assert result.attempts == 2
+
+
+def test_parse_and_client_errors_are_not_retried():
+    parse_error, not_found = "https://sefaz.example/1", "https://sefaz.example/2"
+    scraper = FakeScraper(
+        errors={
+            parse_error: [AttributeError("tabResult")],
+            not_found: [http_error(404)],
+        }
+    )
+    batch_scraper = BatchScraper(scraper, rate=0, retries=3, backoff=0.01)
+
+    results = {
+        result.source: result
+        for result in batch_scraper.scrape_all([parse_error, not_found])
+    }
+
+    assert isinstance(results[parse_error].error, AttributeError)
+    assert results[parse_error].attempts == 1
+    assert results[not_found].attempts == 1
+    assert len(scraper.calls) == 2
+
+
+def test_retryable_errors():
+    assert is_retryable(TimeoutException(5))
+    assert is_retryable(requests.ConnectionError())
+    assert is_retryable(http_error(502))
+    assert not is_retryable(http_error(400))
+    assert not is_retryable(ValueError("not a NFC-e"))
+
+
+def test_reading_stdin_leaves_it_open(monkeypatch):
+    stdin = io.StringIO("https://sefaz.example/1\n\nhttps://sefaz.example/2\n")
+    monkeypatch.setattr(sys, "stdin", stdin)
+
+    assert list(batch._read_sources(["-"])) == [
+        "https://sefaz.example/1",
+        "https://sefaz.example/2",
+    ]
+    assert not stdin.closed
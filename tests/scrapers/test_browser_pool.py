@@ -0,0 +1,81 @@
+from selenium.common.exceptions import WebDriverException
+from src.scrapers.browsers import BrowserPool
+from src.scrapers.exceptions import BrowserPoolExhaustedException
+import pytest
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.quitted = False
+        self.cookies_deleted = 0
+        self.current_url = "about:blank"
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_script(self, script):
+        pass
+
+    def delete_all_cookies(self):
+        self.cookies_deleted += 1
+
+    def quit(self):
+        self.quitted = True
+
+
+def test_browser_is_reused_and_reset_between_borrowers():
+    pool = BrowserPool(size=1, factory=FakeBrowser)
+
+    with pool.browser() as first:
+        first.get("http://example.com")
+
+    with pool.browser() as second:
+        assert second is first
+        assert second.current_url == "about:blank"
+        assert second.cookies_deleted == 1
+
+
+def test_browser_is_recycled_after_max_pages():
+    pool = BrowserPool(size=1, max_pages=2, factory=FakeBrowser)
+
+    with pool.browser() as first:
+        pass
+    with pool.browser() as second:
+        assert second is first
+
+    with pool.browser() as third:
+        assert third is not first
+
+    assert first.quitted
+
+
+def test_browser_is_discarded_when_it_crashes():
+    pool = BrowserPool(size=1, factory=FakeBrowser)
+
+    with pytest.raises(WebDriverException):
+        with pool.browser() as crashed:
+            raise WebDriverException("browser crashed")
+
+    with pool.browser() as browser:
+        assert browser is not crashed
+
+    assert crashed.quitted
+
+
+def test_borrow_times_out_when_pool_is_exhausted():
+    pool = BrowserPool(size=1, timeout=0.01, factory=FakeBrowser)
+
+    with pool.browser():
+        with pytest.raises(BrowserPoolExhaustedException):
+            pool.acquire()
+
+
+def test_close_quits_idle_browsers():
+    pool = BrowserPool(size=2, factory=FakeBrowser)
+
+    with pool.browser() as browser:
+        pass
+
+    pool.close()
+
+    assert browser.quitted
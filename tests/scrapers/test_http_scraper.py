@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import pytest
+import requests
+
+from scrapers import scrapers
+from scrapers.exceptions import TimeoutException
+from scrapers.parsers import NfceParser
+from scrapers.scrapers import HttpNfceScraper
+
+EXAMPLE = Path(__file__).parents[2] / "examples" / "data.html"
+URL = "https://nfce.sefaz.example/qrcode?p=1"
+
+
+def response(content: bytes, content_type: str = "text/html") -> requests.Response:
+    result = requests.Response()
+    result.status_code = 200
+    result.url = URL
+    result._content = content
+    result.headers["Content-Type"] = content_type
+
+    return result
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, timeout=None):
+        self.calls.append((url, timeout))
+        result = self.responses.pop(0)
+
+        if isinstance(result, Exception):
+            raise result
+
+        return result
+
+
+class FakeNfceScraper:
+    created = []
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.urls = []
+        FakeNfceScraper.created.append(self)
+
+    def fetch(self, url):
+        self.urls.append(url)
+        return "<div id='tabResult'>rendered</div>"
+
+
+@pytest.fixture
+def browser_scraper(monkeypatch):
+    FakeNfceScraper.created = []
+    monkeypatch.setattr(scrapers, "NfceScraper", FakeNfceScraper)
+    monkeypatch.setattr(scrapers, "get_browser_pool", lambda: "pool")
+
+    return FakeNfceScraper
+
+
+def test_server_rendered_page_is_scraped_without_a_browser(browser_scraper):
+    session = FakeSession(response(EXAMPLE.read_bytes(), "text/html; charset=utf-8"))
+    scraper = HttpNfceScraper(session=session, timeout=7)
+
+    data = scraper.get(URL)
+
+    assert data == NfceParser().parse(NfceParser().load(EXAMPLE.read_text("utf-8")))
+    assert session.calls == [(URL, 7)]
+    assert browser_scraper.created == []
+
+
+def test_charset_is_read_from_the_meta_tag():
+    page = '<meta charset="iso-8859-1"><div id="tabResult">AÇÚCAR</div>'
+    session = FakeSession(response(page.encode("iso-8859-1")))
+
+    assert "AÇÚCAR" in HttpNfceScraper(session=session).fetch(URL)
+
+
+def test_charset_defaults_to_utf8():
+    page = '<div id="tabResult">AÇÚCAR</div>'
+    session = FakeSession(response(page.encode("utf-8")))
+
+    assert "AÇÚCAR" in HttpNfceScraper(session=session).fetch(URL)
+
+
+def test_javascript_page_switches_lazily_to_the_browser(browser_scraper):
+    session = FakeSession(
+        response(b"<div id='tabResult'></div>"),
+        response(b"<div id='loading'></div>"),
+        response(b"<div id='loading'></div>"),
+    )
+    scraper = HttpNfceScraper(session=session)
+
+    scraper.fetch(URL)
+    assert browser_scraper.created == []
+
+    assert scraper.fetch(URL) == "<div id='tabResult'>rendered</div>"
+    scraper.fetch(URL)
+
+    [fallback] = browser_scraper.created
+    assert fallback.kwargs["pool"] == "pool"
+    assert fallback.urls == [URL, URL]
+
+
+def test_timeout_is_raised_as_a_scraper_timeout():
+    session = FakeSession(requests.Timeout())
+
+    with pytest.raises(TimeoutException):
+        HttpNfceScraper(session=session, timeout=3).fetch(URL)
@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+
+from scrapers.cache import encode_datetime
+from scrapers.database import dict_to_entity
+from scrapers.loader import (
+    INVOICE_COLUMNS,
+    ITEM_COLUMNS,
+    MERGE_STATEMENTS,
+    CopyLoader,
+    read_records,
+    write_rows,
+)
+from scrapers.parsers import StreamingNfceParser
+from tests.scrapers.test_parsers import example_with_infos
+import pytest
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, statement):
+        if self.connection.fail and statement in MERGE_STATEMENTS:
+            raise RuntimeError("deadlock detected")
+
+        self.connection.statements.append(statement)
+
+    def copy_expert(self, statement, file):
+        table = statement.split()[1]
+        self.connection.copied.setdefault(table, []).extend(csv.reader(file))
+
+
+class FakeConnection:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.statements = []
+        self.copied = {}
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture(scope="module")
+def data():
+    parser = StreamingNfceParser()
+
+    return parser.parse(parser.load(example_with_infos()))
+
+
+def with_key(data: dict, key: str) -> dict:
+    return {**data, "informacoes": {**data["informacoes"], "chave_acesso": key}}
+
+
+def test_write_rows_merges_the_items_of_a_product(data):
+    entity = dict_to_entity(data)
+    entity.items.append(entity.items[0])
+    invoices, items = io.StringIO(), io.StringIO()
+
+    count = write_rows([entity], invoices, items)
+    invoice_rows, item_rows = list(csv.reader(invoices)), list(csv.reader(items))
+
+    assert count == len(item_rows) == len(dict_to_entity(data).items)
+    assert len(invoice_rows[0]) == len(INVOICE_COLUMNS)
+    assert len(item_rows[0]) == len(ITEM_COLUMNS)
+    assert invoice_rows[0][1] == entity.access_key
+    # Timestamps converted to the time zone of the database, as the ORM stores them
+    assert invoice_rows[0][4] == "2024-02-01 13:11:12"
+    assert float(item_rows[0][3]) == entity.items[0].quantity
+
+
+def test_read_records_from_json_and_ndjson(tmp_path, data):
+    lines = [
+        json.dumps(with_key(data, str(i)), default=encode_datetime) for i in (1, 2)
+    ]
+    (tmp_path / "dump.ndjson").write_text("\n".join(lines) + "\n\n")
+    (tmp_path / "dump.json").write_text(
+        json.dumps([with_key(data, "3")], default=encode_datetime)
+    )
+
+    records = list(
+        read_records([str(tmp_path / "dump.ndjson"), str(tmp_path / "dump.json")])
+    )
+
+    assert [record["informacoes"]["chave_acesso"] for record in records] == [
+        "1",
+        "2",
+        "3",
+    ]
+    assert (
+        records[0]["informacoes"]["data_emissao"] == data["informacoes"]["data_emissao"]
+    )
+
+
+def test_loader_copies_and_merges_each_batch(data):
+    connection = FakeConnection()
+    records = [with_key(data, "1"), {"itens": {}}, with_key(data, "1")]
+    records.append(with_key(data, "2"))
+
+    report = CopyLoader(connection, batch_size=3).load(records)
+
+    assert (report.invoices, report.failed, report.batches) == (2, 1, 2)
+    assert [row[1] for row in connection.copied["carga_notas"]] == ["1", "2"]
+    assert connection.statements.count(MERGE_STATEMENTS[-1]) == 2
+    # The staging tables are created once, then a commit per batch
+    assert connection.commits == 3
+    assert report.rows_per_second > 0
+
+
+def test_loader_rolls_back_a_failed_batch(data):
+    connection = FakeConnection(fail=True)
+
+    with pytest.raises(RuntimeError):
+        CopyLoader(connection).load([with_key(data, "1")])
+
+    assert connection.rollbacks == 1
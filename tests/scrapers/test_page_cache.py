@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+import os
+from pathlib import Path
+
+from scrapers.cache import CachedScraper, PageCache
+from scrapers.interfaces import Scraper
+from scrapers.parsers import NfceParser
+import pytest
+
+EXAMPLE = Path(__file__).parents[2] / "examples" / "data.html"
+KEY = "32240612345678000000650010000001231000001234"
+URL = f"https://nfce.sefaz.es.gov.br/qrcode?p={KEY}|2|1|1|ABCDEF"
+
+
+class FakeScraper(Scraper):
+    def __init__(self, source: str):
+        self.source = source
+        self.fetched = []
+
+    def get(self, url: str):
+        raise AssertionError("The cached scraper must only fetch pages")
+
+    def fetch(self, url: str) -> str:
+        self.fetched.append(url)
+        return self.source
+
+    def wait_page_load(self) -> None:
+        pass
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PageCache(tmp_path)
+
+
+def test_page_cache_round_trips_pages_and_data(cache):
+    issued_at = datetime(2024, 2, 1, 10, 11, 12, tzinfo=timezone(timedelta(hours=-3)))
+    data = {"informacoes": {"data_emissao": issued_at}, "itens": {"1": {"x": 1.0}}}
+
+    cache.set_page(KEY, "<html>página</html>")
+    cache.set_data(KEY, 1, data)
+
+    assert cache.get_page(KEY) == "<html>página</html>"
+    assert cache.get_data(KEY, 1) == data
+    assert cache.get_data(KEY, 2) is None
+    assert list(cache.pages()) == [(KEY, "<html>página</html>")]
+    assert PageCache(cache.directory).size == cache.size > 0
+
+
+def test_page_cache_evicts_the_least_recently_used_files(cache):
+    keys = [f"{i:0>44}" for i in range(3)]
+
+    for at, key in enumerate(keys[:2]):
+        cache.set_page(key, os.urandom(500).hex())
+        os.utime(cache._path(key, ".html.gz"), (at, at))
+
+    # The oldest file is used again, so the second one is the least recently used
+    cache.get_page(keys[0])
+    # Two of the files fit in the cache, three do not
+    cache.max_bytes = int(cache.size * 1.2 / 0.9)
+    cache.set_page(keys[2], os.urandom(500).hex())
+
+    assert cache.get_page(keys[1]) is None
+    assert cache.get_page(keys[0]) is not None
+    assert cache.get_page(keys[2]) is not None
+    assert cache.size <= cache.max_bytes * 0.9
+
+
+def test_page_cache_drops_corrupted_files(cache):
+    cache.set_page(KEY, "<html></html>")
+    cache._path(KEY, ".html.gz").write_bytes(b"not gzip")
+
+    assert cache.get_page(KEY) is None
+    assert not cache._path(KEY, ".html.gz").exists()
+
+
+def test_cached_scraper_scrapes_each_access_key_once(cache):
+    scraper = FakeScraper(EXAMPLE.read_text(encoding="utf-8"))
+    cached_scraper = CachedScraper(scraper, cache, NfceParser())
+
+    first = cached_scraper.get(URL)
+    second = cached_scraper.get(f"  {KEY} ")
+
+    assert first == second
+    assert len(first["itens"]) > 0
+    assert scraper.fetched == [URL]
+    assert cached_scraper.fetch(URL) == scraper.source
+
+
+def test_cached_scraper_parses_archived_pages_after_the_parser_changes(cache):
+    scraper = FakeScraper(EXAMPLE.read_text(encoding="utf-8"))
+    CachedScraper(scraper, cache, NfceParser()).get(URL)
+
+    class NewParser(NfceParser):
+        VERSION = NfceParser.VERSION + 1
+
+    data = CachedScraper(scraper, cache, NewParser()).get(URL)
+
+    assert len(data["itens"]) > 0
+    assert len(scraper.fetched) == 1
+    assert cache.get_data(KEY, NewParser.VERSION) == data
+
+
+def test_cached_scraper_does_not_cache_pages_without_items(cache):
+    scraper = FakeScraper("<html>Nota fiscal não encontrada</html>")
+    cached_scraper = CachedScraper(scraper, cache, NfceParser())
+
+    cached_scraper.get(URL)
+    cached_scraper.get(URL)
+
+    assert len(scraper.fetched) == 2
+    assert cache.get_page(KEY) is None
+
+
+def test_page_caches_sharing_a_directory_keep_it_under_the_limit(tmp_path):
+    caches = [PageCache(tmp_path, max_bytes=20_000) for _ in range(4)]
+
+    for i in range(120):
+        caches[i % 4].set_page(f"{i:0>44}", os.urandom(500).hex())
+
+    size = sum(path.stat().st_size for path in tmp_path.glob("*/*.gz"))
+
+    # Each cache may be behind the others by 10% of the limit
+    assert size <= 20_000 * 1.4
@@ -0,0 +1,85 @@
+from pathlib import Path
+from timeit import timeit
+
+from bs4 import BeautifulSoup
+from src.scrapers.parsers import NfceParser, StreamingNfceParser
+import pytest
+
+EXAMPLE = Path(__file__).parents[2] / "examples" / "data.html"
+
+INFOS = """
+<div data-role="collapsible-set" id="infos">
+    <div data-role="collapsible"><h4>Informações gerais da Nota</h4>
+        <ul data-role="listview" class="ui-listview">
+            <li>
+                <strong>Número: </strong>000123
+                <strong>Série: </strong>001
+                <strong>Emissão: </strong>01/02/2024 10:11:12-03:00
+ - Via Consumidor
+                <br><br>
+                <strong>Protocolo de Autorização: </strong>332240000123456 às 01/02/2024 10:11:13-03:00
+            </li>
+        </ul>
+    </div>
+    <div data-role="collapsible"><h4>Chave de acesso</h4>
+        <ul><li><span class="chave">3224 0612 3456 7800 0000 6500 1000 0001 2310 0000 1234</span></li></ul>
+    </div>
+    <div data-role="collapsible"><h4>Consumidor</h4>
+        <ul><li>Trib aprox: R$ 10,50 Fed R$ 8,20 Est R$ 0,00 Mun Fonte: IBPT</li></ul>
+    </div>
+    <div><span>Outras informações</span></div>
+    <div></div>
+</div>
+"""
+
+
+def example_with_infos() -> str:
+    html = EXAMPLE.read_text(encoding="utf-8")
+    end_of_content = html.index('<div class="txtRight" id="totalNota">')
+
+    return html[:end_of_content] + INFOS + html[end_of_content:]
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        EXAMPLE.read_text(encoding="utf-8"),
+        example_with_infos(),
+        "",
+        "<div id='conteudo'><div class='text'>CNPJ: 1</div></div>",
+    ],
+)
+def test_streaming_parser_matches_nfce_parser(html):
+    expected = NfceParser().parse(BeautifulSoup(html, "html.parser"))
+
+    assert StreamingNfceParser().parse(html) == expected
+
+
+def test_streaming_parser_reads_invoice_information():
+    data = StreamingNfceParser().parse(example_with_infos())
+
+    assert data["informacoes"]["numero"] == "000123"
+    assert data["informacoes"]["protocolo_autorizacao"] == "332240000123456"
+    assert data["tributos"] == {
+        "federal": 10.5,
+        "estadual": 8.2,
+        "municipal": 0.0,
+        "fonte": "IBPT",
+    }
+    assert len(data["itens"]) == 4
+
+
+@pytest.mark.benchmark
+def test_streaming_parser_is_faster_than_tree_parsing():
+    html = EXAMPLE.read_text(encoding="utf-8")
+    parser, streaming_parser = NfceParser(), StreamingNfceParser()
+
+    tree = timeit(lambda: parser.parse(parser.load(html)), number=50)
+    streaming = timeit(
+        lambda: streaming_parser.parse(streaming_parser.load(html)), number=50
+    )
+
+    print(
+        f"\nNfceParser: {tree * 20:.2f}ms StreamingNfceParser: {streaming * 20:.2f}ms"
+    )
+    assert streaming < tree
@@ -0,0 +1,79 @@
+from pathlib import Path
+import random
+import threading
+import time
+
+from scrapers.interfaces import Scraper
+from scrapers.parsers import NfceParser, StreamingNfceParser
+from scrapers.pipeline import ScrapingPipeline
+
+EXAMPLE = Path(__file__).parents[2] / "examples" / "data.html"
+
+
+class FakeScraper(Scraper):
+    def __init__(self, source: str):
+        self.source = source
+        self.fetched = 0
+        self.lock = threading.Lock()
+
+    def get(self, url: str):
+        raise AssertionError("The pipeline must only fetch pages")
+
+    def fetch(self, url: str) -> str:
+        time.sleep(random.uniform(0, 0.01))
+
+        with self.lock:
+            self.fetched += 1
+
+        if "error" in url:
+            raise ConnectionError(url)
+
+        return self.source.replace("ESTABELECIMENTO", url)
+
+    def wait_page_load(self) -> None:
+        pass
+
+
+def test_pipeline_delivers_results_in_input_order():
+    scraper = FakeScraper(EXAMPLE.read_text(encoding="utf-8"))
+    urls = [f"https://nfce/{i}" for i in range(20)]
+    urls[7] = "https://nfce/error"
+    pipeline = ScrapingPipeline(scraper, NfceParser(), fetchers=4, workers=2)
+
+    results = pipeline.scrape_all(urls)
+
+    assert [result.url for result in results] == urls
+    assert isinstance(results[7].error, ConnectionError)
+    assert [
+        result.data["empresa"]["razao_social"] for result in results if result.ok
+    ] == [url.upper() for url in urls if url != "https://nfce/error"]
+
+
+def test_pipeline_bounds_the_pages_fetched_ahead():
+    scraper = FakeScraper(EXAMPLE.read_text(encoding="utf-8"))
+    pipeline = ScrapingPipeline(
+        scraper, StreamingNfceParser(), fetchers=4, workers=1, window=3
+    )
+    ahead = []
+
+    for delivered, result in enumerate(
+        pipeline.scrape(f"https://nfce/{i}" for i in range(12)), start=1
+    ):
+        time.sleep(0.02)
+        ahead.append(scraper.fetched - delivered)
+        assert result.ok
+
+    assert max(ahead) <= 3
+    assert scraper.fetched == 12
+
+
+def test_pipeline_stops_fetching_when_the_consumer_stops():
+    scraper = FakeScraper(EXAMPLE.read_text(encoding="utf-8"))
+    pipeline = ScrapingPipeline(scraper, StreamingNfceParser(), workers=1, window=2)
+
+    results = pipeline.scrape(f"https://nfce/{i}" for i in range(100))
+    next(results)
+    results.close()
+    time.sleep(0.05)
+
+    assert scraper.fetched < 10
@@ -0,0 +1,163 @@
+import gzip
+import tarfile
+import zipfile
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from database.schema import (
+    CompanySchema,
+    InvoiceSchema,
+    ItemSchema,
+    ProductSchema,
+    Schema,
+)
+from scrapers.database import dict_to_entity, merge_items
+from scrapers.utils import to_database_time
+from scrapers.reparse import ParsedPage, Reparser, diff_invoice, parse_pages, read_pages
+from tests.scrapers.test_parsers import example_with_infos
+import pytest
+
+KEY = "32240612345678000000650010000001231000001234"
+
+
+@pytest.fixture(scope="module")
+def data():
+    page = next(parse_pages([("example.html", example_with_infos().encode())], 1))
+
+    return page.data
+
+
+@pytest.fixture
+def session(data):
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+    entity = dict_to_entity(data)
+
+    with Session(engine) as session:
+        invoice = InvoiceSchema(
+            access_key=KEY,
+            number=entity.number,
+            series=entity.series,
+            # Stored before the parser read the time of the issue
+            issue_date=datetime(2024, 2, 1),
+            authorization_protocol=entity.authorization_protocol,
+            # As Postgres stores the aware datetimes saved by the ORM
+            authorization_date=to_database_time(entity.authorization_date),
+            federal_tax=entity.taxes.federal,
+            state_tax=entity.taxes.state,
+            city_tax=entity.taxes.municipal,
+            source=entity.taxes.source,
+            company=CompanySchema(cnpj=entity.company.cnpj, name=entity.company.name),
+        )
+        session.add(invoice)
+
+        for item in merge_items(entity.items):
+            product = ProductSchema(
+                code=item.product.code, description=item.product.description
+            )
+            invoice.items.append(
+                ItemSchema(
+                    product=product,
+                    quantity=item.quantity,
+                    unit_price=item.unit_price,
+                    unity_of_measurement=item.unity_of_measurement,
+                )
+            )
+
+        session.commit()
+
+        yield session
+
+
+def test_read_pages_from_directories_and_archives(tmp_path):
+    (tmp_path / "pages" / "3224").mkdir(parents=True)
+    (tmp_path / "pages" / "a.html").write_bytes(b"a")
+    (tmp_path / "pages" / "3224" / "b.html.gz").write_bytes(gzip.compress(b"b"))
+    (tmp_path / "pages" / "notes.txt").write_bytes(b"ignored")
+
+    with tarfile.open(tmp_path / "pages.tar.gz", "w:gz") as archive:
+        archive.add(tmp_path / "pages" / "a.html", "c.html")
+
+    with zipfile.ZipFile(tmp_path / "pages.zip", "w") as archive:
+        archive.writestr("d.htm", b"d")
+
+    pages = read_pages(
+        [tmp_path / "pages", tmp_path / "pages.tar.gz", tmp_path / "pages.zip"]
+    )
+
+    assert [content for _, content in pages] == [b"b", b"a", b"a", b"d"]
+
+
+def test_parse_pages_keeps_the_order_and_reports_errors(data):
+    pages = [(f"{i}.html", example_with_infos().encode()) for i in range(5)]
+    pages.insert(2, ("broken.html", None))
+
+    parsed = list(parse_pages(pages, workers=2, chunk_size=2))
+
+    assert [page.source for page in parsed] == [source for source, _ in pages]
+    assert not parsed[2].ok
+    assert all(page.data == data for page in parsed if page.source != "broken.html")
+
+
+def test_parse_pages_reads_the_pages_lazily():
+    read = []
+
+    def pages():
+        for i in range(10):
+            read.append(i)
+            yield f"{i}.html", b""
+
+    parsed = parse_pages(pages(), workers=1, chunk_size=1, window=2)
+    next(parsed)
+
+    assert len(read) == 2
+    parsed.close()
+
+
+def test_diff_invoice_lists_the_changed_fields(data):
+    stored, parsed = dict_to_entity(data), dict_to_entity(data)
+    parsed.items = merge_items(parsed.items)
+    stored.items = merge_items(stored.items)
+
+    assert diff_invoice(parsed, stored) == []
+
+    stored.number = "1"
+    stored.taxes.federal += 1
+    stored.items[0].quantity += 1
+
+    assert diff_invoice(parsed, stored) == ["number", "taxes.federal", "items"]
+
+
+def test_reparser_reports_corrections_in_dry_run(session, data):
+    pages = parse_pages([("example.html", example_with_infos().encode())], 1)
+
+    report = Reparser(session).run(pages, dry_run=True)
+
+    assert (report.parsed, report.corrected, report.missing) == (1, 1, 0)
+    assert report.changes == {"issue_date": 1}
+
+
+def test_reparser_counts_missing_and_unparsable_invoices(session, data):
+    other = {**data, "informacoes": {**data["informacoes"], "chave_acesso": "1" * 44}}
+    pages = [ParsedPage("other.html", data=other), ParsedPage("empty.html", data={})]
+
+    report = Reparser(session).run(pages, dry_run=True)
+
+    assert (report.parsed, report.failed, report.missing) == (1, 1, 1)
+
+
+def test_dates_are_compared_in_the_time_zone_of_the_database(data):
+    parsed = dict_to_entity(data)
+    stored = dict_to_entity(data)
+    stored.issue_date = to_database_time(parsed.issue_date)
+    stored.authorization_date = to_database_time(parsed.authorization_date)
+
+    assert stored.issue_date == datetime(2024, 2, 1, 13, 11, 12)
+    assert "issue_date" not in diff_invoice(parsed, stored)
+
+    # The time of the page, without its offset, is another time
+    stored.issue_date = parsed.issue_date.replace(tzinfo=None)
+
+    assert "issue_date" in diff_invoice(parsed, stored)
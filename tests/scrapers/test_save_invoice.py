@@ -0,0 +1,109 @@
+import copy
+import re
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+
+from database.schema import ItemSchema, ProductSchema, Schema
+from repositories import InvoiceRepository
+from repositories.company import CompanyRepository
+from repositories.item import ItemRepository
+from repositories.product import ProductRepository
+from scrapers.database import save_invoice
+from scrapers.parsers import NfceParser
+import pytest
+
+EXAMPLE = Path(__file__).parents[2] / "examples" / "data.html"
+
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://")
+    Schema.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture(scope="module")
+def parsed():
+    parser = NfceParser()
+    return parser.parse(parser.load(EXAMPLE.read_text(encoding="utf-8")))
+
+
+def invoice_with_items(
+    parsed: dict, count: int, access_key: str, prefix: str = "P"
+) -> dict:
+    data = copy.deepcopy(parsed)
+    item = next(iter(data["itens"].values()))
+    # The example page has no invoice information nor taxes
+    data["informacoes"] = {
+        "numero": "123",
+        "serie": "1",
+        "data_emissao": None,
+        "data_autorizacao": None,
+        "protocolo_autorizacao": "",
+        "chave_acesso": access_key,
+    }
+    data["tributos"] = {"federal": 0.0, "estadual": 0.0, "municipal": 0.0, "fonte": ""}
+    data["itens"] = {
+        str(code): {
+            **item,
+            "codigo_produto": str(code),
+            "descricao_produto": f"{prefix}{code}",
+        }
+        for code in range(1, count + 1)
+    }
+
+    return data
+
+
+def count_statements(session: Session) -> list[str]:
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    return statements
+
+
+def save(session: Session, data: dict):
+    return save_invoice(
+        data,
+        InvoiceRepository(session),
+        CompanyRepository(session),
+        ProductRepository(session),
+        ItemRepository(session),
+    )
+
+
+def test_save_invoice_runs_the_same_statements_whatever_the_items(session, parsed):
+    statements = count_statements(session)
+    save(session, invoice_with_items(parsed, 5, "1" * 44))
+    few = len(statements)
+
+    statements.clear()
+    save(session, invoice_with_items(parsed, 50, "2" * 44, prefix="Q"))
+
+    assert len(statements) == few
+    assert session.scalar(select(func.count()).select_from(ItemSchema)) == 55
+    assert session.scalar(select(func.count()).select_from(ProductSchema)) == 55
+
+
+def test_existing_products_are_read_back_with_a_single_query(session, parsed):
+    save(session, invoice_with_items(parsed, 30, "1" * 44))
+    statements = count_statements(session)
+
+    entity = save(session, invoice_with_items(parsed, 30, "2" * 44))
+
+    lookups = [
+        statement
+        for statement in statements
+        if statement.lstrip().startswith("SELECT")
+        and re.search(r"FROM produtos\b(?!_)", statement)
+    ]
+    assert len(lookups) == 1
+    assert len({item.product_id for item in entity.items}) == 30
@@ -1,8 +1,11 @@
 from src.scrapers.utils import (
     remove_consecutive_spaces,
     to_float,
+    to_floats,
     sanitize_text,
+    sanitize_texts,
     clean_text,
+    get_access_key,
 )
 import pytest
 
@@ -113,3 +116,52 @@ def test_sanitize_text_unwanted_words_with_special_chars(input_text, expected_ou
 )
 def test_clean_text_removing_dots_dashes_whitespace(input_text, expected_output):
     assert clean_text(input_text) == expected_output
+
+
+SANITIZER_INPUTS = [
+    "\t\t\rUN:    123",
+    "(Vl. Unit.: 1.123,45",
+    "Qtde.:\n\n\t1.230",
+    "\t\t\tCódigo: \n\n\n123040",
+    "\r\r\rCNPJ: \t\t\t12.345.678/00001-23",
+    "A SIMPLE TEST WITH SPACE",
+    "",
+    None,
+]
+
+
+def test_sanitize_texts_matches_sanitize_text():
+    assert sanitize_texts(SANITIZER_INPUTS) == [
+        sanitize_text(text) for text in SANITIZER_INPUTS
+    ]
+
+
+def test_sanitize_texts_when_a_word_spans_two_texts():
+    texts = ["Vl", " Unit.: 10"]
+
+    assert sanitize_texts(texts) == ["Vl", "Unit.: 10"]
+
+
+def test_to_floats_matches_to_float():
+    numbers = ["10,5", " 10.000,50 ", "Vl. Unit.: 16,99", "invalid", ""]
+
+    assert to_floats(numbers) == [to_float(number) for number in numbers]
+
+
+@pytest.mark.parametrize(
+    "input_text,expected_output",
+    [
+        (
+            "https://app.sefaz.es.gov.br/ConsultaNFCe/qrcode.aspx"
+            "?p=32240612345678000000650010000001231000001234|2|1|1|ABC",
+            "32240612345678000000650010000001231000001234",
+        ),
+        (
+            "3224 0612 3456 7800 0000 6500 1000 0001 2310 0000 1234",
+            "32240612345678000000650010000001231000001234",
+        ),
+        ("https://example.com/?p=123", ""),
+    ],
+)
+def test_get_access_key(input_text, expected_output):
+    assert get_access_key(input_text) == expected_output
@@ -0,0 +1,63 @@
+import re
+from timeit import timeit
+
+from src.scrapers.utils import sanitize_text, sanitize_texts, to_floats, to_float
+import pytest
+
+LEGACY_UNWANTED_WORDS = [
+    r"UN: *",
+    r"Vl. Unit.:",
+    r"Qtde.:",
+    r"Código:",
+    r"CNPJ:",
+    r"\(",
+    r"\)",
+    r"\n",
+    r"\r",
+    r"\t",
+]
+
+COLUMN = ["\n\t\t(Código:\n\t\t000000%02d\n\t\t)\n" % i for i in range(60)]
+PRICES = ["Vl. Unit.:\n\t&nbsp;\n\t1.%03d,99" % i for i in range(60)]
+
+
+def legacy_sanitize_text(text: str) -> str:
+    words_to_remove = re.compile("|".join(LEGACY_UNWANTED_WORDS))
+    return words_to_remove.sub("", text).strip()
+
+
+def report(name: str, baseline: float, optimized: float) -> None:
+    print(f"\n{name}: {baseline * 1e3:.2f}ms -> {optimized * 1e3:.2f}ms")
+
+
+def test_sanitize_text_matches_legacy_implementation():
+    assert [sanitize_text(text) for text in COLUMN] == [
+        legacy_sanitize_text(text) for text in COLUMN
+    ]
+
+
+@pytest.mark.benchmark
+def test_benchmark_sanitize_text_against_legacy_implementation():
+    baseline = timeit(lambda: [legacy_sanitize_text(t) for t in COLUMN], number=100)
+    optimized = timeit(lambda: [sanitize_text(t) for t in COLUMN], number=100)
+
+    report("sanitize_text", baseline, optimized)
+    assert optimized < baseline
+
+
+@pytest.mark.benchmark
+def test_benchmark_sanitize_texts_against_sanitize_text():
+    baseline = timeit(lambda: [sanitize_text(t) for t in COLUMN], number=100)
+    optimized = timeit(lambda: sanitize_texts(COLUMN), number=100)
+
+    report("sanitize_texts", baseline, optimized)
+    assert optimized < baseline
+
+
+@pytest.mark.benchmark
+def test_benchmark_to_floats_against_to_float():
+    baseline = timeit(lambda: [to_float(price) for price in PRICES], number=100)
+    optimized = timeit(lambda: to_floats(PRICES), number=100)
+
+    report("to_floats", baseline, optimized)
+    assert optimized < baseline